@@ -1,23 +1,111 @@
+import time
+
+# Record the process start before the heavy imports so import time is part of time-to-ready
+_started_at = time.perf_counter()
+
+import asyncio
+import json
 import logging
 import os
 import signal
 import sys
 from contextlib import asynccontextmanager
-from time import sleep
+from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI
-from dapr.ext.fastapi import DaprApp
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from dapr.conf import settings
 
 from workflow.runtime import workflow_runtime as wf
+from workflow.activity_executor import activity_executor
+from workflow.activity_cache import activity_cache
+from workflow.admission import admission_controller
+from workflow.micro_batch import micro_batcher
+from workflow.batch import BatchItem, BatchScheduler, BatchSummary
+from workflow.claim_check import claim_check
+from workflow.resilience import circuit_breakers
+from workflow.client import workflow_client_pool
+from workflow.events import EventBroadcaster, EventSummary
+from workflow.ingestion import PubSubSubscriptions, WorkflowIngestor
+from workflow.metrics import CONTENT_TYPE_LATEST, render as render_metrics
+from workflow.profiling import workflow_profiler
+from workflow.serialization import compression_stats
+from workflow.startup import StartupState, wait_for_sidecar
+from workflow.status import workflow_status_cache
+from workflow.structured_logging import configure_logging
+from workflow.supervisor import SupervisorClient
 
-# Import the workflow file so it is registered as we are using a decorator
-from workflow.workflow import employee_onboarding_workflow
+# Workflows and activities register when the runtime starts, so the workflow module and
+# the Dapr SDK are imported after the app can serve /healthz (see workflow/runtime.py)
+wf.include("workflow.workflow")
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (batched, non-blocking; see workflow/structured_logging.py)
+configure_logging()
 logger = logging.getLogger("employee_onboarding_workflowService")
 
+# Readiness and startup phase timings, reported by /healthz
+startup = StartupState(started_at=_started_at)
+startup.mark("imports")
+
+# 'embedded' runs the workflow runtime in this process; 'supervised' serves only the API
+# while the workflow runtime runs in worker processes (see worker.py)
+RUNTIME_MODE = os.getenv("WORKFLOW_RUNTIME_MODE", "embedded")
+supervisor_client = SupervisorClient()
+
+# In supervised mode activities run in the workers, so adaptive admission reads their load
+if RUNTIME_MODE == "supervised" and admission_controller.adaptive is not None:
+    admission_controller.adaptive.load = supervisor_client.activity_load
+
+# Workflows that can be started through the bulk API
+WORKFLOWS = {"employee_onboarding_workflow", "employee_cohort_workflow"}
+
+async def start_workflow_runtime():
+    """
+    Waits for the Dapr sidecar and connects the workflow runtime, then marks the service ready.
+    """
+    try:
+        # Wait for the sidecar to become available
+        logger.info("Waiting for Dapr sidecar to become available...")
+        probes = await wait_for_sidecar()
+        logger.info(f"Dapr sidecar ready after {startup.mark('sidecar_ready'):.3f}s ({probes} probes)")
+
+        if RUNTIME_MODE == "supervised":
+            logger.info("Workflow runtime runs in supervised worker processes, serving the API only")
+        else:
+            # Register the workflows and start the workflow runtime without blocking the event loop
+            await asyncio.to_thread(wf.resolve)
+            startup.mark("registration")
+            await asyncio.to_thread(wf.start)
+            logger.info(f"Workflow runtime connected after {startup.mark('runtime_start'):.3f}s")
+
+        startup.set_ready()
+        logger.info(f"employee_onboarding_workflow service started: {startup.to_dict()}")
+    except Exception as e:
+        startup.set_failed(str(e))
+        logger.error(f"employee_onboarding_workflow service failed to start: {e}")
+
+async def refresh_worker_stats():
+    """
+    Keeps the worker stats read by adaptive admission control current in supervised mode.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(supervisor_client.fetch)
+        except OSError as e:
+            logger.debug(f"Refreshing worker stats failed: {e}")
+        await asyncio.sleep(supervisor_client.refresh_interval)
+
+async def supervised_stats(section: str) -> Any:
+    """
+    Returns a section of the stats the supervisor aggregates across worker processes.
+    """
+    try:
+        status = await asyncio.to_thread(supervisor_client.fetch)
+    except OSError as e:
+        raise HTTPException(status_code=503, detail=f"Worker supervisor unavailable: {e}")
+    return status['aggregate'][section]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -29,28 +117,60 @@ async def lifespan(app: FastAPI):
     # Log Dapr ports for debugging
     logger.info(f"Using Dapr ports - gRPC: {settings.DAPR_GRPC_PORT}, HTTP: {settings.DAPR_HTTP_PORT}")
     
-    # Start the workflow runtime
-    wf.start()
-    
-    # Wait for the sidecar to become available
-    logger.info("Waiting for Dapr sidecar to become available...")
-    sleep(2)
-    
-    logger.info("employee_onboarding_workflow service started")
+    # Start the workflow runtime in the background so /healthz can report progress
+    startup_task = asyncio.create_task(start_workflow_runtime())
+    stats_task = asyncio.create_task(refresh_worker_stats()) if RUNTIME_MODE == "supervised" else None
     
     yield
     
     # Clean up resources on application shutdown
     logger.info("Shutting down employee_onboarding_workflow service...")
+    if not startup_task.done():
+        startup_task.cancel()
+    if stats_task is not None:
+        stats_task.cancel()
     
-    # Shutdown the workflow runtime
+    # Shutdown the workflow runtime if it was created; this also stops a start that is still connecting
     wf.shutdown()
+
+    # Release the activity thread and process pools
+    activity_executor.shutdown()
+
+    # Close the shared workflow client connections
+    await workflow_client_pool.close()
     
     logger.info("employee_onboarding_workflow service stopped")
 
 # FastAPI app and Dapr app
 app = FastAPI(title="employee_onboarding_workflow Service", lifespan=lifespan)
-dapr_app = DaprApp(app)
+subscriptions = PubSubSubscriptions(app)
+
+# Pub/sub ingestion of employee_onboarding_workflow start requests
+INGEST_PUBSUB = os.getenv("WORKFLOW_INGEST_PUBSUB", "pubsub")
+INGEST_TOPIC = os.getenv("WORKFLOW_INGEST_TOPIC", "onboarding-requests")
+INGEST_ROUTE = "/events/onboarding-requests"
+onboarding_ingestor = WorkflowIngestor("employee_onboarding_workflow")
+
+@subscriptions.subscribe(pubsub=INGEST_PUBSUB, topic=INGEST_TOPIC, route=INGEST_ROUTE, bulk=True)
+async def ingest_onboarding_requests(request: Request):
+    """
+    Starts an employee_onboarding_workflow instance per message on the ingestion topic.
+
+    Messages arrive in bulk; each is acknowledged with SUCCESS, RETRY (redelivered
+    later, e.g. when no start slot frees up in time) or DROP (malformed).
+    """
+    body = await request.json()
+    if isinstance(body, dict) and "entries" in body:
+        statuses = await onboarding_ingestor.handle_entries(body["entries"])
+        return {"statuses": statuses}
+    return {"status": await onboarding_ingestor.handle_event(body)}
+
+@app.get("/ingest/stats")
+async def ingest_stats():
+    """
+    Returns counters of workflow start messages consumed from the ingestion topic.
+    """
+    return onboarding_ingestor.stats()
 
 @app.get("/")
 async def read_root():
@@ -67,13 +187,303 @@ async def read_root():
 async def healthz():
     """
     Health check endpoint required by Dapr.
+
+    Reports healthy only once the workflow runtime is connected to the sidecar.
+    """
+    if not startup.is_ready:
+        return JSONResponse(status_code=503, content={"status": startup.phase, "startup": startup.to_dict()})
+    return {"status": "healthy", "startup": startup.to_dict()}
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Exposes workflow and activity metrics in the Prometheus text format.
+
+    In supervised mode the metrics of every worker process are included (see workflow/metrics.py).
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/activities/stats")
+async def activity_stats():
+    """
+    Returns concurrency and queue-depth statistics for each managed activity.
+    """
+    if RUNTIME_MODE == "supervised":
+        return await supervised_stats("activities")
+    return activity_executor.stats()
+
+@app.get("/workers")
+async def worker_stats():
+    """
+    Returns per-worker health and aggregated stats from the worker supervisor.
+
+    Only available when the workflow runtime runs in supervised worker processes.
+    """
+    if RUNTIME_MODE != "supervised":
+        raise HTTPException(status_code=404, detail="The workflow runtime runs in this process")
+
+    try:
+        return await asyncio.to_thread(supervisor_client.fetch)
+    except OSError as e:
+        raise HTTPException(status_code=503, detail=f"Worker supervisor unavailable: {e}")
+
+@app.get("/activities/cache/stats")
+async def activity_cache_stats():
+    """
+    Returns hit and miss counters of the activity result cache.
+    """
+    if RUNTIME_MODE == "supervised":
+        return await supervised_stats("activityCache")
+    return activity_cache.stats()
+
+@app.get("/activities/batch/stats")
+async def activity_batch_stats():
+    """
+    Returns batch counts, average batch sizes and flush reasons of micro-batched activities.
+    """
+    if RUNTIME_MODE == "supervised":
+        return await supervised_stats("activityBatches")
+    return micro_batcher.stats()
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """
+    Returns the admission control buckets and the adaptive start rate limit.
+    """
+    return admission_controller.stats()
+
+@app.get("/claim-check/stats")
+async def claim_check_stats():
+    """
+    Returns counters of payloads offloaded to the state store and of reference lookups.
+    """
+    return claim_check.stats()
+
+@app.get("/circuit-breakers")
+async def circuit_breaker_stats():
     """
-    return {"status": "healthy"}
+    Returns the state of the circuit breaker of every downstream dependency in use.
+
+    In supervised mode every worker has its own breakers; the most severe state is reported.
+    """
+    if RUNTIME_MODE == "supervised":
+        return await supervised_stats("circuitBreakers")
+    return circuit_breakers.stats()
+
+@app.get("/payloads/compression/stats")
+async def payload_compression_stats():
+    """
+    Returns payload compression counters and ratios per workflow type or activity name.
+
+    In supervised mode the counters are summed across worker processes; payloads
+    compressed by the API itself (workflow inputs) are reported by /metrics.
+    """
+    if RUNTIME_MODE == "supervised":
+        return await supervised_stats("compression")
+    return compression_stats()
+
+def require_profiler():
+    """
+    Raises a 404 unless workflows and activities are profiled in this process.
+    """
+    if RUNTIME_MODE == "supervised":
+        raise HTTPException(status_code=404, detail="Profiles are recorded by the worker processes, not the API process")
+    if not workflow_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled; set WORKFLOW_PROFILING_ENABLED=true")
+
+@app.get("/debug/profile")
+async def profile_stats():
+    """
+    Returns replay and new-progress time and allocations per workflow and activity, and recent invocations.
+
+    Requires WORKFLOW_PROFILING_ENABLED=true. Profiles are recorded by the process
+    that runs the workflow runtime, so in supervised mode this returns 404.
+    """
+    require_profiler()
+    return workflow_profiler.stats()
+
+@app.get("/debug/profile/stacks")
+async def profile_stacks():
+    """
+    Returns the sampled stacks of profiled workflows and activities in collapsed (flamegraph) format.
+    """
+    require_profiler()
+    return Response(content=workflow_profiler.collapsed_stacks(), media_type="text/plain")
+
+@app.delete("/debug/profile")
+async def reset_profile():
+    """
+    Clears the recorded profiles and sampled stacks.
+    """
+    require_profiler()
+    workflow_profiler.reset()
+    return {"status": "reset"}
+
+class BulkEventRequest(BaseModel):
+    """Request body for raising an event to many workflow instances at once."""
+    data: Any = None
+    instance_ids: Optional[List[str]] = None
+    statuses: Optional[List[str]] = Field(default=None, description="Target every instance with one of these runtime statuses, e.g. RUNNING")
+    workflow: Optional[str] = Field(default=None, description="With statuses, only target instances of this workflow type")
+    concurrency: Optional[int] = Field(default=None, gt=0)
+
+# Registered before the batch route, which would otherwise take events named 'batch'
+@app.post("/workflows/events/{event_name}")
+async def raise_bulk_event(event_name: str, request: BulkEventRequest, stream: bool = False):
+    """
+    Raises an event to a list of workflow instances, or to every instance matching a status filter.
+
+    Deliveries run concurrently with bounded parallelism. With stream=true the response is
+    newline-delimited JSON with one line per instance followed by a summary line, or by
+    an error line if selecting the instances failed after the response started.
+    """
+    if (request.instance_ids is None) == (request.statuses is None):
+        raise HTTPException(status_code=400, detail="Pass either instance_ids or statuses")
+
+    broadcaster = EventBroadcaster(concurrency=request.concurrency)
+    summary = EventSummary(event_name)
+    deliveries = broadcaster.broadcast(
+        event_name, request.data,
+        instance_ids=request.instance_ids, statuses=request.statuses, workflow_name=request.workflow, summary=summary,
+    )
+    if request.instance_ids is not None:
+        logger.info(f"Raising {event_name} to {len(request.instance_ids)} instances")
+    else:
+        logger.info(f"Raising {event_name} to instances with status {', '.join(request.statuses)}")
+
+    if stream:
+        async def progress():
+            try:
+                async for result in deliveries:
+                    line = {"type": "result", **result.to_dict(), "completed": summary.delivered + summary.failed, "total": summary.total}
+                    yield json.dumps(line) + "\n"
+            except Exception as e:
+                # The status code was already sent, so the failure is reported in the stream
+                logger.warning(f"Selecting instances for {event_name} failed: {e}")
+                yield json.dumps({"type": "error", "error": f"Selecting workflow instances failed: {e}", **summary.to_dict()}) + "\n"
+                return
+            logger.info(f"Event {event_name} finished: {summary.to_dict()}")
+            yield json.dumps({"type": "summary", **summary.to_dict()}) + "\n"
+
+        return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+    try:
+        results = [result async for result in deliveries]
+    except Exception as e:
+        logger.warning(f"Selecting instances for {event_name} failed: {e}")
+        raise HTTPException(status_code=503, detail=f"Selecting workflow instances failed: {e}")
+    logger.info(f"Event {event_name} finished: {summary.to_dict()}")
+    return {
+        "results": [result.to_dict() for result in results],
+        "summary": summary.to_dict(),
+    }
+
+class BatchStartItem(BaseModel):
+    """A single workflow start request in a batch."""
+    input: Dict[str, Any] = Field(default_factory=dict)
+    instance_id: Optional[str] = None
+
+class BatchStartRequest(BaseModel):
+    """Request body for starting many workflow instances at once."""
+    items: List[BatchStartItem]
+    concurrency: Optional[int] = Field(default=None, gt=0)
+
+@app.post("/workflows/{workflow_name}/batch")
+async def start_workflow_batch(workflow_name: str, request: BatchStartRequest, http_request: Request, stream: bool = False):
+    """
+    Schedules many workflow instances concurrently through the shared workflow client pool.
+
+    With stream=true the response is newline-delimited JSON with one line per scheduled
+    item followed by a summary line. Otherwise all results are returned at once.
+    Batches over the admission limits are rejected with 429 and a Retry-After header.
+    """
+    if workflow_name not in WORKFLOWS:
+        raise HTTPException(status_code=404, detail=f"Unknown workflow: {workflow_name}")
+
+    tenant = http_request.headers.get(admission_controller.tenant_header)
+    decision = admission_controller.admit(workflow_name, tenant=tenant, count=len(request.items))
+    if not decision.admitted:
+        raise HTTPException(
+            status_code=429,
+            detail=decision.to_dict(),
+            headers={"Retry-After": str(decision.retry_after_header)},
+        )
+
+    scheduler = BatchScheduler(concurrency=request.concurrency)
+    items = [BatchItem(input=item.input, instance_id=item.instance_id) for item in request.items]
+    summary = BatchSummary()
+    logger.info(f"Scheduling batch of {len(items)} {workflow_name} instances")
+
+    if stream:
+        async def progress():
+            async for result in scheduler.schedule(workflow_name, items, summary):
+                line = {"type": "result", **result.to_dict(), "completed": summary.succeeded + summary.failed, "total": summary.total}
+                yield json.dumps(line) + "\n"
+            logger.info(f"Batch of {workflow_name} finished: {summary.to_dict()}")
+            yield json.dumps({"type": "summary", **summary.to_dict()}) + "\n"
+
+        return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+    results = [result async for result in scheduler.schedule(workflow_name, items, summary)]
+    results.sort(key=lambda result: result.index)
+    logger.info(f"Batch of {workflow_name} finished: {summary.to_dict()}")
+    return {
+        "results": [result.to_dict() for result in results],
+        "summary": summary.to_dict(),
+    }
+
+@app.get("/workflows/status")
+async def workflow_statuses(ids: str = Query(..., description="Comma-separated workflow instance IDs"), payloads: bool = False):
+    """
+    Returns the status of many workflow instances in one request.
+
+    Lookups fan out concurrently and are cached briefly; terminal statuses stay cached.
+    Input, output and custom status payloads are only included with payloads=true.
+    """
+    instance_ids = [instance_id.strip() for instance_id in ids.split(",") if instance_id.strip()]
+    if not instance_ids:
+        raise HTTPException(status_code=400, detail="No workflow instance IDs given")
+    try:
+        statuses = await workflow_status_cache.get_many(instance_ids, include_payloads=payloads)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"workflows": statuses}
+
+@app.get("/workflows")
+async def list_workflows(
+    page_size: int = Query(default=100, gt=0, le=workflow_status_cache.max_ids),
+    continuation_token: Optional[str] = None,
+    status: bool = True,
+    payloads: bool = False,
+):
+    """
+    Lists workflow instances known to the sidecar, one page at a time.
+
+    Pass the returned continuationToken to get the next page. With status=true each
+    instance's status is looked up through the same cache as /workflows/status.
+    """
+    try:
+        return await workflow_status_cache.list_page(page_size, continuation_token, include_status=status, include_payloads=payloads)
+    except Exception as e:
+        logger.warning(f"Listing workflow instances failed: {e}")
+        raise HTTPException(status_code=503, detail=f"Listing workflow instances failed: {e}")
+
+@app.get("/workflows/status/stats")
+async def workflow_status_stats():
+    """
+    Returns hit and miss counters of the workflow status cache.
+    """
+    return workflow_status_cache.stats()
 
 
 if __name__ == "__main__":
     from uvicorn.config import Config
     from uvicorn.server import Server
+
+    # Name the process consistently with the worker processes when run by the supervisor
+    if os.getenv("WORKFLOW_PROCESS_NAME"):
+        from workflow.supervisor import set_process_title
+        set_process_title(os.environ["WORKFLOW_PROCESS_NAME"])
     
     # Run the FastAPI application with uvicorn
     port = int(os.environ.get("APP_PORT", "8080"))
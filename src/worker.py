@@ -0,0 +1,45 @@
+"""
+Multi-process worker entry point for employee_onboarding_workflow.
+
+Runs the workflow runtime in several worker processes under a supervisor, so
+orchestration and activity work scale with the number of cores. See
+workflow/supervisor.py for details and configuration.
+
+USAGE:
+    python3 src/worker.py --workers 4 --serve-api
+"""
+
+import argparse
+import logging
+import signal
+
+from workflow.structured_logging import configure_logging
+from workflow.supervisor import Supervisor
+
+logger = logging.getLogger("employee_onboarding_workflowWorkers")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run employee_onboarding_workflow in multiple worker processes")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: WORKFLOW_WORKERS or CPU count)")
+    parser.add_argument("--serve-api", action="store_true", help="Also run the FastAPI front end as a supervised process")
+    parser.add_argument("--port", type=int, default=None, help="Port of the supervisor status endpoints (0 disables them)")
+    args = parser.parse_args()
+
+    configure_logging()
+    supervisor = Supervisor(workers=args.workers, serve_api=args.serve_api, port=args.port)
+
+    # Handle shutdown signals
+    def handle_exit(signo, frame):
+        logger.info(f"Received signal {signo}. Stopping workers...")
+        supervisor.request_stop()
+
+    signal.signal(signal.SIGINT, handle_exit)
+    signal.signal(signal.SIGTERM, handle_exit)
+
+    logger.info(f"Starting {supervisor.worker_count} workflow workers")
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
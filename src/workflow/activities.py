@@ -24,7 +24,21 @@ steps or tasks that can be orchestrated by the workflow engine.
    - Each activity is decorated with @wfr.activity
    - No additional registration is needed
 
-4. DOMAIN-SPECIFIC DATA:
+4. ACTIVITY EXECUTION:
+   - Activities are wrapped with @activity_executor.bounded so they don't hold a worker thread
+   - Prefer 'async def' activities for I/O-bound work (HTTP calls, databases, queues)
+   - Blocking 'def' activities run on a sized thread pool; use ExecutionMode.PROCESS for CPU-bound work
+   - Set max_concurrency per activity to protect slow downstream systems
+   - Wrap idempotent activities with @activity_cache.cached so retries reuse finished results
+   - Use @micro_batcher.batched to run calls from many workflow instances as one backend call
+   - Declare a @retry policy (attempts, jittered backoff, retryable errors) instead of retrying inside the activity
+   - Guard calls to a downstream system with @circuit_breakers.guard so they fail fast while it is unhealthy
+   - Set a @deadline so a stalled call doesn't stall the workflow, and mark idempotent activities @hedged
+     to start a duplicate attempt when a call is slower than usual
+   - Declare the fields an activity reads and writes with @projection, so it only receives what it needs
+   - Log through ContextLogger with %-style arguments; records are formatted and written off the hot path
+
+5. DOMAIN-SPECIFIC DATA:
    - Replace generic ActivityResponse with domain-specific response classes
    - Create proper business entity models rather than using dictionaries
    - Consider adding type hints throughout for better IDE support
@@ -32,24 +46,31 @@ steps or tasks that can be orchestrated by the workflow engine.
 =============================================================================
 """
 
-from typing import Any, Dict, Callable, Optional
+from typing import Any, Dict, Callable, List, Optional
 import logging
 from datetime import datetime, timezone
-import time
+import asyncio
 
 # Import workflow runtime for activity decorators
 from .runtime import workflow_runtime as wfr
+from .activity_executor import activity_executor, ExecutionMode
+from .activity_cache import activity_cache
+from .micro_batch import BatchCall, micro_batcher
+from .structured_logging import ContextLogger, configure_logging
 
 # Import models
 from .models import ActivityResponse
-from .activity_request import ActivityRequest
+from .activity_request import EquipmentRequest, PaperworkRequest
+from .projection import projection
+from .resilience import circuit_breakers, retry
+from .activity_calls import deadline, hedged
 
 # Import stack trace helper for debugging
 import os
 from dapr.ext.workflow.workflow_activity_context import WorkflowActivityContext
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging: records are written in batches on a background thread
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # get the environment variable for debug mode
@@ -57,7 +78,13 @@ debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
 
 
 @wfr.activity
-def prepare_paperwork_activity(ctx: WorkflowActivityContext, input: ActivityRequest) -> ActivityResponse:
+@projection(PaperworkRequest, writes=["paperwork_complete"])
+@deadline(seconds=120)
+@retry(max_attempts=5, first_interval=2, max_interval=60)
+@activity_cache.cached
+@circuit_breakers.guard("paperwork-service")
+@activity_executor.bounded(max_concurrency=200)
+async def prepare_paperwork_activity(ctx: WorkflowActivityContext, input: PaperworkRequest) -> ActivityResponse:
     """
     Prepares and processes required onboarding paperwork.
 
@@ -68,44 +95,60 @@ def prepare_paperwork_activity(ctx: WorkflowActivityContext, input: ActivityRequ
     Returns:
         Activity response with success/error information
     """
-    logger.info(f"[Activity] Executing prepare_paperwork_activity", extra={"activityId": "prepare_paperwork"})
+    log = ContextLogger(logger, instanceId=ctx.workflow_id, activityId="prepare_paperwork", taskId=ctx.task_id)
+    log.info("[Activity] Executing prepare_paperwork_activity")
     
     # Create activity response
     activity_response = ActivityResponse(start_time=datetime.now(timezone.utc).isoformat())
     
-    # Simulate work by sleeping for 2 seconds
+    # Simulate I/O-bound work by sleeping for 2 seconds without blocking the event loop
     # TODO: Replace with actual work
-    time.sleep(2)
+    await asyncio.sleep(2)
     
     activity_response.success = True        
+    activity_response.outputs = {"paperwork_complete": True}
     activity_response.end_time = datetime.now(timezone.utc).isoformat()
 
-    logger.info(f"[Activity] prepare_paperwork_activity completed successfully")
+    log.info("[Activity] prepare_paperwork_activity completed successfully")
     return activity_response                
 
 @wfr.activity
-def provision_equipment_activity(ctx: WorkflowActivityContext, input: ActivityRequest) -> ActivityResponse:
+@projection(EquipmentRequest, writes=["equipment_provisioned"])
+@deadline(seconds=120)
+@hedged(percentile=95)
+@retry(max_attempts=5, first_interval=2, max_interval=60)
+@activity_cache.cached
+@circuit_breakers.guard("equipment-service")
+@activity_executor.bounded(max_concurrency=200)
+@micro_batcher.batched(max_batch_size=50)
+async def provision_equipment_activity(calls: List[BatchCall]) -> List[ActivityResponse]:
     """
-    Provides necessary equipment to the new employee.
+    Provides necessary equipment to new employees, batched across workflow instances.
+
+    Calls from concurrent workflow instances are collected and provisioned with
+    a single backend call; workflows still call this activity with (ctx, input).
 
     Args:
-        ctx: The workflow activity context
-        input: Input data for the activity
+        calls: The batched activity calls with their workflow ids and EquipmentRequest inputs
 
     Returns:
-        Activity response with success/error information
+        One activity response with success/error information per call, in order
     """
-    logger.info(f"[Activity] Executing provision_equipment_activity", extra={"activityId": "provision_equipment"})
+    log = ContextLogger(logger, activityId="provision_equipment", batchSize=len(calls))
+    log.info("[Activity] Executing provision_equipment_activity")
     
-    # Create activity response
-    activity_response = ActivityResponse(start_time=datetime.now(timezone.utc).isoformat())
+    # Create activity responses
+    start_time = datetime.now(timezone.utc).isoformat()
     
-    # Simulate work by sleeping for 2 seconds
+    # Simulate one I/O-bound backend call for the whole batch without blocking the event loop
     # TODO: Replace with actual work
-    time.sleep(2)
+    await asyncio.sleep(2)
     
-    activity_response.success = True        
-    activity_response.end_time = datetime.now(timezone.utc).isoformat()
-
-    logger.info(f"[Activity] provision_equipment_activity completed successfully")
-    return activity_response
\ No newline at end of file
+    end_time = datetime.now(timezone.utc).isoformat()
+    activity_responses = [
+        ActivityResponse(start_time=start_time, end_time=end_time, success=True, outputs={"equipment_provisioned": True})
+        for _ in calls
+    ]
+
+    log.info("[Activity] provision_equipment_activity completed successfully")
+    return activity_responses
@@ -0,0 +1,261 @@
+"""
+Idempotent Activity Result Cache for Python Dapr Workflow
+
+When a worker crashes or an activity is retried, the Dapr runtime executes the
+activity again even if it already finished its work. This module caches
+successful activity results keyed by the activity name and a stable
+fingerprint of its request, so retries and duplicate submissions return the
+stored result instead of repeating expensive downstream calls.
+
+Results are kept in a small process-local LRU cache in front of the Dapr state
+store component, and both layers expire entries after a TTL. While the state
+store is unreachable only the local cache is used.
+
+USAGE:
+Stack the cache above the activity executor so cache hits don't take a
+concurrency slot:
+
+    @wfr.activity
+    @activity_cache.cached(ttl_seconds=3600)
+    @activity_executor.bounded(max_concurrency=200)
+    async def provision_equipment_activity(ctx, input: ActivityRequest) -> ActivityResponse:
+        ...
+
+By default the fingerprint also includes the workflow instance ID and the
+task execution ID of the call, which the sidecar keeps across retries and
+redeliveries of one activity call but changes for every new call. Calling the
+same activity with the same request again (in a loop, or after continue-as-new)
+therefore runs it again instead of returning the earlier result. Pass
+key_by_instance=False for activities whose request fully identifies the work,
+to deduplicate by request across calls and workflow instances. With sidecars that
+don't send task execution IDs, activities keyed by instance aren't cached.
+
+Cache hits are decoded back to the type the activity returned, so callers see
+the same ActivityResponse on a hit as on a miss.
+
+Only successful results are cached: exceptions and ActivityResponse objects
+with success=False always re-run the activity on the next attempt.
+
+CONFIGURATION (environment variables):
+- ACTIVITY_CACHE_BACKEND: 'statestore' or 'memory' (default: statestore)
+- ACTIVITY_CACHE_TTL_SECONDS: Default time to live of cached results (default: 3600)
+- ACTIVITY_CACHE_MAX_ENTRIES: Maximum results held in the local cache (default: 10000)
+- ACTIVITY_CACHE_MAX_RESULT_BYTES: Results larger than this are not cached (default: 65536)
+"""
+
+import dataclasses
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+
+from .serialization import to_json_bytes
+from .state_store import DaprStateStore, InMemoryStateStore, StateStore, StateStoreUnavailableError
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "activity-result"
+
+
+def _normalize(value: Any) -> Any:
+    """Converts a request into plain JSON-compatible values for fingerprinting."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, 'model_dump') and callable(getattr(value, 'model_dump')):
+        return _normalize(value.model_dump())
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _normalize(dataclasses.asdict(value))
+    if isinstance(value, SimpleNamespace):
+        return _normalize(vars(value))
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_normalize(v) for v in value]
+    return str(value)
+
+
+def fingerprint(activity_name: str, request: Any, instance_id: Optional[str] = None, call_id: Optional[str] = None) -> str:
+    """
+    Computes a stable cache key for an activity invocation.
+
+    The request is normalized and serialized with sorted keys, so equal requests
+    produce the same key across processes and Python versions.
+
+    Args:
+        activity_name: Name of the activity
+        request: Activity input
+        instance_id: Workflow instance ID, to only match calls from that instance
+        call_id: Identity of the activity call, to only match retries of that call
+    """
+    canonical = json.dumps(_normalize(request), sort_keys=True, separators=(',', ':'))
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    scope = [part for part in (instance_id, call_id) if part]
+    return "||".join([CACHE_KEY_PREFIX, activity_name, *scope, digest])
+
+
+def call_id(ctx: Any) -> Optional[str]:
+    """
+    Returns the task execution ID of an activity call.
+
+    The sidecar keeps it across retries and redeliveries of the same call, and
+    derives a new one for every call the workflow schedules. Returns None when
+    the sidecar doesn't provide one.
+    """
+    inner = ctx.get_inner_context() if hasattr(ctx, 'get_inner_context') else ctx
+    return getattr(inner, 'task_execution_id', None) or None
+
+
+def _model_path(result: Any) -> Optional[str]:
+    """Returns the import path of a result type that can decode its cached form."""
+    result_type = type(result)
+    if callable(getattr(result_type, 'model_validate', None)):
+        return f"{result_type.__module__}:{result_type.__qualname__}"
+    return None
+
+
+def _decode(cached: Dict[str, Any]) -> Any:
+    """Decodes a cached entry back to the type the activity returned."""
+    if not cached.get('model'):
+        return cached['result']
+    module, _, qualname = cached['model'].partition(':')
+    result_type = importlib.import_module(module)
+    for attribute in qualname.split('.'):
+        result_type = getattr(result_type, attribute)
+    return result_type.model_validate(cached['result'])
+
+
+class ActivityResultCache:
+    """
+    Two-level cache of activity results: a local LRU in front of a shared store.
+    """
+
+    def __init__(
+        self,
+        store: Optional[StateStore] = None,
+        default_ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_result_bytes: Optional[int] = None,
+    ):
+        if store is None:
+            backend = os.getenv("ACTIVITY_CACHE_BACKEND", "statestore")
+            store = InMemoryStateStore() if backend == "memory" else DaprStateStore()
+        self.store = store
+        self.default_ttl_seconds = default_ttl_seconds or int(os.getenv("ACTIVITY_CACHE_TTL_SECONDS", "3600"))
+        self.max_result_bytes = max_result_bytes or int(os.getenv("ACTIVITY_CACHE_MAX_RESULT_BYTES", "65536"))
+        self.local = InMemoryStateStore(max_entries=max_entries or int(os.getenv("ACTIVITY_CACHE_MAX_ENTRIES", "10000")))
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Returns the cached result for key, checking the local cache first, decoded to its original type."""
+        raw = await self.local.get(key)
+        if raw is None and self.store is not None:
+            try:
+                raw = await self.store.get(key)
+            except StateStoreUnavailableError:
+                # Serve from the local cache only until the store is reachable again
+                raw = None
+            except Exception as e:
+                logger.warning(f"Activity cache lookup failed for {key}: {e}")
+                raw = None
+            if raw is not None:
+                await self.local.set(key, raw, self.default_ttl_seconds)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _decode(json.loads(raw))
+
+    async def set(self, key: str, result: Any, ttl_seconds: Optional[int] = None) -> None:
+        """Stores a result in both cache levels unless it exceeds max_result_bytes."""
+        # Results with a model protocol are stored in the form the SDK writes to the workflow history
+        model = _model_path(result)
+        if model is not None:
+            entry = {'result': result.model_dump(), 'model': model}
+        else:
+            entry = {'result': _normalize(result)}
+        raw = to_json_bytes(entry)
+        if len(raw) > self.max_result_bytes:
+            logger.debug(f"Activity result for {key} is {len(raw)} bytes, not caching")
+            return
+        ttl_seconds = ttl_seconds or self.default_ttl_seconds
+        await self.local.set(key, raw, ttl_seconds)
+        if self.store is not None:
+            try:
+                await self.store.set(key, raw, ttl_seconds)
+            except StateStoreUnavailableError:
+                pass
+            except Exception as e:
+                logger.warning(f"Activity cache write failed for {key}: {e}")
+
+    def cached(self, __fn: Callable = None, *, ttl_seconds: Optional[int] = None, key_by_instance: bool = True):
+        """
+        Decorator that serves repeated activity invocations from the cache.
+
+        Args:
+            ttl_seconds: Time to live of cached results for this activity
+            key_by_instance: Include the workflow instance ID and the task execution ID
+                of the call in the cache key, so only retries of the same call are deduplicated
+        """
+        def wrapper(fn: Callable):
+            if not inspect.iscoroutinefunction(fn):
+                raise ValueError(
+                    f"Activity {fn.__name__} must be a coroutine function; "
+                    f"stack @cached above @activity_executor.bounded"
+                )
+            activity_name = fn.__name__
+
+            async def cached_activity(ctx, input: Any = None) -> Any:
+                if not key_by_instance:
+                    key = fingerprint(activity_name, input)
+                elif (execution_id := call_id(ctx)) is not None:
+                    key = fingerprint(activity_name, input, ctx.workflow_id, execution_id)
+                else:
+                    # Without a call identity, repeated calls couldn't be told apart from retries
+                    return await fn(ctx, input)
+                cached_result = await self.get(key)
+                if cached_result is not None:
+                    logger.info(f"[Activity] {activity_name} served from cache", extra={"activityId": activity_name})
+                    return cached_result
+
+                result = await fn(ctx, input)
+                if getattr(result, 'success', True) is False:
+                    return result
+                await self.set(key, result, ttl_seconds)
+                return result
+
+            functools.update_wrapper(cached_activity, fn)
+            if hasattr(cached_activity, '__wrapped__'):
+                del cached_activity.__wrapped__
+            cached_activity.__signature__ = inspect.signature(fn)
+            return cached_activity
+
+        if __fn:
+            # Decorator used without arguments
+            return wrapper(__fn)
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit and miss counters of the cache."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRatio': self.hits / total if total else 0.0,
+            'localEntries': len(self.local)
+        }
+
+    async def close(self) -> None:
+        """Closes the backing store."""
+        if self.store is not None:
+            await self.store.close()
+
+
+# Single activity cache shared across activity modules
+activity_cache = ActivityResultCache()
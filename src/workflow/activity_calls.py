@@ -0,0 +1,343 @@
+"""
+Activity Deadlines and Hedged Calls for Python Dapr Workflow
+
+A workflow that awaits an activity waits for as long as the activity takes, so a
+stalled downstream call stalls the workflow, and the slowest calls set the tail
+latency of every workflow that runs them in parallel. This module runs activity
+calls from workflow code with:
+
+1. Deadlines: a durable timer is raced against the activity with when_any. If
+   the timer fires first, the attempt fails with ActivityTimeoutError, which the
+   activity's retry policy (see resilience.py) may retry. The late activity is
+   not cancelled; its result is ignored.
+2. Hedging, for idempotent activities only: if an attempt hasn't completed
+   after a latency percentile of the activity's recent calls, a duplicate
+   attempt is started and the first successful result is used. Until enough
+   calls have been measured, initial_delay is used instead.
+3. Retries: once every attempt failed or the deadline passed, the call is
+   retried with the activity's retry policy after a jittered durable timer.
+
+Timer and hedge outcomes are recorded in WorkflowData with add_timer_response
+(as '<name>.deadline' and '<name>.hedge') and exported as
+workflow_activity_timeouts_total and workflow_activity_hedges_total metrics.
+
+DETERMINISM:
+The same actions are scheduled on every replay: the hedge timer is created
+whenever hedging is declared, whether or not enough latencies were measured.
+Only its delay depends on the measured latencies, which are kept per worker
+process and read outside of replay; replays reuse the timer recorded in the
+history.
+
+USAGE:
+Declare the deadline and hedging below ``@wfr.activity``:
+
+    @wfr.activity
+    @deadline(seconds=60)
+    @hedged(percentile=95)
+    @retry(max_attempts=3)
+    async def provision_equipment_activity(ctx, input: EquipmentRequest) -> ActivityResponse:
+        ...
+
+Activities run by a TaskGraph (see dag.py) use their declarations. From
+hand-written workflow code use ``yield from``:
+
+    result = yield from call_activity(ctx, provision_equipment_activity, input=request, data=data)
+
+CONFIGURATION (environment variables):
+- WORKFLOW_ACTIVITY_DEADLINE: Deadline in seconds for activities without one (default: none)
+- WORKFLOW_HEDGING_ENABLED: Hedge activities that declare @hedged (default: true)
+- WORKFLOW_HEDGE_PERCENTILE: Latency percentile after which a hedge is started (default: 95)
+- WORKFLOW_HEDGE_MIN_SAMPLES: Latencies measured before the percentile is used (default: 20)
+- WORKFLOW_HEDGE_INITIAL_DELAY: Seconds before hedging until then (default: 5)
+- WORKFLOW_HEDGE_WINDOW: Recent latencies kept per activity (default: 200)
+"""
+
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Deque, Dict, Generator, List, Optional, Union
+
+from .metrics import ACTIVITY_HEDGES, ACTIVITY_TIMEOUTS
+from .resilience import activity_name, next_retry_delay
+
+DEADLINE_ATTRIBUTE = "_activity_deadline"
+HEDGE_ATTRIBUTE = "_activity_hedge"
+
+_deadlines: Dict[str, float] = {}
+_hedge_policies: Dict[str, "HedgePolicy"] = {}
+
+
+class ActivityTimeoutError(Exception):
+    """Raised in the workflow when an activity attempt didn't complete before its deadline."""
+
+
+class HedgeWinner:
+    """Hedged call outcome label values"""
+    PRIMARY = "primary"
+    HEDGE = "hedge"
+    NONE = "none"
+
+
+@dataclass(frozen=True, slots=True)
+class HedgePolicy:
+    """
+    Hedging policy of an idempotent activity.
+
+    Args:
+        percentile: Latency percentile after which a duplicate attempt is started
+        max_hedges: Duplicate attempts started per call at most
+        min_delay: Seconds before hedging at least
+        initial_delay: Seconds before hedging until enough latencies were measured
+    """
+    percentile: float
+    max_hedges: int
+    min_delay: float
+    initial_delay: float
+
+
+def deadline(seconds: float):
+    """Decorator that declares the deadline of each attempt of an activity, in seconds."""
+    if seconds <= 0:
+        raise ValueError("seconds must be positive")
+
+    def wrapper(fn: Callable):
+        setattr(fn, DEADLINE_ATTRIBUTE, float(seconds))
+        return fn
+
+    return wrapper
+
+
+def hedged(
+    *,
+    percentile: Optional[float] = None,
+    max_hedges: int = 1,
+    min_delay: float = 0.1,
+    initial_delay: Optional[float] = None,
+):
+    """
+    Decorator that declares an idempotent activity may be hedged.
+
+    Only declare it for activities that can safely run more than once for the
+    same request; stack @activity_cache.cached below it to share the result.
+    """
+    policy = HedgePolicy(
+        percentile=percentile if percentile is not None else float(os.getenv("WORKFLOW_HEDGE_PERCENTILE", "95")),
+        max_hedges=max_hedges,
+        min_delay=min_delay,
+        initial_delay=initial_delay if initial_delay is not None else float(os.getenv("WORKFLOW_HEDGE_INITIAL_DELAY", "5")),
+    )
+    if not 0 < policy.percentile < 100:
+        raise ValueError("percentile must be between 0 and 100")
+    if policy.max_hedges < 1:
+        raise ValueError("max_hedges must be at least 1")
+
+    def wrapper(fn: Callable):
+        setattr(fn, HEDGE_ATTRIBUTE, policy)
+        return fn
+
+    return wrapper
+
+
+def get_deadline(activity: Union[Callable, str]) -> Optional[float]:
+    """Returns the deadline in seconds declared by an activity function or registered name."""
+    seconds = _deadlines.get(activity) if isinstance(activity, str) else getattr(activity, DEADLINE_ATTRIBUTE, None)
+    if seconds is None:
+        default = os.getenv("WORKFLOW_ACTIVITY_DEADLINE")
+        seconds = float(default) if default else None
+    return seconds
+
+
+def get_hedge_policy(activity: Union[Callable, str]) -> Optional[HedgePolicy]:
+    """Returns the hedging policy declared by an activity function or registered name, if hedging is enabled."""
+    if os.getenv("WORKFLOW_HEDGING_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    if isinstance(activity, str):
+        return _hedge_policies.get(activity)
+    return getattr(activity, HEDGE_ATTRIBUTE, None)
+
+
+def register_call_policies(fn: Callable, name: str) -> None:
+    """Records an activity's deadline and hedging policy under its registered name."""
+    seconds = getattr(fn, DEADLINE_ATTRIBUTE, None)
+    if seconds is not None:
+        _deadlines[name] = seconds
+    policy = getattr(fn, HEDGE_ATTRIBUTE, None)
+    if policy is not None:
+        _hedge_policies[name] = policy
+
+
+class LatencyTracker:
+    """Recent schedule-to-completion latencies per activity, as seen by workflows in this process."""
+
+    def __init__(self, window: Optional[int] = None, min_samples: Optional[int] = None):
+        self.window = window or int(os.getenv("WORKFLOW_HEDGE_WINDOW", "200"))
+        self.min_samples = min_samples or int(os.getenv("WORKFLOW_HEDGE_MIN_SAMPLES", "20"))
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, activity: str, seconds: float) -> None:
+        with self._lock:
+            latencies = self._latencies.get(activity)
+            if latencies is None:
+                latencies = self._latencies[activity] = deque(maxlen=self.window)
+            latencies.append(seconds)
+
+    def percentile(self, activity: str, p: float) -> Optional[float]:
+        """Returns the p-th percentile latency of an activity, or None until min_samples were recorded."""
+        with self._lock:
+            latencies = self._latencies.get(activity)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+# Single latency tracker shared across workflows
+activity_latencies = LatencyTracker()
+
+
+class ActivityCall:
+    """
+    One activity call from workflow code, with its deadline, hedges and retries.
+
+    The call schedules durable tasks as it advances; the workflow awaits
+    when_any(call.pending) and calls advance() until it returns True.
+
+    Args:
+        ctx: The workflow context
+        activity: The activity function or its registered name
+        input: Input passed to every attempt
+        retry_policy: SDK retry policy passed to ctx.call_activity; when set,
+            the activity's own retry policy is not applied
+        data: Workflow data the timer outcomes are recorded in
+    """
+
+    def __init__(self, ctx, activity: Union[Callable, str], input: Any = None, *, retry_policy: Any = None, data: Any = None):
+        self.ctx = ctx
+        self.activity = activity
+        self.input = input
+        self.retry_policy = retry_policy
+        self.data = data
+        self.name = activity_name(activity)
+        self.deadline = get_deadline(activity)
+        self.hedge_policy = get_hedge_policy(activity)
+        self.attempt = 0
+        self.done = False
+        self._result: Any = None
+        self._error: Optional[BaseException] = None
+        self._start_attempt()
+
+    def _call(self) -> Any:
+        return self.ctx.call_activity(self.activity, input=self.input, retry_policy=self.retry_policy)
+
+    def _hedge_delay(self) -> float:
+        policy = self.hedge_policy
+        measured = None if self.ctx.is_replaying else activity_latencies.percentile(self.name, policy.percentile)
+        return max(policy.min_delay, measured if measured is not None else policy.initial_delay)
+
+    def _start_attempt(self) -> None:
+        self.attempt += 1
+        self.started_at = self.ctx.current_utc_datetime
+        self.running: List[Any] = [self._call()]
+        self.hedges = 0
+        self.retry_timer = None
+        self.hedge_timer = self.ctx.create_timer(timedelta(seconds=self._hedge_delay())) if self.hedge_policy else None
+        self.deadline_timer = self.ctx.create_timer(timedelta(seconds=self.deadline)) if self.deadline else None
+
+    @property
+    def pending(self) -> List[Any]:
+        """The durable tasks the workflow has to await before advancing the call."""
+        if self.retry_timer is not None:
+            return [self.retry_timer]
+        timers = [timer for timer in (self.hedge_timer, self.deadline_timer) if timer is not None]
+        # Failed attempts are left out so when_any doesn't return before the others complete
+        return [task for task in self.running if not task.is_failed] + timers
+
+    def _record_hedge(self, winner: str) -> None:
+        if self.hedges and not self.ctx.is_replaying:
+            ACTIVITY_HEDGES.labels(self.name, winner).inc()
+
+    def _finish(self, result: Any, index: int) -> bool:
+        self._record_hedge(HedgeWinner.PRIMARY if index == 0 else HedgeWinner.HEDGE)
+        if not self.ctx.is_replaying:
+            activity_latencies.record(self.name, (self.ctx.current_utc_datetime - self.started_at).total_seconds())
+        self._result, self.done = result, True
+        return True
+
+    def _fail(self, error: BaseException) -> bool:
+        self._record_hedge(HedgeWinner.NONE)
+        self.hedge_timer = self.deadline_timer = None
+        delay = next_retry_delay(self.ctx, self.activity, self.attempt, error) if self.retry_policy is None else None
+        if delay is None:
+            self._error, self.done = error, True
+            return True
+        self.retry_timer = self.ctx.create_timer(timedelta(seconds=delay))
+        return False
+
+    def advance(self) -> bool:
+        """Handles the tasks completed since the last call and returns True once the call is done."""
+        if self.done:
+            return True
+        if self.retry_timer is not None:
+            if not self.retry_timer.is_complete:
+                return False
+            self._start_attempt()
+            # Attempts replayed from the history may have completed already
+            return self.advance()
+
+        for index, task in enumerate(self.running):
+            if task.is_complete and not task.is_failed:
+                return self._finish(task.get_result(), index)
+        if all(task.is_complete for task in self.running):
+            return self._fail(self.running[-1].get_exception())
+
+        now = self.ctx.current_utc_datetime
+        if self.deadline_timer is not None and self.deadline_timer.is_complete:
+            if self.data is not None:
+                self.data.add_timer_response(f"{self.name}.deadline", now)
+            if not self.ctx.is_replaying:
+                ACTIVITY_TIMEOUTS.labels(self.name).inc()
+            return self._fail(ActivityTimeoutError(f"{self.name} didn't complete within {self.deadline:g} seconds"))
+
+        if self.hedge_timer is not None and self.hedge_timer.is_complete:
+            if self.data is not None:
+                self.data.add_timer_response(f"{self.name}.hedge", now)
+            self.running.append(self._call())
+            self.hedges += 1
+            self.hedge_timer = (
+                self.ctx.create_timer(timedelta(seconds=self._hedge_delay()))
+                if self.hedges < self.hedge_policy.max_hedges else None
+            )
+            return self.advance()
+        return False
+
+    def result(self) -> Any:
+        """Returns the result of the call, or raises its last failure."""
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._error
+
+
+def call_activity(ctx, activity: Union[Callable, str], *, input: Any = None, data: Any = None) -> Generator[Any, Any, Any]:
+    """
+    Calls an activity from a workflow with its deadline, hedging and retry policy; use with ``yield from``.
+
+    When data is given, the result is merged into it with add_activity_response.
+    The last failure is raised once the retry policy gives up.
+    """
+    # Imported here so registering activities doesn't load the SDK
+    from dapr.ext.workflow import when_any
+
+    call = ActivityCall(ctx, activity, input, data=data)
+    while not call.advance():
+        yield when_any(call.pending)
+    result = call.result()
+    if data is not None:
+        data.add_activity_response(call.name, result, activity=activity)
+    return result
@@ -0,0 +1,269 @@
+"""
+Activity Execution Engine for Python Dapr Workflow
+
+This module provides a non-blocking execution mode for workflow activities.
+Every managed activity is exposed to the Dapr runtime as a coroutine, so the
+worker dispatches it on its event loop instead of pinning a worker thread for
+the whole run:
+
+- ``async def`` activities are awaited directly on the event loop
+- blocking ``def`` activities are offloaded to a sized thread pool
+- CPU-bound ``def`` activities can be offloaded to a sized process pool
+
+Each activity gets its own concurrency limit. Calls beyond the limit wait in a
+queue on the event loop (not on a thread), and per-activity queue-depth and
+latency statistics are collected for monitoring.
+
+USAGE:
+Stack the executor decorator below ``@wfr.activity``:
+
+    @wfr.activity
+    @activity_executor.bounded(max_concurrency=200)
+    async def send_welcome_email_activity(ctx, input: ActivityRequest) -> ActivityResponse:
+        ...
+
+    @wfr.activity
+    @activity_executor.bounded(max_concurrency=8, mode=ExecutionMode.PROCESS)
+    def render_contract_activity(ctx, input: ActivityRequest) -> ActivityResponse:
+        ...
+
+CONFIGURATION (environment variables):
+- ACTIVITY_THREAD_POOL_SIZE: Threads available to blocking activities (default: 64)
+- ACTIVITY_PROCESS_POOL_SIZE: Processes available to CPU-bound activities (default: CPU count)
+- ACTIVITY_DEFAULT_MAX_CONCURRENCY: Limit used when an activity does not set one (default: 100)
+
+NOTE: Process mode activities run in a child process, so they receive a
+``ProcessActivityContext`` snapshot instead of the live activity context, and
+their inputs and outputs must be picklable.
+"""
+
+import asyncio
+import functools
+import importlib
+import inspect
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Registry of process-mode activity bodies, keyed by "module:qualname".
+# Child processes re-import the activity module, which repopulates this registry.
+_PROCESS_TARGETS: Dict[str, Callable[..., Any]] = {}
+
+
+class ExecutionMode:
+    """Activity execution modes enumeration"""
+    ASYNC = "async"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+@dataclass
+class ProcessActivityContext:
+    """Picklable snapshot of the activity context handed to process mode activities."""
+    workflow_id: str
+    task_id: int
+
+
+@dataclass
+class ActivityStats:
+    """Concurrency and queue-depth statistics for a single activity."""
+    activity_name: str
+    mode: str
+    max_concurrency: int
+    in_flight: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_wait_seconds: float = 0.0
+    total_run_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the activity statistics to a dictionary."""
+        finished = self.completed + self.failed
+        return {
+            'activityName': self.activity_name,
+            'mode': self.mode,
+            'maxConcurrency': self.max_concurrency,
+            'inFlight': self.in_flight,
+            'queued': self.queued,
+            'maxQueued': self.max_queued,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avgWaitSeconds': self.total_wait_seconds / finished if finished else 0.0,
+            'avgRunSeconds': self.total_run_seconds / finished if finished else 0.0,
+        }
+
+
+class _ActivityLimiter:
+    """Per-activity concurrency gate with queue-depth accounting."""
+
+    def __init__(self, stats: ActivityStats):
+        self.stats = stats
+        # asyncio primitives are bound to a single event loop, so keep one per loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.stats.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def run(self, call: Callable[[], Any]) -> Any:
+        """Waits for a free slot, then awaits ``call()`` while holding it."""
+        stats = self.stats
+        semaphore = self._semaphore()
+        queued_at = time.perf_counter()
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.queued -= 1
+
+        started_at = time.perf_counter()
+        stats.total_wait_seconds += started_at - queued_at
+        stats.in_flight += 1
+        try:
+            result = await call()
+            stats.completed += 1
+            return result
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.total_run_seconds += time.perf_counter() - started_at
+            semaphore.release()
+
+
+def _invoke_process_target(target_key: str, ctx: ProcessActivityContext, input: Any) -> Any:
+    """Entry point executed inside a pool process for process mode activities."""
+    if target_key not in _PROCESS_TARGETS:
+        module_name = target_key.split(":", 1)[0]
+        importlib.import_module(module_name)
+    return _PROCESS_TARGETS[target_key](ctx, input)
+
+
+class ActivityExecutor:
+    """
+    Runs workflow activities without holding a Dapr worker thread.
+
+    A single shared instance (``activity_executor``) owns the thread and
+    process pools; pools are created lazily on first use.
+    """
+
+    def __init__(
+        self,
+        thread_pool_size: Optional[int] = None,
+        process_pool_size: Optional[int] = None,
+        default_max_concurrency: Optional[int] = None,
+    ):
+        self.thread_pool_size = thread_pool_size or int(os.getenv("ACTIVITY_THREAD_POOL_SIZE", "64"))
+        self.process_pool_size = process_pool_size or int(
+            os.getenv("ACTIVITY_PROCESS_POOL_SIZE", str(os.cpu_count() or 1))
+        )
+        self.default_max_concurrency = default_max_concurrency or int(
+            os.getenv("ACTIVITY_DEFAULT_MAX_CONCURRENCY", "100")
+        )
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._limiters: Dict[str, _ActivityLimiter] = {}
+
+    def _get_pool(self, mode: str) -> Executor:
+        with self._pool_lock:
+            if mode == ExecutionMode.PROCESS:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(max_workers=self.process_pool_size)
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.thread_pool_size, thread_name_prefix="activity"
+                )
+            return self._thread_pool
+
+    def bounded(self, __fn: Callable = None, *, max_concurrency: Optional[int] = None, mode: Optional[str] = None):
+        """
+        Decorator that runs an activity through the executor.
+
+        Args:
+            max_concurrency: Maximum concurrent executions of this activity on this worker
+            mode: One of ExecutionMode. Defaults to ASYNC for coroutine functions
+                and THREAD for regular functions.
+
+        Returns:
+            A coroutine function suitable for registration with ``@wfr.activity``
+        """
+        def wrapper(fn: Callable):
+            is_coroutine = inspect.iscoroutinefunction(fn)
+            effective_mode = mode or (ExecutionMode.ASYNC if is_coroutine else ExecutionMode.THREAD)
+            if effective_mode == ExecutionMode.ASYNC and not is_coroutine:
+                raise ValueError(f"Activity {fn.__name__} must be 'async def' to use {ExecutionMode.ASYNC} mode")
+            if effective_mode != ExecutionMode.ASYNC and is_coroutine:
+                raise ValueError(f"Activity {fn.__name__} is 'async def' and can only use {ExecutionMode.ASYNC} mode")
+
+            limiter = _ActivityLimiter(ActivityStats(
+                activity_name=fn.__name__,
+                mode=effective_mode,
+                max_concurrency=max_concurrency or self.default_max_concurrency,
+            ))
+            self._limiters[fn.__name__] = limiter
+
+            if effective_mode == ExecutionMode.PROCESS:
+                target_key = f"{fn.__module__}:{fn.__qualname__}"
+                _PROCESS_TARGETS[target_key] = fn
+
+            async def managed_activity(ctx, input: Any = None) -> Any:
+                if effective_mode == ExecutionMode.ASYNC:
+                    return await limiter.run(lambda: fn(ctx, input))
+
+                loop = asyncio.get_running_loop()
+                pool = self._get_pool(effective_mode)
+                if effective_mode == ExecutionMode.PROCESS:
+                    snapshot = ProcessActivityContext(workflow_id=ctx.workflow_id, task_id=ctx.task_id)
+                    call = functools.partial(_invoke_process_target, target_key, snapshot, input)
+                else:
+                    call = functools.partial(fn, ctx, input)
+                return await limiter.run(lambda: loop.run_in_executor(pool, call))
+
+            # Copy the metadata but not __wrapped__: the Dapr worker unwraps decorated
+            # functions to decide between its sync and async dispatch paths.
+            functools.update_wrapper(managed_activity, fn)
+            del managed_activity.__wrapped__
+            managed_activity.__signature__ = inspect.signature(fn)
+            return managed_activity
+
+        if __fn:
+            # Decorator used without arguments
+            return wrapper(__fn)
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the current statistics of every managed activity keyed by activity name."""
+        return {name: limiter.stats.to_dict() for name, limiter in self._limiters.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shuts down the thread and process pools."""
+        with self._pool_lock:
+            for pool in (self._thread_pool, self._process_pool):
+                if pool is not None:
+                    pool.shutdown(wait=wait)
+            self._thread_pool = None
+            self._process_pool = None
+
+
+# Single executor instance shared across activity modules
+activity_executor = ActivityExecutor()
@@ -24,8 +24,9 @@ class OrderProcessingRequest:
 """
 
 from dataclasses import dataclass
+from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class ActivityRequest:
     """
     Base scaffold for activity requests.
@@ -33,4 +34,18 @@ class ActivityRequest:
     IMPORTANT: This empty implementation should be replaced
     with your domain-specific request models containing
     the actual fields needed by your activities.
-    """
\ No newline at end of file
+    """
+
+# Example projected requests: each activity receives only the WorkflowData fields
+# named by its request's fields (see projection.py)
+
+@dataclass(slots=True)
+class PaperworkRequest(ActivityRequest):
+    """Request of prepare_paperwork_activity."""
+    employee_id: Optional[str] = None
+
+
+@dataclass(slots=True)
+class EquipmentRequest(ActivityRequest):
+    """Request of provision_equipment_activity."""
+    employee_id: Optional[str] = None
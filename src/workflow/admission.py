@@ -0,0 +1,335 @@
+"""
+Admission Control for Workflow Starts in Python Dapr Workflow
+
+A spike of workflow starts floods the workers with activities, and latency
+collapses for every workflow in flight. This module decides whether a start
+is admitted before it is scheduled:
+
+1. Token buckets per workflow type: a sustained start rate with a burst size
+2. Token buckets per tenant: one tenant can't use up the capacity of the others
+3. An optional adaptive limit: a global start rate that is cut back
+   multiplicatively while activities queue up (in-flight count above a limit)
+   or slow down (average activity latency above a target), and raised additively
+   while they keep up
+
+A rejected start carries the number of seconds until it would be admitted,
+which the API returns as a 429 response with a Retry-After header. Admission
+decisions, bucket levels and the adaptive rate are exported as metrics.
+
+USAGE:
+    decision = admission_controller.admit("employee_onboarding_workflow", tenant="acme")
+    if not decision.admitted:
+        raise HTTPException(status_code=429, headers={"Retry-After": str(decision.retry_after_header)})
+
+A batch of n starts asks for n tokens at once. Batches larger than the burst
+size are admitted when the bucket is full and leave it in debt, so the next
+starts wait until the batch has been paid back.
+
+CONFIGURATION (environment variables):
+- ADMISSION_ENABLED: Enable admission control (default: true)
+- ADMISSION_WORKFLOW_RATE: Starts per second per workflow type; 0 disables (default: 100)
+- ADMISSION_WORKFLOW_BURST: Burst size per workflow type (default: 200)
+- ADMISSION_WORKFLOW_RATES: Per-type overrides, e.g. 'employee_onboarding_workflow=50' (default: none)
+- ADMISSION_TENANT_RATE: Starts per second per tenant; 0 disables (default: 20)
+- ADMISSION_TENANT_BURST: Burst size per tenant (default: 50)
+- ADMISSION_TENANT_HEADER: HTTP header carrying the tenant (default: X-Tenant-ID)
+- ADMISSION_ADAPTIVE: Enable the adaptive limit (default: false)
+- ADMISSION_ADAPTIVE_MAX_IN_FLIGHT: Activities in flight or queued before the limit is cut (default: 500)
+- ADMISSION_ADAPTIVE_TARGET_LATENCY: Average activity latency in seconds before the limit is cut (default: 5)
+- ADMISSION_ADAPTIVE_MIN_RATE: Lowest adaptive start rate per second (default: 1)
+
+NOTE: The adaptive limit reads the activity statistics of this process. With
+supervised worker processes, app.py points it at the load the workers report
+to the supervisor instead (see SupervisorClient in supervisor.py).
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .metrics import ADMISSION_ADAPTIVE_RATE, ADMISSION_DECISIONS, ADMISSION_TOKENS
+
+logger = logging.getLogger(__name__)
+
+MAX_TENANT_BUCKETS = 10000
+
+
+class AdmissionReason:
+    """Admission decision reasons enumeration"""
+    ADMITTED = "admitted"
+    WORKFLOW_RATE = "workflow_rate"
+    TENANT_RATE = "tenant_rate"
+    ADAPTIVE = "adaptive"
+
+
+class TokenBucket:
+    """
+    Token bucket with a sustained rate and a burst size.
+
+    Args:
+        rate: Tokens added per second
+        burst: Maximum tokens held
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if now > self.updated_at:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def wait_time(self, count: int, now: float) -> float:
+        """Seconds until count tokens can be taken; 0 if they can be taken now."""
+        self.refill(now)
+        # Requests larger than the burst only need a full bucket
+        needed = min(count, self.burst)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def take(self, count: int) -> None:
+        self.tokens -= count
+
+
+@dataclass(slots=True)
+class AdmissionDecision:
+    """The outcome of an admission check."""
+    admitted: bool
+    reason: str = AdmissionReason.ADMITTED
+    retry_after: float = 0.0
+
+    @property
+    def retry_after_header(self) -> int:
+        """Retry-After value in whole seconds, at least 1."""
+        return max(1, math.ceil(self.retry_after)) if math.isfinite(self.retry_after) else 60
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the admission decision to a dictionary."""
+        return {
+            'admitted': self.admitted,
+            'reason': self.reason,
+            'retryAfterSeconds': round(self.retry_after, 3) if math.isfinite(self.retry_after) else None
+        }
+
+
+def _activity_load() -> Tuple[int, int, float]:
+    """Returns activities in flight or queued, activities finished and their total seconds."""
+    from .activity_executor import activity_executor
+
+    in_flight = finished = 0
+    total_seconds = 0.0
+    for limiter in activity_executor._limiters.values():
+        stats = limiter.stats
+        in_flight += stats.in_flight + stats.queued
+        finished += stats.completed + stats.failed
+        total_seconds += stats.total_wait_seconds + stats.total_run_seconds
+    return in_flight, finished, total_seconds
+
+
+class AdaptiveLimit:
+    """
+    Global start rate adjusted by additive increase, multiplicative decrease.
+
+    Args:
+        max_rate: Highest start rate per second
+        min_rate: Lowest start rate per second
+        max_in_flight: Activities in flight or queued before the rate is cut
+        target_latency: Average activity latency in seconds before the rate is cut
+        load: Returns activities in flight, activities finished and their total seconds
+        interval: Seconds between adjustments
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        min_rate: float,
+        max_in_flight: int,
+        target_latency: float,
+        load: Callable[[], Tuple[int, int, float]] = _activity_load,
+        interval: float = 1.0,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.max_in_flight = max_in_flight
+        self.target_latency = target_latency
+        self.load = load
+        self.interval = interval
+        self.bucket = TokenBucket(max_rate, max(max_rate, 1.0))
+        self.in_flight = 0
+        self.latency = 0.0
+        self._last_finished = 0
+        self._last_seconds = 0.0
+        self._adjusted_at = time.monotonic()
+
+    def adjust(self, now: float) -> None:
+        """Adjusts the rate from the activity load observed since the last adjustment."""
+        if now - self._adjusted_at < self.interval:
+            return
+        self._adjusted_at = now
+        self.in_flight, finished, total_seconds = self.load()
+        if finished > self._last_finished:
+            self.latency = (total_seconds - self._last_seconds) / (finished - self._last_finished)
+        self._last_finished, self._last_seconds = finished, total_seconds
+
+        rate = self.bucket.rate
+        if self.in_flight > self.max_in_flight or self.latency > self.target_latency:
+            rate = max(self.min_rate, rate * 0.7)
+        else:
+            rate = min(self.max_rate, rate + max(1.0, self.max_rate * 0.05))
+        if rate != self.bucket.rate:
+            self.bucket.refill(now)
+            self.bucket.rate = rate
+            self.bucket.burst = max(rate, 1.0)
+            ADMISSION_ADAPTIVE_RATE.set(rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the adaptive limit state to a dictionary."""
+        return {
+            'rate': round(self.bucket.rate, 3),
+            'maxRate': self.max_rate,
+            'activitiesInFlight': self.in_flight,
+            'activityLatencySeconds': round(self.latency, 3)
+        }
+
+
+def _parse_rates(value: str) -> Dict[str, float]:
+    """Parses per-type rates such as 'employee_onboarding_workflow=50,other=10'."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+class AdmissionController:
+    """
+    Admits or rejects workflow starts by workflow type, tenant and activity load.
+
+    Args:
+        workflow_rate: Starts per second per workflow type; 0 disables
+        workflow_burst: Burst size per workflow type
+        tenant_rate: Starts per second per tenant; 0 disables
+        tenant_burst: Burst size per tenant
+        adaptive: Enable the adaptive limit
+    """
+
+    def __init__(
+        self,
+        workflow_rate: Optional[float] = None,
+        workflow_burst: Optional[float] = None,
+        tenant_rate: Optional[float] = None,
+        tenant_burst: Optional[float] = None,
+        adaptive: Optional[bool] = None,
+    ):
+        self.enabled = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.workflow_rate = workflow_rate if workflow_rate is not None else float(os.getenv("ADMISSION_WORKFLOW_RATE", "100"))
+        self.workflow_burst = workflow_burst or float(os.getenv("ADMISSION_WORKFLOW_BURST", "200"))
+        self.workflow_rates = _parse_rates(os.getenv("ADMISSION_WORKFLOW_RATES", ""))
+        self.tenant_rate = tenant_rate if tenant_rate is not None else float(os.getenv("ADMISSION_TENANT_RATE", "20"))
+        self.tenant_burst = tenant_burst or float(os.getenv("ADMISSION_TENANT_BURST", "50"))
+        self.tenant_header = os.getenv("ADMISSION_TENANT_HEADER", "X-Tenant-ID")
+        if adaptive is None:
+            adaptive = os.getenv("ADMISSION_ADAPTIVE", "false").lower() in ("1", "true", "yes")
+        self.adaptive: Optional[AdaptiveLimit] = None
+        if adaptive:
+            self.adaptive = AdaptiveLimit(
+                max_rate=max(self.workflow_rate, 1.0),
+                min_rate=float(os.getenv("ADMISSION_ADAPTIVE_MIN_RATE", "1")),
+                max_in_flight=int(os.getenv("ADMISSION_ADAPTIVE_MAX_IN_FLIGHT", "500")),
+                target_latency=float(os.getenv("ADMISSION_ADAPTIVE_TARGET_LATENCY", "5")),
+            )
+            ADMISSION_ADAPTIVE_RATE.set(self.adaptive.bucket.rate)
+        self._workflow_buckets: Dict[str, TokenBucket] = {}
+        self._tenant_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # Starts are admitted from the web server's loop and from ingestion, so guard the buckets
+        self._lock = threading.Lock()
+
+    def _workflow_bucket(self, workflow_name: str) -> Optional[TokenBucket]:
+        rate = self.workflow_rates.get(workflow_name, self.workflow_rate)
+        if rate <= 0:
+            return None
+        bucket = self._workflow_buckets.get(workflow_name)
+        if bucket is None:
+            bucket = self._workflow_buckets[workflow_name] = TokenBucket(rate, max(self.workflow_burst, rate))
+        return bucket
+
+    def _tenant_bucket(self, tenant: Optional[str]) -> Optional[TokenBucket]:
+        if not tenant or self.tenant_rate <= 0:
+            return None
+        bucket = self._tenant_buckets.get(tenant)
+        if bucket is None:
+            bucket = self._tenant_buckets[tenant] = TokenBucket(self.tenant_rate, self.tenant_burst)
+            while len(self._tenant_buckets) > MAX_TENANT_BUCKETS:
+                self._tenant_buckets.popitem(last=False)
+        self._tenant_buckets.move_to_end(tenant)
+        return bucket
+
+    def admit(self, workflow_name: str, tenant: Optional[str] = None, count: int = 1) -> AdmissionDecision:
+        """
+        Admits count starts of a workflow type for a tenant, or returns when to retry.
+
+        Tokens are only taken when every limit admits the starts.
+        """
+        if not self.enabled:
+            return AdmissionDecision(admitted=True)
+
+        now = time.monotonic()
+        with self._lock:
+            buckets = [
+                (AdmissionReason.WORKFLOW_RATE, self._workflow_bucket(workflow_name)),
+                (AdmissionReason.TENANT_RATE, self._tenant_bucket(tenant)),
+            ]
+            if self.adaptive is not None:
+                self.adaptive.adjust(now)
+                buckets.append((AdmissionReason.ADAPTIVE, self.adaptive.bucket))
+
+            decision = AdmissionDecision(admitted=True)
+            for reason, bucket in buckets:
+                if bucket is None:
+                    continue
+                wait = bucket.wait_time(count, now)
+                if wait > decision.retry_after:
+                    decision = AdmissionDecision(admitted=False, reason=reason, retry_after=wait)
+            if decision.admitted:
+                for _, bucket in buckets:
+                    if bucket is not None:
+                        bucket.take(count)
+
+            workflow_bucket = buckets[0][1]
+            if workflow_bucket is not None:
+                ADMISSION_TOKENS.labels(workflow_name).set(workflow_bucket.tokens)
+
+        ADMISSION_DECISIONS.labels(workflow_name, decision.reason).inc(count)
+        if not decision.admitted:
+            logger.debug(f"Rejected {count} {workflow_name} starts for tenant {tenant}: {decision.reason}")
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the current admission state."""
+        now = time.monotonic()
+        with self._lock:
+            workflows = {}
+            for name, bucket in self._workflow_buckets.items():
+                bucket.refill(now)
+                workflows[name] = {'rate': bucket.rate, 'burst': bucket.burst, 'tokens': round(bucket.tokens, 3)}
+            return {
+                'enabled': self.enabled,
+                'workflows': workflows,
+                'tenants': len(self._tenant_buckets),
+                'tenantRate': self.tenant_rate,
+                'tenantBurst': self.tenant_burst,
+                'adaptive': self.adaptive.to_dict() if self.adaptive is not None else None
+            }
+
+
+# Single admission controller shared across the application
+admission_controller = AdmissionController()
@@ -0,0 +1,240 @@
+"""
+Workflow Benchmarks for Python Dapr Workflow
+
+This module measures the orchestration overhead of the workflow code with the
+in-process fake runtime (see fake_runtime.py), so results reflect the cost of
+the Python side of the workflow (replay, serialization, models) without the
+sidecar, the network or the activities themselves.
+
+BENCHMARKS:
+- step_overhead: Orchestration time per step of a workflow with sequential no-op activities
+- replay_<N>: Time to replay a completed workflow with a history of N activities
+- throughput: employee_onboarding_workflow instances completed per second when
+  many instances run concurrently with instant activities
+
+BASELINE:
+Results can be stored as a baseline and later runs compared against it. A
+benchmark regresses when it is slower than the baseline by more than the
+tolerance, and the command exits with status 1, so it can gate CI.
+
+USAGE (from the src directory):
+    python -m workflow.benchmarks                      # Run and compare with benchmarks/baseline.json
+    python -m workflow.benchmarks --save-baseline      # Run and store the results as the new baseline
+    python -m workflow.benchmarks --instances 500 --tolerance 0.3
+
+Or use the make targets 'make bench' and 'make bench-baseline'.
+
+NOTE: Baselines are machine specific. Record the baseline on the machine that
+runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .fake_runtime import FakeWorkflowRuntime
+from .models import ActivityResponse
+from .structured_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "benchmarks", "baseline.json"
+)
+REPLAY_HISTORY_LENGTHS = (10, 50, 100, 200)
+
+
+class Direction:
+    """Whether lower or higher values of a benchmark are better"""
+    LOWER = "lower"
+    HIGHER = "higher"
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    """The measured value of a single benchmark."""
+    name: str
+    value: float
+    unit: str
+    direction: str = Direction.LOWER
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the benchmark result to a dictionary."""
+        return {
+            'value': self.value,
+            'unit': self.unit,
+            'direction': self.direction
+        }
+
+
+@dataclass(slots=True)
+class Comparison:
+    """A benchmark result compared against its baseline value."""
+    name: str
+    value: float
+    baseline: Optional[float]
+    change: Optional[float]
+    regressed: bool
+
+
+async def noop_activity(ctx, input: Any = None) -> ActivityResponse:
+    """Activity that returns immediately, used to isolate orchestration cost."""
+    return ActivityResponse(success=True)
+
+
+def sequential_workflow(ctx, steps: int) -> Any:
+    """Workflow that calls noop_activity the given number of times in sequence."""
+    completed = 0
+    for _ in range(steps):
+        result = yield ctx.call_activity(noop_activity, input={'step': completed})
+        completed += 1 if ActivityResponse.from_payload(result).success else 0
+    return {'completed': completed}
+
+
+async def _run_sequential(runtime: FakeWorkflowRuntime, steps: int) -> str:
+    instance_id = await runtime.schedule_new_workflow(sequential_workflow, input=steps)
+    state = await runtime.wait_for_workflow_completion(instance_id, timeout_in_seconds=None)
+    if state.failure_details is not None:
+        raise RuntimeError(f"Benchmark workflow failed: {state.failure_details.message}")
+    return instance_id
+
+
+async def bench_step_overhead(steps: int = 50) -> BenchmarkResult:
+    """Measures orchestration time per workflow step, including the replays it causes."""
+    runtime = FakeWorkflowRuntime(time_scale=0)
+    instance_id = await _run_sequential(runtime, steps)
+    metrics = runtime.instance_metrics(instance_id)
+    return BenchmarkResult('step_overhead', metrics.orchestration_seconds / steps * 1000, 'ms/step')
+
+
+async def bench_replay(history_length: int, repeats: int = 20) -> BenchmarkResult:
+    """Measures the median time to replay a completed workflow with the given history length."""
+    runtime = FakeWorkflowRuntime(time_scale=0)
+    instance_id = await _run_sequential(runtime, history_length)
+    timings = [runtime.replay(instance_id) for _ in range(repeats)]
+    return BenchmarkResult(f'replay_{history_length}', statistics.median(timings) * 1000, 'ms')
+
+
+async def bench_throughput(instances: int = 200) -> BenchmarkResult:
+    """Measures completed employee_onboarding_workflow instances per second."""
+    # Imported here so the sequential benchmarks don't pay for loading the app's workflows
+    from .workflow import employee_onboarding_workflow
+
+    runtime = FakeWorkflowRuntime(
+        activity_overrides={
+            'provision_equipment_activity': noop_activity,
+            'prepare_paperwork_activity': noop_activity,
+        },
+        time_scale=0,
+    )
+    started = time.perf_counter()
+    instance_ids = [
+        await runtime.schedule_new_workflow(employee_onboarding_workflow, input={'data': {'employee': i}})
+        for i in range(instances)
+    ]
+    states = await asyncio.gather(*(runtime.wait_for_workflow_completion(i, timeout_in_seconds=None) for i in instance_ids))
+    elapsed = time.perf_counter() - started
+    failed = [state.instance_id for state in states if state.failure_details is not None]
+    if failed:
+        raise RuntimeError(f"{len(failed)} benchmark workflows failed")
+    return BenchmarkResult('throughput', instances / elapsed, 'workflows/s', Direction.HIGHER)
+
+
+async def run_benchmarks(instances: int = 200, steps: int = 50) -> List[BenchmarkResult]:
+    """Runs all benchmarks and returns their results."""
+    results = [await bench_step_overhead(steps)]
+    for history_length in REPLAY_HISTORY_LENGTHS:
+        results.append(await bench_replay(history_length))
+    results.append(await bench_throughput(instances))
+    return results
+
+
+def compare(results: List[BenchmarkResult], baseline: Dict[str, Any], tolerance: float) -> List[Comparison]:
+    """
+    Compares results against baseline values.
+
+    Args:
+        results: The measured results
+        baseline: Benchmark name to result dictionary, as written by save_baseline()
+        tolerance: Allowed relative slowdown before a benchmark counts as regressed
+    """
+    comparisons = []
+    for result in results:
+        reference = baseline.get(result.name, {}).get('value')
+        if not reference:
+            comparisons.append(Comparison(result.name, result.value, None, None, False))
+            continue
+        change = (result.value - reference) / reference
+        if result.direction == Direction.HIGHER:
+            regressed = change < -tolerance
+        else:
+            regressed = change > tolerance
+        comparisons.append(Comparison(result.name, result.value, reference, change, regressed))
+    return comparisons
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    """Loads a baseline file, returning an empty baseline if it doesn't exist."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('benchmarks', {})
+
+
+def save_baseline(path: str, results: List[BenchmarkResult]) -> None:
+    """Writes results as the new baseline."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'python': sys.version.split()[0],
+            'recordedAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'benchmarks': {result.name: result.to_dict() for result in results}
+        }, f, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark workflow orchestration overhead with the in-process fake runtime")
+    parser.add_argument("--instances", type=int, default=200, help="Concurrent workflow instances for the throughput benchmark")
+    parser.add_argument("--steps", type=int, default=50, help="Sequential steps for the step overhead benchmark")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Path of the baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown against the baseline")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    # Workflow logging would dominate the measurements
+    configure_logging(level="WARNING")
+
+    results = asyncio.run(run_benchmarks(instances=args.instances, steps=args.steps))
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+
+    comparisons = compare(results, load_baseline(args.baseline), args.tolerance)
+    if args.json:
+        print(json.dumps({c.name: {'value': c.value, 'baseline': c.baseline, 'change': c.change, 'regressed': c.regressed} for c in comparisons}, indent=2))
+    else:
+        units = {result.name: result.unit for result in results}
+        print(f"{'benchmark':<16} {'value':>12} {'baseline':>12} {'change':>9}")
+        for c in comparisons:
+            baseline = f"{c.baseline:12.4f}" if c.baseline is not None else f"{'-':>12}"
+            change = f"{c.change:+8.1%}" if c.change is not None else f"{'-':>8}"
+            flag = "  REGRESSED" if c.regressed else ""
+            print(f"{c.name:<16} {c.value:12.4f} {baseline} {change}  {units[c.name]}{flag}")
+
+    regressions = [c.name for c in comparisons if c.regressed]
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
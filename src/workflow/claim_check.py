@@ -0,0 +1,312 @@
+"""
+Claim-Check Payload Offloading for Python Dapr Workflow
+
+Every activity input and output, workflow input and continue-as-new state is
+copied into the orchestration history and read back on each replay. As the
+workflow data grows this makes history large and replay slow.
+
+This module implements the claim-check pattern for those payloads:
+
+1. Values whose serialized size is above a threshold are written to the Dapr
+   state store component, and only a small reference with the content hash and
+   size goes into the workflow history
+2. References are content addressed (the key is the SHA-256 of the payload), so
+   writing the same payload again, e.g. when an activity is retried, is idempotent
+3. Payloads are fetched lazily, only when an activity actually needs the value,
+   through a local read-through cache
+4. Fetched payloads are checked against the hash in the reference
+
+Values are offloaded field by field, so workflow code can still read the small
+fields of its data and passes references to large fields along unread. The
+state store is only used outside workflow code, which must not do I/O:
+
+- At the client boundary, BatchScheduler, the ingestion consumer and
+  EventBroadcaster offload the large fields of workflow inputs and event data
+- Activities registered with the shared runtime receive their input with
+  references resolved and have the large outputs of their results offloaded
+
+USAGE:
+    workflow_input = await claim_check.offload_input_async({"data": {...}})
+    fields = await claim_check.offload_fields_async(event_data)
+    payload = await claim_check.resolve_async(reference)     # Values that aren't references are returned unchanged
+
+CONFIGURATION (environment variables):
+- CLAIM_CHECK_THRESHOLD_BYTES: Payloads larger than this are offloaded; 0 disables offloading (default: 32768)
+- CLAIM_CHECK_BACKEND: 'statestore' or 'memory' (default: statestore)
+- CLAIM_CHECK_TTL_SECONDS: Time to live of offloaded payloads; 0 keeps them until deleted (default: 0)
+- CLAIM_CHECK_CACHE_ENTRIES: Payloads held in the local read-through cache (default: 1000)
+
+NOTE: The 'memory' backend only works when every workflow and activity runs in
+a single process, e.g. with the fake runtime. Offloaded payloads must outlive
+every workflow that references them, so set a TTL well above the longest
+workflow duration.
+"""
+
+import dataclasses
+import functools
+import hashlib
+import inspect
+import logging
+import os
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .state_store import DaprStateStore, InMemoryStateStore, StateStore
+
+logger = logging.getLogger(__name__)
+
+CLAIM_CHECK_KEY_PREFIX = "claim-check"
+REFERENCE_FIELD = "$claimCheck"
+
+
+def is_reference(value: Any) -> bool:
+    """Returns True if the value is a claim-check reference."""
+    if isinstance(value, SimpleNamespace):
+        value = vars(value)
+    return isinstance(value, dict) and REFERENCE_FIELD in value
+
+
+class ClaimCheckStore:
+    """
+    Offloads large payloads to a state store and resolves references to them.
+
+    Args:
+        store: Store holding the offloaded payloads
+        threshold_bytes: Payloads larger than this are offloaded; 0 disables offloading
+        ttl_seconds: Time to live of offloaded payloads
+        cache_entries: Payloads held in the local read-through cache
+    """
+
+    def __init__(
+        self,
+        store: Optional[StateStore] = None,
+        threshold_bytes: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        cache_entries: Optional[int] = None,
+    ):
+        if store is None:
+            backend = os.getenv("CLAIM_CHECK_BACKEND", "statestore")
+            store = InMemoryStateStore(max_entries=1_000_000) if backend == "memory" else DaprStateStore()
+        self.store = store
+        self.threshold_bytes = threshold_bytes if threshold_bytes is not None else int(os.getenv("CLAIM_CHECK_THRESHOLD_BYTES", "32768"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("CLAIM_CHECK_TTL_SECONDS", "0"))
+        self.local = InMemoryStateStore(max_entries=cache_entries or int(os.getenv("CLAIM_CHECK_CACHE_ENTRIES", "1000")))
+        self.offloaded = 0
+        self.offloaded_bytes = 0
+        self.cache_hits = 0
+        self.fetches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_bytes > 0
+
+    def _prepare(self, value: Any) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """Returns the reference and serialized payload if the value should be offloaded."""
+        if not self.enabled or value is None or isinstance(value, (bool, int, float)) or is_reference(value):
+            return None
+        # Serialize like the SDK does, so a resolved payload looks exactly like one read from history
+        from dapr.ext.workflow._durabletask.internal import shared
+        raw = shared.to_json(value).encode('utf-8')
+        if len(raw) <= self.threshold_bytes:
+            return None
+        digest = hashlib.sha256(raw).hexdigest()
+        reference = {REFERENCE_FIELD: f"{CLAIM_CHECK_KEY_PREFIX}||{digest}", 'sha256': digest, 'size': len(raw)}
+        return reference, raw
+
+    def _stored(self, reference: Dict[str, Any], raw: bytes) -> Dict[str, Any]:
+        self.offloaded += 1
+        self.offloaded_bytes += len(raw)
+        logger.debug(f"Offloaded {len(raw)} byte payload to {reference[REFERENCE_FIELD]}")
+        return reference
+
+    def offload(self, value: Any) -> Any:
+        """
+        Returns a reference to the stored payload if the value is above the threshold.
+
+        Blocking; use from blocking activities, never from workflow code. Smaller
+        values are returned unchanged.
+        """
+        prepared = self._prepare(value)
+        if prepared is None:
+            return value
+        reference, raw = prepared
+        key = reference[REFERENCE_FIELD]
+        # Payloads are content addressed, so a payload cached locally is already stored
+        if self.local.get_sync(key) is None:
+            self.store.set_sync(key, raw, self.ttl_seconds or None)
+            self.local.set_sync(key, raw)
+        return self._stored(reference, raw)
+
+    async def offload_async(self, value: Any) -> Any:
+        """Returns a reference to the stored payload if the value is above the threshold."""
+        prepared = self._prepare(value)
+        if prepared is None:
+            return value
+        reference, raw = prepared
+        key = reference[REFERENCE_FIELD]
+        if await self.local.get(key) is None:
+            await self.store.set(key, raw, self.ttl_seconds or None)
+            await self.local.set(key, raw)
+        return self._stored(reference, raw)
+
+    def _reference_key(self, reference: Any) -> Tuple[str, str]:
+        if isinstance(reference, SimpleNamespace):
+            reference = vars(reference)
+        return reference[REFERENCE_FIELD], reference['sha256']
+
+    def _decode(self, key: str, digest: str, raw: Optional[bytes]) -> Any:
+        if raw is None:
+            raise KeyError(f"Claim-check payload {key} was not found in the state store")
+        if hashlib.sha256(raw).hexdigest() != digest:
+            raise ValueError(f"Claim-check payload {key} does not match its content hash")
+        from dapr.ext.workflow._durabletask.internal import shared
+        return shared.from_json(raw.decode('utf-8'))
+
+    def resolve(self, value: Any) -> Any:
+        """
+        Returns the payload a reference points to, fetching it on first use.
+
+        Blocking; use from blocking activities, never from workflow code. Values
+        that aren't references are returned unchanged.
+        """
+        if not is_reference(value):
+            return value
+        key, digest = self._reference_key(value)
+        raw = self.local.get_sync(key)
+        if raw is None:
+            self.fetches += 1
+            raw = self.store.get_sync(key)
+            if raw is not None:
+                self.local.set_sync(key, raw)
+        else:
+            self.cache_hits += 1
+        return self._decode(key, digest, raw)
+
+    async def resolve_async(self, value: Any) -> Any:
+        """Returns the payload a reference points to, fetching it on first use."""
+        if not is_reference(value):
+            return value
+        key, digest = self._reference_key(value)
+        raw = await self.local.get(key)
+        if raw is None:
+            self.fetches += 1
+            raw = await self.store.get(key)
+            if raw is not None:
+                await self.local.set(key, raw)
+        else:
+            self.cache_hits += 1
+        return self._decode(key, digest, raw)
+
+    def offload_fields(self, value: Any) -> Any:
+        """Returns a copy of a dictionary with each value above the threshold replaced by a reference."""
+        if not isinstance(value, dict):
+            return value
+        return {key: self.offload(field) for key, field in value.items()}
+
+    async def offload_fields_async(self, value: Any) -> Any:
+        """
+        Returns a copy of a dictionary with each value above the threshold replaced by a reference.
+
+        Values that aren't dictionaries are offloaded as a whole.
+        """
+        if not isinstance(value, dict):
+            return await self.offload_async(value)
+        return {key: await self.offload_async(field) for key, field in value.items()}
+
+    async def offload_input_async(self, value: Any) -> Any:
+        """
+        Offloads the large fields of a workflow input.
+
+        The 'data' and 'original' sections of a WorkflowData input are offloaded
+        field by field, so the workflow can read the rest; other dictionaries
+        are offloaded field by field and other values are returned unchanged.
+        """
+        if not self.enabled or not isinstance(value, dict):
+            return value
+        if not isinstance(value.get('data'), dict):
+            return await self.offload_fields_async(value)
+        value = dict(value)
+        for section in ('data', 'original'):
+            if isinstance(value.get(section), dict):
+                value[section] = await self.offload_fields_async(value[section])
+        return value
+
+    def _fields(self, value: Any) -> Optional[Dict[str, Any]]:
+        if isinstance(value, SimpleNamespace):
+            return vars(value)
+        return value if isinstance(value, dict) else None
+
+    def _with_fields(self, value: Any, fields: Dict[str, Any]) -> Any:
+        return SimpleNamespace(**fields) if isinstance(value, SimpleNamespace) else fields
+
+    def resolve_fields(self, value: Any) -> Any:
+        """Resolves a reference, or the referenced fields of a dictionary or deserialized object."""
+        fields = self._fields(value)
+        if fields is None or is_reference(value):
+            return self.resolve(value)
+        return self._with_fields(value, {key: self.resolve(field) for key, field in fields.items()})
+
+    async def resolve_fields_async(self, value: Any) -> Any:
+        """Resolves a reference, or the referenced fields of a dictionary or deserialized object."""
+        fields = self._fields(value)
+        if fields is None or is_reference(value):
+            return await self.resolve_async(value)
+        return self._with_fields(value, {key: await self.resolve_async(field) for key, field in fields.items()})
+
+    def wrap_activity(self, fn: Callable) -> Callable:
+        """
+        Wraps an activity to resolve referenced inputs and offload large result outputs.
+
+        References in the input, or in its top-level fields, are resolved before
+        the activity runs. Outputs of an ActivityResponse result (or of a
+        dictionary with 'outputs') above the threshold are replaced by
+        references, which the workflow merges into its data without reading.
+        The wrapper keeps the sync or async nature and the signature of the activity.
+        """
+        def outputs_of(result: Any) -> Optional[Dict[str, Any]]:
+            outputs = result.get('outputs') if isinstance(result, dict) else getattr(result, 'outputs', None)
+            return outputs if isinstance(outputs, dict) and outputs else None
+
+        def with_outputs(result: Any, outputs: Dict[str, Any]) -> Any:
+            # Don't change the returned object, it may be cached
+            if isinstance(result, dict):
+                return {**result, 'outputs': outputs}
+            if dataclasses.is_dataclass(result):
+                return dataclasses.replace(result, outputs=outputs)
+            return result
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def claim_checked_activity(ctx, input: Any = None):
+                result = await fn(ctx, await self.resolve_fields_async(input))
+                outputs = outputs_of(result) if self.enabled else None
+                if outputs is None:
+                    return result
+                return with_outputs(result, await self.offload_fields_async(outputs))
+        else:
+            @functools.wraps(fn)
+            def claim_checked_activity(ctx, input: Any = None):
+                result = fn(ctx, self.resolve_fields(input))
+                outputs = outputs_of(result) if self.enabled else None
+                if outputs is None:
+                    return result
+                return with_outputs(result, self.offload_fields(outputs))
+
+        return claim_checked_activity
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns counters of offloaded payloads and reference lookups."""
+        lookups = self.cache_hits + self.fetches
+        return {
+            'thresholdBytes': self.threshold_bytes,
+            'offloaded': self.offloaded,
+            'offloadedBytes': self.offloaded_bytes,
+            'cacheHits': self.cache_hits,
+            'fetches': self.fetches,
+            'cacheHitRatio': self.cache_hits / lookups if lookups else 0.0,
+            'localEntries': len(self.local)
+        }
+
+
+# Single claim-check store shared across the application
+claim_check = ClaimCheckStore()
@@ -0,0 +1,127 @@
+"""
+Shared Workflow Client for Python Dapr Workflow
+
+This module provides a small pool of async Dapr workflow clients that is shared
+across the application. Each client owns one gRPC channel to the sidecar, and
+gRPC multiplexes many concurrent calls over a channel, so a handful of clients
+is enough to schedule thousands of workflows concurrently without opening a
+connection per request.
+
+CONFIGURATION (environment variables):
+- WORKFLOW_CLIENT_POOL_SIZE: Number of clients (gRPC channels) in the pool (default: 4)
+
+NOTE: Listing instances and closing the channels need the durabletask client
+that the async DaprWorkflowClient keeps private. It is reached through
+inner_client(), which fails with UnsupportedSdkError when an SDK release no
+longer has it; the dapr-ext-workflow version is pinned below the next minor
+release for this reason.
+"""
+
+import itertools
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from dapr.ext.workflow.aio import DaprWorkflowClient
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedSdkError(RuntimeError):
+    """Raised when the installed Dapr SDK lacks an internal API this module relies on."""
+
+
+def inner_client(client: "DaprWorkflowClient", *methods: str) -> Any:
+    """
+    Returns the durabletask client wrapped by an async DaprWorkflowClient.
+
+    Args:
+        client: The Dapr workflow client
+        methods: Methods of the durabletask client the caller uses
+
+    Raises:
+        UnsupportedSdkError: If the SDK doesn't keep the client where expected or it lacks a method
+    """
+    inner = getattr(client, "_DaprWorkflowClient__obj", None)
+    missing = [method for method in methods if not callable(getattr(inner, method, None))]
+    if inner is None or missing:
+        from importlib.metadata import PackageNotFoundError, version
+        try:
+            sdk_version = version("dapr-ext-workflow")
+        except PackageNotFoundError:
+            sdk_version = "unknown"
+        wanted = f"a durabletask client with {', '.join(missing)}" if inner is not None else "its durabletask client"
+        raise UnsupportedSdkError(
+            f"dapr-ext-workflow {sdk_version} doesn't expose {wanted}; this module supports dapr-ext-workflow 1.18"
+        )
+    return inner
+
+
+class WorkflowClientPool:
+    """
+    Round-robin pool of async DaprWorkflowClient instances.
+
+    Clients are created lazily on first use so that importing this module
+    does not open connections to the sidecar.
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or int(os.getenv("WORKFLOW_CLIENT_POOL_SIZE", "4"))
+        self._clients: List["DaprWorkflowClient"] = []
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    def get(self) -> "DaprWorkflowClient":
+        """Returns the next client in the pool, creating the pool on first use."""
+        with self._lock:
+            if not self._clients:
+                # Imported on first use, so the SDK and the gRPC stack aren't loaded at startup
+                from dapr.ext.workflow.aio import DaprWorkflowClient
+                logger.info(f"Creating workflow client pool with {self.size} clients")
+                self._clients = [DaprWorkflowClient() for _ in range(self.size)]
+                self._cycle = itertools.cycle(self._clients)
+            return next(self._cycle)
+
+    async def list_instance_ids(
+        self, page_size: Optional[int] = None, continuation_token: Optional[str] = None
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Returns a page of workflow instance IDs known to the sidecar.
+
+        Args:
+            page_size: Maximum number of IDs in the page
+            continuation_token: Token returned with the previous page
+
+        Returns:
+            The instance IDs and the token of the next page, or None on the last page
+
+        Raises:
+            UnsupportedSdkError: If the installed SDK doesn't provide the internals used for listing
+        """
+        # The Dapr workflow client does not expose instance listing, so call the sidecar through the durabletask stub
+        from dapr.ext.workflow._durabletask.internal import orchestrator_service_pb2 as pb
+
+        stub = inner_client(self.get(), "_get_stub")._get_stub()
+        if not hasattr(stub, "ListInstanceIDs"):
+            raise UnsupportedSdkError("The durabletask gRPC stub of the installed Dapr SDK has no ListInstanceIDs")
+        request = pb.ListInstanceIDsRequest(pageSize=page_size, continuationToken=continuation_token)
+        response = await stub.ListInstanceIDs(request)
+        next_token = response.continuationToken if response.HasField("continuationToken") else None
+        return list(response.instanceIds), next_token or None
+
+    async def close(self) -> None:
+        """Closes every client channel in the pool."""
+        with self._lock:
+            clients, self._clients, self._cycle = self._clients, [], None
+        for client in clients:
+            # The Dapr async client does not expose close(), so close the underlying durabletask client
+            try:
+                await inner_client(client, "aclose").aclose()
+            except UnsupportedSdkError as e:
+                logger.warning(f"Leaving a workflow client channel open: {e}")
+
+
+# Single client pool shared across the application
+workflow_client_pool = WorkflowClientPool()
@@ -0,0 +1,189 @@
+"""
+Sharded Cohort Orchestration for Python Dapr Workflow
+
+Onboarding a whole intake as thousands of independently started workflow
+instances leaves nothing that tracks the intake's progress or outcome. This
+module runs a cohort from one parent workflow instead:
+
+1. The cohort's input list is split into shards of wave_size items
+2. Each shard runs as a wave of child workflows, one per item, and the next
+   wave starts once every child of the current wave finished
+3. Child results are folded into compact summary counts (succeeded, failed,
+   waves) as they complete, rather than collected into one huge result; only
+   the first failed child instance IDs are kept
+4. After each wave the parent yields a checkpoint, so under
+   @continue_as_new_policy it continues as new once its history grows too
+   large, carrying only the cursor and the summary forward
+
+A large input list arrives as a claim-check reference when the cohort is
+started through BatchScheduler or the ingestion consumer (see claim_check.py).
+The parent never reads it: each wave is loaded by the load_cohort_wave
+activity and only the reference is carried between executions, so the
+parent's history and continue-as-new state stay the same size for any cohort
+size. Lists passed inline are sliced in the workflow.
+
+Child instance IDs are derived from the parent's instance ID and the item's
+position in the cohort ('<parent>-000042'), so a replayed or restarted wave
+never starts a child twice.
+
+USAGE:
+    @wfr.workflow(name="employee_cohort_workflow")
+    @continue_as_new_policy
+    def employee_cohort_workflow(ctx: DaprWorkflowContext, input_data: Any) -> Any:
+        data = WorkflowData.from_payload(input_data)
+        yield from run_cohort(ctx, data, employee_onboarding_workflow, items_key="employees")
+        return data
+
+Start it with the cohort in the input: {"data": {"employees": [{...}, ...], "waveSize": 50}}.
+The summary is kept in data['cohort'].
+
+CONFIGURATION (environment variables):
+- WORKFLOW_COHORT_WAVE_SIZE: Child workflows per wave when the input doesn't set waveSize (default: 100)
+- WORKFLOW_COHORT_MAX_FAILED_IDS: Failed child instance IDs kept in the summary (default: 20)
+"""
+
+import os
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Generator, List, Tuple, Union
+
+from dapr.ext.workflow import when_any
+
+from .claim_check import claim_check, is_reference
+from .continue_as_new import checkpoint
+from .models import WorkflowData, WorkflowResult
+from .runtime import workflow_runtime
+
+SUMMARY_KEY = "cohort"
+CURSOR_KEY = "cohortCursor"
+
+
+@dataclass(slots=True)
+class CohortSummary:
+    """Aggregated outcome of the child workflows of a cohort, across executions."""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    waves: int = 0
+    failed_instance_ids: List[str] = field(default_factory=list)
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    def record_failure(self, instance_id: str, limit: int) -> None:
+        self.failed += 1
+        if len(self.failed_instance_ids) < limit:
+            self.failed_instance_ids.append(instance_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the cohort summary to a dictionary."""
+        return {
+            'total': self.total,
+            'completed': self.completed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'waves': self.waves,
+            'failedInstanceIds': self.failed_instance_ids
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CohortSummary':
+        """Creates a CohortSummary from a dictionary."""
+        return cls(
+            total=data.get('total', 0),
+            succeeded=data.get('succeeded', 0),
+            failed=data.get('failed', 0),
+            waves=data.get('waves', 0),
+            failed_instance_ids=list(data.get('failedInstanceIds', []))
+        )
+
+
+@workflow_runtime.activity(name="load_cohort_wave")
+async def load_cohort_wave(ctx, input: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Loads one wave of a claim-checked cohort list.
+
+    Args:
+        ctx: The workflow activity context
+        input: {"items": <reference>, "start": <position>, "count": <wave size>}
+
+    Returns:
+        {"items": [...], "total": <cohort size>}
+    """
+    items = await claim_check.resolve_async(input['items']) or []
+    start = input['start']
+    return {'items': items[start:start + input['count']], 'total': len(items)}
+
+
+def _load_wave(ctx, items: Any, start: int, count: int) -> Generator[Any, Any, Tuple[List[Any], int]]:
+    """Returns the items of a wave and the cohort size."""
+    if not is_reference(items):
+        return items[start:start + count], len(items)
+    wave = yield ctx.call_activity(load_cohort_wave, input={'items': items, 'start': start, 'count': count})
+    if isinstance(wave, SimpleNamespace):
+        wave = vars(wave)
+    return list(wave['items']), wave['total']
+
+
+def run_cohort(
+    ctx,
+    data: WorkflowData,
+    child_workflow: Union[Callable, str],
+    *,
+    items_key: str,
+) -> Generator[Any, Any, CohortSummary]:
+    """
+    Runs a child workflow per item of data[items_key] in waves; use with ``yield from``.
+
+    Each child receives {"data": item} as input. The cursor and the summary are
+    kept in data, so the cohort resumes where it left off after continue-as-new.
+
+    Args:
+        ctx: The workflow context
+        data: Workflow data holding the items, the cursor and the summary
+        child_workflow: The child workflow function or its registered name
+        items_key: Key of the item list in data
+
+    Returns:
+        The summary of every wave run so far
+    """
+    wave_size = int(data.data.get('waveSize') or os.getenv("WORKFLOW_COHORT_WAVE_SIZE", "100"))
+    max_failed_ids = int(os.getenv("WORKFLOW_COHORT_MAX_FAILED_IDS", "20"))
+    if wave_size < 1:
+        raise ValueError("waveSize must be at least 1")
+
+    # A referenced list is only carried along; its waves are loaded by an activity
+    items = data.data.get(items_key) or []
+    summary = CohortSummary.from_dict(data.data.get(SUMMARY_KEY) or {})
+    cursor = data.data.get(CURSOR_KEY, 0)
+
+    while True:
+        wave, summary.total = yield from _load_wave(ctx, items, cursor, wave_size)
+        if not wave:
+            break
+        in_flight = {
+            f"{ctx.instance_id}-{cursor + offset:06d}": ctx.call_child_workflow(
+                child_workflow, input={"data": item}, instance_id=f"{ctx.instance_id}-{cursor + offset:06d}"
+            )
+            for offset, item in enumerate(wave)
+        }
+        while in_flight:
+            yield when_any(list(in_flight.values()))
+            for instance_id in [instance_id for instance_id, child in in_flight.items() if child.is_complete]:
+                child = in_flight.pop(instance_id)
+                if child.is_failed or not WorkflowResult.from_payload(child.get_result()).success:
+                    summary.record_failure(instance_id, max_failed_ids)
+                else:
+                    summary.succeeded += 1
+
+        cursor += len(wave)
+        summary.waves += 1
+        data.data[CURSOR_KEY] = cursor
+        data.data[SUMMARY_KEY] = summary.to_dict()
+        if cursor >= summary.total:
+            break
+        yield checkpoint(data)
+
+    data.data[SUMMARY_KEY] = summary.to_dict()
+    return summary
@@ -0,0 +1,196 @@
+"""
+Automatic Continue-As-New Policy for Python Dapr Workflow
+
+Every task a workflow awaits adds events to its orchestration history, and the
+whole history is replayed each time the workflow resumes. Long-running or
+looping workflows therefore get slower with every iteration. Continue-as-new
+restarts the workflow with a fresh, empty history and a new input.
+
+This module provides a workflow decorator that:
+
+1. Counts the history events produced by each awaited task
+2. At checkpoints declared by the workflow, measures the serialized state size
+3. Continues the workflow as new once either threshold is exceeded, carrying
+   forward WorkflowData.data/original and a condensed summary of the history
+
+USAGE:
+Stack the policy below ``@wfr.workflow`` and yield a checkpoint at points where
+the workflow can safely restart from the top, typically the end of a loop body:
+
+    @wfr.workflow(name="badge_sync_workflow")
+    @continue_as_new_policy(max_events=500)
+    def badge_sync_workflow(ctx: DaprWorkflowContext, input_data: Any) -> Any:
+        data = WorkflowData.from_payload(input_data)
+        while not data.get_bool("done"):
+            result = yield ctx.call_activity(sync_badges_activity, input=data.get_activity_request_data())
+            data.add_activity_response("sync_badges", result)
+            yield checkpoint(data)
+
+The restarted execution receives the carried-over state as its input, so the
+workflow must resume from WorkflowData rather than from local variables.
+
+CONFIGURATION (environment variables):
+- WORKFLOW_CAN_MAX_EVENTS: History events before continuing as new (default: 1000)
+- WORKFLOW_CAN_MAX_STATE_BYTES: Serialized state size before continuing as new (default: 524288)
+"""
+
+import functools
+import inspect
+import logging
+import os
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from dapr.ext.workflow._durabletask import task
+
+from .models import WorkflowData
+from .serialization import to_json_bytes
+
+logger = logging.getLogger(__name__)
+
+# Each awaited task adds a scheduled and a completed event to the history
+EVENTS_PER_TASK = 2
+
+
+@dataclass(slots=True)
+class Checkpoint:
+    """Sentinel yielded by a workflow to mark a safe continue-as-new point."""
+    data: WorkflowData
+
+
+def checkpoint(data: WorkflowData) -> Checkpoint:
+    """Creates a checkpoint to yield from a workflow decorated with continue_as_new_policy."""
+    return Checkpoint(data=data)
+
+
+@dataclass(slots=True)
+class ContinueAsNewPolicy:
+    """Thresholds that trigger continue-as-new."""
+    max_events: int = field(default_factory=lambda: int(os.getenv("WORKFLOW_CAN_MAX_EVENTS", "1000")))
+    max_state_bytes: int = field(default_factory=lambda: int(os.getenv("WORKFLOW_CAN_MAX_STATE_BYTES", "524288")))
+
+
+def count_history_events(pending: Any, seen: Optional[weakref.WeakSet] = None) -> int:
+    """
+    Estimates the history events produced by awaiting a task, including composite tasks.
+
+    Tasks in seen are not counted again, so awaiting when_any repeatedly over the
+    same pending tasks (as task graphs do) counts each task once.
+    """
+    if isinstance(pending, task.CompositeTask):
+        return sum(count_history_events(child, seen) for child in pending.get_tasks())
+    if seen is not None:
+        if pending in seen:
+            return 0
+        seen.add(pending)
+    return EVENTS_PER_TASK
+
+
+def summarize_history(data: WorkflowData, events: int) -> Dict[str, Any]:
+    """
+    Condenses the current execution into the running history summary.
+
+    Activity history entries are reduced to counts per activity name, so the
+    summary stays a constant size no matter how many generations have run.
+    """
+    summary = dict(data.history_summary)
+    activity_counts = dict(summary.get('activityCounts', {}))
+    for activity in data.activity_history:
+        activity_counts[activity.activity_name] = activity_counts.get(activity.activity_name, 0) + 1
+    summary['generation'] = summary.get('generation', 0) + 1
+    summary['totalEvents'] = summary.get('totalEvents', 0) + events
+    summary['activityCounts'] = activity_counts
+    return summary
+
+
+class HistoryBudget:
+    """Tracks history growth of a single workflow execution against a policy."""
+
+    def __init__(self, policy: ContinueAsNewPolicy, name: Optional[str] = None):
+        self.policy = policy
+        self.name = name
+        self.events = 0
+        self._seen = weakref.WeakSet()
+
+    def record(self, pending: Any) -> None:
+        """Records the events produced by a task the workflow is about to await."""
+        self.events += count_history_events(pending, self._seen)
+
+    def state_size(self, data: WorkflowData) -> int:
+        """Returns the size in bytes of the state that would be carried forward."""
+        return len(to_json_bytes(data.for_continue_as_new_workflow()))
+
+    def is_exceeded(self, data: WorkflowData) -> bool:
+        """True if the execution crossed either threshold of the policy."""
+        if self.events >= self.policy.max_events:
+            return True
+        return self.state_size(data) >= self.policy.max_state_bytes
+
+    def carry_forward(self, data: WorkflowData) -> Any:
+        """Builds the encoded input for the next execution; claim-check references in the data are carried as is."""
+        data.history_summary = summarize_history(data, self.events)
+        data.activity_history = []
+        return data.to_payload(name=self.name)
+
+
+def continue_as_new_policy(
+    __fn: Callable = None,
+    *,
+    max_events: Optional[int] = None,
+    max_state_bytes: Optional[int] = None,
+):
+    """
+    Decorator that continues a generator workflow as new when its history grows too large.
+
+    Args:
+        max_events: History events before continuing as new
+        max_state_bytes: Serialized state size before continuing as new
+    """
+    policy = ContinueAsNewPolicy()
+    if max_events is not None:
+        policy.max_events = max_events
+    if max_state_bytes is not None:
+        policy.max_state_bytes = max_state_bytes
+
+    def wrapper(fn: Callable):
+        @functools.wraps(fn)
+        def policy_workflow(ctx, input_data: Any = None):
+            workflow = fn(ctx, input_data)
+            if not inspect.isgenerator(workflow):
+                return workflow
+
+            budget = HistoryBudget(policy, name=fn.__name__)
+            send_value, error = None, None
+            while True:
+                try:
+                    pending = workflow.throw(error) if error is not None else workflow.send(send_value)
+                except StopIteration as stop:
+                    return stop.value
+                send_value, error = None, None
+
+                if isinstance(pending, Checkpoint):
+                    if budget.is_exceeded(pending.data):
+                        if not ctx.is_replaying:
+                            logger.info(f"[Workflow] Continuing {ctx.instance_id} as new after {budget.events} history events")
+                        ctx.continue_as_new(budget.carry_forward(pending.data))
+                        workflow.close()
+                        return None
+                    continue
+
+                budget.record(pending)
+                try:
+                    send_value = yield pending
+                except GeneratorExit:
+                    workflow.close()
+                    raise
+                except Exception as e:
+                    error = e
+
+        return policy_workflow
+
+    if __fn:
+        # Decorator used without arguments
+        return wrapper(__fn)
+
+    return wrapper
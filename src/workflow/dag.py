@@ -0,0 +1,204 @@
+"""
+Declarative Task Graphs for Python Dapr Workflow
+
+Awaiting when_all on every parallel task at once doesn't scale to workflows
+that fan out to hundreds of activities: nothing bounds the number of activities
+in flight, and downstream steps can't start until the slowest task finishes.
+
+This module lets a workflow declare its activities and their dependencies as a
+graph, and schedules them:
+
+1. In windows: at most window_size activities are in flight at any time
+2. Eagerly: a task is scheduled as soon as all of its dependencies completed
+3. By name: each result is merged into WorkflowData with add_activity_response
+   under the task's name, never by position; for activities with a projection
+   only their declared outputs are merged
+4. Resiliently: each activity runs with its deadline, hedging and retry
+   policy (see activity_calls.py and resilience.py) while the other tasks keep
+   running; hedged attempts don't count against window_size
+
+Scheduling is deterministic (ready tasks start in declaration order), so the
+graph replays exactly like hand-written workflow code.
+
+USAGE:
+Declare the graph once at module level and run it from the workflow with
+``yield from``:
+
+    onboarding_tasks = (
+        TaskGraph(window_size=50)
+        .add("provision_equipment", provision_equipment_activity)
+        .add("prepare_paperwork", prepare_paperwork_activity)
+        .add("notify_manager", notify_manager_activity, depends_on=["provision_equipment", "prepare_paperwork"])
+    )
+
+    @wfr.workflow(name="employee_onboarding_workflow")
+    def employee_onboarding_workflow(ctx: DaprWorkflowContext, input_data: Any) -> Any:
+        data = WorkflowData.from_payload(input_data)
+        outcome = yield from onboarding_tasks.run(ctx, data)
+
+By default each activity receives data.get_activity_request_data(activity),
+which holds only the fields the activity declared in its projection. Pass an
+input callable to build a task's input from the workflow data and the results
+of its dependencies:
+
+    .add("notify_manager", notify_manager_activity, depends_on=["provision_equipment"],
+         input=lambda data, results: {"equipment": results["provision_equipment"]})
+
+CONFIGURATION (environment variables):
+- WORKFLOW_DAG_WINDOW_SIZE: Default maximum activities in flight per graph run (default: 16)
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple, Union
+
+from dapr.ext.workflow import when_any
+
+from .activity_calls import ActivityCall
+from .models import WorkflowData
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class GraphTask:
+    """A named activity in a task graph."""
+    name: str
+    activity: Union[Callable, str]
+    depends_on: Tuple[str, ...] = ()
+    input: Optional[Callable[[WorkflowData, Dict[str, Any]], Any]] = None
+    retry_policy: Any = None
+
+
+@dataclass(slots=True)
+class GraphOutcome:
+    """Results of a task graph run, keyed by task name."""
+    results: Dict[str, Any] = field(default_factory=dict)
+    failed: Dict[str, str] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return not self.failed and not self.skipped
+
+
+class TaskGraph:
+    """
+    A set of activities with dependencies, run with bounded fan-out.
+
+    Args:
+        window_size: Maximum number of activities in flight at any time
+    """
+
+    def __init__(self, window_size: Optional[int] = None):
+        self.window_size = window_size or int(os.getenv("WORKFLOW_DAG_WINDOW_SIZE", "16"))
+        if self.window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        self.tasks: Dict[str, GraphTask] = {}
+
+    def add(
+        self,
+        name: str,
+        activity: Union[Callable, str],
+        *,
+        depends_on: Iterable[str] = (),
+        input: Optional[Callable[[WorkflowData, Dict[str, Any]], Any]] = None,
+        retry_policy: Any = None,
+    ) -> 'TaskGraph':
+        """
+        Adds an activity to the graph.
+
+        Args:
+            name: Unique task name, also used to merge the result into WorkflowData
+            activity: The activity function or its registered name
+            depends_on: Names of tasks that must complete before this one starts
+            input: Builds the activity input from the workflow data and dependency results
+            retry_policy: SDK retry policy passed to ctx.call_activity; when set, the
+                activity's own retry policy (see resilience.py) is not applied
+
+        Returns:
+            The graph, so calls can be chained
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task '{name}' is already part of the graph")
+        self.tasks[name] = GraphTask(name, activity, tuple(depends_on), input, retry_policy)
+        return self
+
+    def validate(self) -> None:
+        """Raises ValueError if a dependency is unknown or the graph has a cycle."""
+        for task in self.tasks.values():
+            for dependency in task.depends_on:
+                if dependency not in self.tasks:
+                    raise ValueError(f"Task '{task.name}' depends on unknown task '{dependency}'")
+
+        dependents = self._dependents()
+        remaining = {name: len(task.depends_on) for name, task in self.tasks.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for dependent in dependents.get(name, ()):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(self.tasks):
+            cycle = sorted(name for name, count in remaining.items() if count > 0)
+            raise ValueError(f"Task graph has a dependency cycle between: {', '.join(cycle)}")
+
+    def _dependents(self) -> Dict[str, List[str]]:
+        dependents: Dict[str, List[str]] = {}
+        for task in self.tasks.values():
+            for dependency in task.depends_on:
+                dependents.setdefault(dependency, []).append(task.name)
+        return dependents
+
+    def run(self, ctx, data: WorkflowData, *, fail_fast: bool = True) -> Generator[Any, Any, GraphOutcome]:
+        """
+        Runs the graph from a workflow; use with ``yield from``.
+
+        Args:
+            ctx: The workflow context
+            data: Workflow data the results are merged into
+            fail_fast: Raise the first activity failure instead of skipping its dependents
+
+        Returns:
+            The results, failures and skipped tasks by name
+        """
+        self.validate()
+        order = {name: index for index, name in enumerate(self.tasks)}
+        dependents = self._dependents()
+        remaining = {name: len(task.depends_on) for name, task in self.tasks.items()}
+        ready = [name for name in self.tasks if remaining[name] == 0]
+        in_flight: Dict[str, ActivityCall] = {}
+        outcome = GraphOutcome()
+
+        while ready or in_flight:
+            while ready and len(in_flight) < self.window_size:
+                task = self.tasks[ready.pop(0)]
+                dependency_results = {name: outcome.results[name] for name in task.depends_on}
+                activity_input = task.input(data, dependency_results) if task.input else data.get_activity_request_data(task.activity)
+                in_flight[task.name] = ActivityCall(ctx, task.activity, activity_input, retry_policy=task.retry_policy, data=data)
+
+            yield when_any([pending for call in in_flight.values() for pending in call.pending])
+
+            # Several tasks may have completed by the time the workflow resumes
+            for name in [name for name, call in in_flight.items() if call.advance()]:
+                call = in_flight.pop(name)
+                if call.error is not None:
+                    if fail_fast:
+                        raise call.error
+                    outcome.failed[name] = str(call.error)
+                    continue
+                result = call.result()
+                outcome.results[name] = result
+                data.add_activity_response(name, result, activity=self.tasks[name].activity)
+                for dependent in dependents.get(name, ()):
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        ready.append(dependent)
+            ready.sort(key=order.__getitem__)
+
+        outcome.skipped = [name for name in self.tasks if name not in outcome.results and name not in outcome.failed]
+        return outcome
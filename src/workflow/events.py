@@ -0,0 +1,289 @@
+"""
+Bulk External Events for Python Dapr Workflow
+
+Signalling thousands of waiting workflow instances ("badge system back
+online") one raiseEvent request at a time is slow for the caller and bursty
+for the sidecar. This module provides both sides of bulk signalling:
+
+1. EventBroadcaster raises one event to many instances concurrently through
+   the shared workflow client pool, with bounded parallelism. Targets are
+   either a list of instance IDs or every instance whose runtime status (and
+   optionally workflow type) matches a filter, found by paging through the
+   instances known to the sidecar. Large fields of the event data are
+   claim-check offloaded and the data is encoded once for all targets. Results
+   are yielded per instance as each delivery completes, so callers can stream
+   progress.
+2. wait_for_events() is the workflow side: it waits for an event with an
+   optional timeout and then takes every event of the same name that was
+   already queued for the instance, merging their data into WorkflowData with
+   a single data.update. A workflow that was busy while several signals
+   arrived handles them in one step instead of one replay per event.
+
+USAGE:
+    broadcaster = EventBroadcaster(concurrency=100)
+    async for result in broadcaster.broadcast("badge_system_online", {"online": True}, instance_ids=ids):
+        ...
+
+    # In a workflow
+    received = yield from wait_for_events(ctx, data, "badge_system_online", timeout=timedelta(hours=4))
+    if not received:
+        ...  # Timed out
+
+Queued events are taken with a zero-timeout wait, which completes right away
+with an event that was already received or fails without waiting, so the
+coalescing is deterministic on replay.
+
+CONFIGURATION (environment variables):
+- WORKFLOW_EVENT_CONCURRENCY: Default number of concurrent event deliveries (default: 64)
+- WORKFLOW_EVENT_PAGE_SIZE: Instances per page when selecting targets by status (default: 500)
+- WORKFLOW_EVENT_COALESCE_MAX: Queued events merged into one data update at most (default: 100)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Generator, Iterable, Optional, Union
+
+from .claim_check import claim_check
+from .client import WorkflowClientPool, workflow_client_pool
+from .models import WorkflowData
+from .serialization import decode_payload, encode_payload
+from .status import WorkflowStatusCache, workflow_status_cache
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the target instance IDs in the delivery queue
+_DONE = object()
+
+
+@dataclass
+class EventDeliveryResult:
+    """The outcome of raising an event to a single workflow instance."""
+    instance_id: str
+    success: bool = False
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the delivery result to a dictionary."""
+        return {
+            'instanceID': self.instance_id,
+            'success': self.success,
+            'error': self.error
+        }
+
+
+@dataclass
+class EventSummary:
+    """Aggregated outcome and throughput of a bulk event."""
+    event_name: str
+    total: int = 0
+    delivered: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    elapsed_seconds: float = 0.0
+
+    def record(self, result: EventDeliveryResult) -> None:
+        """Records a single delivery result."""
+        if result.success:
+            self.delivered += 1
+        else:
+            self.failed += 1
+        self.elapsed_seconds = time.perf_counter() - self.started_at
+
+    @property
+    def events_per_second(self) -> float:
+        """Successful deliveries per second since the bulk event began."""
+        return self.delivered / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the event summary to a dictionary."""
+        return {
+            'eventName': self.event_name,
+            'total': self.total,
+            'completed': self.delivered + self.failed,
+            'delivered': self.delivered,
+            'failed': self.failed,
+            'elapsedSeconds': round(self.elapsed_seconds, 3),
+            'eventsPerSecond': round(self.events_per_second, 2)
+        }
+
+
+class EventBroadcaster:
+    """
+    Raises an event to many workflow instances with bounded concurrency.
+
+    A fixed number of worker tasks take instance IDs from a bounded queue that
+    is filled as targets are found, so memory use stays constant regardless of
+    how many instances match.
+    """
+
+    def __init__(
+        self,
+        client_pool: Optional[WorkflowClientPool] = None,
+        status_cache: Optional[WorkflowStatusCache] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.client_pool = client_pool or workflow_client_pool
+        self.status_cache = status_cache or workflow_status_cache
+        self.concurrency = concurrency or int(os.getenv("WORKFLOW_EVENT_CONCURRENCY", "64"))
+        self.page_size = min(int(os.getenv("WORKFLOW_EVENT_PAGE_SIZE", "500")), self.status_cache.max_ids)
+
+    async def matching_instances(self, statuses: Iterable[str], workflow_name: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Yields the IDs of instances known to the sidecar whose runtime status is in statuses.
+
+        Args:
+            statuses: Runtime status names, e.g. ["RUNNING", "SUSPENDED"]
+            workflow_name: Only yield instances of this workflow type
+        """
+        wanted = {status.upper() for status in statuses}
+        token = None
+        while True:
+            page = await self.status_cache.list_page(self.page_size, token, include_status=True)
+            for status in page['workflows']:
+                if status.get('runtimeStatus') in wanted and workflow_name in (None, status.get('name')):
+                    yield status['instanceId']
+            token = page['continuationToken']
+            if not token:
+                return
+
+    async def _raise_one(self, instance_id: str, event_name: str, payload: Any) -> EventDeliveryResult:
+        try:
+            await self.client_pool.get().raise_workflow_event(instance_id, event_name, data=payload)
+            return EventDeliveryResult(instance_id=instance_id, success=True)
+        except Exception as e:
+            logger.warning(f"Failed to raise {event_name} to {instance_id}: {e}")
+            return EventDeliveryResult(instance_id=instance_id, success=False, error=str(e))
+
+    async def broadcast(
+        self,
+        event_name: str,
+        data: Any = None,
+        *,
+        instance_ids: Optional[Iterable[str]] = None,
+        statuses: Optional[Iterable[str]] = None,
+        workflow_name: Optional[str] = None,
+        summary: Optional[EventSummary] = None,
+    ) -> AsyncIterator[EventDeliveryResult]:
+        """
+        Raises an event to every target instance and yields results in completion order.
+
+        Args:
+            event_name: Name of the event
+            data: Event data, shared by all targets
+            instance_ids: Target instance IDs; duplicates are signalled once
+            statuses: Target every instance with one of these runtime statuses instead
+            workflow_name: With statuses, only target instances of this workflow type
+            summary: Optional summary that is updated as targets are found and results arrive
+
+        Yields:
+            One EventDeliveryResult per target instance
+        """
+        if (instance_ids is None) == (statuses is None):
+            raise ValueError("Pass either instance_ids or statuses")
+        # Large event data goes to the state store once and every instance gets the references
+        payload = encode_payload(await claim_check.offload_fields_async(data)) if data is not None else None
+
+        async def targets() -> AsyncIterator[str]:
+            if instance_ids is not None:
+                for instance_id in dict.fromkeys(instance_ids):
+                    yield instance_id
+            else:
+                async for instance_id in self.matching_instances(statuses, workflow_name):
+                    yield instance_id
+
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def produce() -> None:
+            try:
+                async for instance_id in targets():
+                    if summary is not None:
+                        summary.total += 1
+                    await pending.put(instance_id)
+            finally:
+                for _ in range(self.concurrency):
+                    await pending.put(_DONE)
+
+        async def worker() -> None:
+            while (instance_id := await pending.get()) is not _DONE:
+                await results.put(await self._raise_one(instance_id, event_name, payload))
+            await results.put(_DONE)
+
+        producer = asyncio.create_task(produce())
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            finished = 0
+            while finished < len(workers):
+                result = await results.get()
+                if result is _DONE:
+                    finished += 1
+                    continue
+                if summary is not None:
+                    summary.record(result)
+                yield result
+            # Surface errors from selecting the targets, e.g. the sidecar being unavailable
+            await producer
+        finally:
+            for pending_task in (producer, *workers):
+                pending_task.cancel()
+
+
+def _event_data(payload: Any) -> Any:
+    """Decodes event data raised through EventBroadcaster or directly; claim-check references are kept."""
+    payload = decode_payload(payload)
+    return vars(payload) if isinstance(payload, SimpleNamespace) else payload
+
+
+def wait_for_events(
+    ctx,
+    data: WorkflowData,
+    name: str,
+    *,
+    timeout: Optional[Union[datetime, timedelta]] = None,
+    max_events: Optional[int] = None,
+) -> Generator[Any, Any, int]:
+    """
+    Waits for an event, takes the queued events of the same name and merges them into data; use with ``yield from``.
+
+    Dictionary event data is merged in the order the events were received, so
+    later events win; other values are stored under the event name. Claim-check
+    references in the event data are merged as is, for the activities that read
+    them. The events are recorded as one event response in the activity history.
+
+    Args:
+        ctx: The workflow context
+        data: Workflow data the event data is merged into
+        name: Name of the event
+        timeout: How long to wait for the first event; None waits indefinitely
+        max_events: Events merged at most; further events stay queued for the next wait
+
+    Returns:
+        The number of events received, 0 if the wait timed out
+    """
+    max_events = max_events or int(os.getenv("WORKFLOW_EVENT_COALESCE_MAX", "100"))
+    try:
+        received = [(yield ctx.wait_for_external_event(name, timeout=timeout))]
+    except TimeoutError:
+        return 0
+
+    while len(received) < max_events:
+        # A zero timeout takes an event that was already received, or fails without waiting
+        queued = ctx.wait_for_external_event(name, timeout=timedelta(0))
+        if not queued.is_complete or queued.is_failed:
+            break
+        received.append(queued.get_result())
+
+    update: Dict[str, Any] = {}
+    for payload in received:
+        event_data = _event_data(payload)
+        if isinstance(event_data, dict):
+            update.update(event_data)
+        elif event_data is not None:
+            update[name] = event_data
+    data.add_event_response(name, ctx.current_utc_datetime, update)
+    return len(received)
@@ -0,0 +1,633 @@
+"""
+In-Process Fake Dapr Workflow Runtime
+
+This module provides an in-memory stand-in for the Dapr workflow runtime and
+client, so workflows can be executed and measured without a sidecar or Redis.
+
+It follows the same execution model as the real engine:
+
+- The workflow generator is re-executed from the start on every step
+  ("episode"), replaying completed tasks from an in-memory history
+- Actions are matched to history entries by sequence number, and a mismatch
+  raises a NonDeterminismError just like the real engine
+- Recorded results are revealed step by step whenever the workflow waits on an
+  incomplete task, so a replay sees results in the order they were produced
+- ctx.is_replaying is True while history is replayed and turns False when the
+  workflow reaches results that were produced since the previous episode
+- Tasks are real durabletask tasks, so when_all/when_any behave as in production
+- A zero-timeout wait_for_external_event takes an event that was already raised
+  or fails right away, like the SDK's, and its outcome is recorded for replay
+- Activity inputs and outputs are round-tripped through the SDK's JSON encoding
+- Activity contexts carry a task execution ID that stays the same across
+  retries of one call, like the sidecar's
+- Registered workflows and activities (including activity_overrides) get the
+  same wrappers as with the SDK runtime (see wrap_registered in runtime.py):
+  projection, claim checks, compression, profiling and metrics
+
+The client-style methods (schedule_new_workflow, wait_for_workflow_start,
+wait_for_workflow_completion, get_workflow_state, raise_workflow_event,
+terminate_workflow) mirror the async DaprWorkflowClient, so tooling can run
+against either.
+
+USAGE:
+    runtime = FakeWorkflowRuntime(activity_overrides={"provision_equipment_activity": fast_activity})
+    instance_id = await runtime.schedule_new_workflow(employee_onboarding_workflow, input={"data": {}})
+    state = await runtime.wait_for_workflow_completion(instance_id)
+
+NOTE: Timers wait real time scaled by time_scale (0 fires them immediately).
+Retry policies are honoured with the same scaling applied to their delays.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from dapr.ext.workflow import WorkflowStatus
+from dapr.ext.workflow._durabletask import task
+from dapr.ext.workflow._durabletask.internal import protos as pb
+from dapr.ext.workflow._durabletask.internal import shared
+
+from .runtime import RegistrationKind, wrap_registered
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (WorkflowStatus.COMPLETED, WorkflowStatus.FAILED, WorkflowStatus.TERMINATED)
+
+
+class NonDeterminismError(Exception):
+    """Raised when a replayed workflow schedules different actions than its history."""
+
+
+class ActionKind:
+    """History action kinds enumeration"""
+    ACTIVITY = "activity"
+    TIMER = "timer"
+    EVENT = "event"
+    CHILD_WORKFLOW = "child_workflow"
+
+
+@dataclass(slots=True)
+class HistoryEvent:
+    """A completed action in the fake history."""
+    sequence: int
+    kind: str
+    name: str
+    step: int
+    completed_at: datetime
+    result: Optional[str] = None
+    failure: Optional[Tuple[str, str]] = None
+
+
+@dataclass(slots=True)
+class FailureDetails:
+    """Failure information of a failed workflow."""
+    message: str
+    error_type: str
+    stack_trace: Optional[str] = None
+
+
+@dataclass
+class FakeWorkflowState:
+    """Snapshot of a fake workflow instance, shaped like the SDK's WorkflowState."""
+    instance_id: str
+    name: str
+    runtime_status: WorkflowStatus
+    created_at: datetime
+    last_updated_at: datetime
+    serialized_input: Optional[str] = None
+    serialized_output: Optional[str] = None
+    serialized_custom_status: Optional[str] = None
+    failure_details: Optional[FailureDetails] = None
+
+
+@dataclass
+class InstanceMetrics:
+    """Execution measurements of a fake workflow instance."""
+    episodes: int = 0
+    generations: int = 1
+    orchestration_seconds: float = 0.0
+    last_episode_seconds: float = 0.0
+    activity_calls: int = 0
+    scheduled_at: float = field(default_factory=time.perf_counter)
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the instance metrics to a dictionary."""
+        return {
+            'episodes': self.episodes,
+            'generations': self.generations,
+            'orchestrationSeconds': self.orchestration_seconds,
+            'lastEpisodeSeconds': self.last_episode_seconds,
+            'activityCalls': self.activity_calls,
+            'scheduleToStartSeconds': (self.started_at - self.scheduled_at) if self.started_at else None,
+            'startToCompleteSeconds': (
+                self.completed_at - self.started_at if self.started_at and self.completed_at else None
+            )
+        }
+
+
+@dataclass(slots=True)
+class FakeActivityContext:
+    """Activity context passed to activities run by the fake runtime."""
+    workflow_id: str
+    task_id: int
+    # Stable across retries of the call, like the sidecar's task execution ID
+    task_execution_id: str = ""
+
+
+class _Instance:
+    """Mutable state of one fake workflow instance."""
+
+    def __init__(self, instance_id: str, name: str, workflow: Callable, serialized_input: Optional[str]):
+        now = datetime.now(timezone.utc)
+        self.instance_id = instance_id
+        self.name = name
+        self.workflow = workflow
+        self.serialized_input = serialized_input
+        self.status = WorkflowStatus.PENDING
+        self.created_at = now
+        self.last_updated_at = now
+        self.serialized_output: Optional[str] = None
+        self.custom_status: Optional[str] = None
+        self.failure: Optional[FailureDetails] = None
+        self.error: Optional[Exception] = None
+        self.history: Dict[int, HistoryEvent] = {}
+        self.step = 0
+        self.step_times: List[datetime] = [now]
+        self.inflight: Dict[int, asyncio.Task] = {}
+        self.event_waiters: Dict[int, str] = {}
+        self.event_buffer: Dict[str, Deque[Any]] = {}
+        self.wakeup = asyncio.Event()
+        self.started = asyncio.Event()
+        self.done = asyncio.Event()
+        self.runner: Optional[asyncio.Task] = None
+        self.metrics = InstanceMetrics()
+
+    def reset_for_continue_as_new(self, serialized_input: Optional[str]) -> None:
+        self.serialized_input = serialized_input
+        self.history = {}
+        self.step = 0
+        self.step_times = [datetime.now(timezone.utc)]
+        self.event_waiters = {}
+        self.metrics.generations += 1
+
+    def state(self, fetch_payloads: bool = True) -> FakeWorkflowState:
+        return FakeWorkflowState(
+            instance_id=self.instance_id,
+            name=self.name,
+            runtime_status=self.status,
+            created_at=self.created_at,
+            last_updated_at=self.last_updated_at,
+            serialized_input=self.serialized_input if fetch_payloads else None,
+            serialized_output=self.serialized_output if fetch_payloads else None,
+            serialized_custom_status=self.custom_status if fetch_payloads else None,
+            failure_details=self.failure,
+        )
+
+
+class FakeWorkflowContext:
+    """In-memory stand-in for DaprWorkflowContext used during one episode."""
+
+    def __init__(self, runtime: "FakeWorkflowRuntime", instance: _Instance):
+        self._runtime = runtime
+        self._instance = instance
+        self._sequence = 0
+        self._is_replaying = instance.step > 0
+        self._current_utc_datetime = instance.step_times[0]
+        self._visible_step = 0
+        self._deferred: Dict[int, List[Tuple[task.CompletableTask, HistoryEvent]]] = {}
+        self._new_input: Any = None
+        self._continued_as_new = False
+        self.pending_actions: List[Tuple[int, str, str, Callable[[], Any]]] = []
+
+    @property
+    def instance_id(self) -> str:
+        return self._instance.instance_id
+
+    @property
+    def current_utc_datetime(self) -> datetime:
+        return self._current_utc_datetime
+
+    @property
+    def is_replaying(self) -> bool:
+        return self._is_replaying
+
+    def set_custom_status(self, custom_status: str) -> None:
+        self._instance.custom_status = custom_status
+
+    def _schedule(self, kind: str, name: str, start: Callable[[], Any], completable: task.CompletableTask) -> task.CompletableTask:
+        sequence = self._sequence
+        self._sequence += 1
+        event = self._instance.history.get(sequence)
+        if event is not None:
+            if event.kind != kind or event.name != name:
+                raise NonDeterminismError(
+                    f"Action {sequence} was {event.kind} '{event.name}' in history but replay scheduled {kind} '{name}'"
+                )
+            if event.step <= self._visible_step:
+                self._apply(completable, event)
+            else:
+                self._deferred.setdefault(event.step, []).append((completable, event))
+        elif sequence not in self._instance.inflight and sequence not in self._instance.event_waiters:
+            self.pending_actions.append((sequence, kind, name, start))
+        return completable
+
+    @staticmethod
+    def _apply(completable: task.CompletableTask, event: HistoryEvent) -> None:
+        if event.failure is not None:
+            error_type, message = event.failure
+            completable.fail(message, pb.TaskFailureDetails(errorType=error_type, errorMessage=message))
+        else:
+            completable.complete(shared.from_json(event.result) if event.result is not None else None)
+
+    def _reveal_next_step(self) -> bool:
+        """Completes the tasks whose results were recorded in the next step; False if there are none."""
+        if not self._deferred:
+            return False
+        step = min(self._deferred)
+        self._visible_step = step
+        self._current_utc_datetime = self._instance.step_times[step]
+        # Results produced since the previous episode are new progress
+        if step >= self._instance.step:
+            self._is_replaying = False
+        for completable, event in self._deferred.pop(step):
+            self._apply(completable, event)
+        return True
+
+    def call_activity(self, activity: Union[Callable, str], *, input: Any = None, retry_policy: Any = None, app_id: Optional[str] = None) -> task.Task:
+        name, fn = self._runtime._resolve_activity(activity)
+        sequence = self._sequence
+        return self._schedule(
+            ActionKind.ACTIVITY, name,
+            lambda: self._runtime._execute_activity(self._instance, sequence, name, fn, input, retry_policy),
+            task.CompletableTask(),
+        )
+
+    def call_child_workflow(self, workflow: Union[Callable, str], *, input: Any = None, instance_id: Optional[str] = None, retry_policy: Any = None, app_id: Optional[str] = None) -> task.Task:
+        name, fn = self._runtime._resolve_workflow(workflow)
+        sequence = self._sequence
+        child_id = instance_id or f"{self._instance.instance_id}:{sequence:04d}"
+        return self._schedule(
+            ActionKind.CHILD_WORKFLOW, name,
+            lambda: self._runtime._execute_child_workflow(fn, name, input, child_id),
+            task.CompletableTask(),
+        )
+
+    def create_timer(self, fire_at: Union[datetime, timedelta]) -> task.Task:
+        if isinstance(fire_at, timedelta):
+            delay = fire_at.total_seconds()
+        else:
+            delay = (fire_at - self._current_utc_datetime).total_seconds()
+        return self._schedule(
+            ActionKind.TIMER, "timer",
+            lambda: self._runtime._execute_timer(delay),
+            task.TimerTask(),
+        )
+
+    def wait_for_external_event(self, name: str, *, timeout: Optional[Union[datetime, timedelta]] = None) -> task.Task:
+        if isinstance(timeout, timedelta) and timeout == timedelta(0):
+            return self._take_received_event(name)
+        event_task = self._schedule(ActionKind.EVENT, name, None, task.CompletableTask())
+        if timeout is None:
+            return event_task
+        timer_task = self.create_timer(timeout)
+        return task.ExternalEventWithTimeoutTask(event_task, timer_task, name, timeout)
+
+    def _take_received_event(self, name: str) -> task.Task:
+        """Zero-timeout wait: completes with an event that was already raised, or fails without waiting."""
+        instance = self._instance
+        if self._sequence not in instance.history:
+            buffer = instance.event_buffer.get(name)
+            if buffer:
+                data = buffer.popleft()
+                self._runtime._record(instance, self._sequence, ActionKind.EVENT, name, shared.to_json(data) if data is not None else None, None)
+            else:
+                failure = ("TimeoutError", f"Wait for external event {name!r} canceled immediately due to zero timeout")
+                self._runtime._record(instance, self._sequence, ActionKind.EVENT, name, None, failure)
+        return self._schedule(ActionKind.EVENT, name, None, task.CompletableTask())
+
+    def continue_as_new(self, new_input: Any, *, save_events: bool = False) -> None:
+        self._new_input = new_input
+        self._continued_as_new = True
+
+    def is_patched(self, patch_name: str) -> bool:
+        return True
+
+
+class FakeWorkflowRuntime:
+    """
+    In-memory workflow runtime and client.
+
+    Args:
+        activity_overrides: Replacement callables for activities, keyed by activity name
+        time_scale: Multiplier applied to timer and retry delays (0 fires them immediately)
+    """
+
+    def __init__(self, activity_overrides: Optional[Dict[str, Callable]] = None, time_scale: float = 1.0):
+        self.time_scale = time_scale
+        self._activities: Dict[str, Callable] = {}
+        self._workflows: Dict[str, Callable] = {}
+        self._instances: Dict[str, _Instance] = {}
+        for name, fn in (activity_overrides or {}).items():
+            self.register_activity(fn, name=name)
+
+    # Registration -------------------------------------------------------------
+
+    def register_activity(self, fn: Callable, *, name: Optional[str] = None) -> None:
+        """Registers an activity so it can be called by name."""
+        self._register(RegistrationKind.ACTIVITY, fn, name)
+
+    def register_workflow(self, fn: Callable, *, name: Optional[str] = None) -> None:
+        """Registers a workflow so it can be called by name."""
+        self._register(RegistrationKind.WORKFLOW, fn, name)
+
+    @staticmethod
+    def _unwrap_registered(fn: Callable) -> Callable:
+        # Functions decorated with @wfr.activity/@wfr.workflow are replaced by an SDK
+        # stub that keeps the registered function in __wrapped__
+        if hasattr(fn, '_dapr_alternate_name') and hasattr(fn, '__wrapped__'):
+            return fn.__wrapped__
+        return fn
+
+    def _register(self, kind: str, fn: Callable, name: Optional[str]) -> Callable:
+        name = name or getattr(fn, '_dapr_alternate_name', fn.__name__)
+        registry = self._workflows if kind == RegistrationKind.WORKFLOW else self._activities
+        registry[name] = wrap_registered(kind, self._unwrap_registered(fn), name)
+        return registry[name]
+
+    def _resolve(self, target: Union[Callable, str], kind: str) -> Tuple[str, Callable]:
+        registry = self._workflows if kind == RegistrationKind.WORKFLOW else self._activities
+        if isinstance(target, str):
+            if target not in registry:
+                raise KeyError(f"'{target}' is not registered with the fake runtime")
+            return target, registry[target]
+        name = getattr(target, '_dapr_alternate_name', target.__name__)
+        # Functions called before they were registered are registered on first use, like the SDK runtime registers them all at start
+        return name, registry.get(name) or self._register(kind, target, name)
+
+    def _resolve_activity(self, activity: Union[Callable, str]) -> Tuple[str, Callable]:
+        return self._resolve(activity, RegistrationKind.ACTIVITY)
+
+    def _resolve_workflow(self, workflow: Union[Callable, str]) -> Tuple[str, Callable]:
+        return self._resolve(workflow, RegistrationKind.WORKFLOW)
+
+    # Action execution -----------------------------------------------------------
+
+    async def _execute_activity(self, instance: _Instance, sequence: int, name: str, fn: Callable, input: Any, retry_policy: Any) -> Any:
+        instance.metrics.activity_calls += 1
+        activity_input = shared.from_json(shared.to_json(input)) if input is not None else None
+        ctx = FakeActivityContext(
+            workflow_id=instance.instance_id,
+            task_id=sequence,
+            task_execution_id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{instance.instance_id}:{instance.metrics.generations}:{sequence}")),
+        )
+        attempts = retry_policy.max_number_of_attempts if retry_policy is not None else 1
+        delay = retry_policy.first_retry_interval.total_seconds() if retry_policy is not None else 0.0
+        for attempt in range(1, attempts + 1):
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    return await fn(ctx, activity_input)
+                return await asyncio.get_running_loop().run_in_executor(None, fn, ctx, activity_input)
+            except Exception:
+                if attempt >= attempts:
+                    raise
+                await asyncio.sleep(delay * self.time_scale)
+                delay *= retry_policy.backoff_coefficient or 1.0
+                if retry_policy.max_retry_interval is not None:
+                    delay = min(delay, retry_policy.max_retry_interval.total_seconds())
+
+    async def _execute_child_workflow(self, fn: Callable, name: str, input: Any, instance_id: str) -> Any:
+        await self._schedule(fn, name, input, instance_id)
+        state = await self.wait_for_workflow_completion(instance_id, timeout_in_seconds=None)
+        if state.runtime_status != WorkflowStatus.COMPLETED:
+            message = state.failure_details.message if state.failure_details else state.runtime_status.name
+            raise RuntimeError(f"Child workflow {instance_id} did not complete: {message}")
+        return shared.from_json(state.serialized_output) if state.serialized_output else None
+
+    async def _execute_timer(self, delay: float) -> None:
+        await asyncio.sleep(max(delay, 0.0) * self.time_scale)
+
+    # Episode execution ----------------------------------------------------------
+
+    def _run_episode(self, instance: _Instance) -> FakeWorkflowContext:
+        """Replays the workflow from the start against the current history."""
+        ctx = FakeWorkflowContext(self, instance)
+        started = time.perf_counter()
+        try:
+            workflow_input = shared.from_json(instance.serialized_input) if instance.serialized_input else None
+            workflow = instance.workflow(ctx, workflow_input)
+            if not inspect.isgenerator(workflow):
+                self._complete(instance, workflow, ctx)
+                return ctx
+
+            send_value, error = None, None
+            while True:
+                try:
+                    pending = workflow.throw(error) if error is not None else workflow.send(send_value)
+                except StopIteration as stop:
+                    self._complete(instance, stop.value, ctx)
+                    return ctx
+                if not isinstance(pending, task.Task):
+                    raise TypeError(f"Workflow yielded {type(pending).__name__}, expected a task")
+                while not pending.is_complete and ctx._reveal_next_step():
+                    pass
+                if not pending.is_complete:
+                    return ctx
+
+                if pending.is_failed:
+                    send_value, error = None, pending.get_exception()
+                else:
+                    send_value, error = pending.get_result(), None
+        except Exception as e:
+            instance.status = WorkflowStatus.FAILED
+            instance.failure = FailureDetails(message=str(e), error_type=type(e).__name__)
+            instance.error = e
+            return ctx
+        finally:
+            elapsed = time.perf_counter() - started
+            instance.metrics.episodes += 1
+            instance.metrics.orchestration_seconds += elapsed
+            instance.metrics.last_episode_seconds = elapsed
+
+    def _complete(self, instance: _Instance, output: Any, ctx: FakeWorkflowContext) -> None:
+        if ctx._continued_as_new:
+            instance.reset_for_continue_as_new(
+                shared.to_json(ctx._new_input) if ctx._new_input is not None else None
+            )
+            return
+        instance.serialized_output = shared.to_json(output) if output is not None else None
+        instance.status = WorkflowStatus.COMPLETED
+
+    def _start_actions(self, instance: _Instance, ctx: FakeWorkflowContext) -> None:
+        for sequence, kind, name, start in ctx.pending_actions:
+            if kind == ActionKind.EVENT:
+                instance.event_waiters[sequence] = name
+                continue
+
+            async def run_action(sequence=sequence, kind=kind, name=name, start=start):
+                try:
+                    result = await start()
+                    return sequence, kind, name, shared.to_json(result) if result is not None else None, None
+                except Exception as e:
+                    return sequence, kind, name, None, (type(e).__name__, str(e))
+
+            instance.inflight[sequence] = asyncio.create_task(run_action())
+
+    def _record(self, instance: _Instance, sequence: int, kind: str, name: str, result: Optional[str], failure: Optional[Tuple[str, str]]) -> None:
+        instance.history[sequence] = HistoryEvent(
+            sequence=sequence, kind=kind, name=name, step=instance.step,
+            completed_at=instance.step_times[-1], result=result, failure=failure,
+        )
+
+    def _deliver_events(self, instance: _Instance) -> bool:
+        delivered = False
+        for sequence, name in sorted(instance.event_waiters.items()):
+            buffer = instance.event_buffer.get(name)
+            if buffer:
+                data = buffer.popleft()
+                del instance.event_waiters[sequence]
+                self._record(instance, sequence, ActionKind.EVENT, name, shared.to_json(data) if data is not None else None, None)
+                delivered = True
+        return delivered
+
+    async def _run_instance(self, instance: _Instance) -> None:
+        instance.status = WorkflowStatus.RUNNING
+        instance.metrics.started_at = time.perf_counter()
+        instance.started.set()
+        try:
+            while instance.status == WorkflowStatus.RUNNING:
+                generation = instance.metrics.generations
+                ctx = self._run_episode(instance)
+                if instance.status != WorkflowStatus.RUNNING or instance.metrics.generations != generation:
+                    continue
+                self._start_actions(instance, ctx)
+
+                # Wait for the next completion, then record everything that finished
+                instance.wakeup.clear()
+                new_step_time = datetime.now(timezone.utc)
+                if not self._has_deliverable_events(instance):
+                    waiter = asyncio.create_task(instance.wakeup.wait())
+                    try:
+                        await asyncio.wait([waiter, *instance.inflight.values()], return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        waiter.cancel()
+                    new_step_time = datetime.now(timezone.utc)
+                if instance.status != WorkflowStatus.RUNNING:
+                    break
+                instance.step += 1
+                instance.step_times.append(new_step_time)
+                for sequence, action in list(instance.inflight.items()):
+                    if action.done():
+                        del instance.inflight[sequence]
+                        self._record(instance, *action.result())
+                self._deliver_events(instance)
+        finally:
+            for action in instance.inflight.values():
+                action.cancel()
+            instance.inflight.clear()
+            instance.last_updated_at = datetime.now(timezone.utc)
+            instance.metrics.completed_at = time.perf_counter()
+            instance.done.set()
+
+    @staticmethod
+    def _has_deliverable_events(instance: _Instance) -> bool:
+        return any(instance.event_buffer.get(name) for name in instance.event_waiters.values())
+
+    # Client API -------------------------------------------------------------
+
+    async def _schedule(self, fn: Callable, name: str, input: Any, instance_id: Optional[str]) -> str:
+        instance_id = instance_id or uuid.uuid4().hex
+        existing = self._instances.get(instance_id)
+        if existing is not None and existing.status not in TERMINAL_STATUSES:
+            raise ValueError(f"Workflow instance {instance_id} already exists")
+        instance = _Instance(instance_id, name, fn, shared.to_json(input) if input is not None else None)
+        self._instances[instance_id] = instance
+        instance.runner = asyncio.create_task(self._run_instance(instance))
+        return instance_id
+
+    async def schedule_new_workflow(self, workflow: Union[Callable, str], *, input: Any = None, instance_id: Optional[str] = None, start_at: Optional[datetime] = None) -> str:
+        """Schedules a new workflow instance and returns its instance ID."""
+        name, fn = self._resolve_workflow(workflow)
+        return await self._schedule(fn, name, input, instance_id)
+
+    async def get_workflow_state(self, instance_id: str, *, fetch_payloads: bool = True) -> Optional[FakeWorkflowState]:
+        """Returns the current state of a workflow instance, or None if it does not exist."""
+        instance = self._instances.get(instance_id)
+        return instance.state(fetch_payloads) if instance is not None else None
+
+    async def wait_for_workflow_start(self, instance_id: str, *, fetch_payloads: bool = False, timeout_in_seconds: Optional[float] = 60) -> FakeWorkflowState:
+        """Waits until a workflow instance has started running."""
+        instance = self._instances[instance_id]
+        await asyncio.wait_for(instance.started.wait(), timeout=timeout_in_seconds)
+        return instance.state(fetch_payloads)
+
+    async def wait_for_workflow_completion(self, instance_id: str, *, fetch_payloads: bool = True, timeout_in_seconds: Optional[float] = 60) -> FakeWorkflowState:
+        """Waits until a workflow instance reaches a terminal state."""
+        instance = self._instances[instance_id]
+        await asyncio.wait_for(instance.done.wait(), timeout=timeout_in_seconds)
+        return instance.state(fetch_payloads)
+
+    async def raise_workflow_event(self, instance_id: str, event_name: str, *, data: Any = None) -> None:
+        """Delivers an external event to a workflow instance."""
+        instance = self._instances[instance_id]
+        instance.event_buffer.setdefault(event_name, deque()).append(data)
+        instance.wakeup.set()
+
+    async def terminate_workflow(self, instance_id: str, *, output: Any = None) -> None:
+        """Terminates a running workflow instance."""
+        instance = self._instances[instance_id]
+        if instance.status in TERMINAL_STATUSES:
+            return
+        instance.status = WorkflowStatus.TERMINATED
+        instance.serialized_output = shared.to_json(output) if output is not None else None
+        instance.wakeup.set()
+
+    async def purge_workflow(self, instance_id: str, recursive: bool = True) -> None:
+        """Removes a terminal workflow instance from memory."""
+        instance = self._instances.get(instance_id)
+        if instance is not None and instance.status in TERMINAL_STATUSES:
+            del self._instances[instance_id]
+
+    # Measurement helpers ----------------------------------------------------
+
+    def instance_metrics(self, instance_id: str) -> InstanceMetrics:
+        """Returns the execution measurements of a workflow instance."""
+        return self._instances[instance_id].metrics
+
+    def history_length(self, instance_id: str) -> int:
+        """Returns the number of completed actions in the current history of an instance."""
+        return len(self._instances[instance_id].history)
+
+    def replay(self, instance_id: str) -> float:
+        """
+        Replays a completed workflow instance against its full history.
+
+        Returns:
+            The wall time of the replay in seconds
+
+        Raises:
+            NonDeterminismError: If the replay schedules different actions than the
+                history, or doesn't complete once the whole history is revealed
+            Exception: Any other error the workflow raised during the replay
+        """
+        instance = self._instances[instance_id]
+        if instance.status != WorkflowStatus.COMPLETED:
+            raise ValueError("Only completed workflow instances can be replayed")
+        replay_instance = _Instance(instance.instance_id, instance.name, instance.workflow, instance.serialized_input)
+        replay_instance.history = instance.history
+        replay_instance.step = instance.step + 1
+        replay_instance.step_times = instance.step_times + [instance.step_times[-1]]
+        replay_instance.status = WorkflowStatus.RUNNING
+        self._run_episode(replay_instance)
+        if replay_instance.error is not None:
+            raise replay_instance.error
+        if replay_instance.status != WorkflowStatus.COMPLETED:
+            raise NonDeterminismError(f"Replay of {instance_id} waits on a task that isn't in its history")
+        return replay_instance.metrics.last_episode_seconds
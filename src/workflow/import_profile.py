@@ -0,0 +1,168 @@
+"""
+Startup Import Profile and Budget for Python Dapr Workflow
+
+Until the app module is imported, uvicorn can't serve /healthz, so import time
+is part of every cold start. This module measures it in fresh interpreters with
+python -X importtime and reports where the time goes:
+
+- total: Median wall time to import the module over several runs
+- packages: Self time summed per top-level package (fastapi, pydantic, workflow, ...)
+- modules: The slowest modules by cumulative time
+
+BUDGET:
+The check fails (exit status 1) when the median import time is above the budget
+or when a module that should only load once the workflow runtime starts is
+imported at startup. The default deferred modules are the Dapr SDK's client and
+workflow packages, the gRPC and aiohttp stacks and the app's workflow module;
+they are loaded by workflow_runtime.start() (see runtime.py).
+
+USAGE (from the src directory):
+    python -m workflow.import_profile                      # Report for 'import app'
+    python -m workflow.import_profile --budget-ms 750      # Fail above 750 ms or on deferred imports
+    python -m workflow.import_profile --module workflow.workflow --runs 3 --json
+
+Or use the make targets 'make import-profile' and 'make import-budget'.
+
+NOTE: Import times are machine specific. Set the budget on the machine that
+runs the check (IMPORT_BUDGET_MS for the make target).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the app must not import before the workflow runtime starts
+DEFERRED_MODULES = (
+    "dapr.clients",
+    "dapr.ext.workflow",
+    "dapr.ext.fastapi",
+    "grpc",
+    "aiohttp",
+    "workflow.workflow",
+)
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'deferred': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+@dataclass(slots=True)
+class ImportTiming:
+    """Self and cumulative import time of one module, in microseconds."""
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class ImportProfile:
+    """Import time measurements of a module over several runs."""
+    module: str
+    run_seconds: List[float]
+    timings: List[ImportTiming] = field(default_factory=list)
+    deferred_imported: List[str] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return statistics.median(self.run_seconds)
+
+    def packages(self, limit: int) -> Dict[str, float]:
+        """Returns self time in milliseconds summed per top-level package, slowest first."""
+        totals: Dict[str, int] = {}
+        for timing in self.timings:
+            package = timing.name.split('.')[0]
+            totals[package] = totals.get(package, 0) + timing.self_us
+        return {name: us / 1000 for name, us in sorted(totals.items(), key=lambda item: -item[1])[:limit]}
+
+    def slowest(self, limit: int) -> List[ImportTiming]:
+        return sorted(self.timings, key=lambda timing: -timing.cumulative_us)[:limit]
+
+    def to_dict(self, limit: int = 15) -> Dict[str, Any]:
+        """Converts the import profile to a dictionary."""
+        return {
+            'module': self.module,
+            'seconds': self.seconds,
+            'runSeconds': self.run_seconds,
+            'packagesMs': self.packages(limit),
+            'modulesMs': {t.name: {'self': t.self_us / 1000, 'cumulative': t.cumulative_us / 1000} for t in self.slowest(limit)},
+            'deferredImported': self.deferred_imported
+        }
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Parses the stderr of python -X importtime."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def profile_imports(module: str = "app", runs: int = 5, deferred: tuple = DEFERRED_MODULES) -> ImportProfile:
+    """Imports module in runs fresh interpreters and returns the measurements."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    profile = ImportProfile(module, [])
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, deferred=deferred)],
+            cwd=SRC_DIR, env=env, capture_output=True, text=True, check=False,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        profile.run_seconds.append(result['seconds'])
+        profile.deferred_imported = result['deferred']
+        # Keep the per-module timings of the last run; earlier runs warm the file system cache
+        profile.timings = parse_importtime(completed.stderr)
+    return profile
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile startup import time and check it against a budget")
+    parser.add_argument("--module", default="app", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure; the median is reported")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the median import time is higher")
+    parser.add_argument("--allow-deferred", action="store_true", help="Don't fail when deferred modules are imported")
+    parser.add_argument("--top", type=int, default=15, help="Packages and modules to list")
+    parser.add_argument("--json", action="store_true", help="Print the profile as JSON")
+    args = parser.parse_args(argv)
+
+    profile = profile_imports(args.module, args.runs)
+    if args.json:
+        print(json.dumps(profile.to_dict(args.top), indent=2))
+    else:
+        runs = ", ".join(f"{seconds * 1000:.0f}" for seconds in profile.run_seconds)
+        print(f"import {args.module}: {profile.seconds * 1000:.1f} ms median ({runs} ms)")
+        print(f"\n{'package':<32} {'self ms':>10}")
+        for name, ms in profile.packages(args.top).items():
+            print(f"{name:<32} {ms:10.1f}")
+        print(f"\n{'module':<48} {'self ms':>10} {'cumul. ms':>10}")
+        for timing in profile.slowest(args.top):
+            print(f"{timing.name:<48} {timing.self_us / 1000:10.1f} {timing.cumulative_us / 1000:10.1f}")
+
+    failures = []
+    if args.budget_ms is not None and profile.seconds * 1000 > args.budget_ms:
+        failures.append(f"import {args.module} took {profile.seconds * 1000:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if profile.deferred_imported and not args.allow_deferred:
+        failures.append(f"import {args.module} loads modules that should be deferred: {', '.join(profile.deferred_imported)}")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
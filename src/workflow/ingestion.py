@@ -0,0 +1,265 @@
+"""
+Pub/Sub-Driven Workflow Ingestion for Python Dapr Workflow
+
+This module starts workflow instances from messages delivered by a Dapr pub/sub
+subscription, so producers can publish start requests instead of calling the
+HTTP API one at a time:
+
+1. Bulk delivery: the subscription uses Dapr bulk subscribe, so the sidecar
+   delivers up to max_messages messages per request
+2. Bounded in-flight window: at most window workflow starts are in flight; the
+   remaining messages wait for a free slot, which holds the sidecar's delivery
+   and slows consumption to the rate the workflow runtime can absorb
+3. Dedupe on message ID: the CloudEvent ID is used as the workflow instance ID,
+   and recently seen IDs are remembered, so redelivered messages don't start a
+   second instance
+4. Admission control: each start is admitted by the shared admission
+   controller; a rejected start waits for its retry-after time when that fits
+   in max_wait_seconds
+5. Retry instead of fail: messages that can't get a slot or be admitted within
+   max_wait_seconds, or whose start fails transiently, are returned as RETRY and
+   redelivered later; only malformed messages are dropped
+
+USAGE:
+    subscriptions = PubSubSubscriptions(app)
+    ingestor = WorkflowIngestor("employee_onboarding_workflow")
+
+    @subscriptions.subscribe(pubsub="pubsub", topic="onboarding-requests", route="/events/onboarding-requests", bulk=True)
+    async def ingest(request: Request):
+        return {"statuses": await ingestor.handle_entries((await request.json())["entries"])}
+
+CONFIGURATION (environment variables):
+- WORKFLOW_INGEST_PUBSUB: Pub/sub component name (default: pubsub)
+- WORKFLOW_INGEST_TOPIC: Topic with workflow start requests (default: onboarding-requests)
+- WORKFLOW_INGEST_WINDOW: Maximum workflow starts in flight (default: 64)
+- WORKFLOW_INGEST_MAX_WAIT: Seconds a message waits for a slot before it is retried (default: 30)
+- WORKFLOW_INGEST_DEDUPE_SIZE: Message IDs remembered for deduplication (default: 100000)
+- WORKFLOW_INGEST_BULK_MAX_MESSAGES: Maximum messages per bulk delivery (default: 100)
+- WORKFLOW_INGEST_BULK_MAX_AWAIT_MS: Milliseconds the sidecar waits to fill a bulk delivery (default: 100)
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .admission import admission_controller
+from .claim_check import claim_check
+from .client import WorkflowClientPool, workflow_client_pool
+from .serialization import encode_payload
+
+logger = logging.getLogger(__name__)
+
+
+class IngestStatus:
+    """Message statuses understood by the Dapr sidecar"""
+    SUCCESS = "SUCCESS"
+    RETRY = "RETRY"
+    DROP = "DROP"
+
+
+@dataclass
+class IngestStats:
+    """Counters of ingested messages."""
+    received: int = 0
+    started: int = 0
+    duplicates: int = 0
+    retried: int = 0
+    dropped: int = 0
+    rejected: int = 0
+    waiting: int = 0
+    in_flight: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the ingestion counters to a dictionary."""
+        return {
+            'received': self.received,
+            'started': self.started,
+            'duplicates': self.duplicates,
+            'retried': self.retried,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+            'waiting': self.waiting,
+            'inFlight': self.in_flight
+        }
+
+
+class PubSubSubscriptions:
+    """
+    Dapr programmatic subscriptions served at GET /dapr/subscribe.
+
+    Does what dapr.ext.fastapi.DaprApp does for subscriptions, plus bulk
+    subscribe, without importing the SDK's FastAPI extension, which loads the
+    actor and HTTP client stacks at startup.
+
+    Args:
+        app: The FastAPI app the subscription routes are added to
+    """
+
+    def __init__(self, app: Any):
+        self._app = app
+        self._subscriptions: List[Dict[str, Any]] = []
+        app.add_api_route('/dapr/subscribe', self.subscriptions, methods=['GET'], tags=['PubSub'])
+
+    def subscriptions(self) -> List[Dict[str, Any]]:
+        return self._subscriptions
+
+    def subscribe(
+        self,
+        pubsub: str,
+        topic: str,
+        route: str,
+        bulk: bool = False,
+        max_messages: Optional[int] = None,
+        max_await_ms: Optional[int] = None,
+    ):
+        """
+        Decorator that subscribes a handler to a topic.
+
+        Args:
+            pubsub: Pub/sub component name
+            topic: Topic to subscribe to
+            route: HTTP route the sidecar delivers messages to
+            bulk: Deliver messages in bulk
+            max_messages: Maximum messages per bulk delivery
+            max_await_ms: Milliseconds the sidecar waits to fill a bulk delivery
+        """
+        def decorator(fn: Callable) -> Callable:
+            self._app.add_api_route(route, fn, methods=['POST'], tags=['PubSub'])
+            subscription: Dict[str, Any] = {'pubsubname': pubsub, 'topic': topic, 'route': route, 'metadata': {}}
+            if bulk:
+                subscription['bulkSubscribe'] = {
+                    'enabled': True,
+                    'maxMessagesCount': max_messages or int(os.getenv("WORKFLOW_INGEST_BULK_MAX_MESSAGES", "100")),
+                    'maxAwaitDurationMs': max_await_ms or int(os.getenv("WORKFLOW_INGEST_BULK_MAX_AWAIT_MS", "100")),
+                }
+            self._subscriptions.append(subscription)
+            return fn
+
+        return decorator
+
+
+class WorkflowIngestor:
+    """
+    Starts one workflow instance per pub/sub message with bounded concurrency.
+
+    Args:
+        workflow: The workflow function or registered name to start
+        client_pool: Pool of workflow clients used for starts
+        window: Maximum workflow starts in flight
+        max_wait_seconds: Seconds a message waits for a slot before it is retried
+        dedupe_size: Message IDs remembered for deduplication
+    """
+
+    def __init__(
+        self,
+        workflow: Union[Callable, str],
+        client_pool: Optional[WorkflowClientPool] = None,
+        window: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None,
+        dedupe_size: Optional[int] = None,
+    ):
+        self.workflow = workflow
+        self.workflow_name = workflow if isinstance(workflow, str) else workflow.__name__
+        self.client_pool = client_pool or workflow_client_pool
+        self.window = window or int(os.getenv("WORKFLOW_INGEST_WINDOW", "64"))
+        self.max_wait_seconds = max_wait_seconds or float(os.getenv("WORKFLOW_INGEST_MAX_WAIT", "30"))
+        self.dedupe_size = dedupe_size or int(os.getenv("WORKFLOW_INGEST_DEDUPE_SIZE", "100000"))
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.counters = IngestStats()
+
+    def _remember(self, message_id: str) -> None:
+        self._seen[message_id] = None
+        self._seen.move_to_end(message_id)
+        while len(self._seen) > self.dedupe_size:
+            self._seen.popitem(last=False)
+
+    async def handle_entries(self, entries: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Starts a workflow per bulk entry and returns the per-entry statuses for the sidecar."""
+        statuses = await asyncio.gather(*(self.handle_event(entry.get('event'), entry.get('entryId')) for entry in entries))
+        return [{'entryId': entry.get('entryId'), 'status': status} for entry, status in zip(entries, statuses)]
+
+    async def handle_event(self, event: Any, entry_id: Optional[str] = None) -> str:
+        """Starts a workflow for a single CloudEvent and returns its status for the sidecar."""
+        self.counters.received += 1
+        message_id = event.get('id') if isinstance(event, dict) else None
+        data = event.get('data') if isinstance(event, dict) else None
+        if not message_id or not isinstance(data, dict):
+            logger.warning(f"Dropping malformed workflow start message {message_id or entry_id}")
+            self.counters.dropped += 1
+            return IngestStatus.DROP
+
+        if message_id in self._seen:
+            self.counters.duplicates += 1
+            return IngestStatus.SUCCESS
+        # Duplicates delivered while the first start is still in flight share its outcome
+        pending = self._pending.get(message_id)
+        if pending is not None:
+            self.counters.duplicates += 1
+            return await asyncio.shield(pending)
+
+        tenant = event.get('tenant') or event.get('tenantid')
+        pending = asyncio.ensure_future(self._start(message_id, data, tenant))
+        self._pending[message_id] = pending
+        try:
+            return await asyncio.shield(pending)
+        finally:
+            self._pending.pop(message_id, None)
+
+    async def _admit(self, tenant: Optional[str], deadline: float) -> bool:
+        """Waits until the start is admitted, or returns False if that would pass the deadline."""
+        loop = asyncio.get_running_loop()
+        while True:
+            decision = admission_controller.admit(self.workflow_name, tenant=tenant)
+            if decision.admitted:
+                return True
+            if loop.time() + decision.retry_after > deadline:
+                return False
+            await asyncio.sleep(decision.retry_after)
+
+    async def _start(self, message_id: str, data: Dict[str, Any], tenant: Optional[str] = None) -> str:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.window)
+
+        # Waiting here holds the delivery, so the sidecar slows down when the runtime is saturated
+        deadline = asyncio.get_running_loop().time() + self.max_wait_seconds
+        self.counters.waiting += 1
+        try:
+            if not await self._admit(tenant, deadline):
+                self.counters.rejected += 1
+                self.counters.retried += 1
+                return IngestStatus.RETRY
+            await asyncio.wait_for(self._slots.acquire(), timeout=max(0.0, deadline - asyncio.get_running_loop().time()))
+        except asyncio.TimeoutError:
+            self.counters.retried += 1
+            return IngestStatus.RETRY
+        finally:
+            self.counters.waiting -= 1
+
+        self.counters.in_flight += 1
+        try:
+            workflow_input = encode_payload(await claim_check.offload_input_async(data), name=self.workflow_name)
+            await self.client_pool.get().schedule_new_workflow(self.workflow, input=workflow_input, instance_id=message_id)
+        except Exception as e:
+            if "already exists" in str(e):
+                self._remember(message_id)
+                self.counters.duplicates += 1
+                return IngestStatus.SUCCESS
+            logger.warning(f"Starting workflow for message {message_id} failed, retrying later: {e}")
+            self.counters.retried += 1
+            return IngestStatus.RETRY
+        finally:
+            self.counters.in_flight -= 1
+            self._slots.release()
+
+        self._remember(message_id)
+        self.counters.started += 1
+        return IngestStatus.SUCCESS
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns counters of received, started, duplicate, retried and dropped messages."""
+        return {**self.counters.to_dict(), 'window': self.window}
@@ -0,0 +1,321 @@
+"""
+Workflow Load Generator for Python Dapr Workflow
+
+This module starts many workflow instances and measures how long they take end
+to end, so capacity can be checked before a release. It runs against either:
+
+- fake: the in-process fake runtime (see fake_runtime.py); no sidecar needed
+- sidecar: a running Dapr sidecar and app, through the shared workflow client pool
+
+Load is generated in one of two modes:
+
+- Rate (open loop): instances are started at a fixed rate, whether or not earlier
+  instances have finished, which shows how latency grows as the rate approaches
+  capacity
+- Concurrency (closed loop): a fixed number of instances are kept in flight, and
+  a new one is started as soon as one finishes, which finds the sustainable
+  throughput
+
+LATENCIES:
+- schedule_to_start: From the start request until the instance is running
+- start_to_complete: From running until the instance reaches a terminal state
+
+Latencies are measured from the client, so with the sidecar they include the
+time until the client observes each state change.
+
+The fake target replaces the state stores of the activity cache and the
+claim-check store with in-memory stores, so --real-activities runs the app's
+activities without a sidecar.
+
+USAGE (from the src directory):
+    python -m workflow.loadtest --count 500 --concurrency 50                # Fake runtime, instant activities
+    python -m workflow.loadtest --count 500 --rate 20 --real-activities     # Fake runtime, the app's activities
+    python -m workflow.loadtest --target sidecar --duration 60 --rate 10    # Against a running app and sidecar
+    python -m workflow.loadtest --count 200 --concurrency 20 --max-error-rate 0.01
+
+Or use the make target 'make loadtest' (LOADTEST_TARGET=sidecar, LOADTEST_ARGS="...").
+The command exits with status 1 when the error rate exceeds --max-error-rate.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .benchmarks import noop_activity
+from .fake_runtime import FakeWorkflowRuntime
+from .structured_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+class Target:
+    """Where the load is sent enumeration"""
+    FAKE = "fake"
+    SIDECAR = "sidecar"
+
+
+class Outcome:
+    """Outcome of a single load test instance enumeration"""
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SCHEDULE_ERROR = "schedule_error"
+    TIMEOUT = "timeout"
+
+
+@dataclass(slots=True)
+class Sample:
+    """Timings of a single workflow instance, in seconds since the load test began."""
+    scheduled_at: float
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
+    outcome: str = Outcome.COMPLETED
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Returns the p-th percentile of values by nearest rank, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+@dataclass
+class LoadTestReport:
+    """Aggregated results of a load test."""
+    target: str
+    workflow: str
+    elapsed_seconds: float
+    samples: List[Sample] = field(default_factory=list)
+
+    def _latencies(self, kind: str) -> List[float]:
+        if kind == 'scheduleToStart':
+            return [s.started_at - s.scheduled_at for s in self.samples if s.started_at is not None]
+        return [
+            s.completed_at - s.started_at
+            for s in self.samples
+            if s.outcome == Outcome.COMPLETED and s.started_at is not None and s.completed_at is not None
+        ]
+
+    def count(self, outcome: str) -> int:
+        return sum(1 for s in self.samples if s.outcome == outcome)
+
+    @property
+    def error_rate(self) -> float:
+        total = len(self.samples)
+        return (total - self.count(Outcome.COMPLETED)) / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the load test report to a dictionary."""
+        latencies = {}
+        for kind in ('scheduleToStart', 'startToComplete'):
+            values = self._latencies(kind)
+            latencies[kind] = {f'p{p}': percentile(values, p) for p in PERCENTILES}
+            latencies[kind]['max'] = max(values) if values else None
+        errors: Dict[str, int] = {}
+        for s in self.samples:
+            if s.error:
+                errors[s.error] = errors.get(s.error, 0) + 1
+        completed = self.count(Outcome.COMPLETED)
+        return {
+            'target': self.target,
+            'workflow': self.workflow,
+            'instances': len(self.samples),
+            'completed': completed,
+            'failed': self.count(Outcome.FAILED),
+            'scheduleErrors': self.count(Outcome.SCHEDULE_ERROR),
+            'timeouts': self.count(Outcome.TIMEOUT),
+            'errorRate': self.error_rate,
+            'elapsedSeconds': self.elapsed_seconds,
+            'startsPerSecond': len(self.samples) / self.elapsed_seconds if self.elapsed_seconds else 0.0,
+            'completionsPerSecond': completed / self.elapsed_seconds if self.elapsed_seconds else 0.0,
+            'latencySeconds': latencies,
+            'errors': dict(sorted(errors.items(), key=lambda item: -item[1])[:10])
+        }
+
+
+class LoadGenerator:
+    """
+    Starts workflow instances at a rate or concurrency and records their latencies.
+
+    Args:
+        client: A DaprWorkflowClient or FakeWorkflowRuntime
+        workflow: The workflow function or registered name to start
+        workflow_input: Input passed to every instance
+        timeout_seconds: Seconds to wait for each instance to start and to complete
+    """
+
+    def __init__(self, client: Any, workflow: Any, workflow_input: Any = None, timeout_seconds: float = 120):
+        self.client = client
+        self.workflow = workflow
+        self.workflow_input = workflow_input
+        self.timeout_seconds = timeout_seconds
+        self.samples: List[Sample] = []
+        self._began = time.perf_counter()
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._began
+
+    async def run_one(self) -> Sample:
+        """Starts one instance and waits until it has started and completed."""
+        sample = Sample(scheduled_at=self._now())
+        self.samples.append(sample)
+        try:
+            instance_id = await self.client.schedule_new_workflow(self.workflow, input=self.workflow_input)
+        except Exception as e:
+            sample.outcome, sample.error = Outcome.SCHEDULE_ERROR, type(e).__name__
+            return sample
+
+        try:
+            await self.client.wait_for_workflow_start(instance_id, timeout_in_seconds=self.timeout_seconds)
+            sample.started_at = self._now()
+            state = await self.client.wait_for_workflow_completion(
+                instance_id, fetch_payloads=False, timeout_in_seconds=self.timeout_seconds
+            )
+            sample.completed_at = self._now()
+        except (asyncio.TimeoutError, TimeoutError):
+            sample.outcome, sample.error = Outcome.TIMEOUT, "Timeout"
+            return sample
+        except Exception as e:
+            sample.outcome, sample.error = Outcome.FAILED, type(e).__name__
+            return sample
+
+        if state is None:
+            sample.outcome, sample.error = Outcome.TIMEOUT, "Timeout"
+        elif state.runtime_status.name != "COMPLETED":
+            sample.outcome = Outcome.FAILED
+            sample.error = state.failure_details.error_type if state.failure_details else state.runtime_status.name
+        return sample
+
+    async def run_rate(self, rate: float, count: Optional[int], duration: Optional[float]) -> None:
+        """Starts instances at a fixed rate until count instances or duration seconds."""
+        tasks = []
+        interval = 1.0 / rate
+        started = 0
+        while (count is None or started < count) and (duration is None or self._now() < duration):
+            tasks.append(asyncio.ensure_future(self.run_one()))
+            started += 1
+            # Sleep until the next start is due, so slow starts don't lower the rate
+            await asyncio.sleep(max(0.0, started * interval - self._now()))
+        await asyncio.gather(*tasks)
+
+    async def run_concurrency(self, concurrency: int, count: Optional[int], duration: Optional[float]) -> None:
+        """Keeps concurrency instances in flight until count instances or duration seconds."""
+        remaining = [count]
+
+        async def worker():
+            while duration is None or self._now() < duration:
+                if remaining[0] is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                await self.run_one()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    def report(self, target: str, workflow_name: str) -> LoadTestReport:
+        return LoadTestReport(target, workflow_name, self._now(), self.samples)
+
+
+def _use_in_memory_stores() -> None:
+    """Points the shared activity cache and claim-check store at in-memory stores."""
+    from .activity_cache import activity_cache
+    from .claim_check import claim_check
+    from .state_store import InMemoryStateStore
+
+    activity_cache.store = InMemoryStateStore()
+    claim_check.store = InMemoryStateStore(max_entries=1_000_000)
+
+
+def _load_workflow(name: str) -> Any:
+    """Returns the workflow function with the given name from the app's workflow module."""
+    module = importlib.import_module(".workflow", __package__)
+    workflow = getattr(module, name, None)
+    if workflow is None:
+        raise SystemExit(f"Unknown workflow: {name}")
+    return workflow
+
+
+async def run_load_test(args: argparse.Namespace) -> LoadTestReport:
+    """Runs a load test as configured by the command line arguments."""
+    workflow_input = json.loads(args.input)
+    if args.target == Target.FAKE:
+        _use_in_memory_stores()
+        workflow = _load_workflow(args.workflow)
+        overrides = {} if args.real_activities else {
+            'prepare_paperwork_activity': noop_activity,
+            'provision_equipment_activity': noop_activity,
+        }
+        client = FakeWorkflowRuntime(activity_overrides=overrides, time_scale=1 if args.real_activities else 0)
+    else:
+        # Imported here so the fake target doesn't create sidecar clients
+        from .client import workflow_client_pool
+        workflow = args.workflow
+        client = workflow_client_pool.get()
+
+    generator = LoadGenerator(client, workflow, workflow_input, timeout_seconds=args.timeout)
+    count = args.count if args.count or args.duration else 100
+    if args.rate:
+        await generator.run_rate(args.rate, count, args.duration)
+    else:
+        await generator.run_concurrency(args.concurrency, count, args.duration)
+    return generator.report(args.target, args.workflow)
+
+
+def _format_seconds(value: Optional[float]) -> str:
+    return f"{value * 1000:10.1f}" if value is not None else f"{'-':>10}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Start workflow instances under load and report end-to-end latencies")
+    parser.add_argument("--target", choices=[Target.FAKE, Target.SIDECAR], default=Target.FAKE, help="Run against the in-process fake runtime or a running sidecar")
+    parser.add_argument("--workflow", default="employee_onboarding_workflow", help="Name of the workflow to start")
+    parser.add_argument("--input", default='{"data": {}}', help="JSON input passed to every instance")
+    parser.add_argument("--rate", type=float, help="Instances started per second (open loop)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Instances kept in flight when no rate is given (closed loop)")
+    parser.add_argument("--count", type=int, help="Total instances to start (default: 100 without --duration)")
+    parser.add_argument("--duration", type=float, help="Seconds to keep starting instances")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for each instance to start and to complete")
+    parser.add_argument("--real-activities", action="store_true", help="Run the app's activities with the fake runtime instead of instant ones")
+    parser.add_argument("--max-error-rate", type=float, help="Exit with status 1 when the error rate is higher")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    # Workflow logging would dominate the measurements
+    configure_logging(level="WARNING")
+
+    report = asyncio.run(run_load_test(args))
+    result = report.to_dict()
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        mode = f"rate {args.rate}/s" if args.rate else f"concurrency {args.concurrency}"
+        print(f"{result['workflow']} on {result['target']} ({mode}): {result['instances']} instances in {result['elapsedSeconds']:.1f}s, "
+              f"{result['completionsPerSecond']:.1f} completed/s")
+        print(f"{'latency (ms)':<20} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+        for kind, label in (('scheduleToStart', 'schedule-to-start'), ('startToComplete', 'start-to-complete')):
+            values = result['latencySeconds'][kind]
+            print(f"{label:<20} {_format_seconds(values['p50'])} {_format_seconds(values['p95'])} "
+                  f"{_format_seconds(values['p99'])} {_format_seconds(values['max'])}")
+        print(f"completed {result['completed']}, failed {result['failed']}, schedule errors {result['scheduleErrors']}, "
+              f"timeouts {result['timeouts']}, error rate {result['errorRate']:.2%}")
+        for error, occurrences in result['errors'].items():
+            print(f"  {error}: {occurrences}")
+
+    if args.max_error_rate is not None and report.error_rate > args.max_error_rate:
+        print(f"Error rate {report.error_rate:.2%} exceeds {args.max_error_rate:.2%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Prometheus Metrics for Python Dapr Workflow
+
+This module defines the workflow and activity metrics exposed by the /metrics
+endpoint, and the instrumentation that records them. Instrumentation is applied
+when a workflow or activity is registered with the shared workflow runtime (see
+runtime.py), so every function decorated with @wfr.workflow or @wfr.activity is
+measured without code changes.
+
+METRICS:
+- workflow_activity_duration_seconds{activity, outcome}: Activity execution time
+- workflow_activities_in_flight{activity}: Activities currently executing
+- workflow_duration_seconds{workflow, outcome}: End-to-end workflow latency, from the
+  orchestration start time to completion (per execution when continued as new)
+- workflow_executions_total{workflow, mode}: Orchestration episodes, where mode is
+  'new' for the first execution and 'replay' for each replay of the history
+- workflow_workflows_in_flight{workflow}: Workflows started but not completed, counted
+  by the worker that ran their first and last episode
+- workflow_payload_size_bytes{kind, name}: JSON size of workflow and activity inputs
+  and outputs
+- workflow_admission_decisions_total{workflow, reason}: Workflow starts admitted
+  (reason 'admitted') or rejected by admission control, by the limit that rejected them
+- workflow_admission_tokens{workflow}: Tokens left in the workflow type's rate limit bucket
+- workflow_admission_adaptive_rate: Current adaptive start rate limit per second
+- workflow_activity_retries_total{activity, error}: Activity attempts retried by workflows
+  (see resilience.py), by the error class of the failed attempt
+- workflow_activity_timeouts_total{activity}: Activity attempts that missed their deadline
+  (see activity_calls.py)
+- workflow_activity_hedges_total{activity, winner}: Hedged activity calls, by the attempt
+  whose result was used ('primary', 'hedge', or 'none' if all failed)
+- workflow_circuit_breaker_state{dependency}: 0 closed, 1 half-open, 2 open
+- workflow_circuit_breaker_transitions_total{dependency, state}: Breaker state changes
+- workflow_circuit_breaker_rejections_total{dependency}: Activity calls failed fast by an
+  open breaker
+- workflow_payload_compressed_total{name}: Payloads stored compressed, by workflow type
+  or activity name (see serialization.py)
+- workflow_payload_compression_raw_bytes_total{name} and
+  workflow_payload_compression_stored_bytes_total{name}: Size of compressed payloads
+  before and after compression; their quotient is the compression ratio
+
+Workflow metrics are only recorded outside of replay, so replays don't count
+the same start or completion twice.
+
+With supervised worker processes (see supervisor.py) the supervisor points
+PROMETHEUS_MULTIPROC_DIR at a shared directory before it starts the workers and
+the API process. Every process then writes its metrics to that directory
+(prometheus_client multiprocess mode) and /metrics on the API process reports
+them across all processes: counters and histograms are summed, and each gauge
+declares how the values of several processes combine. Compression counters are
+exported by workers with every heartbeat.
+
+CONFIGURATION (environment variables):
+- WORKFLOW_METRICS_ENABLED: Instrument registered workflows and activities (default: true)
+- PROMETHEUS_MULTIPROC_DIR: Directory shared by the processes in multiprocess mode (default:
+  unset, set by the supervisor)
+"""
+
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+from .serialization import compression_stats, to_json_bytes
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("WORKFLOW_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+WORKFLOW_DURATION_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 14400.0, 86400.0)
+SIZE_BUCKETS = tuple(64 * 4 ** i for i in range(10))  # 64 bytes to 16 MiB
+
+
+class Outcome:
+    """Metric outcome label values"""
+    SUCCESS = "success"
+    ERROR = "error"
+
+
+class PayloadKind:
+    """Payload size kind label values"""
+    WORKFLOW_INPUT = "workflow_input"
+    WORKFLOW_OUTPUT = "workflow_output"
+    ACTIVITY_INPUT = "activity_input"
+    ACTIVITY_OUTPUT = "activity_output"
+
+
+ACTIVITY_DURATION = Histogram(
+    "workflow_activity_duration_seconds", "Activity execution time",
+    ["activity", "outcome"], buckets=DURATION_BUCKETS,
+)
+ACTIVITIES_IN_FLIGHT = Gauge(
+    "workflow_activities_in_flight", "Activities currently executing", ["activity"], multiprocess_mode="livesum",
+)
+WORKFLOW_DURATION = Histogram(
+    "workflow_duration_seconds", "End-to-end workflow latency",
+    ["workflow", "outcome"], buckets=WORKFLOW_DURATION_BUCKETS,
+)
+WORKFLOW_EXECUTIONS = Counter(
+    "workflow_executions", "Orchestration episodes by first execution or replay", ["workflow", "mode"],
+)
+WORKFLOWS_IN_FLIGHT = Gauge(
+    # Workflows can start on one worker and complete on another, so exited workers still count
+    "workflow_workflows_in_flight", "Workflows started but not yet completed", ["workflow"], multiprocess_mode="sum",
+)
+PAYLOAD_SIZE = Histogram(
+    "workflow_payload_size_bytes", "Serialized size of workflow and activity payloads",
+    ["kind", "name"], buckets=SIZE_BUCKETS,
+)
+ADMISSION_DECISIONS = Counter(
+    "workflow_admission_decisions", "Workflow starts admitted or rejected by admission control", ["workflow", "reason"],
+)
+ADMISSION_TOKENS = Gauge(
+    "workflow_admission_tokens", "Tokens left in the workflow type's rate limit bucket", ["workflow"],
+    multiprocess_mode="mostrecent",
+)
+ADMISSION_ADAPTIVE_RATE = Gauge(
+    "workflow_admission_adaptive_rate", "Current adaptive start rate limit per second", multiprocess_mode="mostrecent",
+)
+
+RETRIES = Counter(
+    "workflow_activity_retries", "Activity attempts retried by workflows", ["activity", "error"],
+)
+ACTIVITY_TIMEOUTS = Counter(
+    "workflow_activity_timeouts", "Activity attempts that missed their deadline", ["activity"],
+)
+ACTIVITY_HEDGES = Counter(
+    "workflow_activity_hedges", "Hedged activity calls by the attempt whose result was used", ["activity", "winner"],
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    "workflow_circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ["dependency"],
+    multiprocess_mode="livemax",
+)
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "workflow_circuit_breaker_transitions", "Circuit breaker state changes", ["dependency", "state"],
+)
+CIRCUIT_BREAKER_REJECTIONS = Counter(
+    "workflow_circuit_breaker_rejections", "Activity calls failed fast by an open circuit breaker", ["dependency"],
+)
+
+
+PAYLOAD_COMPRESSED = Counter(
+    "workflow_payload_compressed", "Payloads stored compressed", ["name"],
+)
+PAYLOAD_COMPRESSION_RAW_BYTES = Counter(
+    "workflow_payload_compression_raw_bytes", "Size of compressed payloads before compression", ["name"],
+)
+PAYLOAD_COMPRESSION_STORED_BYTES = Counter(
+    "workflow_payload_compression_stored_bytes", "Size of compressed payloads as stored", ["name"],
+)
+
+# Compression counters already added to the metrics, by name
+_exported_compression: Dict[str, Dict[str, int]] = {}
+_export_lock = threading.Lock()
+
+
+def export_compression_stats() -> None:
+    """
+    Adds the payload compression counted by the serialization layer since the last export to the metrics.
+
+    Called when metrics are rendered and, in supervised worker processes, with every heartbeat.
+    """
+    counters = (
+        ('compressed', PAYLOAD_COMPRESSED),
+        ('rawBytes', PAYLOAD_COMPRESSION_RAW_BYTES),
+        ('storedBytes', PAYLOAD_COMPRESSION_STORED_BYTES),
+    )
+    with _export_lock:
+        for name, stats in compression_stats().items():
+            exported = _exported_compression.setdefault(name, {key: 0 for key, _ in counters})
+            for key, counter in counters:
+                counter.labels(name).inc(stats[key] - exported[key])
+                exported[key] = stats[key]
+
+
+def payload_size(value: Any) -> int:
+    """Returns the JSON size of a payload in bytes, or 0 if it can't be serialized."""
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(to_json_bytes(value))
+    except Exception:
+        return 0
+
+
+def instrument_activity(fn: Callable, name: str) -> Callable:
+    """
+    Wraps an activity to record its duration, in-flight count and payload sizes.
+
+    The wrapper keeps the sync or async nature and the signature of the
+    activity, so the SDK dispatches it exactly like the original function.
+    """
+    in_flight = ACTIVITIES_IN_FLIGHT.labels(name)
+
+    def record(started: float, outcome: str, args: tuple, result: Any = None) -> None:
+        ACTIVITY_DURATION.labels(name, outcome).observe(time.perf_counter() - started)
+        if len(args) > 1:
+            PAYLOAD_SIZE.labels(PayloadKind.ACTIVITY_INPUT, name).observe(payload_size(args[1]))
+        if outcome == Outcome.SUCCESS:
+            PAYLOAD_SIZE.labels(PayloadKind.ACTIVITY_OUTPUT, name).observe(payload_size(result))
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def instrumented_activity(*args):
+            started = time.perf_counter()
+            in_flight.inc()
+            try:
+                result = await fn(*args)
+            except Exception:
+                record(started, Outcome.ERROR, args)
+                raise
+            finally:
+                in_flight.dec()
+            record(started, Outcome.SUCCESS, args, result)
+            return result
+    else:
+        @functools.wraps(fn)
+        def instrumented_activity(*args):
+            started = time.perf_counter()
+            in_flight.inc()
+            try:
+                result = fn(*args)
+            except Exception:
+                record(started, Outcome.ERROR, args)
+                raise
+            finally:
+                in_flight.dec()
+            record(started, Outcome.SUCCESS, args, result)
+            return result
+
+    return instrumented_activity
+
+
+def instrument_workflow(fn: Callable, name: str) -> Callable:
+    """
+    Wraps a workflow to count replays and record its end-to-end latency and payload sizes.
+
+    Latency is measured with the deterministic orchestration clock
+    (ctx.current_utc_datetime), from the start of the execution to the episode
+    in which the workflow completes.
+    """
+    @functools.wraps(fn)
+    def instrumented_workflow(ctx, *args):
+        replaying = ctx.is_replaying
+        started_at = ctx.current_utc_datetime
+        WORKFLOW_EXECUTIONS.labels(name, "replay" if replaying else "new").inc()
+        if not replaying:
+            WORKFLOWS_IN_FLIGHT.labels(name).inc()
+            if args:
+                PAYLOAD_SIZE.labels(PayloadKind.WORKFLOW_INPUT, name).observe(payload_size(args[0]))
+
+        def record(outcome: str, result: Any = None) -> None:
+            if ctx.is_replaying:
+                return
+            WORKFLOWS_IN_FLIGHT.labels(name).dec()
+            elapsed = (ctx.current_utc_datetime - started_at).total_seconds()
+            WORKFLOW_DURATION.labels(name, outcome).observe(max(elapsed, 0.0))
+            if outcome == Outcome.SUCCESS:
+                PAYLOAD_SIZE.labels(PayloadKind.WORKFLOW_OUTPUT, name).observe(payload_size(result))
+
+        try:
+            workflow = fn(ctx, *args)
+            result = (yield from workflow) if inspect.isgenerator(workflow) else workflow
+        except GeneratorExit:
+            raise
+        except Exception:
+            record(Outcome.ERROR)
+            raise
+        record(Outcome.SUCCESS, result)
+        return result
+
+    return instrumented_workflow
+
+
+def render() -> bytes:
+    """Renders all metrics in the Prometheus text exposition format, across all processes in multiprocess mode."""
+    export_compression_stats()
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
@@ -0,0 +1,276 @@
+"""
+Cross-Instance Micro-Batching for Python Dapr Workflow Activities
+
+When many workflow instances call the same activity at about the same time
+(for example while a cohort is onboarded), each call normally makes its own
+round trip to the downstream system. This module collects those calls and runs
+them as one batched backend call:
+
+1. Calls are collected per activity (and optionally per batch key)
+2. A batch is flushed when it reaches max_batch_size, when max_wait_seconds
+   passed since its first call (the window), or when no new call arrived for
+   idle_seconds (flush-on-idle), whichever comes first
+3. The batch handler receives all calls and returns one result per call, in
+   order; each result (or exception) is fanned back out to the activity call
+   it belongs to, so every workflow instance gets its own activity result
+
+USAGE:
+Write the activity as a batch handler that takes a list of BatchCall objects and
+returns a list of results, and stack the batcher below the executor:
+
+    @wfr.activity
+    @activity_cache.cached
+    @activity_executor.bounded(max_concurrency=500)
+    @micro_batcher.batched(max_batch_size=100, max_wait_seconds=0.05)
+    async def provision_equipment_activity(calls: List[BatchCall]) -> List[ActivityResponse]:
+        responses = await equipment_api.provision_many([call.input for call in calls])
+        return [ActivityResponse(success=r.ok) for r in responses]
+
+The registered activity still takes (ctx, input) and returns a single result,
+so workflows call it exactly like any other activity. A handler can return an
+Exception instance in place of a result to fail only that call; if the handler
+raises, every call in the batch fails.
+
+CONFIGURATION (environment variables):
+- ACTIVITY_BATCH_MAX_SIZE: Default maximum calls per batch (default: 100)
+- ACTIVITY_BATCH_MAX_WAIT: Default seconds a batch may collect calls (default: 0.05)
+- ACTIVITY_BATCH_IDLE: Default seconds without new calls before flushing (default: 0.01)
+
+NOTE: Batches are collected per process. With multiple worker processes each
+worker forms its own batches.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FlushReason:
+    """Batch flush reasons enumeration"""
+    SIZE = "size"
+    WINDOW = "window"
+    IDLE = "idle"
+
+
+@dataclass(slots=True)
+class BatchCall:
+    """A single activity call collected into a batch."""
+    workflow_id: str
+    task_id: int
+    input: Any
+
+
+@dataclass
+class BatchStats:
+    """Batching statistics for a single activity."""
+    activity_name: str
+    max_batch_size: int
+    calls: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    flushed_on_size: int = 0
+    flushed_on_window: int = 0
+    flushed_on_idle: int = 0
+    total_handler_seconds: float = 0.0
+
+    def record(self, size: int, reason: str) -> None:
+        self.calls += size
+        self.batches += 1
+        if reason == FlushReason.SIZE:
+            self.flushed_on_size += 1
+        elif reason == FlushReason.WINDOW:
+            self.flushed_on_window += 1
+        else:
+            self.flushed_on_idle += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the batching statistics to a dictionary."""
+        return {
+            'activityName': self.activity_name,
+            'maxBatchSize': self.max_batch_size,
+            'calls': self.calls,
+            'batches': self.batches,
+            'failedBatches': self.failed_batches,
+            'avgBatchSize': self.calls / self.batches if self.batches else 0.0,
+            'avgHandlerSeconds': self.total_handler_seconds / self.batches if self.batches else 0.0,
+            'flushedOnSize': self.flushed_on_size,
+            'flushedOnWindow': self.flushed_on_window,
+            'flushedOnIdle': self.flushed_on_idle,
+        }
+
+
+class _PendingBatch:
+    """Calls waiting to be flushed together, bound to one event loop."""
+
+    def __init__(self):
+        self.calls: List[Tuple[BatchCall, asyncio.Future]] = []
+        self.first_at = 0.0
+        self.last_at = 0.0
+        self.timer: Optional[asyncio.Task] = None
+
+
+class _ActivityBatcher:
+    """Collects calls of one activity and runs its batch handler."""
+
+    def __init__(self, handler: Callable, stats: BatchStats, max_wait_seconds: float, idle_seconds: float,
+                 key: Optional[Callable[[Any], Hashable]]):
+        self.handler = handler
+        self.stats = stats
+        self.max_batch_size = stats.max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.idle_seconds = idle_seconds
+        self.key = key
+        # asyncio futures are bound to a single event loop, so keep pending batches per loop
+        self._pending = weakref.WeakKeyDictionary()
+        # The event loop only keeps weak references to tasks, so hold running batches until they finish
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, call: BatchCall) -> Any:
+        loop = asyncio.get_running_loop()
+        batches: Dict[Hashable, _PendingBatch] = self._pending.setdefault(loop, {})
+        batch_key = self.key(call.input) if self.key else None
+        batch = batches.get(batch_key)
+        if batch is None:
+            batch = batches[batch_key] = _PendingBatch()
+            batch.first_at = time.monotonic()
+
+        future = loop.create_future()
+        batch.calls.append((call, future))
+        batch.last_at = time.monotonic()
+
+        if len(batch.calls) >= self.max_batch_size:
+            self._flush(batches, batch_key, FlushReason.SIZE)
+        elif batch.timer is None:
+            batch.timer = loop.create_task(self._flush_when_due(batches, batch_key, batch))
+        return await future
+
+    async def _flush_when_due(self, batches: Dict[Hashable, _PendingBatch], batch_key: Hashable, batch: _PendingBatch) -> None:
+        while True:
+            window_due = batch.first_at + self.max_wait_seconds
+            idle_due = batch.last_at + self.idle_seconds
+            delay = min(window_due, idle_due) - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        if batches.get(batch_key) is batch:
+            reason = FlushReason.WINDOW if time.monotonic() >= window_due else FlushReason.IDLE
+            self._flush(batches, batch_key, reason)
+
+    def _flush(self, batches: Dict[Hashable, _PendingBatch], batch_key: Hashable, reason: str) -> None:
+        batch = batches.pop(batch_key)
+        if batch.timer is not None and batch.timer is not asyncio.current_task():
+            batch.timer.cancel()
+        self.stats.record(len(batch.calls), reason)
+        task = asyncio.get_running_loop().create_task(self._run(batch.calls))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, calls: List[Tuple[BatchCall, asyncio.Future]]) -> None:
+        started = time.perf_counter()
+        try:
+            results = await self.handler([call for call, _ in calls])
+            if len(results) != len(calls):
+                raise ValueError(
+                    f"Batch handler {self.stats.activity_name} returned {len(results)} results for {len(calls)} calls"
+                )
+        except Exception as e:
+            self.stats.failed_batches += 1
+            logger.warning(f"Batch of {len(calls)} {self.stats.activity_name} calls failed: {e}")
+            for _, future in calls:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.stats.total_handler_seconds += time.perf_counter() - started
+
+        for (_, future), result in zip(calls, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class MicroBatcher:
+    """
+    Micro-batching layer that turns batch handlers into per-call activities.
+
+    Args:
+        max_batch_size: Default maximum calls per batch
+        max_wait_seconds: Default seconds a batch may collect calls
+        idle_seconds: Default seconds without new calls before a batch is flushed
+    """
+
+    def __init__(
+        self,
+        max_batch_size: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None,
+        idle_seconds: Optional[float] = None,
+    ):
+        self.max_batch_size = max_batch_size or int(os.getenv("ACTIVITY_BATCH_MAX_SIZE", "100"))
+        self.max_wait_seconds = max_wait_seconds if max_wait_seconds is not None else float(os.getenv("ACTIVITY_BATCH_MAX_WAIT", "0.05"))
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(os.getenv("ACTIVITY_BATCH_IDLE", "0.01"))
+        self._batchers: Dict[str, _ActivityBatcher] = {}
+
+    def batched(
+        self,
+        __fn: Callable = None,
+        *,
+        max_batch_size: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None,
+        idle_seconds: Optional[float] = None,
+        key: Optional[Callable[[Any], Hashable]] = None,
+    ):
+        """
+        Decorator that exposes a batch handler as a single-call activity.
+
+        Args:
+            max_batch_size: Maximum calls per batch
+            max_wait_seconds: Seconds a batch may collect calls after its first call
+            idle_seconds: Seconds without new calls before the batch is flushed
+            key: Groups calls into separate batches by a key computed from the input
+        """
+        def wrapper(fn: Callable):
+            if not inspect.iscoroutinefunction(fn):
+                raise ValueError(f"Batch handler {fn.__name__} must be a coroutine function")
+            activity_name = fn.__name__
+            stats = BatchStats(activity_name=activity_name, max_batch_size=max_batch_size or self.max_batch_size)
+            batcher = _ActivityBatcher(
+                fn, stats,
+                max_wait_seconds if max_wait_seconds is not None else self.max_wait_seconds,
+                idle_seconds if idle_seconds is not None else self.idle_seconds,
+                key,
+            )
+            self._batchers[activity_name] = batcher
+
+            async def batched_activity(ctx, input: Any = None) -> Any:
+                return await batcher.submit(BatchCall(workflow_id=ctx.workflow_id, task_id=ctx.task_id, input=input))
+
+            functools.update_wrapper(batched_activity, fn)
+            # The activity takes (ctx, input), not the handler's list of calls
+            del batched_activity.__wrapped__
+            batched_activity.__signature__ = inspect.signature(batched_activity)
+            return batched_activity
+
+        if __fn:
+            # Decorator used without arguments
+            return wrapper(__fn)
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the batching statistics of every batched activity keyed by activity name."""
+        return {name: batcher.stats.to_dict() for name, batcher in self._batchers.items()}
+
+
+# Single micro-batcher shared across activity modules
+micro_batcher = MicroBatcher()
@@ -13,6 +13,17 @@ For production systems, you should:
 3. Replace generic dictionaries with well-defined class structures
 4. Add custom serialization/deserialization as needed
 
+SERIALIZATION:
+Models use slotted dataclasses to keep per-instance memory and attribute access
+cheap on every replay. Activity responses and workflow payloads are written to
+the workflow history through the pluggable codecs in serialization.py, selected
+with the WORKFLOW_PAYLOAD_CODEC environment variable.
+
+Fields above a size threshold are offloaded to the state store by clients and
+activities, and only a reference travels through the history. The models never
+resolve references: workflow code passes them along to the activities that
+read them (see claim_check.py).
+
 MINIMALIST DESIGN PHILOSOPHY:
 These models are deliberately minimal, containing only essential fields needed
 for workflow execution. This design emphasizes clarity and ease of use
@@ -23,9 +34,12 @@ when needed for your specific use case.
 import os
 import json
 from dataclasses import dataclass, field
+from types import SimpleNamespace
 from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 from .activity_request import ActivityRequest
+from .projection import get_projection
+from .serialization import decode_payload, encode_payload, to_json_bytes
 
 class CustomJSONEncoder(json.JSONEncoder):
     """Custom JSON encoder that handles non-serializable types."""
@@ -47,7 +61,7 @@ class ActivityType:
     EVENT = "event"
     TIMER = "timer"
 
-@dataclass
+@dataclass(slots=True)
 class ActivityResponse:
     """
     Represents the result of a single activity execution.
@@ -80,19 +94,67 @@ class ActivityResponse:
     success: bool = False
     error: Optional[str] = None
 
+    # Outputs merged into the workflow data for activities with a projection
+    outputs: Dict[str, Any] = field(default_factory=dict)
+
     def to_dict(self) -> Dict[str, Any]:
         """Converts the activity response to a dictionary."""
-        return {
+        response = {
             'startTime': self.start_time,
             'endTime': self.end_time,
             'success': self.success,
             'error': self.error
         }
+        if self.outputs:
+            response['outputs'] = self.outputs
+        return response
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ActivityResponse':
+        """Creates an ActivityResponse from a dictionary produced by to_dict()."""
+        return cls(
+            start_time=data.get('startTime', data.get('start_time')),
+            end_time=data.get('endTime', data.get('end_time')),
+            success=data.get('success', False),
+            error=data.get('error'),
+            outputs=data.get('outputs') or {}
+        )
+
+    def to_payload(self, name: Optional[str] = None) -> Any:
+        """
+        Encodes the activity response with the configured payload codec.
+
+        Args:
+            name: Activity name that selects the payload compression settings
+        """
+        return encode_payload(self.to_dict(), name=name)
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> 'ActivityResponse':
+        """
+        Creates an ActivityResponse from an activity result as seen by the workflow.
+
+        Accepts encoded payloads, dictionaries, and the SimpleNamespace objects
+        that histories written before the payload codecs existed deserialize to.
+        """
+        if isinstance(payload, cls):
+            return payload
+        if isinstance(payload, SimpleNamespace):
+            payload = vars(payload)
+        return cls.from_dict(decode_payload(payload) or {})
+
+    # Model protocol hooks used by the Dapr SDK to serialize activity results
+    def model_dump(self) -> Any:
+        return self.to_payload()
+
+    @classmethod
+    def model_validate(cls, value: Any) -> 'ActivityResponse':
+        return cls.from_payload(value)
 
 # Event response type - a simplified alias for a dictionary
 EventResponse = Dict[str, Any]
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowActivityInfo:
     """Contains information about an activity to be used in the workflow state history for debugging."""
     activity_name: str
@@ -109,7 +171,7 @@ class WorkflowActivityInfo:
             'endTime': self.end_time
         }
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowData:
     """
     Main workflow data container with standardized structure.
@@ -133,10 +195,15 @@ class WorkflowData:
     
     # Status information
     success: bool = True
+    has_error: bool = False
+    error_message: Optional[str] = None
     
     # Linear history of activity executions for debugging
     activity_history: List[WorkflowActivityInfo] = field(default_factory=list)
     
+    # Condensed summary of previous executions carried across continue-as-new
+    history_summary: Dict[str, Any] = field(default_factory=dict)
+    
     # Debug mode
     debug_mode: bool = field(default_factory=lambda: os.getenv("DEBUG") == "true")
 
@@ -158,13 +225,14 @@ class WorkflowData:
             )
             self.activity_history.append(activity_info)
 
-    def add_activity_response(self, activity_name: str, activity_response: ActivityResponse) -> None:
+    def add_activity_response(self, activity_name: str, activity_response: Any, activity: Any = None) -> None:
         """
         Updates the workflow's activity history with an activity response.
         
-        IMPORTANT: This method only adds the activity to history. It does not transfer
-        any data from the activity response to the workflow state. For domain-specific 
-        data transfer, you should:
+        IMPORTANT: This method only transfers data from the activity response to the
+        workflow state for activities that declare a projection (see projection.py);
+        only their declared outputs are merged. For other domain-specific data
+        transfer, you should:
         
         1. Create domain-specific response types for your activities
         2. Implement custom methods to extract and process data from those responses
@@ -172,11 +240,19 @@ class WorkflowData:
         
         Args:
             activity_name: Name of the activity
-            activity_response: The activity response object
+            activity_response: The activity response object or the encoded activity result
+            activity: The activity function or registered name whose projection is used;
+                defaults to activity_name
         """
         # Add the activity to history
+        activity_response = ActivityResponse.from_payload(activity_response)
         self.add_to_activity_history(activity_name, ActivityType.ACTIVITY, activity_response)
 
+        # Merge only the declared outputs
+        projection = get_projection(activity or activity_name)
+        if projection is not None:
+            projection.merge(self, activity_response.outputs)
+
     def add_event_response(self, event_name: str, event_end_time: datetime, event_data: Dict[str, Any] = None) -> None:
         """
         Adds an event response to the workflow data.
@@ -224,20 +300,35 @@ class WorkflowData:
 
     def for_continue_as_new_workflow(self) -> Dict[str, Dict[str, Any]]:
         """Creates a dictionary for the 'Continue As New' operation as starting data for a new workflow."""
-        return {
+        state = {
             'data': self.data.copy(),
             'original': self.original.copy(),
         }
+        if self.history_summary:
+            state['history_summary'] = self.history_summary.copy()
+        return state
 
-    def get_activity_request_data(self) -> ActivityRequest:
+    def get_activity_request_data(self, activity: Any = None) -> ActivityRequest:
         """
-        Creates an empty ActivityRequest scaffold.
+        Creates the request for an activity.
+        
+        For activities that declare a projection (see projection.py), the request
+        holds only the fields the activity reads. Otherwise an empty ActivityRequest
+        scaffold is returned.
         
         IMPORTANT: For production use, implement domain-specific request types
         instead of using this generic implementation. See activity_request.py
         for guidance on creating properly typed activity request models.
+
+        Fields holding claim-check references are passed along unread;
+        activities registered with the shared runtime receive them resolved.
+
+        Args:
+            activity: The activity function or registered name the request is for
         """
-        return ActivityRequest()
+        projection = get_projection(activity)
+        request = projection.build_request(self) if projection is not None else ActivityRequest()
+        return request
 
     def get_bool(self, key: str, default: bool = False) -> bool:
         """Gets a boolean value from the workflow data."""
@@ -255,13 +346,42 @@ class WorkflowData:
                 
         return default
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the workflow data to a dictionary."""
+        return {
+            'data': self.data,
+            'original': self.original,
+            'success': self.success,
+            'has_error': self.has_error,
+            'error_message': self.error_message,
+            'activity_history': [activity.to_dict() for activity in self.activity_history],
+            'history_summary': self.history_summary,
+            'debug_mode': self.debug_mode
+        }
+
     def to_json(self) -> str:
         """Serializes the workflow data to JSON."""
-        return json.dumps(self, cls=CustomJSONEncoder, default=lambda o: o.__dict__)
+        return to_json_bytes(self.to_dict()).decode('utf-8')
+
+    def to_payload(self, name: Optional[str] = None) -> Any:
+        """
+        Encodes the workflow state carried between executions with the configured payload codec.
+
+        Args:
+            name: Workflow type that selects the payload compression settings
+        """
+        return encode_payload(self.for_continue_as_new_workflow(), name=name)
 
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'WorkflowData':
-        """Creates a WorkflowData instance from a dictionary."""
+    def from_dict(cls, data: Dict[str, Any], copy: bool = True) -> 'WorkflowData':
+        """
+        Creates a WorkflowData instance from a dictionary.
+
+        Args:
+            data: The dictionary to read from
+            copy: Copy the nested dictionaries. Pass False when the dictionary was
+                freshly decoded and is not shared, e.g. a workflow input on replay.
+        """
         if not data:
             return cls()
             
@@ -271,14 +391,23 @@ class WorkflowData:
         
         # Copy data
         if 'data' in data and isinstance(data['data'], dict):
-            workflow_data.data = data['data'].copy()
+            workflow_data.data = data['data'].copy() if copy else data['data']
         
         # Copy original data if present
         if 'original' in data and isinstance(data['original'], dict):
-            workflow_data.original = data['original'].copy()
+            workflow_data.original = data['original'].copy() if copy else data['original']
+        
+        # Carry over the history summary of previous executions
+        if 'history_summary' in data and isinstance(data['history_summary'], dict):
+            workflow_data.history_summary = data['history_summary'].copy() if copy else data['history_summary']
         
         return workflow_data
 
+    @classmethod
+    def from_payload(cls, payload: Any) -> 'WorkflowData':
+        """Creates a WorkflowData instance from a workflow input, decoding it if needed."""
+        return cls.from_dict(decode_payload(payload), copy=False)
+
     @classmethod
     def from_json(cls, json_str: str) -> 'WorkflowData':
         """Creates a WorkflowData instance from a JSON string."""
@@ -289,7 +418,7 @@ class WorkflowData:
         return cls.from_dict(data)
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowResult:
     """Represents the result of a workflow execution.
     
@@ -340,7 +469,26 @@ class WorkflowResult:
         result.activity_history = workflow_data.activity_history.copy()
         
         return result
-    
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> 'WorkflowResult':
+        """
+        Creates a WorkflowResult from a child workflow's output as seen by the parent.
+
+        Accepts encoded payloads, dictionaries, and the SimpleNamespace objects a
+        returned WorkflowData deserializes to. A result that recorded an error is
+        not successful.
+        """
+        payload = decode_payload(payload)
+        if isinstance(payload, SimpleNamespace):
+            payload = vars(payload)
+        payload = payload or {}
+        data = payload.get('data')
+        return cls(
+            success=bool(payload.get('success', True)) and not payload.get('has_error', False),
+            data=vars(data) if isinstance(data, SimpleNamespace) else data or {}
+        )
+
     def to_dict(self) -> Dict[str, Any]:
         """Converts the workflow result to a dictionary."""
         activity_history_dicts = [
@@ -0,0 +1,462 @@
+"""
+Replay-Cost Profiler for Python Dapr Workflow
+
+Every orchestration episode re-runs the workflow function from the start, so
+code that is cheap once (decoding WorkflowData, logging, merging results) is
+paid again for every replayed step. The Prometheus metrics count replays but
+can't tell where their CPU goes. This opt-in profiler wraps registered
+workflows and activities and records, per invocation:
+
+1. Wall and CPU time split into replay and new-progress segments. Each step of
+   a workflow generator (the code between two yields) is attributed to the
+   replay segment if the workflow was replaying when the step started, and to
+   new progress otherwise. Activities are never replayed and only have new
+   progress; for async activities each step of the coroutine is timed, so CPU
+   time spent in executor threads shows up as wall time only.
+2. Allocation counts and bytes per segment and the largest allocation sites,
+   from tracemalloc snapshots taken around each step (opt-in, it's slow)
+3. Sampled stacks of the code running in profiled steps, exportable in the
+   collapsed format read by flamegraph.pl, speedscope and similar tools. Stacks
+   start with '<kind>:<name>;<segment>', so replay and new-progress time appear
+   as separate towers of the same workflow.
+
+Per-function totals and the most recent invocations are served at
+/debug/profile, the collapsed stacks at /debug/profile/stacks, and both are
+cleared with DELETE /debug/profile.
+
+USAGE:
+Profiling is applied when functions are registered with the workflow runtime
+(see runtime.py), so no code changes are needed:
+
+    WORKFLOW_PROFILING_ENABLED=true python3 src/app.py
+    curl localhost:3000/debug/profile
+    curl localhost:3000/debug/profile/stacks > stacks.txt && flamegraph.pl stacks.txt > replay.svg
+
+NOTE: Allocation snapshots and the stack sampler cover the whole process, so
+allocations and samples from other threads during a step are included. Keep
+profiling off in production; it is meant for load tests and debugging.
+
+CONFIGURATION (environment variables):
+- WORKFLOW_PROFILING_ENABLED: Profile registered workflows and activities (default: false)
+- WORKFLOW_PROFILING_ALLOCATIONS: Trace allocations with tracemalloc (default: false)
+- WORKFLOW_PROFILING_SAMPLE_INTERVAL: Seconds between stack samples, 0 to disable sampling (default: 0.005)
+- WORKFLOW_PROFILING_HISTORY: Recent invocations kept for /debug/profile (default: 100)
+- WORKFLOW_PROFILING_TOP_ALLOCATIONS: Largest allocation sites kept per invocation and function (default: 10)
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Distinct stacks kept by the sampler; further samples are counted under their root
+MAX_STACKS = 20000
+
+
+class ProfileKind:
+    """Profiled function kinds enumeration"""
+    WORKFLOW = "workflow"
+    ACTIVITY = "activity"
+
+
+class ProfileSegment:
+    """Invocation segments enumeration"""
+    REPLAY = "replay"
+    NEW = "new"
+
+
+class ProfileOutcome:
+    """Invocation outcomes enumeration"""
+    COMPLETED = "completed"
+    FAILED = "failed"
+    # The episode ended while the workflow waited on an incomplete task
+    SUSPENDED = "suspended"
+    # The activity call was cancelled, e.g. the losing attempt of a hedged call
+    CANCELLED = "cancelled"
+
+
+@dataclass(slots=True)
+class SegmentProfile:
+    """Time and allocations of the steps in one segment."""
+    steps: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    allocations: int = 0
+    allocated_bytes: int = 0
+
+    def add(self, other: 'SegmentProfile') -> None:
+        self.steps += other.steps
+        self.wall_seconds += other.wall_seconds
+        self.cpu_seconds += other.cpu_seconds
+        self.allocations += other.allocations
+        self.allocated_bytes += other.allocated_bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the segment profile to a dictionary."""
+        return {
+            'steps': self.steps,
+            'wallMs': self.wall_seconds * 1000,
+            'cpuMs': self.cpu_seconds * 1000,
+            'allocations': self.allocations,
+            'allocatedBytes': self.allocated_bytes
+        }
+
+
+def _merge_sites(sites: Dict[str, List[int]], other: Dict[str, List[int]], limit: int) -> None:
+    """Adds the [bytes, count] of other's allocation sites to sites, keeping the largest."""
+    for site, (size, count) in other.items():
+        totals = sites.setdefault(site, [0, 0])
+        totals[0] += size
+        totals[1] += count
+    if len(sites) > limit * 4:
+        for site, _ in sorted(sites.items(), key=lambda item: item[1][0])[:len(sites) - limit * 2]:
+            del sites[site]
+
+
+def _top_sites(sites: Dict[str, List[int]], limit: int) -> List[Dict[str, Any]]:
+    return [
+        {'site': site, 'bytes': size, 'count': count}
+        for site, (size, count) in sorted(sites.items(), key=lambda item: -item[1][0])[:limit]
+    ]
+
+
+@dataclass(slots=True)
+class InvocationProfile:
+    """Profile of one workflow episode or activity call."""
+    kind: str
+    name: str
+    instance_id: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    outcome: str = ProfileOutcome.SUSPENDED
+    replay: SegmentProfile = field(default_factory=SegmentProfile)
+    new: SegmentProfile = field(default_factory=SegmentProfile)
+    allocation_sites: Dict[str, List[int]] = field(default_factory=dict)
+
+    def segment(self, replaying: bool) -> SegmentProfile:
+        return self.replay if replaying else self.new
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        """Converts the invocation profile to a dictionary."""
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'instanceId': self.instance_id,
+            'startedAt': self.started_at,
+            'outcome': self.outcome,
+            'replay': self.replay.to_dict(),
+            'new': self.new.to_dict(),
+            'largestAllocations': _top_sites(self.allocation_sites, top)
+        }
+
+
+@dataclass(slots=True)
+class FunctionProfile:
+    """Totals of every profiled invocation of one workflow or activity."""
+    kind: str
+    name: str
+    invocations: int = 0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    replay: SegmentProfile = field(default_factory=SegmentProfile)
+    new: SegmentProfile = field(default_factory=SegmentProfile)
+    allocation_sites: Dict[str, List[int]] = field(default_factory=dict)
+
+    def add(self, invocation: InvocationProfile, top: int) -> None:
+        self.invocations += 1
+        self.outcomes[invocation.outcome] = self.outcomes.get(invocation.outcome, 0) + 1
+        self.replay.add(invocation.replay)
+        self.new.add(invocation.new)
+        _merge_sites(self.allocation_sites, invocation.allocation_sites, top)
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        """Converts the function profile to a dictionary."""
+        total_cpu = self.replay.cpu_seconds + self.new.cpu_seconds
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'invocations': self.invocations,
+            'outcomes': self.outcomes,
+            'replay': self.replay.to_dict(),
+            'new': self.new.to_dict(),
+            'replayCpuShare': self.replay.cpu_seconds / total_cpu if total_cpu else 0.0,
+            'largestAllocations': _top_sites(self.allocation_sites, top)
+        }
+
+
+def _frame_name(frame: types.FrameType) -> str:
+    """Returns 'module:function' for a frame; qualified names need Python 3.11."""
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """
+    Samples the stacks of threads that are running a profiled step.
+
+    Steps register their thread with a stack root while they run; a daemon
+    thread periodically reads the frames of registered threads from
+    sys._current_frames() and counts each stack in collapsed form.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self._roots: Dict[int, str] = {}
+        self._stacks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def enter(self, root: str) -> Optional[str]:
+        """Registers the current thread with a stack root; returns the root it replaces."""
+        if self._thread is None:
+            self._start()
+        thread_id = threading.get_ident()
+        previous = self._roots.get(thread_id)
+        self._roots[thread_id] = root
+        return previous
+
+    def exit(self, previous: Optional[str]) -> None:
+        thread_id = threading.get_ident()
+        if previous is None:
+            self._roots.pop(thread_id, None)
+        else:
+            self._roots[thread_id] = previous
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="workflow-profiler-sampler", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            if self._roots:
+                self.sample()
+
+    def sample(self) -> None:
+        """Records the current stack of every registered thread."""
+        frames = sys._current_frames()
+        for thread_id, root in list(self._roots.items()):
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            names = []
+            # Walk up to the profiler's step, which called into the profiled code
+            while frame is not None and frame.f_code is not _STEP_CODE:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            stack = ";".join([root, *reversed(names)])
+            with self._lock:
+                self.samples += 1
+                if stack not in self._stacks and len(self._stacks) >= MAX_STACKS:
+                    stack = root
+                self._stacks[stack] = self._stacks.get(stack, 0) + 1
+
+    def collapsed(self) -> str:
+        """Returns the sampled stacks in collapsed format, one 'frame;frame count' line per stack."""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+
+class WorkflowProfiler:
+    """Profiles registered workflow and activity functions."""
+
+    def __init__(self):
+        self.enabled = os.getenv("WORKFLOW_PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.trace_allocations = os.getenv("WORKFLOW_PROFILING_ALLOCATIONS", "false").lower() in ("1", "true", "yes")
+        self.top = int(os.getenv("WORKFLOW_PROFILING_TOP_ALLOCATIONS", "10"))
+        self.sampler = StackSampler(float(os.getenv("WORKFLOW_PROFILING_SAMPLE_INTERVAL", "0.005")))
+        self._recent: Deque[InvocationProfile] = deque(maxlen=int(os.getenv("WORKFLOW_PROFILING_HISTORY", "100")))
+        self._functions: Dict[Tuple[str, str], FunctionProfile] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _snapshot() -> "tracemalloc.Snapshot":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return tracemalloc.take_snapshot()
+
+    def _step(self, invocation: InvocationProfile, replaying: bool, call: Callable, *args: Any) -> Any:
+        """Runs one step of a profiled function and adds its cost to the invocation's segment."""
+        segment = invocation.segment(replaying)
+        before = self._snapshot() if self.trace_allocations else None
+        if self.sampler.enabled:
+            label = ProfileSegment.REPLAY if replaying else ProfileSegment.NEW
+            previous = self.sampler.enter(f"{invocation.kind}:{invocation.name};{label}")
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            return call(*args)
+        finally:
+            segment.wall_seconds += time.perf_counter() - started
+            segment.cpu_seconds += time.thread_time() - cpu_started
+            segment.steps += 1
+            if self.sampler.enabled:
+                self.sampler.exit(previous)
+            if before is not None:
+                self._record_allocations(invocation, segment, before)
+
+    def _record_allocations(self, invocation: InvocationProfile, segment: SegmentProfile, before: "tracemalloc.Snapshot") -> None:
+        sites = {}
+        for stat in self._snapshot().compare_to(before, 'lineno'):
+            frame = stat.traceback[0]
+            if stat.size_diff <= 0 or frame.filename in _IGNORED_FILES:
+                continue
+            sites[f"{frame.filename}:{frame.lineno}"] = [stat.size_diff, max(stat.count_diff, 0)]
+            segment.allocations += max(stat.count_diff, 0)
+            segment.allocated_bytes += stat.size_diff
+        _merge_sites(invocation.allocation_sites, sites, self.top)
+
+    def _finish(self, invocation: InvocationProfile) -> None:
+        with self._lock:
+            self._recent.append(invocation)
+            key = (invocation.kind, invocation.name)
+            function = self._functions.get(key)
+            if function is None:
+                function = self._functions[key] = FunctionProfile(invocation.kind, invocation.name)
+            function.add(invocation, self.top)
+
+    def profile_workflow(self, fn: Callable, name: str) -> Callable:
+        """Wraps a workflow to profile each episode, stepping its generator like the runtime does."""
+        @functools.wraps(fn)
+        def profiled_workflow(ctx, *args):
+            invocation = InvocationProfile(ProfileKind.WORKFLOW, name, ctx.instance_id)
+            try:
+                workflow = self._step(invocation, ctx.is_replaying, fn, ctx, *args)
+                if not inspect.isgenerator(workflow):
+                    invocation.outcome = ProfileOutcome.COMPLETED
+                    return workflow
+
+                send_value, error = None, None
+                while True:
+                    try:
+                        if error is not None:
+                            pending = self._step(invocation, ctx.is_replaying, workflow.throw, error)
+                        else:
+                            pending = self._step(invocation, ctx.is_replaying, workflow.send, send_value)
+                    except StopIteration as stop:
+                        invocation.outcome = ProfileOutcome.COMPLETED
+                        return stop.value
+                    send_value, error = None, None
+                    try:
+                        send_value = yield pending
+                    except GeneratorExit:
+                        workflow.close()
+                        raise
+                    except Exception as e:
+                        error = e
+            except GeneratorExit:
+                raise
+            except Exception:
+                invocation.outcome = ProfileOutcome.FAILED
+                raise
+            finally:
+                self._finish(invocation)
+
+        return profiled_workflow
+
+    def profile_activity(self, fn: Callable, name: str) -> Callable:
+        """
+        Wraps an activity to profile each call.
+
+        The wrapper keeps the sync or async nature and the signature of the
+        activity, so the SDK dispatches it exactly like the original function.
+        """
+        @types.coroutine
+        def run_steps(invocation: InvocationProfile, coroutine):
+            send_value, error = None, None
+            while True:
+                try:
+                    if error is not None:
+                        future = self._step(invocation, False, coroutine.throw, error)
+                    else:
+                        future = self._step(invocation, False, coroutine.send, send_value)
+                except StopIteration as stop:
+                    return stop.value
+                send_value, error = None, None
+                try:
+                    send_value = yield future
+                except GeneratorExit:
+                    coroutine.close()
+                    raise
+                except BaseException as e:
+                    error = e
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def profiled_activity(*args):
+                invocation = InvocationProfile(ProfileKind.ACTIVITY, name, getattr(args[0], 'workflow_id', None))
+                try:
+                    result = await run_steps(invocation, fn(*args))
+                    invocation.outcome = ProfileOutcome.COMPLETED
+                    return result
+                except asyncio.CancelledError:
+                    invocation.outcome = ProfileOutcome.CANCELLED
+                    raise
+                except Exception:
+                    invocation.outcome = ProfileOutcome.FAILED
+                    raise
+                finally:
+                    self._finish(invocation)
+        else:
+            @functools.wraps(fn)
+            def profiled_activity(*args):
+                invocation = InvocationProfile(ProfileKind.ACTIVITY, name, getattr(args[0], 'workflow_id', None))
+                try:
+                    result = self._step(invocation, False, fn, *args)
+                    invocation.outcome = ProfileOutcome.COMPLETED
+                    return result
+                except Exception:
+                    invocation.outcome = ProfileOutcome.FAILED
+                    raise
+                finally:
+                    self._finish(invocation)
+
+        return profiled_activity
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns per-function totals and the most recent invocations."""
+        with self._lock:
+            functions = sorted(self._functions.values(), key=lambda f: -(f.replay.cpu_seconds + f.new.cpu_seconds))
+            return {
+                'enabled': self.enabled,
+                'traceAllocations': self.trace_allocations,
+                'stackSamples': self.sampler.samples,
+                'functions': [function.to_dict(self.top) for function in functions],
+                'recent': [invocation.to_dict(self.top) for invocation in reversed(self._recent)]
+            }
+
+    def collapsed_stacks(self) -> str:
+        """Returns the sampled stacks in collapsed (flamegraph) format."""
+        return self.sampler.collapsed()
+
+    def reset(self) -> None:
+        """Clears all recorded profiles and stacks."""
+        with self._lock:
+            self._recent.clear()
+            self._functions.clear()
+        self.sampler.reset()
+
+
+_STEP_CODE = WorkflowProfiler._step.__code__
+# Allocations made by the profiler itself aren't attributed to the profiled code
+_IGNORED_FILES = frozenset((tracemalloc.__file__, __file__))
+
+# Single profiler shared across the app and the workflow runtime
+workflow_profiler = WorkflowProfiler()
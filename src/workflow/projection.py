@@ -0,0 +1,201 @@
+"""
+Per-Activity Field Projection for Python Dapr Workflow
+
+By default every activity receives a generic request built from the workflow
+state, and results are merged back without knowing what an activity changed.
+With projections each activity declares:
+
+1. What it reads: a typed request dataclass whose fields name the WorkflowData
+   fields copied into the request; nothing else is sent to the activity
+2. What it writes: the output names merged back into WorkflowData.data from
+   ActivityResponse.outputs; other outputs are rejected
+
+Request types are validated once, when the activity is registered with the
+shared runtime: every field must have a JSON-serializable type, so a bad
+declaration fails at startup rather than in the middle of a workflow.
+
+USAGE:
+Declare the request type next to ActivityRequest and stack @projection right
+below @wfr.activity:
+
+    @dataclass(slots=True)
+    class PaperworkRequest(ActivityRequest):
+        employee_id: Optional[str] = None
+
+    @wfr.activity
+    @projection(PaperworkRequest, writes=["paperwork_complete"])
+    @activity_executor.bounded(max_concurrency=200)
+    async def prepare_paperwork_activity(ctx, input: PaperworkRequest) -> ActivityResponse:
+        return ActivityResponse(success=True, outputs={"paperwork_complete": True})
+
+In the workflow, pass the activity when building the request and merging the
+result (TaskGraph does this for you):
+
+    result = yield ctx.call_activity(prepare_paperwork_activity, input=data.get_activity_request_data(prepare_paperwork_activity))
+    data.add_activity_response("prepare_paperwork", result, activity=prepare_paperwork_activity)
+
+Each read field is taken from WorkflowData.data, falling back to
+WorkflowData.original, and keeps the request type's default when neither has it.
+"""
+
+import dataclasses
+import functools
+import inspect
+import logging
+import typing
+from dataclasses import dataclass
+from types import NoneType, SimpleNamespace, UnionType
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type, Union
+
+from .activity_request import ActivityRequest
+
+logger = logging.getLogger(__name__)
+
+PROJECTION_ATTRIBUTE = "_activity_projection"
+
+_SCALAR_TYPES = (str, int, float, bool, NoneType)
+
+# Projections of registered activities by activity name
+_projections: Dict[str, 'ActivityProjection'] = {}
+
+
+def _check_serializable(tp: Any, path: str) -> None:
+    """Raises TypeError if values of the annotated type can't be written to the workflow history."""
+    if tp is Any or tp in _SCALAR_TYPES:
+        return
+    if dataclasses.is_dataclass(tp):
+        for name, field_type in typing.get_type_hints(tp).items():
+            _check_serializable(field_type, f"{path}.{name}")
+        return
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if origin in (Union, UnionType):
+        for arg in args:
+            _check_serializable(arg, path)
+        return
+    if origin in (list, tuple, set, frozenset) or tp in (list, tuple):
+        for arg in args:
+            if arg is not Ellipsis:
+                _check_serializable(arg, f"{path}[]")
+        return
+    if origin is dict or tp is dict:
+        if args and args[0] is not str:
+            raise TypeError(f"{path} has non-string dictionary keys, which JSON can't represent")
+        if args:
+            _check_serializable(args[1], f"{path}{{}}")
+        return
+    raise TypeError(f"{path} has type {tp!r}, which can't be serialized to the workflow history")
+
+
+@dataclass(frozen=True, slots=True)
+class ActivityProjection:
+    """The WorkflowData fields an activity reads and the outputs it writes."""
+    request_type: Type[ActivityRequest]
+    reads: Tuple[str, ...]
+    writes: Tuple[str, ...]
+
+    def validate(self, activity_name: str) -> None:
+        """Checks the declaration and that the request type is serializable."""
+        if not dataclasses.is_dataclass(self.request_type):
+            raise TypeError(f"Request type of {activity_name} must be a dataclass")
+        _check_serializable(self.request_type, self.request_type.__name__)
+        for name in self.writes:
+            if not isinstance(name, str) or not name:
+                raise ValueError(f"Activity {activity_name} declares an invalid output name: {name!r}")
+        if len(set(self.writes)) != len(self.writes):
+            raise ValueError(f"Activity {activity_name} declares duplicate outputs")
+
+    def build_request(self, data: Any) -> ActivityRequest:
+        """Builds the request from only the declared fields of the workflow data."""
+        values = {}
+        for name in self.reads:
+            if name in data.data:
+                values[name] = data.data[name]
+            elif name in data.original:
+                values[name] = data.original[name]
+        return self.request_type(**values)
+
+    def coerce(self, input: Any) -> Any:
+        """Converts an activity input as deserialized by the SDK into the request type."""
+        if input is None or isinstance(input, self.request_type):
+            return input
+        if isinstance(input, SimpleNamespace):
+            input = vars(input)
+        if isinstance(input, dict):
+            return self.request_type(**{name: input[name] for name in self.reads if name in input})
+        return input
+
+    def check_outputs(self, activity_name: str, outputs: Optional[Dict[str, Any]]) -> None:
+        """Raises ValueError if an activity returned outputs it didn't declare."""
+        undeclared = set(outputs or ()) - set(self.writes)
+        if undeclared:
+            raise ValueError(f"Activity {activity_name} returned undeclared outputs: {', '.join(sorted(undeclared))}")
+
+    def merge(self, data: Any, outputs: Optional[Dict[str, Any]]) -> None:
+        """Merges only the declared outputs into the workflow data."""
+        if not outputs:
+            return
+        for name in self.writes:
+            if name in outputs:
+                data.data[name] = outputs[name]
+
+
+def projection(request_type: Type[ActivityRequest], *, writes: Iterable[str] = ()):
+    """
+    Decorator that declares the request type an activity reads and the outputs it writes.
+
+    Args:
+        request_type: Dataclass whose fields name the WorkflowData fields the activity reads
+        writes: Names of the outputs merged back into WorkflowData.data
+    """
+    reads = tuple(field.name for field in dataclasses.fields(request_type)) if dataclasses.is_dataclass(request_type) else ()
+
+    def wrapper(fn: Callable):
+        setattr(fn, PROJECTION_ATTRIBUTE, ActivityProjection(request_type, reads, tuple(writes)))
+        return fn
+
+    return wrapper
+
+
+def get_projection(activity: Union[Callable, str, None]) -> Optional[ActivityProjection]:
+    """Returns the projection declared by an activity function or registered activity name."""
+    if activity is None:
+        return None
+    if isinstance(activity, str):
+        return _projections.get(activity)
+    return getattr(activity, PROJECTION_ATTRIBUTE, None)
+
+
+def _outputs(result: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(result, dict):
+        return result.get('outputs')
+    return getattr(result, 'outputs', None)
+
+
+def register_projection(fn: Callable, name: str) -> Callable:
+    """
+    Validates an activity's projection and wraps it to receive its typed request.
+
+    Activities without a projection are returned unchanged. The wrapper keeps
+    the sync or async nature and the signature of the activity.
+    """
+    activity_projection = get_projection(fn)
+    if activity_projection is None:
+        return fn
+    activity_projection.validate(name)
+    _projections[name] = activity_projection
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def projected_activity(ctx, input: Any = None):
+            result = await fn(ctx, activity_projection.coerce(input))
+            activity_projection.check_outputs(name, _outputs(result))
+            return result
+    else:
+        @functools.wraps(fn)
+        def projected_activity(ctx, input: Any = None):
+            result = fn(ctx, activity_projection.coerce(input))
+            activity_projection.check_outputs(name, _outputs(result))
+            return result
+
+    return projected_activity
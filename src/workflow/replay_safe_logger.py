@@ -1,19 +1,28 @@
-class ReplaySafeLogger:
+import logging
+
+from workflow.structured_logging import ContextLogger
+
+
+class ReplaySafeLogger(ContextLogger):
     """
     A logger that is safe to use in the workflow code to avoid
     duplicate logs when sections of the workflow are replayed.
+
+    Messages take %-style arguments that are only formatted when the record is
+    written, so nothing is formatted while replaying:
+
+        logger.info("[Workflow] Starting workflow: %s", ctx.instance_id)
+
+    Every record carries the workflow instance ID as the instanceId field,
+    plus any fields passed as keyword arguments.
     """
-    def __init__(self, ctx, base_logger=None):
+    def __init__(self, ctx, base_logger=None, **fields):
+        super().__init__(base_logger or logging.getLogger("workflow"), instanceId=ctx.instance_id, **fields)
         self.ctx = ctx
-        self.base_logger = base_logger
+        self.base_logger = self.logger
 
     def _should_log(self):
         return not self.ctx.is_replaying
 
-    def info(self, msg, *args, **kwargs):
-        if self._should_log():
-            self.base_logger.info(msg, *args, **kwargs)
-
-    def error(self, msg, *args, **kwargs):
-        if self._should_log():
-            self.base_logger.error(msg, *args, **kwargs)
\ No newline at end of file
+    def isEnabledFor(self, level):
+        return self._should_log() and self.logger.isEnabledFor(level)
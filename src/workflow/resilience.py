@@ -0,0 +1,405 @@
+"""
+Activity Retries and Circuit Breakers for Python Dapr Workflow
+
+Without retries, one transient downstream error fails the whole workflow. With
+naive retries, every workflow that hit the same outage retries at the same
+moments, and the synchronized retry storms keep the downstream system from
+recovering. This module provides:
+
+1. Retry policies per activity: maximum attempts, exponential backoff with
+   jitter and the error classes that are retried. Retries are scheduled by the
+   workflow with durable timers, so they survive worker restarts, and the jitter
+   is derived from the instance ID and attempt, so replays wait exactly as long
+   as the first execution did.
+2. Circuit breakers per downstream dependency, shared by every activity that
+   declares the dependency. After failure_threshold consecutive failures (or
+   calls slower than slow_call_seconds) the breaker opens and calls fail fast
+   with CircuitOpenError instead of queueing for a concurrency slot. After
+   reset_timeout seconds a limited number of trial calls are let through; a
+   success closes the breaker and a failure opens it again.
+
+USAGE:
+Declare the policy below ``@wfr.activity`` and stack the breaker above the
+activity executor, so calls are rejected before they wait for a concurrency
+slot, and below the result cache, so cached results are still served:
+
+    @wfr.activity
+    @retry(max_attempts=5, first_interval=2, retryable=["TimeoutError", "ConnectionError"])
+    @activity_cache.cached
+    @circuit_breakers.guard("hr-system")
+    @activity_executor.bounded(max_concurrency=200)
+    async def prepare_paperwork_activity(ctx, input: PaperworkRequest) -> ActivityResponse:
+        ...
+
+Activities run by a TaskGraph (see dag.py) or called with call_activity (see
+activity_calls.py) are retried with their policy.
+
+Breaker state is served at /circuit-breakers and exported as
+workflow_circuit_breaker_* metrics. Each worker process keeps its own breakers.
+
+CONFIGURATION (environment variables):
+- WORKFLOW_RETRY_MAX_ATTEMPTS: Attempts for activities without a retry policy (default: 1)
+- WORKFLOW_RETRY_FIRST_INTERVAL: Seconds before the first retry (default: 1)
+- WORKFLOW_RETRY_BACKOFF_COEFFICIENT: Multiplier applied to the interval after each retry (default: 2)
+- WORKFLOW_RETRY_MAX_INTERVAL: Maximum seconds between retries (default: 60)
+- WORKFLOW_RETRY_JITTER: Fraction of each interval that is randomized (default: 0.5)
+- CIRCUIT_BREAKER_ENABLED: Guard activities with their declared circuit breakers (default: true)
+- CIRCUIT_BREAKER_FAILURE_THRESHOLD: Consecutive failures that open a breaker (default: 5)
+- CIRCUIT_BREAKER_RESET_TIMEOUT: Seconds a breaker stays open before trial calls (default: 30)
+- CIRCUIT_BREAKER_HALF_OPEN_CALLS: Trial calls let through while half-open (default: 1)
+- CIRCUIT_BREAKER_SLOW_CALL_SECONDS: Calls slower than this count as failures (default: none)
+"""
+
+import functools
+import inspect
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from .metrics import CIRCUIT_BREAKER_REJECTIONS, CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS, RETRIES
+
+logger = logging.getLogger(__name__)
+
+RETRY_ATTRIBUTE = "_activity_retry"
+
+_retry_policies: Dict[str, "ActivityRetryPolicy"] = {}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an activity while its dependency's circuit breaker is open."""
+
+
+class BreakerState:
+    """Circuit breaker states enumeration"""
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+# Value of the workflow_circuit_breaker_state gauge per state
+BREAKER_STATE_VALUES = {BreakerState.CLOSED: 0, BreakerState.HALF_OPEN: 1, BreakerState.OPEN: 2}
+
+
+def _env_float(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+@dataclass(frozen=True, slots=True)
+class ActivityRetryPolicy:
+    """
+    Retry policy of an activity.
+
+    Args:
+        max_attempts: Total attempts including the first one
+        first_interval: Seconds before the first retry
+        backoff_coefficient: Multiplier applied to the interval after each retry
+        max_interval: Maximum seconds between retries
+        jitter: Fraction of each interval that is randomized (0 waits exactly the interval)
+        retryable: Error class names that are retried; empty retries every error
+        non_retryable: Error class names that are never retried
+    """
+    max_attempts: int
+    first_interval: float
+    backoff_coefficient: float
+    max_interval: float
+    jitter: float
+    retryable: Tuple[str, ...] = ()
+    non_retryable: Tuple[str, ...] = ()
+
+    def is_retryable(self, error_type: Optional[str]) -> bool:
+        """True if a failure with the given error class name should be retried."""
+        if error_type in self.non_retryable:
+            return False
+        return not self.retryable or error_type in self.retryable
+
+    def delay(self, attempt: int, seed: str) -> float:
+        """
+        Returns the seconds to wait after the given failed attempt.
+
+        The interval grows exponentially up to max_interval and the jittered
+        part is drawn from a generator seeded with seed, so the same workflow
+        attempt always waits the same time while different workflows spread out.
+        """
+        interval = min(self.first_interval * self.backoff_coefficient ** (attempt - 1), self.max_interval)
+        return interval * (1 - self.jitter) + interval * self.jitter * random.Random(seed).random()
+
+
+def default_retry_policy() -> ActivityRetryPolicy:
+    """Returns the retry policy configured by the environment."""
+    return ActivityRetryPolicy(
+        max_attempts=int(os.getenv("WORKFLOW_RETRY_MAX_ATTEMPTS", "1")),
+        first_interval=_env_float("WORKFLOW_RETRY_FIRST_INTERVAL", "1"),
+        backoff_coefficient=_env_float("WORKFLOW_RETRY_BACKOFF_COEFFICIENT", "2"),
+        max_interval=_env_float("WORKFLOW_RETRY_MAX_INTERVAL", "60"),
+        jitter=_env_float("WORKFLOW_RETRY_JITTER", "0.5"),
+    )
+
+
+def retry(
+    *,
+    max_attempts: Optional[int] = None,
+    first_interval: Optional[float] = None,
+    backoff_coefficient: Optional[float] = None,
+    max_interval: Optional[float] = None,
+    jitter: Optional[float] = None,
+    retryable: Iterable[Union[str, type]] = (),
+    non_retryable: Iterable[Union[str, type]] = (),
+):
+    """
+    Decorator that declares the retry policy of an activity.
+
+    Unset arguments use the environment defaults. Error classes may be given
+    as exception types or class names.
+    """
+    default = default_retry_policy()
+    policy = ActivityRetryPolicy(
+        max_attempts=max_attempts if max_attempts is not None else default.max_attempts,
+        first_interval=first_interval if first_interval is not None else default.first_interval,
+        backoff_coefficient=backoff_coefficient if backoff_coefficient is not None else default.backoff_coefficient,
+        max_interval=max_interval if max_interval is not None else default.max_interval,
+        jitter=jitter if jitter is not None else default.jitter,
+        retryable=tuple(e if isinstance(e, str) else e.__name__ for e in retryable),
+        non_retryable=tuple(e if isinstance(e, str) else e.__name__ for e in non_retryable),
+    )
+    if policy.max_attempts < 1:
+        raise ValueError("max_attempts must be at least 1")
+    if not 0 <= policy.jitter <= 1:
+        raise ValueError("jitter must be between 0 and 1")
+
+    def wrapper(fn: Callable):
+        setattr(fn, RETRY_ATTRIBUTE, policy)
+        return fn
+
+    return wrapper
+
+
+def get_retry_policy(activity: Union[Callable, str, None]) -> ActivityRetryPolicy:
+    """Returns the retry policy declared by an activity function or registered activity name."""
+    if isinstance(activity, str):
+        policy = _retry_policies.get(activity)
+    else:
+        policy = getattr(activity, RETRY_ATTRIBUTE, None)
+    return policy or default_retry_policy()
+
+
+def activity_name(activity: Union[Callable, str]) -> str:
+    if isinstance(activity, str):
+        return activity
+    return getattr(activity, '_dapr_alternate_name', None) or activity.__name__
+
+
+def _error_type(error: BaseException) -> str:
+    # Failures reported by the runtime carry the activity's error class name
+    details = getattr(error, 'details', None)
+    return getattr(details, 'error_type', None) or type(error).__name__
+
+
+def next_retry_delay(ctx, activity: Union[Callable, str], attempt: int, error: BaseException) -> Optional[float]:
+    """
+    Returns the seconds to wait before retrying a failed activity attempt, or None to give up.
+
+    Args:
+        ctx: The workflow context
+        activity: The activity function or its registered name
+        attempt: The attempt that failed, starting at 1
+        error: The failure raised by the activity task
+    """
+    policy = get_retry_policy(activity)
+    if attempt >= policy.max_attempts or not policy.is_retryable(_error_type(error)):
+        return None
+    name = activity_name(activity)
+    if not ctx.is_replaying:
+        RETRIES.labels(name, _error_type(error)).inc()
+    return policy.delay(attempt, f"{ctx.instance_id}:{name}:{attempt}")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one downstream dependency.
+
+    Args:
+        dependency: Name of the downstream dependency
+        failure_threshold: Consecutive failures that open the breaker
+        reset_timeout: Seconds the breaker stays open before trial calls
+        half_open_calls: Trial calls let through while half-open
+        slow_call_seconds: Calls slower than this count as failures
+    """
+
+    def __init__(
+        self,
+        dependency: str,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        half_open_calls: Optional[int] = None,
+        slow_call_seconds: Optional[float] = None,
+    ):
+        self.dependency = dependency
+        self.failure_threshold = failure_threshold or int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+        self.reset_timeout = reset_timeout if reset_timeout is not None else _env_float("CIRCUIT_BREAKER_RESET_TIMEOUT", "30")
+        self.half_open_calls = half_open_calls or int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_CALLS", "1"))
+        slow_call_env = os.getenv("CIRCUIT_BREAKER_SLOW_CALL_SECONDS")
+        self.slow_call_seconds = slow_call_seconds if slow_call_seconds is not None else (float(slow_call_env) if slow_call_env else None)
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trials = 0
+        self.rejected = 0
+        self.opened = 0
+        self._lock = threading.Lock()
+        CIRCUIT_BREAKER_STATE.labels(dependency).set(BREAKER_STATE_VALUES[self.state])
+
+    def _transition(self, state: str) -> None:
+        logger.warning(f"Circuit breaker for {self.dependency} is {state} (was {self.state})")
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(self.dependency).set(BREAKER_STATE_VALUES[state])
+        CIRCUIT_BREAKER_TRANSITIONS.labels(self.dependency, state).inc()
+        if state == BreakerState.OPEN:
+            self.opened += 1
+            self.opened_at = time.monotonic()
+        self.trials = 0
+
+    def acquire(self) -> None:
+        """Lets a call through or raises CircuitOpenError while the dependency is unhealthy."""
+        with self._lock:
+            if self.state == BreakerState.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(BreakerState.HALF_OPEN)
+            if self.state == BreakerState.CLOSED:
+                return
+            if self.state == BreakerState.HALF_OPEN and self.trials < self.half_open_calls:
+                self.trials += 1
+                return
+            self.rejected += 1
+        CIRCUIT_BREAKER_REJECTIONS.labels(self.dependency).inc()
+        raise CircuitOpenError(f"Circuit breaker for {self.dependency} is open")
+
+    def record(self, success: bool, seconds: float) -> None:
+        """Records the outcome of a call let through by acquire()."""
+        if self.slow_call_seconds is not None and seconds > self.slow_call_seconds:
+            success = False
+        with self._lock:
+            if success:
+                self.consecutive_failures = 0
+                if self.state == BreakerState.HALF_OPEN:
+                    self._transition(BreakerState.CLOSED)
+                return
+            self.consecutive_failures += 1
+            if self.state == BreakerState.HALF_OPEN or (
+                self.state == BreakerState.CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                self._transition(BreakerState.OPEN)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the breaker state to a dictionary."""
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutiveFailures': self.consecutive_failures,
+                'failureThreshold': self.failure_threshold,
+                'resetTimeout': self.reset_timeout,
+                'openedCount': self.opened,
+                'rejected': self.rejected
+            }
+
+
+class CircuitBreakers:
+    """Circuit breakers by downstream dependency."""
+
+    def __init__(self):
+        self.enabled = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() in ("1", "true", "yes")
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._settings: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, dependency: str) -> CircuitBreaker:
+        """Returns the breaker of a dependency, creating it on first use."""
+        with self._lock:
+            breaker = self._breakers.get(dependency)
+            if breaker is None:
+                breaker = CircuitBreaker(dependency, **self._settings.get(dependency, {}))
+                self._breakers[dependency] = breaker
+            return breaker
+
+    def guard(
+        self,
+        dependency: str,
+        *,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        half_open_calls: Optional[int] = None,
+        slow_call_seconds: Optional[float] = None,
+    ):
+        """
+        Decorator that guards an activity with the circuit breaker of its downstream dependency.
+
+        Activities guarding the same dependency share one breaker, configured by
+        the first declaration; unset arguments use the environment defaults. The
+        wrapper keeps the sync or async nature and the signature of the activity.
+        """
+        settings = {
+            'failure_threshold': failure_threshold, 'reset_timeout': reset_timeout,
+            'half_open_calls': half_open_calls, 'slow_call_seconds': slow_call_seconds,
+        }
+        with self._lock:
+            self._settings.setdefault(dependency, {k: v for k, v in settings.items() if v is not None})
+
+        def wrapper(fn: Callable):
+            if not self.enabled:
+                return fn
+            # Created on first call, so the state gauge only lists dependencies in use
+            breaker = None
+
+            def acquire() -> CircuitBreaker:
+                nonlocal breaker
+                breaker = breaker or self.get(dependency)
+                breaker.acquire()
+                return breaker
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def guarded_activity(*args, **kwargs):
+                    guard = acquire()
+                    started = time.perf_counter()
+                    try:
+                        result = await fn(*args, **kwargs)
+                    except Exception:
+                        guard.record(False, time.perf_counter() - started)
+                        raise
+                    guard.record(True, time.perf_counter() - started)
+                    return result
+            else:
+                @functools.wraps(fn)
+                def guarded_activity(*args, **kwargs):
+                    guard = acquire()
+                    started = time.perf_counter()
+                    try:
+                        result = fn(*args, **kwargs)
+                    except Exception:
+                        guard.record(False, time.perf_counter() - started)
+                        raise
+                    guard.record(True, time.perf_counter() - started)
+                    return result
+
+            return guarded_activity
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the state of every breaker by dependency."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.dependency: breaker.to_dict() for breaker in breakers}
+
+
+# Single set of circuit breakers shared across activities
+circuit_breakers = CircuitBreakers()
+
+
+def register_retry_policy(fn: Callable, name: str) -> None:
+    """Records an activity's retry policy under its registered name, for workflows that call it by name."""
+    policy = getattr(fn, RETRY_ATTRIBUTE, None)
+    if policy is not None:
+        _retry_policies[name] = policy
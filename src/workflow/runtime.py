@@ -1,5 +1,173 @@
-from dapr.ext.workflow import WorkflowRuntime
+import functools
+import importlib
+import inspect
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
-# Create a single instance of the WorkflowRuntime that can be shared across modules
-# The SDK will automatically use environment variables for connection settings
-workflow_runtime = WorkflowRuntime()
\ No newline at end of file
+from workflow.activity_calls import register_call_policies
+from workflow.claim_check import claim_check
+from workflow.metrics import METRICS_ENABLED, instrument_activity, instrument_workflow
+from workflow.profiling import workflow_profiler
+from workflow.projection import register_projection
+from workflow.resilience import register_retry_policy
+from workflow.serialization import compress_results, compression_for
+
+if TYPE_CHECKING:
+    from dapr.ext.workflow import WorkflowRuntime
+
+logger = logging.getLogger(__name__)
+
+
+class RegistrationKind:
+    """Kinds of registered functions enumeration"""
+    WORKFLOW = "workflow"
+    ACTIVITY = "activity"
+
+
+def _registered_stub(fn: Callable, name: Optional[str]) -> Callable:
+    """Returns the same stub the SDK decorators return for a registered function."""
+    @functools.wraps(fn)
+    def registered():
+        return fn
+
+    registered.__dict__['_dapr_alternate_name'] = getattr(fn, '_dapr_alternate_name', None) or name or fn.__name__
+    registered.__signature__ = inspect.signature(fn)
+    return registered
+
+
+def wrap_registered(kind: str, fn: Callable, name: str) -> Callable:
+    """
+    Applies the registration wrappers described in LazyWorkflowRuntime to a workflow or activity.
+
+    The fake runtime registers functions through this as well, so workflows run
+    against the same activity chain as with the SDK runtime.
+    """
+    if kind == RegistrationKind.WORKFLOW:
+        if workflow_profiler.enabled:
+            fn = workflow_profiler.profile_workflow(fn, name)
+        if METRICS_ENABLED:
+            fn = instrument_workflow(fn, name)
+        return fn
+
+    fn = register_projection(fn, name)
+    register_retry_policy(fn, name)
+    register_call_policies(fn, name)
+    if claim_check.enabled:
+        fn = claim_check.wrap_activity(fn)
+    if compression_for(name) is not None:
+        fn = compress_results(fn, name)
+    if workflow_profiler.enabled:
+        fn = workflow_profiler.profile_activity(fn, name)
+    if METRICS_ENABLED:
+        fn = instrument_activity(fn, name)
+    return fn
+
+
+class LazyWorkflowRuntime:
+    """
+    Workflow runtime whose registrations are resolved when it starts.
+
+    The @wfr.workflow and @wfr.activity decorators only record the function and
+    return the same stub as the SDK decorators, so importing workflow modules
+    doesn't load the SDK or the gRPC stack. resolve() (called by start()) imports
+    the included modules, creates the SDK WorkflowRuntime and registers every
+    recorded function.
+
+    Workflows are wrapped, innermost first, with:
+    1. The replay-cost profiler, when profiling is enabled
+    2. Prometheus metrics, when metrics are enabled
+
+    Activities have their projection, retry policy, deadline and hedging policy
+    recorded, and are wrapped, innermost first, with:
+    1. The projection, so they receive their typed request
+    2. Claim checks, when enabled, which resolve referenced inputs and offload large outputs
+    3. Result compression, when the activity has compression settings
+    4. The replay-cost profiler, when profiling is enabled
+    5. Prometheus metrics, when metrics are enabled
+    """
+
+    def __init__(self):
+        self._modules: List[str] = []
+        self._pending: List[Tuple[str, Callable, Optional[str]]] = []
+        self._runtime: Optional["WorkflowRuntime"] = None
+        self._lock = threading.Lock()
+
+    def include(self, *modules: str) -> None:
+        """Adds modules that register workflows and activities; they are imported by resolve()."""
+        self._modules.extend(module for module in modules if module not in self._modules)
+
+    def register_workflow(self, fn: Callable, *, name: Optional[str] = None) -> None:
+        self._record(RegistrationKind.WORKFLOW, fn, name)
+
+    def register_activity(self, fn: Callable, *, name: Optional[str] = None) -> None:
+        self._record(RegistrationKind.ACTIVITY, fn, name)
+
+    def workflow(self, __fn: Optional[Callable] = None, *, name: Optional[str] = None):
+        """Decorator that registers a workflow function when the runtime is resolved."""
+        def wrapper(fn: Callable) -> Callable:
+            self.register_workflow(fn, name=name)
+            return _registered_stub(fn, name)
+
+        return wrapper(__fn) if __fn else wrapper
+
+    def activity(self, __fn: Optional[Callable] = None, *, name: Optional[str] = None):
+        """Decorator that registers an activity function when the runtime is resolved."""
+        def wrapper(fn: Callable) -> Callable:
+            self.register_activity(fn, name=name)
+            return _registered_stub(fn, name)
+
+        return wrapper(__fn) if __fn else wrapper
+
+    def _record(self, kind: str, fn: Callable, name: Optional[str]) -> None:
+        # Functions decorated after the runtime was created are registered right away
+        if self._runtime is not None:
+            self._register(self._runtime, kind, fn, name)
+        else:
+            self._pending.append((kind, fn, name))
+
+    @staticmethod
+    def _register(runtime: "WorkflowRuntime", kind: str, fn: Callable, name: Optional[str]) -> None:
+        registered_name = name or getattr(fn, '_dapr_alternate_name', fn.__name__)
+        fn = wrap_registered(kind, fn, registered_name)
+        if kind == RegistrationKind.WORKFLOW:
+            runtime.register_workflow(fn, name=name)
+        else:
+            runtime.register_activity(fn, name=name)
+
+    def resolve(self) -> "WorkflowRuntime":
+        """Imports the included modules and registers everything with a new SDK runtime, once."""
+        with self._lock:
+            if self._runtime is not None:
+                return self._runtime
+            for module in self._modules:
+                importlib.import_module(module)
+
+            from dapr.ext.workflow import WorkflowRuntime
+
+            # The SDK will automatically use environment variables for connection settings
+            # Activities managed by the activity executor run on the worker's event loop, so the
+            # concurrent work item limit (not the thread pool) bounds how many can be in flight
+            runtime = WorkflowRuntime(
+                maximum_concurrent_activity_work_items=int(os.getenv("WORKFLOW_MAX_CONCURRENT_ACTIVITIES", "1000")),
+                maximum_concurrent_orchestration_work_items=int(os.getenv("WORKFLOW_MAX_CONCURRENT_ORCHESTRATIONS", "1000")),
+            )
+            for kind, fn, name in self._pending:
+                self._register(runtime, kind, fn, name)
+            logger.info(f"Registered {len(self._pending)} workflows and activities from {', '.join(self._modules) or 'imported modules'}")
+            self._pending.clear()
+            self._runtime = runtime
+            return runtime
+
+    def start(self) -> None:
+        """Resolves the registrations and connects the runtime to the sidecar."""
+        self.resolve().start()
+
+    def shutdown(self) -> None:
+        if self._runtime is not None:
+            self._runtime.shutdown()
+
+
+# Single lazily resolved workflow runtime shared across modules
+workflow_runtime = LazyWorkflowRuntime()
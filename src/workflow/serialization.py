@@ -0,0 +1,376 @@
+"""
+Payload Serialization for Python Dapr Workflow
+
+This module provides a pluggable serialization layer for the payloads that the
+workflow models write into the workflow history (activity outputs, workflow
+inputs, continue-as-new state).
+
+FORMATS:
+- json: Payloads stay native JSON objects in the history. Uses orjson when it is
+  installed for fast text encoding (for example in WorkflowData.to_json).
+- msgpack: Payloads are packed into a compact binary form and stored as a
+  headered string. Requires the optional 'msgpack' package.
+
+COMPRESSION:
+Payloads whose encoded size is at or above a threshold can be compressed with
+zlib, or zstd when the optional 'zstandard' package is installed. Compressed
+payloads are only stored when they are smaller than the original, including the
+base64 overhead. Compression is configured globally and can be overridden per
+workflow type (workflow inputs and continue-as-new state) or activity name
+(activity results), and compression ratios are tracked per name.
+
+PAYLOAD HEADER:
+Binary payloads are stored as strings of the form
+
+    wfc1:<codec>:<base64 body>
+
+where 'wfc1' is the header version. The decoder reads the header to select the
+codec, so a payload written with any registered codec can always be read back
+regardless of the currently configured codec. Plain JSON objects (including
+histories written before this layer existed) have no header and are returned
+unchanged.
+
+Compressed payloads use the 'wfc2' header, whose body starts with a marker byte
+naming the compression (0 none, 1 zlib, 2 zstd) followed by the codec output:
+
+    wfc2:<codec>:<base64 of marker byte + compressed body>
+
+'wfc1' payloads and plain JSON objects decode exactly as before, so histories
+written without compression keep replaying.
+
+CONFIGURATION (environment variables):
+- WORKFLOW_PAYLOAD_CODEC: Codec used for new payloads, 'json' or 'msgpack' (default: json)
+- WORKFLOW_PAYLOAD_COMPRESSION: Compression for large payloads, 'none', 'zlib' or 'zstd' (default: none)
+- WORKFLOW_PAYLOAD_COMPRESSION_THRESHOLD: Encoded size in bytes from which payloads are compressed (default: 4096)
+- WORKFLOW_PAYLOAD_COMPRESSION_OVERRIDES: Per workflow type or activity settings,
+  e.g. 'employee_onboarding_workflow=zstd:8192,prepare_paperwork_activity=none' (default: none)
+"""
+
+import base64
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+PAYLOAD_HEADER_VERSION = "wfc1"
+COMPRESSED_HEADER_VERSION = "wfc2"
+
+
+def _default(obj: Any) -> Any:
+    """Converts values the codecs can't encode natively, mirroring CustomJSONEncoder."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, set):
+        return list(obj)
+    if hasattr(obj, 'to_dict') and callable(getattr(obj, 'to_dict')):
+        return obj.to_dict()
+    return str(obj)
+
+
+class PayloadCodec:
+    """
+    Base class for payload codecs.
+
+    Subclasses set a unique name, declare whether they produce binary output,
+    and implement dumps/loads.
+    """
+    name: str = ""
+    binary: bool = False
+
+    def dumps(self, value: Any) -> bytes:
+        """Encodes a value to bytes."""
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        """Decodes bytes produced by dumps."""
+        raise NotImplementedError
+
+
+class JsonCodec(PayloadCodec):
+    """JSON codec backed by orjson when available, falling back to the standard library."""
+    name = "json"
+    binary = False
+
+    def dumps(self, value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(value, default=_default, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class MsgpackCodec(PayloadCodec):
+    """Compact binary codec backed by msgpack."""
+    name = "msgpack"
+    binary = True
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_default, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+_codecs: Dict[str, PayloadCodec] = {}
+_unavailable_warned = set()
+
+
+def register_codec(codec: PayloadCodec) -> None:
+    """Registers a codec so payloads carrying its name in the header can be decoded."""
+    if not codec.name or ":" in codec.name:
+        raise ValueError(f"Invalid codec name: {codec.name!r}")
+    _codecs[codec.name] = codec
+
+
+def get_codec(name: Optional[str] = None) -> PayloadCodec:
+    """
+    Returns a registered codec by name, or the configured default codec.
+
+    Falls back to JSON when the configured codec is not available, for example
+    when the optional msgpack package is not installed.
+    """
+    name = name or os.getenv("WORKFLOW_PAYLOAD_CODEC", JsonCodec.name)
+    codec = _codecs.get(name)
+    if codec is None:
+        if name not in _unavailable_warned:
+            _unavailable_warned.add(name)
+            logger.warning(f"Payload codec '{name}' is not available, falling back to '{JsonCodec.name}'")
+        codec = _codecs[JsonCodec.name]
+    return codec
+
+
+class Compression:
+    """Payload compression algorithms enumeration"""
+    NONE = "none"
+    ZLIB = "zlib"
+    ZSTD = "zstd"
+
+
+# Marker byte at the start of every wfc2 payload body
+COMPRESSION_MARKERS = {Compression.NONE: 0, Compression.ZLIB: 1, Compression.ZSTD: 2}
+_MARKER_COMPRESSION = {marker: name for name, marker in COMPRESSION_MARKERS.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class CompressionSettings:
+    """Compression applied to payloads of one workflow type or activity."""
+    algorithm: str
+    threshold_bytes: int
+
+
+@dataclass(slots=True)
+class CompressionStats:
+    """Compression counters of one workflow type or activity."""
+    candidates: int = 0
+    compressed: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the compression counters to a dictionary."""
+        return {
+            'candidates': self.candidates,
+            'compressed': self.compressed,
+            'rawBytes': self.raw_bytes,
+            'storedBytes': self.stored_bytes,
+            'ratio': self.stored_bytes / self.raw_bytes if self.raw_bytes else None
+        }
+
+
+_compression_stats: Dict[str, CompressionStats] = {}
+_compression_lock = threading.Lock()
+
+
+def _parse_compression(value: str, default_threshold: int) -> CompressionSettings:
+    algorithm, _, threshold = value.strip().partition(":")
+    algorithm = algorithm.strip().lower() or Compression.NONE
+    if algorithm not in COMPRESSION_MARKERS:
+        raise ValueError(f"Unknown payload compression '{algorithm}'")
+    if algorithm == Compression.ZSTD and zstandard is None:
+        if algorithm not in _unavailable_warned:
+            _unavailable_warned.add(algorithm)
+            logger.warning(f"Payload compression '{Compression.ZSTD}' needs the zstandard package, using '{Compression.ZLIB}'")
+        algorithm = Compression.ZLIB
+    return CompressionSettings(algorithm, int(threshold) if threshold else default_threshold)
+
+
+@functools.lru_cache(maxsize=8)
+def _compression_config(default: str, threshold: str, overrides: str) -> Tuple[CompressionSettings, Dict[str, CompressionSettings]]:
+    default_threshold = int(threshold)
+    by_name = {}
+    for item in filter(None, (part.strip() for part in overrides.split(","))):
+        name, _, value = item.partition("=")
+        by_name[name.strip()] = _parse_compression(value, default_threshold)
+    return _parse_compression(default, default_threshold), by_name
+
+
+def compression_for(name: Optional[str] = None) -> Optional[CompressionSettings]:
+    """Returns the compression settings for a workflow type or activity name, or None if disabled."""
+    default, by_name = _compression_config(
+        os.getenv("WORKFLOW_PAYLOAD_COMPRESSION", Compression.NONE),
+        os.getenv("WORKFLOW_PAYLOAD_COMPRESSION_THRESHOLD", "4096"),
+        os.getenv("WORKFLOW_PAYLOAD_COMPRESSION_OVERRIDES", ""),
+    )
+    settings = by_name.get(name, default) if name else default
+    return settings if settings.algorithm != Compression.NONE else None
+
+
+def _compress(algorithm: str, data: bytes) -> bytes:
+    if algorithm == Compression.ZSTD:
+        return zstandard.ZstdCompressor().compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(marker: int, data: bytes) -> bytes:
+    algorithm = _MARKER_COMPRESSION.get(marker)
+    if algorithm == Compression.NONE:
+        return data
+    if algorithm == Compression.ZLIB:
+        return zlib.decompress(data)
+    if algorithm == Compression.ZSTD:
+        if zstandard is None:
+            raise ValueError("Workflow payload is zstd compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Workflow payload has unknown compression marker {marker}")
+
+
+def _record_compression(name: Optional[str], raw_size: int, stored_size: Optional[int]) -> None:
+    with _compression_lock:
+        stats = _compression_stats.setdefault(name or "default", CompressionStats())
+        stats.candidates += 1
+        if stored_size is not None:
+            stats.compressed += 1
+            stats.raw_bytes += raw_size
+            stats.stored_bytes += stored_size
+
+
+def compression_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns compression counters and ratios per workflow type or activity name."""
+    with _compression_lock:
+        return {name: stats.to_dict() for name, stats in _compression_stats.items()}
+
+
+def is_encoded_payload(payload: Any) -> bool:
+    """Returns True if the payload is a headered payload string."""
+    return isinstance(payload, str) and (
+        payload.startswith(PAYLOAD_HEADER_VERSION + ":") or payload.startswith(COMPRESSED_HEADER_VERSION + ":")
+    )
+
+
+def encode_payload(value: Any, codec: Optional[PayloadCodec] = None, name: Optional[str] = None) -> Any:
+    """
+    Encodes a JSON-compatible value for storage in the workflow history.
+
+    Args:
+        value: The value to encode, typically a dictionary from a model's to_dict()
+        codec: The codec to use; defaults to the configured codec
+        name: Workflow type or activity name that selects the compression settings
+
+    Returns:
+        The value unchanged for the JSON codec, otherwise a headered payload
+        string; compressed payloads are always headered
+    """
+    codec = codec or get_codec()
+    settings = compression_for(name) if not is_encoded_payload(value) else None
+    if settings is None:
+        if not codec.binary:
+            return value
+        raw = codec.dumps(value)
+    else:
+        raw = codec.dumps(value)
+        if len(raw) >= settings.threshold_bytes:
+            body = bytes([COMPRESSION_MARKERS[settings.algorithm]]) + _compress(settings.algorithm, raw)
+            encoded = base64.b64encode(body).decode('ascii')
+            # Keep the original when base64 eats the savings
+            if len(encoded) < len(raw):
+                _record_compression(name, len(raw), len(encoded))
+                return f"{COMPRESSED_HEADER_VERSION}:{codec.name}:{encoded}"
+            _record_compression(name, len(raw), None)
+        if not codec.binary:
+            return value
+    body = base64.b64encode(raw).decode('ascii')
+    return f"{PAYLOAD_HEADER_VERSION}:{codec.name}:{body}"
+
+
+def decode_payload(payload: Any) -> Any:
+    """
+    Decodes a payload produced by encode_payload.
+
+    Values without a payload header are returned unchanged, so plain JSON
+    payloads and histories written before this layer existed keep replaying.
+    """
+    if not is_encoded_payload(payload):
+        return payload
+    try:
+        version, codec_name, body = payload.split(":", 2)
+    except ValueError:
+        raise ValueError("Malformed workflow payload header")
+    codec = _codecs.get(codec_name)
+    if codec is None:
+        raise ValueError(f"Workflow payload uses unknown codec '{codec_name}'")
+    data = base64.b64decode(body)
+    if version == COMPRESSED_HEADER_VERSION:
+        if not data:
+            raise ValueError("Compressed workflow payload is empty")
+        data = _decompress(data[0], data[1:])
+    return codec.loads(data)
+
+
+def compress_results(fn: Callable, name: str) -> Callable:
+    """
+    Wraps an activity to encode its result with the compression settings of the activity.
+
+    Results that provide to_payload (ActivityResponse) are encoded with the
+    activity's name; other results are returned unchanged. The wrapper keeps
+    the sync or async nature and the signature of the activity.
+    """
+    def dump(result: Any) -> Any:
+        to_payload = getattr(result, 'to_payload', None)
+        return to_payload(name=name) if callable(to_payload) else result
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def compressed_activity(*args):
+            return dump(await fn(*args))
+    else:
+        @functools.wraps(fn)
+        def compressed_activity(*args):
+            return dump(fn(*args))
+
+    return compressed_activity
+
+
+def to_json_bytes(value: Any) -> bytes:
+    """Serializes a value to JSON bytes with the fastest available backend."""
+    return _codecs[JsonCodec.name].dumps(value)
+
+
+register_codec(JsonCodec())
+if msgpack is not None:
+    register_codec(MsgpackCodec())
@@ -0,0 +1,143 @@
+"""
+Readiness-based Startup for Python Dapr Workflow
+
+This module replaces fixed startup delays with an explicit readiness sequence:
+
+1. Probe the Dapr sidecar's outbound health endpoint with exponential backoff
+2. Start the workflow runtime (connects the work item stream to the sidecar)
+3. Mark the service as ready
+
+Each phase is timed so time-to-ready can be tracked for autoscaling decisions.
+
+CONFIGURATION (environment variables):
+- SIDECAR_READY_TIMEOUT: Seconds to wait for the sidecar before giving up (default: 60)
+- SIDECAR_PROBE_INITIAL_DELAY: First backoff delay in seconds (default: 0.05)
+- SIDECAR_PROBE_MAX_DELAY: Maximum backoff delay in seconds (default: 2)
+"""
+
+import asyncio
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, Optional
+
+from dapr.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Same header as dapr.clients.http.conf; importing dapr.clients would load the whole client stack
+DAPR_API_TOKEN_HEADER = "dapr-api-token"
+
+
+class StartupPhase:
+    """Startup phases enumeration"""
+    STARTING = "starting"
+    READY = "ready"
+    FAILED = "failed"
+    STOPPING = "stopping"
+
+
+class StartupState:
+    """
+    Tracks the readiness of the service and the duration of each startup phase.
+
+    Phase durations are measured between consecutive calls to mark(), starting
+    from the moment the state object is created.
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.phase = StartupPhase.STARTING
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self._last_mark = self.started_at
+
+    @property
+    def is_ready(self) -> bool:
+        """True once the workflow runtime is connected to the sidecar."""
+        return self.phase == StartupPhase.READY
+
+    def mark(self, name: str) -> float:
+        """Records the duration of a completed startup phase and returns it in seconds."""
+        now = time.perf_counter()
+        duration = now - self._last_mark
+        self.timings[name] = duration
+        self._last_mark = now
+        return duration
+
+    def set_ready(self) -> None:
+        """Marks the service as ready and records the total time to ready."""
+        self.timings["time_to_ready"] = time.perf_counter() - self.started_at
+        self.phase = StartupPhase.READY
+
+    def set_failed(self, error: str) -> None:
+        """Marks startup as failed."""
+        self.error = error
+        self.phase = StartupPhase.FAILED
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the startup state to a dictionary."""
+        return {
+            'phase': self.phase,
+            'error': self.error,
+            'timingsSeconds': {name: round(seconds, 4) for name, seconds in self.timings.items()}
+        }
+
+
+def _sidecar_api_url() -> str:
+    """Returns the sidecar's HTTP API base URL, built like dapr.clients.http.helpers.get_api_url()."""
+    if settings.DAPR_HTTP_ENDPOINT:
+        return f"{settings.DAPR_HTTP_ENDPOINT}/{settings.DAPR_API_VERSION}"
+    return f"http://{settings.DAPR_RUNTIME_HOST}:{settings.DAPR_HTTP_PORT}/{settings.DAPR_API_VERSION}"
+
+
+def _probe_sidecar(health_url: str, timeout: float) -> bool:
+    """Performs a single blocking health probe against the sidecar."""
+    headers = {}
+    if settings.DAPR_API_TOKEN:
+        headers[DAPR_API_TOKEN_HEADER] = settings.DAPR_API_TOKEN
+    try:
+        request = urllib.request.Request(health_url, headers=headers)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+async def wait_for_sidecar(
+    timeout: Optional[float] = None,
+    initial_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+) -> int:
+    """
+    Waits until the Dapr sidecar reports healthy, backing off exponentially between probes.
+
+    Args:
+        timeout: Seconds to wait before raising TimeoutError
+        initial_delay: Delay after the first failed probe, doubled after each failure
+        max_delay: Upper bound for the delay between probes
+
+    Returns:
+        The number of probes it took for the sidecar to become ready
+    """
+    timeout = timeout if timeout is not None else float(os.getenv("SIDECAR_READY_TIMEOUT", "60"))
+    delay = initial_delay if initial_delay is not None else float(os.getenv("SIDECAR_PROBE_INITIAL_DELAY", "0.05"))
+    max_delay = max_delay if max_delay is not None else float(os.getenv("SIDECAR_PROBE_MAX_DELAY", "2"))
+
+    health_url = f"{_sidecar_api_url()}/healthz/outbound"
+    deadline = time.monotonic() + timeout
+    attempts = 0
+    while True:
+        attempts += 1
+        remaining = deadline - time.monotonic()
+        if await asyncio.to_thread(_probe_sidecar, health_url, max(min(remaining, max_delay), 0.1)):
+            return attempts
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Dapr sidecar at {health_url} not ready after {timeout}s ({attempts} probes)")
+        logger.debug(f"Dapr sidecar not ready yet (probe {attempts}), retrying in {delay:.2f}s")
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
@@ -0,0 +1,212 @@
+"""
+State Store Access for Python Dapr Workflow
+
+This module provides a minimal async key/value interface over the Dapr state
+store component configured in components/statestore.yaml, plus an in-memory
+stand-in with the same interface for local runs and tests.
+
+Values are raw bytes; callers own their serialization. Both implementations
+support a per-key TTL, and the in-memory store also evicts the least recently
+used keys once it holds max_entries keys.
+
+Synchronous activities run in worker threads, so stores also offer blocking
+get_sync and set_sync calls for them.
+
+The Dapr clients wait for the sidecar when they are created. The async store
+waits in a thread so the event loop keeps running, and when the sidecar can't
+be reached, calls fail fast with StateStoreUnavailableError until
+STATE_STORE_RETRY_SECONDS have passed instead of waiting again on every call.
+
+CONFIGURATION (environment variables):
+- STATE_STORE_NAME: Name of the Dapr state store component (default: statestore)
+- STATE_STORE_RETRY_SECONDS: Seconds to fail fast after connecting to the sidecar failed (default: 30)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StateStoreUnavailableError(Exception):
+    """Raised instead of connecting again while the state store recently failed to connect."""
+
+
+class StateStore:
+    """Base class for async key/value stores."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Returns the value stored under key, or None if it is missing or expired."""
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        """Stores a value under key, optionally expiring after ttl_seconds."""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """Removes the value stored under key."""
+        raise NotImplementedError
+
+    def get_sync(self, key: str) -> Optional[bytes]:
+        """Blocking variant of get for synchronous callers such as activities run in threads."""
+        raise NotImplementedError
+
+    def set_sync(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        """Blocking variant of set for synchronous callers such as activities run in threads."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Releases any connections held by the store."""
+
+
+class InMemoryStateStore(StateStore):
+    """Process-local store with TTL and least-recently-used eviction."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.get_sync(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        self.set_sync(key, value, ttl_seconds)
+
+    def get_sync(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set_sync(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DaprStateStore(StateStore):
+    """
+    Store backed by a Dapr state store component through the async Dapr client.
+
+    Async gRPC channels are bound to the event loop that created them, and
+    activities run on the workflow worker's loop while endpoints run on the
+    web server's loop, so one client is kept per event loop. Blocking calls
+    share a single synchronous client.
+    """
+
+    def __init__(self, store_name: Optional[str] = None):
+        self.store_name = store_name or os.getenv("STATE_STORE_NAME", "statestore")
+        self.retry_seconds = float(os.getenv("STATE_STORE_RETRY_SECONDS", "30"))
+        self._clients = weakref.WeakKeyDictionary()
+        self._connecting = weakref.WeakKeyDictionary()
+        self._sync_client = None
+        self._sync_lock = threading.Lock()
+        self._unavailable_until = 0.0
+
+    def _check_available(self) -> None:
+        remaining = self._unavailable_until - time.monotonic()
+        if remaining > 0:
+            raise StateStoreUnavailableError(f"State store {self.store_name} is unavailable, retrying in {remaining:.0f}s")
+
+    def _connection_failed(self, error: Exception) -> StateStoreUnavailableError:
+        self._unavailable_until = time.monotonic() + self.retry_seconds
+        logger.warning(f"Connecting to state store {self.store_name} failed, retrying in {self.retry_seconds:.0f}s: {error}")
+        return StateStoreUnavailableError(f"State store {self.store_name} is unavailable: {error}")
+
+    async def _connect(self):
+        # Imported lazily so the gRPC client is only created when the store is used
+        from dapr.aio.clients import DaprClient
+        from dapr.clients.health import DaprHealth
+
+        try:
+            # The client constructor waits for the sidecar in a blocking sleep loop, so wait in a
+            # thread first; the constructor's own check then returns right away
+            await asyncio.to_thread(DaprHealth.wait_for_sidecar)
+            client = DaprClient()
+        except Exception as e:
+            raise self._connection_failed(e) from e
+        self._clients[asyncio.get_running_loop()] = client
+        return client
+
+    async def _get_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is not None:
+            return client
+        self._check_available()
+        # Concurrent callers share one connection attempt
+        connecting = self._connecting.get(loop)
+        if connecting is None:
+            connecting = loop.create_task(self._connect())
+            self._connecting[loop] = connecting
+            connecting.add_done_callback(lambda _: self._connecting.pop(loop, None))
+        return await asyncio.shield(connecting)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        client = await self._get_client()
+        response = await client.get_state(store_name=self.store_name, key=key)
+        return response.data or None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        state_metadata: Dict[str, str] = {}
+        if ttl_seconds:
+            state_metadata["ttlInSeconds"] = str(int(ttl_seconds))
+        client = await self._get_client()
+        await client.save_state(
+            store_name=self.store_name, key=key, value=value, state_metadata=state_metadata
+        )
+
+    async def delete(self, key: str) -> None:
+        client = await self._get_client()
+        await client.delete_state(store_name=self.store_name, key=key)
+
+    def _get_sync_client(self):
+        with self._sync_lock:
+            if self._sync_client is None:
+                self._check_available()
+                from dapr.clients import DaprClient
+                try:
+                    self._sync_client = DaprClient()
+                except Exception as e:
+                    raise self._connection_failed(e) from e
+            return self._sync_client
+
+    def get_sync(self, key: str) -> Optional[bytes]:
+        response = self._get_sync_client().get_state(store_name=self.store_name, key=key)
+        return response.data or None
+
+    def set_sync(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        state_metadata: Dict[str, str] = {}
+        if ttl_seconds:
+            state_metadata["ttlInSeconds"] = str(int(ttl_seconds))
+        self._get_sync_client().save_state(
+            store_name=self.store_name, key=key, value=value, state_metadata=state_metadata
+        )
+
+    async def close(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
@@ -0,0 +1,213 @@
+"""
+Cached Batch Workflow Status Queries for Python Dapr Workflow
+
+Dashboards that poll the status of many workflow instances one request at a
+time put a request on the sidecar and a state store read on every poll. This
+module answers status queries for many instances at once:
+
+1. Lookups for the requested instances fan out concurrently through the shared
+   workflow client pool, with bounded concurrency
+2. Results are kept in an in-memory cache for a short TTL; terminal states
+   (completed, failed, terminated) never change, so they never expire and are
+   only evicted when the cache is full
+3. Concurrent queries for the same instance share a single sidecar lookup
+4. Input, output and custom status payloads are only fetched when requested,
+   so a status poll costs almost no state store reads
+
+USAGE:
+    statuses = await workflow_status_cache.get_many(["id-1", "id-2"], include_payloads=False)
+    page = await workflow_status_cache.list_page(page_size=100, continuation_token=token)
+
+CONFIGURATION (environment variables):
+- WORKFLOW_STATUS_CACHE_TTL: Seconds non-terminal statuses are cached (default: 2)
+- WORKFLOW_STATUS_CACHE_MAX_ENTRIES: Maximum statuses held in the cache (default: 10000)
+- WORKFLOW_STATUS_CONCURRENCY: Concurrent sidecar lookups per query (default: 32)
+- WORKFLOW_STATUS_MAX_IDS: Maximum instance IDs per query (default: 500)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .client import WorkflowClientPool, workflow_client_pool
+
+logger = logging.getLogger(__name__)
+
+# Runtime statuses that never change once reached
+TERMINAL_STATUSES = frozenset({"COMPLETED", "FAILED", "TERMINATED"})
+
+PAYLOAD_FIELDS = ('serializedInput', 'serializedOutput', 'serializedCustomStatus')
+
+
+def state_to_dict(instance_id: str, state: Any, include_payloads: bool) -> Dict[str, Any]:
+    """Converts a workflow state returned by the client to a status dictionary."""
+    if state is None:
+        return {'instanceId': instance_id, 'found': False}
+    status = {
+        'instanceId': instance_id,
+        'found': True,
+        'name': state.name,
+        'runtimeStatus': state.runtime_status.name,
+        'createdAt': state.created_at.isoformat() if state.created_at else None,
+        'lastUpdatedAt': state.last_updated_at.isoformat() if state.last_updated_at else None,
+    }
+    if include_payloads:
+        status['serializedInput'] = state.serialized_input
+        status['serializedOutput'] = state.serialized_output
+        status['serializedCustomStatus'] = state.serialized_custom_status
+    if state.failure_details is not None:
+        status['failureDetails'] = {
+            'message': state.failure_details.message,
+            'errorType': state.failure_details.error_type,
+        }
+    return status
+
+
+@dataclass(slots=True)
+class _CachedStatus:
+    status: Dict[str, Any]
+    has_payloads: bool
+    expires_at: Optional[float]
+
+
+class WorkflowStatusCache:
+    """
+    Batched, cached workflow status lookups.
+
+    Args:
+        client_pool: Pool of workflow clients used for lookups
+        ttl_seconds: Seconds non-terminal statuses are cached
+        max_entries: Maximum statuses held in the cache
+        concurrency: Concurrent sidecar lookups per query
+    """
+
+    def __init__(
+        self,
+        client_pool: Optional[WorkflowClientPool] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.client_pool = client_pool or workflow_client_pool
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("WORKFLOW_STATUS_CACHE_TTL", "2"))
+        self.max_entries = max_entries or int(os.getenv("WORKFLOW_STATUS_CACHE_MAX_ENTRIES", "10000"))
+        self.concurrency = concurrency or int(os.getenv("WORKFLOW_STATUS_CONCURRENCY", "32"))
+        self.max_ids = int(os.getenv("WORKFLOW_STATUS_MAX_IDS", "500"))
+        self._entries: "OrderedDict[str, _CachedStatus]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, bool], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lookups = 0
+
+    def _cached(self, instance_id: str, include_payloads: bool) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(instance_id)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            del self._entries[instance_id]
+            return None
+        if include_payloads and not entry.has_payloads and entry.status['found']:
+            return None
+        self._entries.move_to_end(instance_id)
+        if entry.has_payloads and not include_payloads:
+            return {k: v for k, v in entry.status.items() if k not in PAYLOAD_FIELDS}
+        return entry.status
+
+    def _store(self, status: Dict[str, Any], include_payloads: bool) -> None:
+        terminal = status.get('runtimeStatus') in TERMINAL_STATUSES
+        expires_at = None if terminal else time.monotonic() + self.ttl_seconds
+        self._entries[status['instanceId']] = _CachedStatus(status, include_payloads, expires_at)
+        self._entries.move_to_end(status['instanceId'])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _lookup(self, instance_id: str, include_payloads: bool) -> Dict[str, Any]:
+        self.lookups += 1
+        try:
+            state = await self.client_pool.get().get_workflow_state(instance_id, fetch_payloads=include_payloads)
+        except Exception as e:
+            # Errors aren't cached, so the next poll retries the lookup
+            logger.warning(f"Status lookup for {instance_id} failed: {e}")
+            return {'instanceId': instance_id, 'error': str(e)}
+        status = state_to_dict(instance_id, state, include_payloads)
+        self._store(status, include_payloads)
+        return status
+
+    async def get(self, instance_id: str, include_payloads: bool = False) -> Dict[str, Any]:
+        """Returns the status of a workflow instance, from the cache when possible."""
+        cached = self._cached(instance_id, include_payloads)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        key = (instance_id, include_payloads)
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._lookup(instance_id, include_payloads))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def get_many(self, instance_ids: List[str], include_payloads: bool = False) -> List[Dict[str, Any]]:
+        """
+        Returns the statuses of many workflow instances, in the requested order.
+
+        Raises:
+            ValueError: If more than max_ids instance IDs are requested
+        """
+        if len(instance_ids) > self.max_ids:
+            raise ValueError(f"At most {self.max_ids} instance IDs can be queried at once")
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(instance_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get(instance_id, include_payloads)
+
+        # Duplicate IDs are looked up once
+        unique_ids = list(dict.fromkeys(instance_ids))
+        statuses = dict(zip(unique_ids, await asyncio.gather(*(bounded(instance_id) for instance_id in unique_ids))))
+        return [statuses[instance_id] for instance_id in instance_ids]
+
+    async def list_page(
+        self,
+        page_size: int = 100,
+        continuation_token: Optional[str] = None,
+        include_status: bool = True,
+        include_payloads: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Returns a page of workflow instances known to the sidecar.
+
+        Args:
+            page_size: Maximum number of instances in the page
+            continuation_token: Token returned with the previous page
+            include_status: Look up the status of each instance in the page
+            include_payloads: Include input, output and custom status payloads
+        """
+        instance_ids, next_token = await self.client_pool.list_instance_ids(page_size, continuation_token)
+        page: Dict[str, Any] = {'continuationToken': next_token}
+        if include_status:
+            page['workflows'] = await self.get_many(instance_ids, include_payloads)
+        else:
+            page['instanceIds'] = instance_ids
+        return page
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit and miss counters of the cache."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRatio': self.hits / total if total else 0.0,
+            'lookups': self.lookups,
+            'entries': len(self._entries)
+        }
+
+
+# Single status cache shared across the application
+workflow_status_cache = WorkflowStatusCache()
@@ -0,0 +1,261 @@
+"""
+Structured, Non-Blocking Logging for Python Dapr Workflow
+
+Logging from workflows and activities sits on the orchestration hot path. This
+module keeps its cost off that path:
+
+1. Lazy formatting: loggers take %-style arguments, so messages are only
+   formatted for records that are actually written, and formatting happens on
+   the background thread rather than in the workflow or activity
+2. Structured fields: ContextLogger attaches fields such as instanceId and
+   activityId to every record, rendered as key=value pairs or JSON
+3. Queue-backed output: records are put on a bounded in-memory queue and a
+   background thread writes them to stderr in batches; when the queue is full
+   records are dropped (and counted) instead of blocking the caller
+4. Per-level sampling: a fraction of records per level can be kept, for example
+   1% of DEBUG records during load tests
+
+USAGE:
+    configure_logging()  # Once, at startup; safe to call more than once
+
+    log = ContextLogger(logger, instanceId=ctx.workflow_id, activityId="prepare_paperwork")
+    log.info("[Activity] Provisioned %d items", count)
+
+In workflow code, use ReplaySafeLogger (replay_safe_logger.py), which also
+drops records while the workflow is replaying.
+
+NOTE: Arguments are formatted on the background thread, so pass immutable
+values (ids, counts, strings) rather than objects the caller keeps mutating.
+
+CONFIGURATION (environment variables):
+- LOG_LEVEL: Minimum level written (default: INFO)
+- LOG_FORMAT: 'text' or 'json' (default: text)
+- LOG_SAMPLE_RATES: Fraction of records kept per level, e.g. 'DEBUG=0.01,INFO=0.5' (default: keep all)
+- LOG_QUEUE_SIZE: Records buffered before new records are dropped (default: 10000)
+- LOG_BATCH_SIZE: Maximum records written per batch (default: 256)
+- LOG_FLUSH_INTERVAL: Seconds the writer waits to fill a batch (default: 0.2)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+# Attributes every LogRecord has; anything else was passed through 'extra'
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _structured_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """Returns the fields attached to a record through 'extra'."""
+    return {k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRIBUTES and not k.startswith("_")}
+
+
+class StructuredTextFormatter(logging.Formatter):
+    """Formats records as text followed by their structured fields as key=value pairs."""
+
+    def __init__(self, fmt: str = TEXT_FORMAT):
+        super().__init__(fmt)
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _structured_fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_structured_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of records per level.
+
+    Args:
+        rates: Level number to the fraction of records kept; levels not listed keep every record
+    """
+
+    def __init__(self, rates: Optional[Dict[int, float]] = None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        return rate is None or rate >= 1.0 or random.random() < rate
+
+    @staticmethod
+    def parse(value: str) -> Dict[int, float]:
+        """Parses rates such as 'DEBUG=0.01,INFO=0.5'."""
+        rates = {}
+        for item in filter(None, (part.strip() for part in value.split(","))):
+            level, _, rate = item.partition("=")
+            rates[logging.getLevelName(level.strip().upper())] = float(rate)
+        return rates
+
+
+class BatchingQueueHandler(logging.Handler):
+    """
+    Handler that enqueues records and writes them in batches on a background thread.
+
+    emit() never blocks: if the queue is full the record is dropped and counted.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.2,
+    ):
+        super().__init__()
+        # Without a stream, sys.stderr is looked up on every write so later redirections apply
+        self.stream = stream
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _next_batch(self) -> List[Optional[logging.LogRecord]]:
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if lines:
+            try:
+                stream = self.stream or sys.stderr
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+                self.written += len(lines)
+            except Exception:
+                self.handleError(records[-1])
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            records = [record for record in batch if record is not None]
+            self._write(records)
+            if len(records) < len(batch):
+                return
+
+    def close(self) -> None:
+        """Writes the queued records and stops the background thread."""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout=5)
+        super().close()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns counters of written, queued and dropped records."""
+        return {
+            "written": self.written,
+            "queued": self.queue.qsize(),
+            "dropped": self.dropped
+        }
+
+
+class ContextLogger(logging.LoggerAdapter):
+    """
+    Logger adapter that attaches structured fields to every record.
+
+    Fields passed in a call's 'extra' are merged with the adapter's fields.
+    """
+
+    def __init__(self, logger: logging.Logger, **fields: Any):
+        super().__init__(logger, fields)
+
+    def process(self, msg: Any, kwargs: Dict[str, Any]):
+        kwargs["extra"] = {**self.extra, **kwargs["extra"]} if kwargs.get("extra") else self.extra
+        return msg, kwargs
+
+
+_handler: Optional[BatchingQueueHandler] = None
+_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None) -> BatchingQueueHandler:
+    """
+    Routes the root logger through the batching queue handler.
+
+    Replaces handlers installed earlier (for example by logging.basicConfig)
+    and is a no-op on later calls. Forked processes must call it again.
+    """
+    global _handler
+    with _lock:
+        if _handler is not None:
+            return _handler
+        handler = BatchingQueueHandler(
+            queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("LOG_BATCH_SIZE", "256")),
+            flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "0.2")),
+        )
+        if os.getenv("LOG_FORMAT", "text").lower() == "json":
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(StructuredTextFormatter())
+        sample_rates = SamplingFilter.parse(os.getenv("LOG_SAMPLE_RATES", ""))
+        if sample_rates:
+            handler.addFilter(SamplingFilter(sample_rates))
+        logging.basicConfig(level=(level or os.getenv("LOG_LEVEL", "INFO")).upper(), handlers=[handler], force=True)
+        atexit.register(handler.close)
+        _handler = handler
+        return handler
+
+
+def _reset_after_fork() -> None:
+    # The writer thread doesn't survive a fork, so forked processes configure their own handler
+    global _handler, _lock
+    _handler = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def logging_stats() -> Dict[str, int]:
+    """Returns the counters of the configured handler."""
+    return _handler.stats() if _handler is not None else {}
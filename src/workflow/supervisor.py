@@ -0,0 +1,594 @@
+"""
+Multi-Process Workflow Workers for Python Dapr Workflow
+
+A single Python process replays orchestrations and runs activities behind one
+GIL, so orchestration throughput is capped at one core. This module runs the
+workflow runtime in N worker processes under a supervisor:
+
+1. The supervisor forks the worker processes before anything connects to the
+   sidecar, so no gRPC state is shared across a fork
+2. Each worker registers the workflows, waits for the sidecar and starts its own
+   workflow runtime; all workers connect to the same sidecar, which spreads
+   work items across them
+3. Workers send a heartbeat with their stats; the supervisor restarts workers
+   that exit or stop sending heartbeats, with exponential backoff
+4. Optionally the supervisor also runs the FastAPI front end (app.py) as a
+   separate process in 'supervised' mode, where it serves the API without
+   starting a workflow runtime of its own
+5. Workers and the API process write their Prometheus metrics to a shared
+   PROMETHEUS_MULTIPROC_DIR, so /metrics on the API reports all processes (see
+   metrics.py)
+
+In supervised mode the API serves the per-process stats endpoints
+(/activities/stats, /activities/cache/stats, /activities/batch/stats,
+/circuit-breakers, /payloads/compression/stats) from the aggregate below, which
+SupervisorClient fetches; the adaptive admission limit reads the workers'
+activity load from it as well.
+
+Processes are named consistently as <prefix>-supervisor, <prefix>-worker-<n>
+and <prefix>-api (visible in ps/top when setproctitle is installed, and in
+/proc/<pid>/comm on Linux otherwise).
+
+The supervisor serves its own status endpoints:
+- GET /healthz: 200 when every worker is healthy, otherwise 503
+- GET /workers: Per-worker status and stats plus an aggregate across workers
+
+USAGE:
+    python3 src/worker.py --workers 4              # Workers only
+    python3 src/worker.py --workers 4 --serve-api  # Workers plus the FastAPI front end
+
+CONFIGURATION (environment variables):
+- WORKFLOW_WORKERS: Number of worker processes (default: CPU count)
+- WORKFLOW_WORKER_MODULES: Comma-separated modules that register workflows (default: workflow.workflow)
+- WORKFLOW_WORKER_START_METHOD: multiprocessing start method (default: fork where available)
+- WORKFLOW_WORKER_HEARTBEAT_INTERVAL: Seconds between worker heartbeats (default: 2)
+- WORKFLOW_WORKER_HEARTBEAT_TIMEOUT: Seconds without heartbeat before a worker is restarted (default: 30)
+- WORKFLOW_WORKER_MAX_RESTART_DELAY: Maximum backoff between restarts in seconds (default: 30)
+- WORKFLOW_SUPERVISOR_PORT: Port of the supervisor status endpoints (default: 8309)
+- WORKFLOW_PROCESS_PREFIX: Prefix of process names (default: workflow)
+- PROMETHEUS_MULTIPROC_DIR: Directory for the metrics of all processes; cleared on start
+  (default: a new temporary directory)
+
+NOTE: This module only imports the standard library at module level, so the
+supervisor stays light and nothing heavy is inherited by forked workers.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROCESS_PREFIX = os.getenv("WORKFLOW_PROCESS_PREFIX", "workflow")
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class WorkerPhase:
+    """Worker process phases enumeration"""
+    STARTING = "starting"
+    READY = "ready"
+    FAILED = "failed"
+    STOPPED = "stopped"
+
+
+# Circuit breaker states from least to most severe (see resilience.py)
+BREAKER_SEVERITY = ("closed", "half_open", "open")
+
+
+def set_process_title(title: str) -> None:
+    """Names the current process for ps/top, using setproctitle when it is installed."""
+    multiprocessing.current_process().name = title
+    try:
+        import setproctitle
+        setproctitle.setproctitle(title)
+        return
+    except ImportError:
+        pass
+    try:
+        # Linux limits the command name to 15 characters
+        with open("/proc/self/comm", "w") as f:
+            f.write(title[:15])
+    except OSError:
+        pass
+
+
+def collect_worker_stats() -> Dict[str, Any]:
+    """Collects the stats a worker reports with each heartbeat."""
+    import resource
+    from .activity_cache import activity_cache
+    from .activity_executor import activity_executor
+    from .metrics import export_compression_stats
+    from .micro_batch import micro_batcher
+    from .resilience import circuit_breakers
+    from .serialization import compression_stats
+    from .structured_logging import logging_stats
+
+    export_compression_stats()
+    times = os.times()
+    return {
+        'cpuSeconds': times.user + times.system,
+        'maxRssKb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'activities': activity_executor.stats(),
+        'activityCache': activity_cache.stats(),
+        'activityBatches': micro_batcher.stats(),
+        'circuitBreakers': circuit_breakers.stats(),
+        'compression': compression_stats(),
+        'logging': logging_stats()
+    }
+
+
+def worker_main(index: int, name: str, status_queue, stop_event, modules: List[str], heartbeat_interval: float) -> None:
+    """
+    Entry point of a worker process: starts a workflow runtime and sends heartbeats until stopped.
+    """
+    set_process_title(name)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signo, frame: stop_event.set())
+
+    def report(phase: str, error: Optional[str] = None, stats: Optional[Dict[str, Any]] = None) -> None:
+        status_queue.put({'index': index, 'pid': os.getpid(), 'phase': phase, 'error': error, 'stats': stats, 'at': time.time()})
+
+    runtime = None
+    try:
+        import asyncio
+        from .structured_logging import configure_logging
+        configure_logging()
+
+        # Heavy imports happen here, after the fork
+        from .runtime import workflow_runtime
+        from .startup import wait_for_sidecar
+
+        workflow_runtime.include(*modules)
+        workflow_runtime.resolve()
+        asyncio.run(wait_for_sidecar())
+        workflow_runtime.start()
+        runtime = workflow_runtime
+        logger.info(f"{name} connected to the sidecar")
+
+        report(WorkerPhase.READY, stats=collect_worker_stats())
+        while not stop_event.wait(heartbeat_interval):
+            report(WorkerPhase.READY, stats=collect_worker_stats())
+    except Exception as e:
+        logger.error(f"{name} failed: {e}")
+        report(WorkerPhase.FAILED, error=str(e))
+        sys.exit(1)
+    finally:
+        if runtime is not None:
+            runtime.shutdown()
+            from .activity_executor import activity_executor
+            activity_executor.shutdown()
+
+    report(WorkerPhase.STOPPED)
+
+
+@dataclass
+class WorkerStatus:
+    """Health and stats of one worker process, as seen by the supervisor."""
+    index: int
+    name: str
+    pid: Optional[int] = None
+    phase: str = WorkerPhase.STARTING
+    started_at: float = field(default_factory=time.time)
+    heartbeat_at: Optional[float] = None
+    restarts: int = 0
+    failures: int = 0
+    exit_code: Optional[int] = None
+    error: Optional[str] = None
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    def is_healthy(self, heartbeat_timeout: float) -> bool:
+        """True if the worker is ready and sent a heartbeat within heartbeat_timeout."""
+        return (
+            self.phase == WorkerPhase.READY
+            and self.heartbeat_at is not None
+            and time.time() - self.heartbeat_at < heartbeat_timeout
+        )
+
+    def to_dict(self, heartbeat_timeout: float) -> Dict[str, Any]:
+        """Converts the worker status to a dictionary."""
+        return {
+            'index': self.index,
+            'name': self.name,
+            'pid': self.pid,
+            'phase': self.phase,
+            'healthy': self.is_healthy(heartbeat_timeout),
+            'uptimeSeconds': time.time() - self.started_at,
+            'secondsSinceHeartbeat': time.time() - self.heartbeat_at if self.heartbeat_at else None,
+            'restarts': self.restarts,
+            'exitCode': self.exit_code,
+            'error': self.error,
+            'stats': self.stats
+        }
+
+
+def _aggregate_activities(workers: List[WorkerStatus]) -> Dict[str, Dict[str, Any]]:
+    activities: Dict[str, Dict[str, Any]] = {}
+    for worker in workers:
+        for name, stats in worker.stats.get('activities', {}).items():
+            total = activities.setdefault(name, {
+                'activityName': name, 'mode': stats.get('mode'), 'maxConcurrency': stats.get('maxConcurrency'),
+                'inFlight': 0, 'queued': 0, 'maxQueued': 0, 'completed': 0, 'failed': 0,
+                'avgWaitSeconds': 0.0, 'avgRunSeconds': 0.0,
+            })
+            finished = stats.get('completed', 0) + stats.get('failed', 0)
+            for key in ('inFlight', 'queued', 'completed', 'failed'):
+                total[key] += stats.get(key, 0)
+            total['maxQueued'] = max(total['maxQueued'], stats.get('maxQueued', 0))
+            for key in ('avgWaitSeconds', 'avgRunSeconds'):
+                total[key] += stats.get(key, 0.0) * finished
+
+    for total in activities.values():
+        finished = total['completed'] + total['failed']
+        for key in ('avgWaitSeconds', 'avgRunSeconds'):
+            total[key] = total[key] / finished if finished else 0.0
+    return activities
+
+
+def _aggregate_activity_cache(workers: List[WorkerStatus]) -> Dict[str, Any]:
+    total = {'hits': 0, 'misses': 0, 'hitRatio': 0.0, 'localEntries': 0}
+    for worker in workers:
+        stats = worker.stats.get('activityCache', {})
+        for key in ('hits', 'misses', 'localEntries'):
+            total[key] += stats.get(key, 0)
+    lookups = total['hits'] + total['misses']
+    total['hitRatio'] = total['hits'] / lookups if lookups else 0.0
+    return total
+
+
+def _aggregate_activity_batches(workers: List[WorkerStatus]) -> Dict[str, Dict[str, Any]]:
+    batches: Dict[str, Dict[str, Any]] = {}
+    for worker in workers:
+        for name, stats in worker.stats.get('activityBatches', {}).items():
+            total = batches.setdefault(name, {
+                'activityName': name, 'maxBatchSize': stats.get('maxBatchSize'),
+                'calls': 0, 'batches': 0, 'failedBatches': 0, 'avgBatchSize': 0.0, 'avgHandlerSeconds': 0.0,
+                'flushedOnSize': 0, 'flushedOnWindow': 0, 'flushedOnIdle': 0,
+            })
+            for key in ('calls', 'batches', 'failedBatches', 'flushedOnSize', 'flushedOnWindow', 'flushedOnIdle'):
+                total[key] += stats.get(key, 0)
+            total['avgHandlerSeconds'] += stats.get('avgHandlerSeconds', 0.0) * stats.get('batches', 0)
+
+    for total in batches.values():
+        total['avgBatchSize'] = total['calls'] / total['batches'] if total['batches'] else 0.0
+        total['avgHandlerSeconds'] = total['avgHandlerSeconds'] / total['batches'] if total['batches'] else 0.0
+    return batches
+
+
+def _aggregate_circuit_breakers(workers: List[WorkerStatus]) -> Dict[str, Dict[str, Any]]:
+    breakers: Dict[str, Dict[str, Any]] = {}
+    for worker in workers:
+        for dependency, stats in worker.stats.get('circuitBreakers', {}).items():
+            total = breakers.setdefault(dependency, {
+                'state': stats['state'], 'consecutiveFailures': 0,
+                'failureThreshold': stats.get('failureThreshold'), 'resetTimeout': stats.get('resetTimeout'),
+                'openedCount': 0, 'rejected': 0, 'workerStates': {},
+            })
+            # Every worker has its own breaker; report the most severe state
+            if BREAKER_SEVERITY.index(stats['state']) > BREAKER_SEVERITY.index(total['state']):
+                total['state'] = stats['state']
+            total['consecutiveFailures'] = max(total['consecutiveFailures'], stats.get('consecutiveFailures', 0))
+            total['openedCount'] += stats.get('openedCount', 0)
+            total['rejected'] += stats.get('rejected', 0)
+            total['workerStates'][worker.name] = stats['state']
+    return breakers
+
+
+def _aggregate_compression(workers: List[WorkerStatus]) -> Dict[str, Dict[str, Any]]:
+    compression: Dict[str, Dict[str, Any]] = {}
+    for worker in workers:
+        for name, stats in worker.stats.get('compression', {}).items():
+            total = compression.setdefault(name, {'candidates': 0, 'compressed': 0, 'rawBytes': 0, 'storedBytes': 0, 'ratio': None})
+            for key in ('candidates', 'compressed', 'rawBytes', 'storedBytes'):
+                total[key] += stats.get(key, 0)
+
+    for total in compression.values():
+        total['ratio'] = total['storedBytes'] / total['rawBytes'] if total['rawBytes'] else None
+    return compression
+
+
+def aggregate_stats(workers: List[WorkerStatus], heartbeat_timeout: float) -> Dict[str, Any]:
+    """
+    Aggregates the stats of all workers.
+
+    Counters are summed, maxima take the maximum, and averages are weighted by
+    the number of finished activities (or batches) of each worker. Sections that
+    are served by the API's stats endpoints in supervised mode keep the shape
+    those endpoints have in embedded mode.
+    """
+    return {
+        'workers': len(workers),
+        'healthyWorkers': sum(1 for worker in workers if worker.is_healthy(heartbeat_timeout)),
+        'restarts': sum(worker.restarts for worker in workers),
+        'cpuSeconds': sum(worker.stats.get('cpuSeconds', 0.0) for worker in workers),
+        'maxRssKb': sum(worker.stats.get('maxRssKb', 0) for worker in workers),
+        'activities': _aggregate_activities(workers),
+        'activityCache': _aggregate_activity_cache(workers),
+        'activityBatches': _aggregate_activity_batches(workers),
+        'circuitBreakers': _aggregate_circuit_breakers(workers),
+        'compression': _aggregate_compression(workers)
+    }
+
+
+class Supervisor:
+    """
+    Runs and monitors workflow worker processes and, optionally, the API process.
+
+    Args:
+        workers: Number of worker processes
+        serve_api: Also run the FastAPI front end as a supervised process
+        port: Port of the supervisor status endpoints
+    """
+
+    def __init__(self, workers: Optional[int] = None, serve_api: bool = False, port: Optional[int] = None):
+        self.worker_count = workers or int(os.getenv("WORKFLOW_WORKERS", str(os.cpu_count() or 1)))
+        self.serve_api = serve_api
+        self.port = port if port is not None else int(os.getenv("WORKFLOW_SUPERVISOR_PORT", "8309"))
+        self.modules = [m.strip() for m in os.getenv("WORKFLOW_WORKER_MODULES", "workflow.workflow").split(",") if m.strip()]
+        self.heartbeat_interval = float(os.getenv("WORKFLOW_WORKER_HEARTBEAT_INTERVAL", "2"))
+        self.heartbeat_timeout = float(os.getenv("WORKFLOW_WORKER_HEARTBEAT_TIMEOUT", "30"))
+        self.max_restart_delay = float(os.getenv("WORKFLOW_WORKER_MAX_RESTART_DELAY", "30"))
+
+        start_method = os.getenv("WORKFLOW_WORKER_START_METHOD")
+        if start_method is None:
+            start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(start_method)
+        self._status_queue = self._context.Queue()
+        self._processes: Dict[int, Any] = {}
+        self._stop_events: Dict[int, Any] = {}
+        self._restart_at: Dict[int, float] = {}
+        self.workers = [WorkerStatus(index=i, name=f"{PROCESS_PREFIX}-worker-{i}") for i in range(self.worker_count)]
+        self._api_process: Optional[subprocess.Popen] = None
+        self._api_restarts = 0
+        self._stopping = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.metrics_dir: Optional[str] = None
+
+    # Worker processes -----------------------------------------------------------
+
+    def _start_worker(self, index: int) -> None:
+        status = self.workers[index]
+        stop_event = self._context.Event()
+        process = self._context.Process(
+            target=worker_main,
+            name=status.name,
+            args=(index, status.name, self._status_queue, stop_event, self.modules, self.heartbeat_interval),
+            daemon=False,
+        )
+        process.start()
+        self._processes[index] = process
+        self._stop_events[index] = stop_event
+        status.pid = process.pid
+        status.phase = WorkerPhase.STARTING
+        status.started_at = time.time()
+        status.heartbeat_at = None
+        status.exit_code = None
+        logger.info(f"Started {status.name} (pid {process.pid})")
+
+    def _restart_delay(self, status: WorkerStatus) -> float:
+        return min(2 ** min(status.failures, 10) * 0.5, self.max_restart_delay)
+
+    def _drain_status_queue(self, timeout: float) -> None:
+        try:
+            message = self._status_queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while message is not None:
+            status = self.workers[message['index']]
+            if message['pid'] == status.pid:
+                status.phase = message['phase']
+                status.heartbeat_at = message['at']
+                status.error = message['error']
+                if status.phase == WorkerPhase.READY:
+                    status.failures = 0
+                if message['stats'] is not None:
+                    status.stats = message['stats']
+            try:
+                message = self._status_queue.get_nowait()
+            except queue.Empty:
+                message = None
+
+    def _check_workers(self) -> None:
+        now = time.time()
+        for status in self.workers:
+            process = self._processes.get(status.index)
+            if process is None:
+                if now >= self._restart_at.get(status.index, 0):
+                    self._start_worker(status.index)
+                continue
+
+            if process.is_alive():
+                stale = status.heartbeat_at is not None and now - status.heartbeat_at > self.heartbeat_timeout
+                if status.phase == WorkerPhase.READY and stale:
+                    logger.warning(f"{status.name} missed heartbeats for {now - status.heartbeat_at:.0f}s, restarting")
+                    process.kill()
+                continue
+
+            process.join()
+            self._metrics_process_dead(process.pid)
+            status.exit_code = process.exitcode
+            if status.phase != WorkerPhase.FAILED:
+                status.phase = WorkerPhase.STOPPED
+            del self._processes[status.index]
+            delay = self._restart_delay(status)
+            status.restarts += 1
+            status.failures += 1
+            self._restart_at[status.index] = now + delay
+            logger.warning(f"{status.name} exited with code {process.exitcode}, restarting in {delay:.1f}s")
+
+    # Metrics -----------------------------------------------------------------
+
+    def _prepare_metrics_dir(self) -> None:
+        # Set before any process starts, so workers and the API process inherit it (see metrics.py)
+        directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if not directory:
+            directory = os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix=f"{PROCESS_PREFIX}-metrics-")
+        else:
+            os.makedirs(directory, exist_ok=True)
+            # Files of a previous run would be added to the counters of this one
+            for name in os.listdir(directory):
+                if name.endswith(".db"):
+                    os.remove(os.path.join(directory, name))
+        self.metrics_dir = directory
+
+    def _metrics_process_dead(self, pid: Optional[int]) -> None:
+        # Drops the exited worker from the gauges that only count live processes
+        if self.metrics_dir and pid is not None:
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(pid, self.metrics_dir)
+
+    # API process ------------------------------------------------------------
+
+    def _start_api(self) -> None:
+        env = dict(os.environ, WORKFLOW_RUNTIME_MODE="supervised", WORKFLOW_PROCESS_NAME=f"{PROCESS_PREFIX}-api")
+        self._api_process = subprocess.Popen([sys.executable, os.path.join(SRC_DIR, "app.py")], env=env)
+        logger.info(f"Started {PROCESS_PREFIX}-api (pid {self._api_process.pid})")
+
+    def _check_api(self) -> None:
+        if self._api_process is not None and self._api_process.poll() is not None:
+            logger.warning(f"{PROCESS_PREFIX}-api exited with code {self._api_process.returncode}, restarting")
+            self._metrics_process_dead(self._api_process.pid)
+            self._api_restarts += 1
+            self._start_api()
+
+    # Status endpoints ---------------------------------------------------------
+
+    def is_healthy(self) -> bool:
+        """True if every worker is healthy."""
+        return all(worker.is_healthy(self.heartbeat_timeout) for worker in self.workers)
+
+    def status(self) -> Dict[str, Any]:
+        """Returns the status of every worker and the aggregated stats."""
+        return {
+            'healthy': self.is_healthy(),
+            'workers': [worker.to_dict(self.heartbeat_timeout) for worker in self.workers],
+            'api': {
+                'pid': self._api_process.pid if self._api_process else None,
+                'restarts': self._api_restarts
+            } if self.serve_api else None,
+            'aggregate': aggregate_stats(self.workers, self.heartbeat_timeout)
+        }
+
+    def _serve_status(self) -> None:
+        supervisor = self
+
+        class StatusHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/healthz":
+                    code = 200 if supervisor.is_healthy() else 503
+                    body = {'healthy': code == 200, 'workers': [w.to_dict(supervisor.heartbeat_timeout) for w in supervisor.workers]}
+                elif self.path == "/workers":
+                    code, body = 200, supervisor.status()
+                else:
+                    code, body = 404, {'detail': 'Not Found'}
+                payload = json.dumps(body, default=str).encode('utf-8')
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        self._server = ThreadingHTTPServer(("0.0.0.0", self.port), StatusHandler)
+        threading.Thread(target=self._server.serve_forever, name="supervisor-status", daemon=True).start()
+        logger.info(f"Supervisor status endpoints listening on port {self.port}")
+
+    # Lifecycle --------------------------------------------------------------
+
+    def request_stop(self) -> None:
+        """Asks the supervisor loop to stop; safe to call from a signal handler."""
+        self._stopping.set()
+
+    def run(self) -> None:
+        """Starts the workers and supervises them until request_stop() is called."""
+        set_process_title(f"{PROCESS_PREFIX}-supervisor")
+        self._prepare_metrics_dir()
+        if self.port:
+            self._serve_status()
+        for index in range(self.worker_count):
+            self._start_worker(index)
+        if self.serve_api:
+            self._start_api()
+
+        try:
+            while not self._stopping.is_set():
+                self._drain_status_queue(timeout=0.5)
+                self._check_workers()
+                self._check_api()
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 30) -> None:
+        """Stops the API process and all workers, terminating those that don't exit in time."""
+        logger.info("Stopping workflow workers...")
+        if self._api_process is not None and self._api_process.poll() is None:
+            self._api_process.terminate()
+        for stop_event in self._stop_events.values():
+            stop_event.set()
+
+        deadline = time.monotonic() + timeout
+        for process in self._processes.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"{process.name} did not stop in time, killing it")
+                process.kill()
+                process.join(5)
+        if self._api_process is not None:
+            try:
+                self._api_process.wait(max(deadline - time.monotonic(), 1))
+            except subprocess.TimeoutExpired:
+                self._api_process.kill()
+        if self._server is not None:
+            self._server.shutdown()
+        logger.info("Workflow workers stopped")
+
+
+class SupervisorClient:
+    """
+    Reads worker status and aggregated stats from the supervisor, for the API process in supervised mode.
+
+    Args:
+        url: Base URL of the supervisor status endpoints
+        refresh_interval: Seconds between refreshes of the status read by activity_load()
+    """
+
+    def __init__(self, url: Optional[str] = None, refresh_interval: Optional[float] = None):
+        self.url = url or f"http://localhost:{os.getenv('WORKFLOW_SUPERVISOR_PORT', '8309')}"
+        self.refresh_interval = refresh_interval or float(os.getenv("WORKFLOW_WORKER_HEARTBEAT_INTERVAL", "2"))
+        self.status: Optional[Dict[str, Any]] = None
+
+    def fetch(self) -> Dict[str, Any]:
+        """Fetches the supervisor status; blocks, and raises OSError when the supervisor is unreachable."""
+        with urllib.request.urlopen(f"{self.url}/workers", timeout=5) as response:
+            self.status = json.load(response)
+        return self.status
+
+    def activity_load(self) -> Tuple[int, int, float]:
+        """
+        Returns activities in flight or queued, activities finished and their total seconds across workers.
+
+        Reads the most recently fetched status, so admission decisions don't wait
+        on the supervisor; the API refreshes it every refresh_interval.
+        """
+        in_flight = finished = 0
+        total_seconds = 0.0
+        activities = self.status['aggregate']['activities'] if self.status else {}
+        for stats in activities.values():
+            done = stats['completed'] + stats['failed']
+            in_flight += stats['inFlight'] + stats['queued']
+            finished += done
+            total_seconds += (stats['avgWaitSeconds'] + stats['avgRunSeconds']) * done
+        return in_flight, finished, total_seconds
@@ -7,16 +7,20 @@ from dapr.ext.workflow import DaprWorkflowContext, WorkflowActivityContext, Work
 from dapr.ext.workflow import when_any, when_all
 
 # Import activities from separate module
-from workflow.activities import *
+from workflow.activities import provision_equipment_activity, prepare_paperwork_activity
 
 # Import workflow runtime
 from workflow.runtime import workflow_runtime as wfr
 from workflow.replay_safe_logger import ReplaySafeLogger
+from workflow.structured_logging import configure_logging
+from workflow.continue_as_new import continue_as_new_policy, checkpoint
+from workflow.dag import TaskGraph
+from workflow.cohort import run_cohort
 
 # Import workflow data model
 from workflow.models import WorkflowData
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 base_logger = logging.getLogger(__name__)
 
 store_name = "statestore"
@@ -33,12 +37,39 @@ store_name = "statestore"
 # 5. Keep workflow functions deterministic - they may be replayed multiple times
 ###############################################################################
 
+###############################################################################
+# History Growth and Continue-As-New
+###############################################################################
+# Workflows are wrapped with @continue_as_new_policy, which counts the history
+# events produced by awaited tasks. In loops, yield checkpoint(data) at the end
+# of each iteration: once the event count or the serialized state size exceeds
+# the configured thresholds, the workflow continues as new with data/original
+# and a condensed history summary, keeping the per-replay cost flat.
+###############################################################################
+
+###############################################################################
+# Parallel Tasks
+###############################################################################
+# Parallel activities are declared as a TaskGraph: the graph bounds how many
+# activities are in flight (window_size), starts a task as soon as the tasks
+# it depends_on completed, and merges each result into WorkflowData by name.
+###############################################################################
+
+onboarding_tasks = (
+    TaskGraph()
+    # Provides necessary equipment to the new employee.
+    .add("provision_equipment", provision_equipment_activity)
+    # Prepares and processes required onboarding paperwork.
+    .add("prepare_paperwork", prepare_paperwork_activity)
+)
+
 ###############################################################################
 # Name: EmployeeOnboardingWorkflow
 # Description: Handles the employee onboarding process with parallel tasks for equipment provisioning and paperwork preparation.
 ###############################################################################
 
 @wfr.workflow(name="employee_onboarding_workflow")
+@continue_as_new_policy
 def employee_onboarding_workflow(ctx: DaprWorkflowContext, input_data: Any) -> Any:
     """
     Handles the employee onboarding process with parallel tasks for equipment provisioning and paperwork preparation.
@@ -51,34 +82,19 @@ def employee_onboarding_workflow(ctx: DaprWorkflowContext, input_data: Any) -> A
         The workflow result
     """
     logger = ReplaySafeLogger(ctx, base_logger)
-    logger.info(f"[Workflow] Starting workflow: {ctx.instance_id}")
+    logger.info("[Workflow] Starting workflow: %s", ctx.instance_id)
 
     # Convert input data to WorkflowData object
-    data = WorkflowData.from_dict(input_data)
+    data = WorkflowData.from_payload(input_data)
 
     logger.info("[Workflow] Starting parallel execution for: Splits the workflow to perform equipment provisioning and paperwork preparation in parallel.")
-    # Create a dictionary to track parallel tasks by name
-    parallel_tasks = {}
-    logger.info("[Workflow] Adding parallel task for: Provides necessary equipment to the new employee.")
-    parallel_tasks["provision_equipment"] = ctx.call_activity(provision_equipment_activity, input=data.get_activity_request_data())
-
-    logger.info("[Workflow] Adding parallel task for: Prepares and processes required onboarding paperwork.")
-    parallel_tasks["prepare_paperwork"] = ctx.call_activity(prepare_paperwork_activity, input=data.get_activity_request_data())
-
-
     logger.info("[Workflow] Wait for all tasks to complete")
     try:
-        results = yield when_all(list(parallel_tasks.values()))
+        # Results are merged into data by task name as each task completes
+        yield from onboarding_tasks.run(ctx, data)
         logger.info("[Workflow] All parallel tasks completed successfully")
-        
-        # Process results one by one
-        for i, result in enumerate(results):
-            task_name = list(parallel_tasks.keys())[i]
-            logger.info(f"[Workflow] Processing and merging result from {task_name}")
-            # TODO: merge results if needed
-            data.add_activity_response(task_name, result)
     except Exception as e:
-        logger.error(f"[Workflow] Error in parallel execution: {e}")
+        logger.error("[Workflow] Error in parallel execution: %s", e)
         data.error_message = str(e)
         data.has_error = True
         data.success = False
@@ -100,3 +116,34 @@ def process_join_tasks(ctx: DaprWorkflowContext, data: WorkflowData) -> Any:
     logger.info("[Workflow] Workflow reached end: End of employee onboarding process")
     # Return the final workflow data
     return data
+
+
+###############################################################################
+# Name: EmployeeCohortWorkflow
+# Description: Onboards a cohort of employees as child workflows, in waves, with summary counts instead of per-employee results.
+###############################################################################
+
+@wfr.workflow(name="employee_cohort_workflow")
+@continue_as_new_policy
+def employee_cohort_workflow(ctx: DaprWorkflowContext, input_data: Any) -> Any:
+    """
+    Onboards the employees in data['employees'] by running employee_onboarding_workflow for each of them.
+
+    Args:
+        ctx: The workflow context provided by Dapr
+        input_data: Data passed to the workflow, {"data": {"employees": [...], "waveSize": 100}}
+
+    Returns:
+        The workflow data with the cohort summary in data['cohort']
+    """
+    logger = ReplaySafeLogger(ctx, base_logger)
+    data = WorkflowData.from_payload(input_data)
+    logger.info("[Workflow] Starting cohort workflow: %s at employee %s", ctx.instance_id, data.data.get('cohortCursor', 0))
+
+    summary = yield from run_cohort(ctx, data, employee_onboarding_workflow, items_key="employees")
+    logger.info("[Workflow] Cohort completed: %s of %s employees onboarded", summary.succeeded, summary.total)
+
+    # The output only carries the summary, not the employee list
+    data.data.pop("employees", None)
+    data.success = summary.failed == 0
+    return data
@@ -0,0 +1,37 @@
+"""
+Shared fixtures for the workflow tests.
+
+Workflows run on the in-process FakeWorkflowRuntime, so the tests need neither
+a Dapr sidecar nor a state store.
+"""
+
+import os
+
+# Keep the shared stores in memory; set before the workflow modules create them
+os.environ.setdefault("ACTIVITY_CACHE_BACKEND", "memory")
+os.environ.setdefault("CLAIM_CHECK_BACKEND", "memory")
+
+import pytest
+
+from workflow.fake_runtime import FakeWorkflowRuntime
+
+
+@pytest.fixture
+def runtime() -> FakeWorkflowRuntime:
+    """A fake runtime whose timers wait 1% of their real duration."""
+    return FakeWorkflowRuntime(time_scale=0.01)
+
+
+class FakeClientPool:
+    """Client pool that hands out the fake runtime, which mirrors the async workflow client."""
+
+    def __init__(self, runtime: FakeWorkflowRuntime):
+        self.runtime = runtime
+
+    def get(self) -> FakeWorkflowRuntime:
+        return self.runtime
+
+
+@pytest.fixture
+def client_pool(runtime: FakeWorkflowRuntime) -> FakeClientPool:
+    return FakeClientPool(runtime)
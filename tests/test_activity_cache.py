@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import pytest
+
+from workflow import state_store
+from workflow.activity_cache import ActivityResultCache, call_id, fingerprint
+from workflow.models import ActivityResponse
+from workflow.state_store import DaprStateStore, InMemoryStateStore, StateStoreUnavailableError
+
+
+@dataclass
+class Request:
+    employee_id: str
+    items: list
+
+
+def activity_context(workflow_id="wf-1", task_execution_id="call-1") -> SimpleNamespace:
+    return SimpleNamespace(workflow_id=workflow_id, task_id=1, task_execution_id=task_execution_id)
+
+
+@pytest.fixture
+def cache():
+    return ActivityResultCache(store=InMemoryStateStore())
+
+
+def test_fingerprints_are_stable_across_request_forms():
+    as_dataclass = fingerprint("provision", Request("e1", ["laptop"]))
+    as_dict = fingerprint("provision", {'items': ["laptop"], 'employee_id': "e1"})
+    as_namespace = fingerprint("provision", SimpleNamespace(items=("laptop",), employee_id="e1"))
+
+    assert as_dataclass == as_dict == as_namespace
+    assert fingerprint("provision", {'employee_id': "e2", 'items': ["laptop"]}) != as_dict
+    assert fingerprint("paperwork", {'employee_id': "e1", 'items': ["laptop"]}) != as_dict
+
+
+def test_fingerprints_are_scoped_to_the_instance_and_call():
+    key = fingerprint("provision", {'employee_id': "e1"}, "wf-1", "call-1")
+
+    assert key.startswith("activity-result||provision||wf-1||call-1||")
+    assert key != fingerprint("provision", {'employee_id': "e1"}, "wf-1", "call-2")
+    assert key != fingerprint("provision", {'employee_id': "e1"}, "wf-2", "call-1")
+
+
+def test_call_ids_come_from_the_inner_sdk_context():
+    inner = SimpleNamespace(task_execution_id="call-1")
+    ctx = SimpleNamespace(workflow_id="wf-1", task_id=3, get_inner_context=lambda: inner)
+
+    assert call_id(ctx) == "call-1"
+    assert call_id(SimpleNamespace(workflow_id="wf-1", task_id=3, task_execution_id="")) is None
+
+
+def test_local_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(state_store.time, "monotonic", lambda: now[0])
+    store = InMemoryStateStore()
+    store.set_sync("short", b"1", ttl_seconds=10)
+    store.set_sync("forever", b"2")
+
+    now[0] += 11
+
+    assert store.get_sync("short") is None
+    assert store.get_sync("forever") == b"2"
+    assert len(store) == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    store = InMemoryStateStore(max_entries=2)
+    store.set_sync("a", b"1")
+    store.set_sync("b", b"2")
+    store.get_sync("a")
+    store.set_sync("c", b"3")
+
+    assert store.get_sync("b") is None
+    assert store.get_sync("a") == b"1"
+    assert store.get_sync("c") == b"3"
+
+
+async def test_hits_return_the_same_type_as_misses(cache):
+    calls = []
+
+    @cache.cached
+    async def provision(ctx, input):
+        calls.append(input)
+        return ActivityResponse(start_time="t0", end_time="t1", success=True, outputs={'laptop': "L-1"})
+
+    first = await provision(activity_context(), {'employee_id': "e1"})
+    retried = await provision(activity_context(), {'employee_id': "e1"})
+
+    assert len(calls) == 1
+    assert isinstance(retried, ActivityResponse)
+    assert retried == first
+    assert cache.stats()['hits'] == 1
+
+
+async def test_plain_results_are_cached_as_json(cache):
+    @cache.cached
+    async def lookup(ctx, input):
+        return {'desk': "4B", 'floors': (1, 2)}
+
+    await lookup(activity_context(), None)
+
+    assert await lookup(activity_context(), None) == {'desk': "4B", 'floors': [1, 2]}
+
+
+async def test_new_calls_with_the_same_request_run_again(cache):
+    calls = []
+
+    @cache.cached
+    async def send_reminder(ctx, input):
+        calls.append(ctx.task_execution_id)
+        return ActivityResponse(success=True)
+
+    # A loop (or a continue-as-new generation) schedules a new call with the same input
+    for execution_id in ("call-1", "call-2", "call-2"):
+        await send_reminder(activity_context(task_execution_id=execution_id), {'employee_id': "e1"})
+
+    assert calls == ["call-1", "call-2"]
+
+
+async def test_calls_without_an_execution_id_are_not_cached(cache):
+    calls = []
+
+    @cache.cached
+    async def send_reminder(ctx, input):
+        calls.append(input)
+        return ActivityResponse(success=True)
+
+    for _ in range(2):
+        await send_reminder(SimpleNamespace(workflow_id="wf-1", task_id=1), {'employee_id': "e1"})
+
+    assert len(calls) == 2
+    assert cache.stats()['misses'] == 0
+
+
+async def test_requests_are_shared_across_instances_when_not_keyed_by_instance(cache):
+    calls = []
+
+    @cache.cached(key_by_instance=False)
+    async def lookup_employee(ctx, input):
+        calls.append(ctx.workflow_id)
+        return ActivityResponse(success=True)
+
+    await lookup_employee(activity_context("wf-1"), {'employee_id': "e1"})
+    await lookup_employee(activity_context("wf-2", "call-9"), {'employee_id': "e1"})
+
+    assert calls == ["wf-1"]
+
+
+async def test_failed_results_are_not_cached(cache):
+    outcomes = [ConnectionError("backend down"), ActivityResponse(success=False, error="rejected"), ActivityResponse(success=True)]
+
+    @cache.cached
+    async def provision(ctx, input):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with pytest.raises(ConnectionError):
+        await provision(activity_context(), None)
+    assert (await provision(activity_context(), None)).success is False
+    assert (await provision(activity_context(), None)).success is True
+    assert (await provision(activity_context(), None)).success is True
+
+    assert outcomes == []
+    assert cache.stats()['hits'] == 1
+
+
+async def test_oversized_results_are_not_cached():
+    cache = ActivityResultCache(store=InMemoryStateStore(), max_result_bytes=64)
+
+    @cache.cached
+    async def render(ctx, input):
+        return "x" * 100
+
+    await render(activity_context(), None)
+
+    assert cache.stats()['localEntries'] == 0
+
+
+def test_sync_activities_are_rejected(cache):
+    with pytest.raises(ValueError, match="coroutine function"):
+        @cache.cached
+        def provision(ctx, input):
+            return None
+
+
+async def test_an_unreachable_store_fails_fast_and_serves_the_local_cache(monkeypatch):
+    from dapr.clients.health import DaprHealth
+
+    attempts = []
+
+    def sidecar_down():
+        attempts.append(1)
+        raise TimeoutError("sidecar not ready")
+
+    monkeypatch.setattr(DaprHealth, "wait_for_sidecar", staticmethod(sidecar_down))
+    monkeypatch.setenv("STATE_STORE_RETRY_SECONDS", "30")
+    store = DaprStateStore()
+    cache = ActivityResultCache(store=store)
+    calls = []
+
+    @cache.cached
+    async def provision(ctx, input):
+        calls.append(input)
+        return ActivityResponse(success=True)
+
+    for _ in range(3):
+        assert (await provision(activity_context(), {'employee_id': "e1"})).success
+
+    # Only the first lookup waits for the sidecar; later calls fail fast until the retry interval passes
+    assert attempts == [1]
+    assert calls == [{'employee_id': "e1"}]
+    with pytest.raises(StateStoreUnavailableError, match="retrying in"):
+        await store.get("any")
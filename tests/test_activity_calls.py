@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+
+from dapr.ext.workflow import WorkflowStatus
+
+from workflow.activity_calls import LatencyTracker, call_activity, deadline, hedged
+from workflow.models import WorkflowData
+from workflow.resilience import retry
+
+
+def calling_workflow(activity):
+    def workflow(ctx, input_data):
+        data = WorkflowData.from_payload(input_data)
+        try:
+            data.data['result'] = yield from call_activity(ctx, activity)
+        except Exception as e:
+            data.data['error'] = type(e).__name__
+        return data
+    return workflow
+
+
+async def run(runtime, activity):
+    runtime.register_workflow(calling_workflow(activity), name="calling_workflow")
+    instance_id = await runtime.schedule_new_workflow("calling_workflow", input={"data": {}})
+    state = await runtime.wait_for_workflow_completion(instance_id, timeout_in_seconds=10)
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    return instance_id, json.loads(state.serialized_output)['data']
+
+
+async def test_deadline_fails_a_stalled_attempt(runtime):
+    # 10 s deadline, waited as 0.1 s by the fake runtime
+    @deadline(seconds=10)
+    async def stalled_activity(ctx, input):
+        await asyncio.sleep(5)
+        return "late"
+
+    instance_id, data = await run(runtime, stalled_activity)
+
+    assert data == {'error': "ActivityTimeoutError"}
+    runtime.replay(instance_id)
+
+
+async def test_deadline_doesnt_affect_fast_attempts(runtime):
+    @deadline(seconds=10)
+    async def fast_activity(ctx, input):
+        return "done"
+
+    _, data = await run(runtime, fast_activity)
+
+    assert data == {'result': "done"}
+
+
+async def test_timed_out_attempts_are_retried(runtime):
+    attempts = []
+
+    @deadline(seconds=10)
+    @retry(max_attempts=2, first_interval=1, jitter=0)
+    async def recovering_activity(ctx, input):
+        attempts.append(ctx.task_id)
+        if len(attempts) == 1:
+            await asyncio.sleep(5)
+        return "recovered"
+
+    instance_id, data = await run(runtime, recovering_activity)
+
+    assert data == {'result': "recovered"}
+    assert len(attempts) == 2
+    runtime.replay(instance_id)
+
+
+async def test_hedge_starts_a_duplicate_of_a_slow_attempt(runtime):
+    attempts = []
+
+    # Hedge after 5 s, waited as 0.05 s by the fake runtime
+    @hedged(initial_delay=5)
+    async def slow_activity(ctx, input):
+        attempts.append(ctx.task_id)
+        if len(attempts) == 1:
+            await asyncio.sleep(5)
+            return "primary"
+        return "hedge"
+
+    instance_id, data = await run(runtime, slow_activity)
+
+    assert data == {'result': "hedge"}
+    assert len(attempts) == 2
+    runtime.replay(instance_id)
+
+
+async def test_hedge_is_not_started_for_fast_attempts(runtime):
+    attempts = []
+
+    @hedged(initial_delay=5)
+    async def fast_activity(ctx, input):
+        attempts.append(ctx.task_id)
+        return "primary"
+
+    _, data = await run(runtime, fast_activity)
+
+    assert data == {'result': "primary"}
+    assert len(attempts) == 1
+
+
+def test_latency_percentiles_need_enough_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for value in range(9):
+        tracker.record("activity", float(value))
+    assert tracker.percentile("activity", 95) is None
+
+    for value in range(9, 100):
+        tracker.record("activity", float(value))
+    assert tracker.percentile("activity", 95) == 95.0
+    assert tracker.percentile("activity", 50) == 50.0
+
+
+def test_invalid_call_policies_are_rejected():
+    with pytest.raises(ValueError):
+        deadline(seconds=0)
+    with pytest.raises(ValueError):
+        hedged(percentile=100)
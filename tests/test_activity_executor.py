@@ -0,0 +1,141 @@
+import asyncio
+import os
+import textwrap
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from workflow import activity_executor as activity_executor_module
+from workflow.activity_executor import ActivityExecutor, ExecutionMode, ProcessActivityContext, _invoke_process_target
+
+
+def activity_context(task_id: int = 1) -> SimpleNamespace:
+    return SimpleNamespace(workflow_id="wf-1", task_id=task_id)
+
+
+@pytest.fixture
+def executor():
+    executor = ActivityExecutor(thread_pool_size=4, process_pool_size=1, default_max_concurrency=10)
+    yield executor
+    executor.shutdown()
+
+
+def cpu_activity(ctx, input):
+    # Runs in a pool process, so it's defined at module level
+    return {'pid': os.getpid(), 'ctx': ctx, 'total': sum(range(input))}
+
+
+async def test_calls_beyond_the_limit_wait_in_the_queue(executor):
+    running = 0
+    peak = 0
+    release = asyncio.Event()
+
+    @executor.bounded(max_concurrency=2)
+    async def limited_activity(ctx, input):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await release.wait()
+        running -= 1
+        return input
+
+    calls = [asyncio.ensure_future(limited_activity(activity_context(i), i)) for i in range(5)]
+    await asyncio.sleep(0.01)
+
+    stats = executor.stats()['limited_activity']
+    assert (stats['inFlight'], stats['queued'], stats['maxQueued']) == (2, 3, 3)
+
+    release.set()
+    assert await asyncio.gather(*calls) == [0, 1, 2, 3, 4]
+    assert peak == 2
+    stats = executor.stats()['limited_activity']
+    assert (stats['inFlight'], stats['queued'], stats['completed'], stats['failed']) == (0, 0, 5, 0)
+    assert stats['avgWaitSeconds'] > 0
+
+
+async def test_failures_are_counted_and_free_their_slot(executor):
+    @executor.bounded(max_concurrency=1)
+    async def failing_activity(ctx, input):
+        raise ConnectionError("backend down")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await failing_activity(activity_context(), None)
+
+    stats = executor.stats()['failing_activity']
+    assert (stats['inFlight'], stats['completed'], stats['failed']) == (0, 0, 2)
+    assert stats['mode'] == ExecutionMode.ASYNC
+    assert stats['maxConcurrency'] == 1
+
+
+async def test_blocking_activities_run_in_the_thread_pool(executor):
+    threads = set()
+    # Only passes once all three calls block at the same time
+    barrier = threading.Barrier(3, timeout=5)
+
+    @executor.bounded(max_concurrency=3)
+    def blocking_activity(ctx, input):
+        threads.add(threading.current_thread().name)
+        barrier.wait()
+        return input * 2
+
+    assert asyncio.iscoroutinefunction(blocking_activity)
+    results = await asyncio.gather(*(blocking_activity(activity_context(i), i) for i in range(3)))
+
+    assert results == [0, 2, 4]
+    assert all(name.startswith("activity") for name in threads)
+    assert executor.stats()['blocking_activity']['mode'] == ExecutionMode.THREAD
+
+
+async def test_cpu_bound_activities_run_in_the_process_pool(executor):
+    activity = executor.bounded(cpu_activity, mode=ExecutionMode.PROCESS)
+
+    result = await activity(activity_context(7), 10)
+
+    assert result['total'] == 45
+    assert result['pid'] != os.getpid()
+    # The child gets a picklable snapshot of the context
+    assert result['ctx'] == ProcessActivityContext(workflow_id="wf-1", task_id=7)
+    assert activity_executor_module._PROCESS_TARGETS[f"{__name__}:cpu_activity"] is cpu_activity
+
+
+def test_child_processes_register_targets_by_importing_their_module(tmp_path, monkeypatch):
+    (tmp_path / "contract_activities.py").write_text(textwrap.dedent("""
+        from workflow.activity_executor import ExecutionMode, activity_executor
+
+        @activity_executor.bounded(mode=ExecutionMode.PROCESS)
+        def render_contract(ctx, input):
+            return f"contract for {input} in {ctx.workflow_id}"
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(activity_executor_module, "_PROCESS_TARGETS", {})
+
+    result = _invoke_process_target("contract_activities:render_contract", ProcessActivityContext("wf-1", 1), "e1")
+
+    assert result == "contract for e1 in wf-1"
+
+
+def test_modes_must_match_the_function_kind(executor):
+    def blocking_activity(ctx, input):
+        return None
+
+    async def async_activity(ctx, input):
+        return None
+
+    with pytest.raises(ValueError, match="must be 'async def'"):
+        executor.bounded(blocking_activity, mode=ExecutionMode.ASYNC)
+    with pytest.raises(ValueError, match="can only use async mode"):
+        executor.bounded(mode=ExecutionMode.THREAD)(async_activity)
+
+
+def test_activities_keep_their_signature_without_exposing_the_wrapped_function(executor):
+    async def greet_activity(ctx, input: str) -> str:
+        return input
+
+    activity = executor.bounded(greet_activity)
+
+    assert activity.__name__ == "greet_activity"
+    assert not hasattr(activity, "__wrapped__")
+    assert list(activity.__signature__.parameters) == ["ctx", "input"]
+    assert executor.stats()['greet_activity']['maxConcurrency'] == 10
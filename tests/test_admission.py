@@ -0,0 +1,110 @@
+import math
+import time
+
+import pytest
+
+from workflow.admission import AdaptiveLimit, AdmissionController, AdmissionReason, TokenBucket
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=10, burst=5)
+    now = bucket.updated_at
+
+    assert bucket.wait_time(5, now) == 0.0
+    bucket.take(5)
+    assert bucket.wait_time(1, now) == pytest.approx(0.1)
+    assert bucket.wait_time(1, now + 0.1) == 0.0
+    # Refilling never goes past the burst size
+    bucket.refill(now + 60)
+    assert bucket.tokens == 5
+
+
+def test_batches_above_the_burst_leave_the_bucket_in_debt():
+    bucket = TokenBucket(rate=10, burst=5)
+    now = bucket.updated_at
+
+    assert bucket.wait_time(8, now) == 0.0
+    bucket.take(8)
+    assert bucket.tokens == -3
+    assert bucket.wait_time(1, now) == pytest.approx(0.4)
+
+
+def test_a_bucket_without_rate_never_refills():
+    bucket = TokenBucket(rate=0, burst=1)
+    bucket.take(1)
+
+    assert math.isinf(bucket.wait_time(1, bucket.updated_at + 60))
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setenv("ADMISSION_ENABLED", "true")
+    monkeypatch.delenv("ADMISSION_WORKFLOW_RATES", raising=False)
+
+
+def test_workflow_rate_rejects_starts_beyond_the_burst(enabled):
+    controller = AdmissionController(workflow_rate=1, workflow_burst=5, tenant_rate=0, adaptive=False)
+
+    decisions = [controller.admit("onboarding") for _ in range(6)]
+
+    assert [decision.admitted for decision in decisions] == [True] * 5 + [False]
+    rejected = decisions[-1]
+    assert rejected.reason == AdmissionReason.WORKFLOW_RATE
+    assert 0 < rejected.retry_after <= 1
+    assert rejected.retry_after_header == 1
+    # Workflow types have separate buckets
+    assert controller.admit("offboarding").admitted
+
+
+def test_tenant_rate_isolates_tenants(enabled):
+    controller = AdmissionController(workflow_rate=1000, workflow_burst=1000, tenant_rate=1, tenant_burst=2, adaptive=False)
+
+    assert controller.admit("onboarding", tenant="acme").admitted
+    assert controller.admit("onboarding", tenant="acme").admitted
+    rejected = controller.admit("onboarding", tenant="acme")
+
+    assert not rejected.admitted
+    assert rejected.reason == AdmissionReason.TENANT_RATE
+    assert controller.admit("onboarding", tenant="globex").admitted
+
+
+def test_rejected_batches_take_no_tokens(enabled):
+    controller = AdmissionController(workflow_rate=1, workflow_burst=10, tenant_rate=1, tenant_burst=2, adaptive=False)
+
+    assert controller.admit("onboarding", tenant="acme", count=2).admitted
+    rejected = controller.admit("onboarding", tenant="acme", count=2)
+
+    assert not rejected.admitted
+    assert controller.stats()['workflows']['onboarding']['tokens'] == pytest.approx(8, abs=0.01)
+
+
+def test_disabled_controller_admits_everything(monkeypatch):
+    monkeypatch.setenv("ADMISSION_ENABLED", "false")
+    controller = AdmissionController(workflow_rate=1, workflow_burst=1, tenant_rate=0, adaptive=False)
+
+    assert all(controller.admit("onboarding").admitted for _ in range(10))
+
+
+def test_adaptive_limit_cuts_and_recovers_the_rate():
+    load = {'in_flight': 0, 'finished': 0, 'seconds': 0.0}
+    limit = AdaptiveLimit(
+        max_rate=100, min_rate=10, max_in_flight=50, target_latency=1.0,
+        load=lambda: (load['in_flight'], load['finished'], load['seconds']), interval=0,
+    )
+    now = time.monotonic()
+
+    load['in_flight'] = 80
+    limit.adjust(now)
+    assert limit.bucket.rate == pytest.approx(70)
+
+    # Slow activities cut the rate as well, down to the minimum
+    load.update(in_flight=0, finished=10, seconds=50.0)
+    for step in range(1, 10):
+        limit.adjust(now + step)
+    assert limit.bucket.rate == 10
+    assert limit.latency == pytest.approx(5.0)
+
+    # Healthy windows raise it additively
+    load.update(finished=20, seconds=51.0)
+    limit.adjust(now + 20)
+    assert limit.bucket.rate == pytest.approx(15)
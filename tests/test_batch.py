@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from workflow import batch as batch_module
+from workflow.batch import BatchItem, BatchScheduler, BatchSummary
+from workflow.client import WorkflowClientPool
+
+
+class SchedulingClient:
+    """Client whose starts take as long as the item input says, failing for 'fail' inputs."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def schedule_new_workflow(self, workflow, input=None, instance_id=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(input['delay'])
+            if input.get('fail'):
+                raise ConnectionError(f"sidecar rejected {instance_id}")
+            return instance_id or f"generated-{input['delay']}"
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def client():
+    return SchedulingClient()
+
+
+@pytest.fixture
+def scheduler(client):
+    return BatchScheduler(client_pool=SimpleNamespace(get=lambda: client), concurrency=3)
+
+
+async def collect(scheduler, items, summary=None):
+    return [result async for result in scheduler.schedule("employee_onboarding_workflow", items, summary)]
+
+
+async def test_results_stream_in_completion_order(scheduler):
+    items = [BatchItem({'delay': 0.06}, "slow"), BatchItem({'delay': 0}, "fast"), BatchItem({'delay': 0.03}, "medium")]
+
+    results = await collect(scheduler, items)
+
+    assert [(result.index, result.instance_id) for result in results] == [(1, "fast"), (2, "medium"), (0, "slow")]
+    assert all(result.success for result in results)
+
+
+async def test_starts_are_bounded_by_the_concurrency(scheduler, client):
+    summary = BatchSummary()
+
+    results = await collect(scheduler, [BatchItem({'delay': 0.01}) for _ in range(10)], summary)
+
+    assert len(results) == 10
+    assert client.peak == 3
+    assert summary.to_dict()['completed'] == summary.total == 10
+
+
+async def test_failed_items_are_reported_without_stopping_the_batch(scheduler):
+    summary = BatchSummary()
+    items = [BatchItem({'delay': 0}, "ok-1"), BatchItem({'delay': 0, 'fail': True}, "bad"), BatchItem({'delay': 0}, "ok-2")]
+
+    results = {result.index: result for result in await collect(scheduler, items, summary)}
+
+    assert results[1].to_dict() == {'index': 1, 'instanceID': "bad", 'success': False, 'error': "sidecar rejected bad"}
+    assert results[0].success and results[2].success
+    assert (summary.succeeded, summary.failed) == (2, 1)
+
+
+def test_starts_per_second_counts_successful_starts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(batch_module.time, "perf_counter", lambda: now[0])
+    summary = BatchSummary(total=3, started_at=now[0])
+    assert summary.starts_per_second == 0.0
+
+    now[0] += 0.5
+    summary.record(batch_module.BatchItemResult(index=0, success=True))
+    now[0] += 0.5
+    summary.record(batch_module.BatchItemResult(index=1, success=True))
+    summary.record(batch_module.BatchItemResult(index=2, success=False, error="rejected"))
+
+    assert summary.starts_per_second == pytest.approx(2.0)
+    assert summary.to_dict() == {
+        'total': 3, 'completed': 3, 'succeeded': 2, 'failed': 1, 'elapsedSeconds': 1.0, 'startsPerSecond': 2.0,
+    }
+
+
+async def test_empty_batches_finish_right_away(scheduler):
+    summary = BatchSummary()
+
+    assert await collect(scheduler, [], summary) == []
+    assert summary.total == 0
+
+
+async def test_closing_the_pool_closes_every_channel(caplog):
+    closed = []
+
+    class Inner:
+        def __init__(self, name):
+            self.name = name
+
+        async def aclose(self):
+            closed.append(self.name)
+
+    pool = WorkflowClientPool(size=2)
+    pool._clients = [SimpleNamespace(_DaprWorkflowClient__obj=Inner("a")), SimpleNamespace(), SimpleNamespace(_DaprWorkflowClient__obj=Inner("b"))]
+
+    with caplog.at_level(logging.WARNING, logger="workflow.client"):
+        await pool.close()
+
+    assert closed == ["a", "b"]
+    assert "Leaving a workflow client channel open" in caplog.text
+    assert pool._clients == []
@@ -0,0 +1,65 @@
+import pytest
+
+from workflow.benchmarks import BenchmarkResult, Direction, compare, load_baseline, main, save_baseline
+
+BASELINE = {
+    'step_overhead': {'value': 1.0, 'unit': "ms/step", 'direction': Direction.LOWER},
+    'throughput': {'value': 100.0, 'unit': "workflows/s", 'direction': Direction.HIGHER},
+}
+
+
+def by_name(comparisons):
+    return {comparison.name: comparison for comparison in comparisons}
+
+
+def test_slower_results_beyond_the_tolerance_regress():
+    comparisons = by_name(compare([
+        BenchmarkResult('step_overhead', 1.3, "ms/step"),
+        BenchmarkResult('throughput', 70.0, "workflows/s", Direction.HIGHER),
+    ], BASELINE, tolerance=0.25))
+
+    assert comparisons['step_overhead'].regressed
+    assert comparisons['step_overhead'].change == pytest.approx(0.3)
+    assert comparisons['throughput'].regressed
+
+
+def test_results_within_the_tolerance_or_faster_pass():
+    comparisons = by_name(compare([
+        BenchmarkResult('step_overhead', 1.2, "ms/step"),
+        BenchmarkResult('throughput', 500.0, "workflows/s", Direction.HIGHER),
+    ], BASELINE, tolerance=0.25))
+
+    assert not comparisons['step_overhead'].regressed
+    assert not comparisons['throughput'].regressed
+
+
+def test_benchmarks_without_a_baseline_never_regress():
+    comparison = compare([BenchmarkResult('replay_10', 50.0, "ms")], BASELINE, tolerance=0.25)[0]
+
+    assert comparison.baseline is None
+    assert comparison.change is None
+    assert not comparison.regressed
+
+
+def test_baselines_round_trip(tmp_path):
+    path = str(tmp_path / "benchmarks" / "baseline.json")
+    assert load_baseline(path) == {}
+
+    save_baseline(path, [BenchmarkResult('step_overhead', 1.0, "ms/step")])
+
+    assert load_baseline(path) == {'step_overhead': {'value': 1.0, 'unit': "ms/step", 'direction': Direction.LOWER}}
+
+
+def test_a_regression_fails_the_run(tmp_path, capsys):
+    path = str(tmp_path / "baseline.json")
+    assert main(["--instances", "5", "--steps", "3", "--baseline", path, "--save-baseline"]) == 0
+
+    # Pretend the baseline was recorded on a machine a thousand times faster
+    faster = {Direction.LOWER: 1 / 1000, Direction.HIGHER: 1000}
+    save_baseline(path, [
+        BenchmarkResult(name, result['value'] * faster[result['direction']], result['unit'], result['direction'])
+        for name, result in load_baseline(path).items()
+    ])
+
+    assert main(["--instances", "5", "--steps", "3", "--baseline", path]) == 1
+    assert "Regressions beyond 25%" in capsys.readouterr().out
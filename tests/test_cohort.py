@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from dapr.ext.workflow import WorkflowStatus
+
+from workflow.claim_check import claim_check, is_reference
+from workflow.cohort import CohortSummary, run_cohort
+from workflow.continue_as_new import continue_as_new_policy
+from workflow.models import WorkflowData
+
+started = []
+
+
+def employee_workflow(ctx, input_data):
+    data = WorkflowData.from_payload(input_data)
+    if not ctx.is_replaying:
+        started.append(ctx.instance_id)
+    if data.data.get('fail'):
+        raise ValueError(f"{data.data['name']} can't be onboarded")
+    return data
+
+
+@continue_as_new_policy
+def cohort_workflow(ctx, input_data):
+    data = WorkflowData.from_payload(input_data)
+    yield from run_cohort(ctx, data, employee_workflow, items_key="employees")
+    return data
+
+
+@continue_as_new_policy(max_events=5)
+def long_cohort_workflow(ctx, input_data):
+    data = WorkflowData.from_payload(input_data)
+    yield from run_cohort(ctx, data, employee_workflow, items_key="employees")
+    return data
+
+
+@pytest.fixture(autouse=True)
+def workflows(runtime):
+    started.clear()
+    runtime.register_workflow(employee_workflow, name="employee_workflow")
+    runtime.register_workflow(cohort_workflow, name="cohort_workflow")
+    runtime.register_workflow(long_cohort_workflow, name="long_cohort_workflow")
+
+
+def employees(count, failing=()):
+    return [{'name': f"e{index}", 'fail': index in failing} for index in range(count)]
+
+
+async def run(runtime, workflow, payload, instance_id="cohort"):
+    await runtime.schedule_new_workflow(workflow, input=payload, instance_id=instance_id)
+    state = await runtime.wait_for_workflow_completion(instance_id, timeout_in_seconds=30)
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    return json.loads(state.serialized_output)['data']
+
+
+async def test_cohort_runs_in_waves_and_counts_outcomes(runtime):
+    data = await run(runtime, "cohort_workflow", {'data': {'employees': employees(7, failing={2, 5}), 'waveSize': 3}})
+
+    assert data['cohort'] == {
+        'total': 7,
+        'completed': 7,
+        'succeeded': 5,
+        'failed': 2,
+        'waves': 3,
+        'failedInstanceIds': ["cohort-000002", "cohort-000005"],
+    }
+    assert sorted(started) == [f"cohort-{index:06d}" for index in range(7)]
+    runtime.replay("cohort")
+
+
+async def test_failed_instance_ids_are_capped(runtime, monkeypatch):
+    monkeypatch.setenv("WORKFLOW_COHORT_MAX_FAILED_IDS", "2")
+
+    data = await run(runtime, "cohort_workflow", {'data': {'employees': employees(5, failing=range(5)), 'waveSize': 5}})
+
+    assert data['cohort']['failed'] == 5
+    assert len(data['cohort']['failedInstanceIds']) == 2
+
+
+async def test_empty_cohorts_complete_without_waves(runtime):
+    data = await run(runtime, "cohort_workflow", {'data': {'employees': []}})
+
+    assert data['cohort']['total'] == 0
+    assert data['cohort']['waves'] == 0
+    assert started == []
+
+
+async def test_cohorts_continue_as_new_between_waves(runtime):
+    data = await run(runtime, "long_cohort_workflow", {'data': {'employees': employees(12), 'waveSize': 2}})
+
+    assert data['cohort']['succeeded'] == 12
+    assert data['cohort']['waves'] == 6
+    assert runtime.instance_metrics("cohort").generations > 1
+    # Every child started once, even though the parent ran as several executions
+    assert len(started) == len(set(started)) == 12
+
+
+async def test_referenced_cohorts_are_loaded_wave_by_wave(runtime, monkeypatch):
+    monkeypatch.setattr(claim_check, "threshold_bytes", 100)
+    payload = await claim_check.offload_input_async({'data': {'employees': employees(10, failing={9}), 'waveSize': 4}})
+    assert is_reference(payload['data']['employees'])
+
+    data = await run(runtime, "cohort_workflow", payload)
+
+    assert data['cohort']['succeeded'] == 9
+    assert data['cohort']['failedInstanceIds'] == ["cohort-000009"]
+    assert data['cohort']['waves'] == 3
+    # The parent only carries the reference, never the list itself
+    assert is_reference(data['employees'])
+    runtime.replay("cohort")
+
+
+def test_summary_round_trips():
+    summary = CohortSummary(total=3, succeeded=1, waves=1)
+    summary.record_failure("cohort-000001", limit=1)
+    summary.record_failure("cohort-000002", limit=1)
+
+    restored = CohortSummary.from_dict(summary.to_dict())
+
+    assert restored == summary
+    assert restored.completed == 3
+    assert restored.failed_instance_ids == ["cohort-000001"]
+
+
+async def test_wave_size_must_be_positive(runtime):
+    await runtime.schedule_new_workflow("cohort_workflow", input={'data': {'employees': employees(1), 'waveSize': -1}}, instance_id="bad")
+    state = await runtime.wait_for_workflow_completion("bad")
+
+    assert state.runtime_status == WorkflowStatus.FAILED
+    assert "waveSize" in state.failure_details.message
@@ -0,0 +1,75 @@
+import pytest
+
+from workflow.models import ActivityResponse, WorkflowData
+from workflow.serialization import COMPRESSED_HEADER_VERSION, compression_for, decode_payload, encode_payload
+
+PAYLOAD = {
+    'data': {'employee_id': 'e1', 'items': [{'sku': f'item-{i}', 'quantity': i} for i in range(200)]},
+    'success': True,
+    'ratio': 0.5,
+    'missing': None,
+}
+
+
+@pytest.fixture(autouse=True)
+def default_settings(monkeypatch):
+    for name in ("WORKFLOW_PAYLOAD_CODEC", "WORKFLOW_PAYLOAD_COMPRESSION",
+                 "WORKFLOW_PAYLOAD_COMPRESSION_THRESHOLD", "WORKFLOW_PAYLOAD_COMPRESSION_OVERRIDES"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.mark.parametrize("codec", ["json", "msgpack"])
+def test_zlib_compression_round_trip(monkeypatch, codec):
+    if codec == "msgpack":
+        pytest.importorskip("msgpack")
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_CODEC", codec)
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_COMPRESSION", "zlib")
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_COMPRESSION_THRESHOLD", "256")
+
+    encoded = encode_payload(PAYLOAD, name="test_activity")
+
+    assert encoded.startswith(f"{COMPRESSED_HEADER_VERSION}:{codec}:")
+    assert decode_payload(encoded) == PAYLOAD
+
+
+def test_zstd_compression_round_trip(monkeypatch):
+    pytest.importorskip("zstandard")
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_COMPRESSION", "zstd:256")
+
+    encoded = encode_payload(PAYLOAD)
+
+    assert encoded.startswith(f"{COMPRESSED_HEADER_VERSION}:json:")
+    assert decode_payload(encoded) == PAYLOAD
+
+
+def test_small_payloads_are_not_compressed(monkeypatch):
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_COMPRESSION", "zlib:4096")
+    small = {'success': True}
+
+    assert encode_payload(small) is small
+
+
+def test_compression_overrides_by_name(monkeypatch):
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_COMPRESSION", "zlib:256")
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_COMPRESSION_OVERRIDES", "raw_activity=none,small_activity=zlib:64")
+
+    assert compression_for("raw_activity") is None
+    assert compression_for("small_activity").threshold_bytes == 64
+    assert compression_for("other_activity").threshold_bytes == 256
+    assert encode_payload(PAYLOAD, name="raw_activity") is PAYLOAD
+
+
+def test_models_round_trip_through_compressed_payloads(monkeypatch):
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_COMPRESSION", "zlib:256")
+    response = ActivityResponse(success=True, outputs={'items': PAYLOAD['data']['items']})
+    data = WorkflowData(data=PAYLOAD['data'], original={'employee_id': 'e1'})
+
+    assert ActivityResponse.from_payload(response.to_payload()).outputs == response.outputs
+    restored = WorkflowData.from_payload(data.to_payload())
+    assert restored.data == data.data
+    assert restored.original == data.original
+
+
+def test_payloads_without_a_compression_marker_are_rejected():
+    with pytest.raises(ValueError, match="compression marker"):
+        decode_payload(f"{COMPRESSED_HEADER_VERSION}:json:CXt9")
@@ -0,0 +1,61 @@
+import json
+
+from dapr.ext.workflow import WorkflowStatus
+
+from workflow.continue_as_new import ContinueAsNewPolicy, HistoryBudget, checkpoint, continue_as_new_policy
+from workflow.models import WorkflowData
+
+
+async def count_activity(ctx, input):
+    return {"success": True}
+
+
+@continue_as_new_policy(max_events=6)
+def counting_workflow(ctx, input_data):
+    data = WorkflowData.from_payload(input_data)
+    while data.data.get('count', 0) < 10:
+        result = yield ctx.call_activity(count_activity, input=data.get_activity_request_data())
+        data.add_activity_response("count", result)
+        data.data['count'] = data.data.get('count', 0) + 1
+        yield checkpoint(data)
+    return data
+
+
+async def test_state_is_carried_forward_across_executions(runtime):
+    instance_id = await runtime.schedule_new_workflow(counting_workflow, input={"data": {}, "original": {"employee": "e1"}})
+    state = await runtime.wait_for_workflow_completion(instance_id)
+
+    output = json.loads(state.serialized_output)
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    assert output['data']['count'] == 10
+    assert output['original'] == {"employee": "e1"}
+    # Three activities (six events) per execution; the fourth runs the last one
+    assert runtime.instance_metrics(instance_id).generations == 4
+    assert output['history_summary']['generation'] == 3
+    assert output['history_summary']['totalEvents'] == 18
+    assert runtime.history_length(instance_id) == 1
+
+
+def test_carry_forward_drops_the_activity_history():
+    data = WorkflowData(data={'count': 3}, original={'employee': 'e1'})
+    data.add_activity_response("count", {"success": True})
+    budget = HistoryBudget(ContinueAsNewPolicy(), name="counting_workflow")
+    budget.events = 8
+
+    carried = WorkflowData.from_payload(budget.carry_forward(data))
+
+    assert carried.data == {'count': 3}
+    assert carried.original == {'employee': 'e1'}
+    assert carried.activity_history == []
+    assert carried.history_summary['generation'] == 1
+    assert carried.history_summary['totalEvents'] == 8
+
+
+def test_state_size_threshold():
+    policy = ContinueAsNewPolicy()
+    policy.max_events = 1000
+    policy.max_state_bytes = 100
+    budget = HistoryBudget(policy)
+
+    assert not budget.is_exceeded(WorkflowData(data={'small': 1}))
+    assert budget.is_exceeded(WorkflowData(data={'large': 'x' * 200}))
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+
+from dapr.ext.workflow import WorkflowStatus
+
+from workflow.dag import TaskGraph
+from workflow.models import WorkflowData
+
+
+def graph_workflow(graph: TaskGraph, fail_fast: bool = True):
+    def workflow(ctx, input_data):
+        data = WorkflowData.from_payload(input_data)
+        outcome = yield from graph.run(ctx, data, fail_fast=fail_fast)
+        data.data['results'] = sorted(outcome.results)
+        data.data['failed'] = sorted(outcome.failed)
+        data.data['skipped'] = outcome.skipped
+        return data
+    return workflow
+
+
+async def run_graph(runtime, graph: TaskGraph, fail_fast: bool = True):
+    runtime.register_workflow(graph_workflow(graph, fail_fast), name="graph")
+    instance_id = await runtime.schedule_new_workflow("graph", input={"data": {}})
+    state = await runtime.wait_for_workflow_completion(instance_id)
+    return instance_id, state
+
+
+def recording_activity(calls: list, name: str, fail: bool = False, seconds: float = 0.0):
+    async def activity(ctx, input):
+        calls.append(name)
+        await asyncio.sleep(seconds)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        return {"success": True}
+    activity.__name__ = name
+    return activity
+
+
+async def test_tasks_start_after_their_dependencies(runtime):
+    calls = []
+    graph = (
+        TaskGraph(window_size=1)
+        .add("d", recording_activity(calls, "d"), depends_on=["b", "c"])
+        .add("a", recording_activity(calls, "a"))
+        .add("b", recording_activity(calls, "b"), depends_on=["a"])
+        .add("c", recording_activity(calls, "c"), depends_on=["a"])
+    )
+
+    instance_id, state = await run_graph(runtime, graph)
+
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    assert calls == ["a", "b", "c", "d"]
+    assert json.loads(state.serialized_output)['data']['results'] == ["a", "b", "c", "d"]
+    runtime.replay(instance_id)
+
+
+async def test_window_bounds_activities_in_flight(runtime):
+    in_flight = []
+    peak = []
+
+    def tracked(name):
+        async def activity(ctx, input):
+            in_flight.append(name)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(name)
+            return {"success": True}
+        activity.__name__ = name
+        return activity
+
+    graph = TaskGraph(window_size=2)
+    for index in range(6):
+        graph.add(f"t{index}", tracked(f"t{index}"))
+
+    _, state = await run_graph(runtime, graph)
+
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    assert max(peak) == 2
+
+
+async def test_fail_fast_raises_the_first_failure(runtime):
+    calls = []
+    graph = (
+        TaskGraph()
+        .add("a", recording_activity(calls, "a", fail=True))
+        .add("b", recording_activity(calls, "b"), depends_on=["a"])
+    )
+
+    _, state = await run_graph(runtime, graph)
+
+    assert state.runtime_status == WorkflowStatus.FAILED
+    assert "a failed" in state.failure_details.message
+    assert calls == ["a"]
+
+
+async def test_without_fail_fast_dependents_are_skipped(runtime):
+    calls = []
+    graph = (
+        TaskGraph()
+        .add("a", recording_activity(calls, "a", fail=True))
+        .add("b", recording_activity(calls, "b"), depends_on=["a"])
+        .add("c", recording_activity(calls, "c"))
+    )
+
+    _, state = await run_graph(runtime, graph, fail_fast=False)
+
+    data = json.loads(state.serialized_output)['data']
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    assert data['results'] == ["c"]
+    assert data['failed'] == ["a"]
+    assert data['skipped'] == ["b"]
+    assert "b" not in calls
+
+
+def test_validate_rejects_unknown_dependencies_and_cycles():
+    with pytest.raises(ValueError, match="unknown task"):
+        TaskGraph().add("a", "activity", depends_on=["missing"]).validate()
+    with pytest.raises(ValueError, match="cycle"):
+        TaskGraph().add("a", "activity", depends_on=["b"]).add("b", "activity", depends_on=["a"]).validate()
+    with pytest.raises(ValueError, match="already part"):
+        TaskGraph().add("a", "activity").add("a", "activity")
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+
+from dapr.ext.workflow import WorkflowStatus
+
+from workflow.events import EventBroadcaster, EventSummary, wait_for_events
+from workflow.models import WorkflowData
+from workflow.status import WorkflowStatusCache
+
+
+def badge_workflow(ctx, input_data):
+    data = WorkflowData.from_payload(input_data)
+    # Stay busy on a timer so the events raised meanwhile queue up
+    yield ctx.create_timer(timedelta(seconds=10))
+    data.data['received'] = yield from wait_for_events(
+        ctx, data, "badge", timeout=timedelta(seconds=60), max_events=data.data.get('maxEvents'),
+    )
+    data.data['receivedLater'] = yield from wait_for_events(ctx, data, "badge", timeout=timedelta(seconds=10))
+    return data
+
+
+@pytest.fixture(autouse=True)
+def workflows(runtime):
+    runtime.register_workflow(badge_workflow, name="badge_workflow")
+
+
+async def start(runtime, instance_id, **data):
+    await runtime.schedule_new_workflow("badge_workflow", input={'data': data}, instance_id=instance_id)
+    await asyncio.sleep(0.01)
+
+
+async def finish(runtime, instance_id):
+    state = await runtime.wait_for_workflow_completion(instance_id, timeout_in_seconds=10)
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    return json.loads(state.serialized_output)['data']
+
+
+async def test_queued_events_are_coalesced(runtime):
+    await start(runtime, "wf-1")
+    await runtime.raise_workflow_event("wf-1", "badge", data={'badge': "pending", 'desk': "4B"})
+    await runtime.raise_workflow_event("wf-1", "badge", data={'badge': "printed"})
+    await runtime.raise_workflow_event("wf-1", "badge", data="collected")
+
+    data = await finish(runtime, "wf-1")
+
+    # Later events win, and values that aren't objects are kept under the event name
+    assert data['received'] == 3
+    assert data['badge'] == "collected"
+    assert data['desk'] == "4B"
+    assert data['receivedLater'] == 0
+    runtime.replay("wf-1")
+
+
+async def test_coalescing_stops_at_max_events(runtime):
+    await start(runtime, "wf-2", maxEvents=2)
+    for step in range(3):
+        await runtime.raise_workflow_event("wf-2", "badge", data={'step': step})
+
+    data = await finish(runtime, "wf-2")
+
+    # The third event stays queued for the next wait
+    assert data['received'] == 2
+    assert data['receivedLater'] == 1
+    assert data['step'] == 2
+    runtime.replay("wf-2")
+
+
+async def test_wait_times_out_without_events(runtime):
+    await start(runtime, "wf-3")
+
+    data = await finish(runtime, "wf-3")
+
+    assert data['received'] == 0
+    assert data['receivedLater'] == 0
+
+
+async def test_broadcast_signals_each_instance_once(runtime, client_pool):
+    for index in range(3):
+        await start(runtime, f"wf-{index}")
+    broadcaster = EventBroadcaster(client_pool=client_pool, status_cache=WorkflowStatusCache(client_pool=client_pool), concurrency=2)
+    summary = EventSummary("badge")
+
+    results = [
+        result async for result in broadcaster.broadcast(
+            "badge", {'badge': "printed"}, instance_ids=["wf-0", "wf-1", "wf-0", "wf-2", "missing"], summary=summary,
+        )
+    ]
+
+    assert sorted(result.instance_id for result in results) == ["missing", "wf-0", "wf-1", "wf-2"]
+    assert [result.instance_id for result in results if not result.success] == ["missing"]
+    assert summary.to_dict()['total'] == 4
+    assert summary.delivered == 3
+    assert summary.failed == 1
+    for index in range(3):
+        data = await finish(runtime, f"wf-{index}")
+        assert data['received'] == 1
+        assert data['badge'] == "printed"
+
+
+async def test_broadcast_needs_exactly_one_target_selector(client_pool):
+    broadcaster = EventBroadcaster(client_pool=client_pool, status_cache=WorkflowStatusCache(client_pool=client_pool))
+
+    with pytest.raises(ValueError):
+        async for _ in broadcaster.broadcast("badge"):
+            pass
+
+
+@pytest.mark.parametrize("event_name", ["onboarding-requests", "batch"])
+def test_bulk_event_route_doesnt_collide_with_other_routes(event_name):
+    from fastapi.testclient import TestClient
+
+    from app import app
+
+    # Pub/sub deliveries and batch starts have routes of the same shape; the request must reach the event API
+    response = TestClient(app).post(f"/workflows/events/{event_name}", json={})
+
+    assert response.status_code == 400
+    assert response.json()['detail'] == "Pass either instance_ids or statuses"
@@ -0,0 +1,146 @@
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from dapr.ext.workflow import WorkflowStatus
+
+from workflow.activity_request import ActivityRequest
+from workflow.fake_runtime import NonDeterminismError
+from workflow.models import ActivityResponse, WorkflowData
+from workflow.projection import projection
+from workflow.runtime import LazyWorkflowRuntime
+
+branch = {'activity': "first_activity"}
+
+
+async def first_activity(ctx, input):
+    return "first"
+
+
+async def second_activity(ctx, input):
+    return "second"
+
+
+def branching_workflow(ctx, input_data):
+    # Reads module state, which a workflow must never do
+    result = yield ctx.call_activity(branch['activity'])
+    return result
+
+
+@dataclass(slots=True)
+class BadgeRequest(ActivityRequest):
+    employee_id: Optional[str] = None
+
+
+lazy_runtime = LazyWorkflowRuntime()
+received = []
+
+
+@lazy_runtime.activity(name="badge_activity")
+@projection(BadgeRequest, writes=["badge_printed"])
+async def badge_activity(ctx, input: BadgeRequest) -> ActivityResponse:
+    received.append(input)
+    outputs = {'badge_printed': True}
+    if input.employee_id == "e2":
+        outputs['desk'] = "4B"
+    return ActivityResponse(success=True, outputs=outputs)
+
+
+def badge_workflow(ctx, input_data):
+    data = WorkflowData.from_payload(input_data)
+    result = yield ctx.call_activity(badge_activity, input=data.get_activity_request_data(badge_activity))
+    data.add_activity_response("badge", result, activity=badge_activity)
+    return data
+
+
+@pytest.fixture(autouse=True)
+def workflows(runtime):
+    branch['activity'] = "first_activity"
+    received.clear()
+    runtime.register_activity(first_activity)
+    runtime.register_activity(second_activity)
+    runtime.register_workflow(branching_workflow)
+    runtime.register_workflow(badge_workflow)
+
+
+async def test_completed_instances_replay_against_their_history(runtime):
+    instance_id = await runtime.schedule_new_workflow("branching_workflow")
+    state = await runtime.wait_for_workflow_completion(instance_id)
+
+    assert json.loads(state.serialized_output) == "first"
+    assert runtime.history_length(instance_id) == 1
+    assert runtime.replay(instance_id) >= 0
+
+
+async def test_replays_that_schedule_different_actions_fail(runtime):
+    instance_id = await runtime.schedule_new_workflow("branching_workflow")
+    await runtime.wait_for_workflow_completion(instance_id)
+
+    branch['activity'] = "second_activity"
+
+    with pytest.raises(NonDeterminismError, match="first_activity"):
+        runtime.replay(instance_id)
+
+
+async def test_non_determinism_fails_running_instances(runtime):
+    def flipping_workflow(ctx, input_data):
+        # Schedules a different activity on every episode
+        name = "first_activity" if not ctx.is_replaying else "second_activity"
+        yield ctx.call_activity(name)
+        yield ctx.call_activity("first_activity")
+
+    runtime.register_workflow(flipping_workflow)
+    instance_id = await runtime.schedule_new_workflow("flipping_workflow")
+    state = await runtime.wait_for_workflow_completion(instance_id)
+
+    assert state.runtime_status == WorkflowStatus.FAILED
+    assert state.failure_details.error_type == "NonDeterminismError"
+
+
+async def test_only_completed_instances_are_replayed(runtime):
+    def waiting_workflow(ctx, input_data):
+        yield ctx.wait_for_external_event("done")
+
+    runtime.register_workflow(waiting_workflow)
+    instance_id = await runtime.schedule_new_workflow("waiting_workflow")
+
+    with pytest.raises(ValueError):
+        runtime.replay(instance_id)
+    await runtime.terminate_workflow(instance_id)
+
+
+async def test_activities_run_with_the_registration_wrappers(runtime):
+    # The stub is resolved on first use, with the projection applied like the SDK runtime would
+    instance_id = await runtime.schedule_new_workflow("badge_workflow", input={'data': {'employee_id': "e1", 'salary': 1}})
+    state = await runtime.wait_for_workflow_completion(instance_id)
+
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    assert received == [BadgeRequest(employee_id="e1")]
+    assert json.loads(state.serialized_output)['data']['badge_printed'] is True
+
+
+async def test_undeclared_activity_outputs_are_rejected(runtime):
+    instance_id = await runtime.schedule_new_workflow("badge_workflow", input={'data': {'employee_id': "e2"}})
+    state = await runtime.wait_for_workflow_completion(instance_id)
+
+    assert state.runtime_status == WorkflowStatus.FAILED
+    assert "undeclared outputs: desk" in state.failure_details.message
+
+
+async def test_activity_overrides_are_wrapped_as_well(runtime):
+    from workflow.fake_runtime import FakeWorkflowRuntime
+
+    @projection(BadgeRequest, writes=["badge_printed"])
+    async def fast_badge_activity(ctx, input: BadgeRequest) -> ActivityResponse:
+        received.append(input)
+        return ActivityResponse(success=True, outputs={'badge_printed': True})
+
+    overridden = FakeWorkflowRuntime(activity_overrides={'badge_activity': fast_badge_activity}, time_scale=0)
+    overridden.register_workflow(badge_workflow)
+    instance_id = await overridden.schedule_new_workflow("badge_workflow", input={'data': {'employee_id': "e3"}})
+    state = await overridden.wait_for_workflow_completion(instance_id)
+
+    assert state.runtime_status == WorkflowStatus.COMPLETED
+    assert received == [BadgeRequest(employee_id="e3")]
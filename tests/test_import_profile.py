@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from workflow.import_profile import parse_importtime, profile_imports
+
+
+def test_app_import_doesnt_load_deferred_modules():
+    profile = profile_imports("app", runs=1)
+
+    assert profile.deferred_imported == []
+
+
+@pytest.mark.skipif(not os.getenv("IMPORT_BUDGET_MS"), reason="import times are machine specific; set IMPORT_BUDGET_MS")
+def test_app_import_stays_within_budget():
+    budget_ms = float(os.environ["IMPORT_BUDGET_MS"])
+
+    profile = profile_imports("app", runs=3)
+
+    assert profile.seconds * 1000 <= budget_ms
+
+
+def test_deferred_modules_are_detected():
+    profile = profile_imports("workflow.workflow", runs=1)
+
+    # The workflow module needs the SDK, so importing it directly loads the deferred modules
+    assert "dapr.ext.workflow" in profile.deferred_imported
+
+
+def test_importtime_output_is_parsed():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   json.decoder",
+        "import time:       300 |        420 | json",
+        "some other stderr line",
+    ])
+
+    timings = parse_importtime(output)
+
+    assert [(timing.name, timing.self_us, timing.cumulative_us) for timing in timings] == [
+        ("json.decoder", 120, 120),
+        ("json", 300, 420),
+    ]
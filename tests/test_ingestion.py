@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from workflow.ingestion import IngestStatus, WorkflowIngestor
+
+
+def started_workflow(ctx, input_data):
+    return input_data
+
+
+def waiting_workflow(ctx, input_data):
+    yield ctx.wait_for_external_event("done")
+
+
+@pytest.fixture
+def ingestor(runtime, client_pool):
+    runtime.register_workflow(started_workflow, name="started_workflow")
+    runtime.register_workflow(waiting_workflow, name="waiting_workflow")
+    return WorkflowIngestor("started_workflow", client_pool=client_pool, window=4, max_wait_seconds=1)
+
+
+def event(message_id, **data):
+    return {'id': message_id, 'data': {'data': data}}
+
+
+async def test_redelivered_messages_start_one_instance(runtime, ingestor):
+    assert await ingestor.handle_event(event("m1", employee="e1")) == IngestStatus.SUCCESS
+    assert await ingestor.handle_event(event("m1", employee="e1")) == IngestStatus.SUCCESS
+
+    state = await runtime.wait_for_workflow_completion("m1")
+    assert state.name == "started_workflow"
+    assert ingestor.counters.started == 1
+    assert ingestor.counters.duplicates == 1
+
+
+async def test_concurrent_duplicates_share_the_first_start(runtime, ingestor):
+    statuses = await asyncio.gather(*(ingestor.handle_event(event("m2")) for _ in range(5)))
+
+    assert statuses == [IngestStatus.SUCCESS] * 5
+    assert ingestor.counters.started == 1
+    assert ingestor.counters.duplicates == 4
+
+
+async def test_instances_that_already_exist_are_acknowledged(runtime, client_pool):
+    # A message seen before a restart: the dedupe memory is empty but the instance exists
+    runtime.register_workflow(waiting_workflow, name="waiting_workflow")
+    await runtime.schedule_new_workflow("waiting_workflow", instance_id="m3")
+    ingestor = WorkflowIngestor("waiting_workflow", client_pool=client_pool)
+
+    assert await ingestor.handle_event(event("m3")) == IngestStatus.SUCCESS
+    assert ingestor.counters.started == 0
+    assert ingestor.counters.duplicates == 1
+    assert await ingestor.handle_event(event("m3")) == IngestStatus.SUCCESS
+    assert ingestor.counters.duplicates == 2
+    await runtime.terminate_workflow("m3")
+
+
+async def test_bulk_entries_report_a_status_per_entry(ingestor):
+    entries = [
+        {'entryId': "1", 'event': event("m4")},
+        {'entryId': "2", 'event': event("m4")},
+        {'entryId': "3", 'event': {'id': "m5", 'data': "not an object"}},
+        {'entryId': "4", 'event': None},
+    ]
+
+    statuses = await ingestor.handle_entries(entries)
+
+    assert statuses == [
+        {'entryId': "1", 'status': IngestStatus.SUCCESS},
+        {'entryId': "2", 'status': IngestStatus.SUCCESS},
+        {'entryId': "3", 'status': IngestStatus.DROP},
+        {'entryId': "4", 'status': IngestStatus.DROP},
+    ]
+    assert ingestor.stats()['dropped'] == 2
+    assert ingestor.stats()['started'] == 1
+
+
+async def test_dedupe_memory_is_bounded(runtime, client_pool):
+    runtime.register_workflow(started_workflow, name="started_workflow")
+    ingestor = WorkflowIngestor("started_workflow", client_pool=client_pool, dedupe_size=2)
+
+    for message_id in ("a", "b", "c"):
+        await ingestor.handle_event(event(message_id))
+
+    assert list(ingestor._seen) == ["b", "c"]
@@ -0,0 +1,78 @@
+import json
+import logging
+
+import pytest
+
+from workflow import loadtest as loadtest_module
+from workflow.loadtest import LoadTestReport, Outcome, Sample, main, percentile
+
+
+@pytest.mark.parametrize("p, expected", [(0, 1), (10, 1), (11, 2), (50, 5), (90, 9), (95, 10), (99, 10), (100, 10)])
+def test_percentiles_use_the_nearest_rank(p, expected):
+    # Shuffled so the values are sorted first
+    values = [7, 3, 10, 1, 5, 9, 2, 8, 4, 6]
+
+    assert percentile(values, p) == expected
+
+
+def test_percentiles_of_few_values():
+    assert percentile([], 50) is None
+    assert percentile([0.25], 99) == 0.25
+    assert percentile([0.1, 0.2], 50) == 0.1
+    assert percentile([0.1, 0.2], 51) == 0.2
+
+
+def report(failed):
+    samples = [Sample(scheduled_at=0.0, started_at=0.1, completed_at=0.5) for _ in range(10 - failed)]
+    samples += [Sample(scheduled_at=0.0, outcome=Outcome.SCHEDULE_ERROR, error="ConnectionError") for _ in range(failed)]
+    return LoadTestReport("fake", "employee_onboarding_workflow", elapsed_seconds=1.0, samples=samples)
+
+
+@pytest.fixture
+def reported(monkeypatch):
+    """Replaces the load test run with one that returns the report set by the test."""
+    result = {}
+
+    async def run_load_test(args):
+        return result['report']
+
+    monkeypatch.setattr(loadtest_module, "run_load_test", run_load_test)
+    monkeypatch.setattr(loadtest_module, "configure_logging", lambda level=None: None)
+    return result
+
+
+@pytest.mark.parametrize("failed, argv, status", [
+    (1, ["--max-error-rate", "0.1"], 0),
+    (2, ["--max-error-rate", "0.1"], 1),
+    (0, ["--max-error-rate", "0"], 0),
+    (1, ["--max-error-rate", "0"], 1),
+    (10, [], 0),
+])
+def test_the_exit_status_checks_the_max_error_rate(reported, capsys, failed, argv, status):
+    reported['report'] = report(failed)
+
+    assert main(argv) == status
+    assert ("exceeds" in capsys.readouterr().out) == bool(status)
+
+
+def test_reports_are_printed_as_json(reported, capsys):
+    reported['report'] = report(failed=2)
+
+    assert main(["--json"]) == 0
+
+    result = json.loads(capsys.readouterr().out)
+    assert (result['instances'], result['completed'], result['scheduleErrors']) == (10, 8, 2)
+    assert result['errorRate'] == pytest.approx(0.2)
+    assert result['latencySeconds']['startToComplete']['p50'] == pytest.approx(0.4)
+    assert result['errors'] == {'ConnectionError': 2}
+
+
+def test_the_fake_target_runs_the_workflow(monkeypatch, capsys, caplog):
+    # Like configure_logging(level="WARNING"), without replacing the test's handlers
+    monkeypatch.setattr(loadtest_module, "configure_logging", lambda level=None: None)
+    caplog.set_level(logging.WARNING)
+
+    assert main(["--count", "5", "--concurrency", "2", "--max-error-rate", "0", "--json"]) == 0
+
+    result = json.loads(capsys.readouterr().out)
+    assert (result['instances'], result['completed']) == (5, 5)
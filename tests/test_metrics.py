@@ -0,0 +1,132 @@
+import asyncio
+import inspect
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from workflow.metrics import instrument_activity, instrument_workflow
+
+
+def sample(metric, **labels):
+    return REGISTRY.get_sample_value(metric, labels) or 0.0
+
+
+class OrchestrationContext(SimpleNamespace):
+    """Orchestration context whose replay flag and clock the test moves forward."""
+
+    def __init__(self, replaying=False):
+        super().__init__(is_replaying=replaying, current_utc_datetime=datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+    def advance(self, seconds, replaying=False):
+        self.current_utc_datetime += timedelta(seconds=seconds)
+        self.is_replaying = replaying
+
+
+def two_step_workflow(ctx, input):
+    first = yield "provision_activity"
+    second = yield "notify_activity"
+    return {'employee': input['employee'], 'steps': [first, second]}
+
+
+def test_first_executions_and_replays_are_counted_separately():
+    workflow = instrument_workflow(two_step_workflow, "counted_workflow")
+
+    # First episode: schedules the first activity and waits for it
+    ctx = OrchestrationContext()
+    episode = workflow(ctx, {'employee': "e1"})
+    assert next(episode) == "provision_activity"
+    episode.close()
+
+    # Each later episode replays the history from the start
+    for _ in range(2):
+        ctx = OrchestrationContext(replaying=True)
+        episode = workflow(ctx, {'employee': "e1"})
+        next(episode)
+        episode.close()
+
+    assert sample("workflow_executions_total", workflow="counted_workflow", mode="new") == 1
+    assert sample("workflow_executions_total", workflow="counted_workflow", mode="replay") == 2
+
+
+def test_starts_and_completions_are_recorded_only_outside_replay():
+    workflow = instrument_workflow(two_step_workflow, "replayed_workflow")
+    in_flight = lambda: sample("workflow_workflows_in_flight", workflow="replayed_workflow")
+    completed = lambda: sample("workflow_duration_seconds_count", workflow="replayed_workflow", outcome="success")
+
+    ctx = OrchestrationContext()
+    episode = workflow(ctx, {'employee': "e1"})
+    next(episode)
+    episode.close()
+    assert in_flight() == 1
+    assert sample("workflow_payload_size_bytes_count", kind="workflow_input", name="replayed_workflow") == 1
+
+    # The replay of the start doesn't count it again; the new completion is recorded
+    ctx = OrchestrationContext(replaying=True)
+    episode = workflow(ctx, {'employee': "e1"})
+    next(episode)
+    ctx.advance(2.5, replaying=True)
+    episode.send("provisioned")
+    ctx.advance(1.5)
+    with pytest.raises(StopIteration) as stop:
+        episode.send("notified")
+
+    assert stop.value.value == {'employee': "e1", 'steps': ["provisioned", "notified"]}
+    assert in_flight() == 0
+    assert completed() == 1
+    assert sample("workflow_duration_seconds_sum", workflow="replayed_workflow", outcome="success") == 4.0
+    assert sample("workflow_payload_size_bytes_count", kind="workflow_input", name="replayed_workflow") == 1
+
+    # Replaying the completed history records nothing
+    ctx = OrchestrationContext(replaying=True)
+    episode = workflow(ctx, {'employee': "e1"})
+    next(episode)
+    episode.send("provisioned")
+    with pytest.raises(StopIteration):
+        episode.send("notified")
+
+    assert (in_flight(), completed()) == (0, 1)
+
+
+def test_failed_workflows_are_recorded_as_errors():
+    def failing_workflow(ctx, input):
+        yield "provision_activity"
+        raise ValueError("no such employee")
+
+    workflow = instrument_workflow(failing_workflow, "failing_workflow")
+    episode = workflow(OrchestrationContext(), None)
+    next(episode)
+
+    with pytest.raises(ValueError):
+        episode.send(None)
+
+    assert sample("workflow_duration_seconds_count", workflow="failing_workflow", outcome="error") == 1
+    assert sample("workflow_workflows_in_flight", workflow="failing_workflow") == 0
+
+
+async def test_async_activities_stay_coroutine_functions():
+    async def provision_activity(ctx, input):
+        await asyncio.sleep(0)
+        return {'provisioned': input}
+
+    activity = instrument_activity(provision_activity, "async_metrics_activity")
+
+    assert inspect.iscoroutinefunction(activity)
+    assert activity.__name__ == "provision_activity"
+    assert await activity(None, "e1") == {'provisioned': "e1"}
+    assert sample("workflow_activity_duration_seconds_count", activity="async_metrics_activity", outcome="success") == 1
+    assert sample("workflow_activities_in_flight", activity="async_metrics_activity") == 0
+
+
+def test_sync_activities_stay_sync():
+    def notify_activity(ctx, input):
+        raise ConnectionError("mail server down")
+
+    activity = instrument_activity(notify_activity, "sync_metrics_activity")
+
+    assert not inspect.iscoroutinefunction(activity)
+    with pytest.raises(ConnectionError):
+        activity(None, "e1")
+    assert sample("workflow_activity_duration_seconds_count", activity="sync_metrics_activity", outcome="error") == 1
+    assert sample("workflow_activities_in_flight", activity="sync_metrics_activity") == 0
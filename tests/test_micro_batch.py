@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from workflow.micro_batch import MicroBatcher
+
+
+def activity_context(task_id: int) -> SimpleNamespace:
+    return SimpleNamespace(workflow_id=f"wf-{task_id}", task_id=task_id)
+
+
+async def call_all(activity, inputs):
+    return await asyncio.gather(
+        *(activity(activity_context(index), value) for index, value in enumerate(inputs)),
+        return_exceptions=True,
+    )
+
+
+async def test_full_batches_flush_on_size():
+    batches = []
+    batcher = MicroBatcher(max_batch_size=3, max_wait_seconds=10, idle_seconds=10)
+
+    @batcher.batched
+    async def double(calls):
+        batches.append([call.input for call in calls])
+        return [call.input * 2 for call in calls]
+
+    results = await call_all(double, range(6))
+
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+    assert batcher.stats()['double']['flushedOnSize'] == 2
+
+
+async def test_batches_flush_when_the_window_closes():
+    batcher = MicroBatcher(max_batch_size=100, max_wait_seconds=0.05, idle_seconds=10)
+
+    @batcher.batched
+    async def echo(calls):
+        return [call.input for call in calls]
+
+    async def trickle():
+        results = []
+        for value in range(3):
+            results.append(asyncio.ensure_future(echo(activity_context(value), value)))
+            await asyncio.sleep(0.01)
+        return await asyncio.gather(*results)
+
+    assert await trickle() == [0, 1, 2]
+    stats = batcher.stats()['echo']
+    assert stats['batches'] == 1
+    assert stats['flushedOnWindow'] == 1
+
+
+async def test_batches_flush_when_calls_stop_arriving():
+    batcher = MicroBatcher(max_batch_size=100, max_wait_seconds=10, idle_seconds=0.01)
+
+    @batcher.batched
+    async def echo(calls):
+        return [call.input for call in calls]
+
+    assert await call_all(echo, ["a", "b"]) == ["a", "b"]
+    stats = batcher.stats()['echo']
+    assert stats['batches'] == 1
+    assert stats['flushedOnIdle'] == 1
+
+
+async def test_batch_keys_form_separate_batches():
+    batches = []
+    batcher = MicroBatcher(max_batch_size=100, max_wait_seconds=10, idle_seconds=0.01)
+
+    @batcher.batched(key=lambda value: value % 2)
+    async def echo(calls):
+        batches.append(sorted(call.input for call in calls))
+        return [call.input for call in calls]
+
+    await call_all(echo, range(4))
+
+    assert sorted(batches) == [[0, 2], [1, 3]]
+
+
+async def test_exception_results_only_fail_their_call():
+    batcher = MicroBatcher(max_batch_size=3, max_wait_seconds=10, idle_seconds=10)
+
+    @batcher.batched
+    async def check(calls):
+        return [ValueError(f"bad {call.input}") if call.input == 1 else call.input for call in calls]
+
+    results = await call_all(check, range(3))
+
+    assert results[0] == 0 and results[2] == 2
+    assert isinstance(results[1], ValueError)
+    assert batcher.stats()['check']['failedBatches'] == 0
+
+
+async def test_handler_failures_fail_every_call():
+    batcher = MicroBatcher(max_batch_size=2, max_wait_seconds=10, idle_seconds=10)
+
+    @batcher.batched
+    async def broken(calls):
+        raise ConnectionError("backend down")
+
+    @batcher.batched
+    async def short(calls):
+        return [None]
+
+    failed = await call_all(broken, range(2))
+    mismatched = await call_all(short, range(2))
+
+    assert all(isinstance(result, ConnectionError) for result in failed)
+    assert all(isinstance(result, ValueError) for result in mismatched)
+    assert batcher.stats()['broken']['failedBatches'] == 1
+
+
+def test_batch_handlers_must_be_coroutines():
+    with pytest.raises(ValueError, match="coroutine"):
+        MicroBatcher().batched(lambda calls: calls)
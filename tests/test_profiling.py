@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from workflow.profiling import ProfileOutcome, WorkflowProfiler, _frame_name
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    monkeypatch.setenv("WORKFLOW_PROFILING_ENABLED", "true")
+    # Samples are taken by the tests; the sampler thread stays asleep
+    monkeypatch.setenv("WORKFLOW_PROFILING_SAMPLE_INTERVAL", "60")
+    return WorkflowProfiler()
+
+
+def adding_workflow(ctx, input_data):
+    first = yield "first task"
+    second = yield "second task"
+    return first + second
+
+
+def test_workflow_steps_are_split_into_replay_and_new_progress(profiler):
+    ctx = SimpleNamespace(instance_id="wf-1", is_replaying=True)
+    episode = profiler.profile_workflow(adding_workflow, "adding_workflow")(ctx, None)
+
+    # Starting the generator and the step up to the first yield replay the history
+    assert next(episode) == "first task"
+    ctx.is_replaying = False
+    assert episode.send(1) == "second task"
+    with pytest.raises(StopIteration) as stop:
+        episode.send(2)
+
+    assert stop.value.value == 3
+    invocation = profiler.stats()['recent'][0]
+    assert invocation['outcome'] == ProfileOutcome.COMPLETED
+    assert invocation['replay']['steps'] == 2
+    assert invocation['new']['steps'] == 2
+    assert invocation['instanceId'] == "wf-1"
+
+
+def test_suspended_episodes_are_recorded(profiler):
+    ctx = SimpleNamespace(instance_id="wf-1", is_replaying=False)
+    episode = profiler.profile_workflow(adding_workflow, "adding_workflow")(ctx, None)
+
+    next(episode)
+    # The runtime closes the generator when the episode ends on an incomplete task
+    episode.close()
+
+    function = profiler.stats()['functions'][0]
+    assert function['outcomes'] == {ProfileOutcome.SUSPENDED: 1}
+
+
+async def test_cancelled_async_activities_are_recorded(profiler):
+    started = asyncio.Event()
+
+    async def slow_activity(ctx, input):
+        started.set()
+        await asyncio.sleep(60)
+
+    activity = profiler.profile_activity(slow_activity, "slow_activity")
+    assert asyncio.iscoroutinefunction(activity)
+    call = asyncio.ensure_future(activity(SimpleNamespace(workflow_id="wf-1"), None))
+    await started.wait()
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    stats = profiler.stats()
+    assert stats['recent'][0]['outcome'] == ProfileOutcome.CANCELLED
+    assert stats['functions'][0]['outcomes'] == {ProfileOutcome.CANCELLED: 1}
+
+
+def test_failed_sync_activities_are_recorded(profiler):
+    def broken_activity(ctx, input):
+        raise ConnectionError("backend down")
+
+    with pytest.raises(ConnectionError):
+        profiler.profile_activity(broken_activity, "broken_activity")(SimpleNamespace(workflow_id="wf-1"), None)
+
+    assert profiler.stats()['recent'][0]['outcome'] == ProfileOutcome.FAILED
+
+
+def test_sampled_stacks_are_collapsed_under_their_segment(profiler):
+    def sampled_activity(ctx, input):
+        profiler.sampler.sample()
+        profiler.sampler.sample()
+
+    profiler.profile_activity(sampled_activity, "sampled_activity")(SimpleNamespace(workflow_id="wf-1"), None)
+
+    # Frames between the profiler's step and the sampler are kept, root first
+    stack, count = profiler.collapsed_stacks().strip().rsplit(" ", 1)
+    frames = stack.split(";")
+    assert frames[:3] == ["activity:sampled_activity", "new", f"{__name__}:test_sampled_stacks_are_collapsed_under_their_segment.<locals>.sampled_activity"]
+    assert frames[-1] == "workflow.profiling:StackSampler.sample"
+    assert count == "2"
+
+    profiler.reset()
+    assert profiler.collapsed_stacks() == ""
+    assert profiler.stats()['functions'] == []
+
+
+def test_frame_names_fall_back_to_the_function_name():
+    # Code objects only have co_qualname on Python 3.11+
+    frame = SimpleNamespace(f_globals={'__name__': "workflow.activities"}, f_code=SimpleNamespace(co_name="provision"))
+
+    assert _frame_name(frame) == "workflow.activities:provision"
@@ -0,0 +1,144 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from workflow import projection as projection_module
+from workflow.activity_request import ActivityRequest
+from workflow.models import ActivityResponse, WorkflowData
+from workflow.projection import get_projection, projection, register_projection
+
+
+@dataclass(slots=True)
+class Address:
+    street: str = ""
+    floors: List[int] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class BadgeRequest(ActivityRequest):
+    employee_id: Optional[str] = None
+    department: str = "unknown"
+    address: Optional[Address] = None
+    tags: Dict[str, Any] = field(default_factory=dict)
+    shifts: Tuple[int, ...] = ()
+
+
+@pytest.fixture(autouse=True)
+def registered_projections(monkeypatch):
+    # Keep the test registrations out of the shared registry
+    monkeypatch.setattr(projection_module, "_projections", {})
+
+
+def projected(request_type, writes=("badge_printed",)):
+    @projection(request_type, writes=writes)
+    async def badge_activity(ctx, input):
+        return ActivityResponse(success=True, outputs={'badge_printed': True})
+
+    return badge_activity
+
+
+def test_serializable_request_types_register():
+    activity = register_projection(projected(BadgeRequest), "badge_activity")
+
+    assert get_projection("badge_activity").reads == ("employee_id", "department", "address", "tags", "shifts")
+    assert get_projection(activity) is get_projection("badge_activity")
+
+
+@pytest.mark.parametrize("annotation, message", [
+    (datetime, "BadRequest.value has type"),
+    (Dict[int, str], "non-string dictionary keys"),
+    (List[set], r"BadRequest.value\[\] has type"),
+    (Optional[bytes], "BadRequest.value has type"),
+])
+def test_unserializable_request_types_fail_at_registration(annotation, message):
+    BadRequest = dataclass(slots=True)(type("BadRequest", (ActivityRequest,), {'__annotations__': {'value': annotation}}))
+
+    with pytest.raises(TypeError, match=message):
+        register_projection(projected(BadRequest), "bad_activity")
+
+
+def test_invalid_output_declarations_fail_at_registration():
+    with pytest.raises(ValueError, match="duplicate outputs"):
+        register_projection(projected(BadgeRequest, writes=["desk", "desk"]), "duplicate_activity")
+    with pytest.raises(ValueError, match="invalid output name"):
+        register_projection(projected(BadgeRequest, writes=[""]), "unnamed_activity")
+    with pytest.raises(TypeError, match="must be a dataclass"):
+        register_projection(projected(SimpleNamespace), "untyped_activity")
+
+
+def test_requests_read_only_declared_fields_preferring_data():
+    data = WorkflowData(
+        data={'employee_id': "e2", 'salary': 100000},
+        original={'employee_id': "e1", 'department': "sales", 'ssn': "000-00-0000"},
+    )
+
+    request = get_projection(projected(BadgeRequest)).build_request(data)
+
+    assert request == BadgeRequest(employee_id="e2", department="sales")
+    assert not hasattr(request, "salary")
+
+
+def test_missing_fields_keep_their_defaults():
+    request = get_projection(projected(BadgeRequest)).build_request(WorkflowData())
+
+    assert request == BadgeRequest()
+
+
+@pytest.mark.parametrize("input", [
+    {'employee_id': "e1", 'department': "it", 'salary': 1},
+    SimpleNamespace(employee_id="e1", department="it", salary=1),
+])
+def test_deserialized_inputs_are_coerced_to_the_request_type(input):
+    assert get_projection(projected(BadgeRequest)).coerce(input) == BadgeRequest(employee_id="e1", department="it")
+
+
+def test_typed_and_missing_inputs_are_passed_through():
+    activity_projection = get_projection(projected(BadgeRequest))
+    request = BadgeRequest(employee_id="e1")
+
+    assert activity_projection.coerce(request) is request
+    assert activity_projection.coerce(None) is None
+
+
+def test_undeclared_outputs_are_rejected():
+    activity_projection = get_projection(projected(BadgeRequest, writes=["badge_printed"]))
+    activity_projection.check_outputs("badge_activity", {'badge_printed': True})
+    activity_projection.check_outputs("badge_activity", None)
+
+    with pytest.raises(ValueError, match="undeclared outputs: desk, floor"):
+        activity_projection.check_outputs("badge_activity", {'badge_printed': True, 'floor': 4, 'desk': "4B"})
+
+
+def test_only_declared_outputs_are_merged():
+    data = WorkflowData(data={'employee_id': "e1"})
+
+    get_projection(projected(BadgeRequest, writes=["badge_printed", "desk"])).merge(
+        data, {'badge_printed': True, 'employee_id': "e2"},
+    )
+
+    assert data.data == {'employee_id': "e1", 'badge_printed': True}
+
+
+async def test_registered_activities_receive_their_request_and_have_outputs_checked():
+    received = []
+
+    @projection(BadgeRequest, writes=["badge_printed"])
+    async def badge_activity(ctx, input):
+        received.append(input)
+        return ActivityResponse(success=True, outputs={'badge_printed': True, 'desk': input.department})
+
+    activity = register_projection(badge_activity, "badge_activity")
+
+    with pytest.raises(ValueError, match="undeclared outputs: desk"):
+        await activity(None, {'employee_id': "e1", 'department': "it"})
+    assert received == [BadgeRequest(employee_id="e1", department="it")]
+
+
+def test_activities_without_a_projection_are_unchanged():
+    def plain_activity(ctx, input):
+        return input
+
+    assert register_projection(plain_activity, "plain_activity") is plain_activity
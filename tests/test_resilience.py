@@ -0,0 +1,126 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from workflow.resilience import (
+    ActivityRetryPolicy,
+    BreakerState,
+    CircuitBreaker,
+    CircuitBreakers,
+    CircuitOpenError,
+    next_retry_delay,
+    retry,
+)
+
+POLICY = ActivityRetryPolicy(max_attempts=5, first_interval=2, backoff_coefficient=2, max_interval=10, jitter=0.5)
+
+
+def test_retry_jitter_is_deterministic_per_seed():
+    assert POLICY.delay(1, "wf-1:activity:1") == POLICY.delay(1, "wf-1:activity:1")
+    delays = {POLICY.delay(1, f"wf-{index}:activity:1") for index in range(20)}
+    # Different instances spread out within the jittered half of the interval
+    assert len(delays) == 20
+    assert all(1.0 <= delay <= 2.0 for delay in delays)
+
+
+def test_retry_intervals_grow_up_to_the_maximum():
+    exact = ActivityRetryPolicy(max_attempts=5, first_interval=2, backoff_coefficient=2, max_interval=10, jitter=0)
+
+    assert [exact.delay(attempt, "seed") for attempt in range(1, 5)] == [2, 4, 8, 10]
+
+
+@retry(max_attempts=3, first_interval=1, jitter=0.5, retryable=[ConnectionError], non_retryable=["ValueError"])
+def flaky_activity(ctx, input):
+    pass
+
+
+def test_next_retry_delay_replays_the_same_delay():
+    first = SimpleNamespace(instance_id="wf-1", is_replaying=False)
+    replay = SimpleNamespace(instance_id="wf-1", is_replaying=True)
+
+    delay = next_retry_delay(first, flaky_activity, 1, ConnectionError("reset"))
+
+    assert delay == next_retry_delay(replay, flaky_activity, 1, ConnectionError("reset"))
+    assert 0.5 <= delay <= 1.0
+
+
+def test_next_retry_delay_gives_up():
+    ctx = SimpleNamespace(instance_id="wf-1", is_replaying=True)
+
+    assert next_retry_delay(ctx, flaky_activity, 3, ConnectionError("reset")) is None
+    assert next_retry_delay(ctx, flaky_activity, 1, ValueError("bad input")) is None
+    assert next_retry_delay(ctx, flaky_activity, 1, KeyError("not retryable")) is None
+    # Failures reported by the runtime carry the activity's error class name
+    reported = Exception("reset")
+    reported.details = SimpleNamespace(error_type="ConnectionError")
+    assert next_retry_delay(ctx, flaky_activity, 1, reported) is not None
+
+
+def test_invalid_retry_policies_are_rejected():
+    with pytest.raises(ValueError):
+        retry(max_attempts=0)
+    with pytest.raises(ValueError):
+        retry(jitter=1.5)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("hr-system", failure_threshold=3, reset_timeout=60)
+
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    breaker.record(True, 0.1)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    assert breaker.state == BreakerState.CLOSED
+
+    breaker.record(False, 0.1)
+    assert breaker.state == BreakerState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert breaker.rejected == 1
+
+
+def test_half_open_breaker_lets_trial_calls_through():
+    breaker = CircuitBreaker("hr-system", failure_threshold=1, reset_timeout=0.01, half_open_calls=1)
+    breaker.record(False, 0.1)
+    time.sleep(0.02)
+
+    breaker.acquire()
+    assert breaker.state == BreakerState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    # A failed trial opens the breaker again, a successful one closes it
+    breaker.record(False, 0.1)
+    assert breaker.state == BreakerState.OPEN
+    time.sleep(0.02)
+    breaker.acquire()
+    breaker.record(True, 0.1)
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.to_dict()['openedCount'] == 2
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("hr-system", failure_threshold=1, reset_timeout=60, slow_call_seconds=0.5)
+
+    breaker.record(True, 1.0)
+
+    assert breaker.state == BreakerState.OPEN
+
+
+async def test_guarded_activities_fail_fast_while_open():
+    breakers = CircuitBreakers()
+    calls = []
+
+    @breakers.guard("payroll", failure_threshold=1, reset_timeout=60)
+    async def payroll_activity(ctx, input):
+        calls.append(input)
+        raise ConnectionError("payroll down")
+
+    with pytest.raises(ConnectionError):
+        await payroll_activity(None, 1)
+    with pytest.raises(CircuitOpenError):
+        await payroll_activity(None, 2)
+    assert calls == [1]
+    assert breakers.stats()['payroll']['state'] == BreakerState.OPEN
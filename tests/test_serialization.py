@@ -0,0 +1,45 @@
+import pytest
+
+from workflow.serialization import PAYLOAD_HEADER_VERSION, decode_payload, encode_payload, get_codec
+
+PAYLOAD = {
+    'data': {'employee_id': 'e1', 'items': [{'sku': f'item-{i}', 'quantity': i} for i in range(200)]},
+    'success': True,
+    'ratio': 0.5,
+    'missing': None,
+}
+
+
+@pytest.fixture(autouse=True)
+def default_settings(monkeypatch):
+    for name in ("WORKFLOW_PAYLOAD_CODEC", "WORKFLOW_PAYLOAD_COMPRESSION",
+                 "WORKFLOW_PAYLOAD_COMPRESSION_THRESHOLD", "WORKFLOW_PAYLOAD_COMPRESSION_OVERRIDES"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_json_payloads_stay_plain_objects():
+    assert encode_payload(PAYLOAD) is PAYLOAD
+    assert decode_payload(PAYLOAD) is PAYLOAD
+
+
+def test_msgpack_round_trip(monkeypatch):
+    pytest.importorskip("msgpack")
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_CODEC", "msgpack")
+
+    encoded = encode_payload(PAYLOAD)
+
+    assert encoded.startswith(f"{PAYLOAD_HEADER_VERSION}:msgpack:")
+    assert decode_payload(encoded) == PAYLOAD
+
+
+def test_payloads_decode_regardless_of_the_configured_codec(monkeypatch):
+    pytest.importorskip("msgpack")
+    encoded = encode_payload(PAYLOAD, codec=get_codec("msgpack"))
+    monkeypatch.setenv("WORKFLOW_PAYLOAD_CODEC", "json")
+
+    assert decode_payload(encoded) == PAYLOAD
+
+
+def test_payloads_with_unknown_codecs_are_rejected():
+    with pytest.raises(ValueError, match="unknown codec"):
+        decode_payload(f"{PAYLOAD_HEADER_VERSION}:missing:e30=")
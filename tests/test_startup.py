@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from workflow import startup as startup_module
+from workflow.startup import StartupPhase, StartupState, wait_for_sidecar
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Sidecar probe results, consumed in order; probes fail once they run out."""
+    results = []
+    monkeypatch.setattr(startup_module, "_probe_sidecar", lambda health_url, timeout: results.pop(0) if results else False)
+    return results
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    delays = []
+    sleep = asyncio.sleep
+
+    async def record(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(startup_module.asyncio, "sleep", record)
+    return delays
+
+
+async def test_probes_back_off_exponentially_up_to_the_max_delay(probes, delays):
+    probes.extend([False] * 5 + [True])
+
+    attempts = await wait_for_sidecar(timeout=60, initial_delay=0.5, max_delay=4)
+
+    assert attempts == 6
+    assert delays == [0.5, 1, 2, 4, 4]
+
+
+async def test_a_ready_sidecar_is_probed_once(probes, delays):
+    probes.append(True)
+
+    assert await wait_for_sidecar(timeout=60, initial_delay=0.5, max_delay=4) == 1
+    assert delays == []
+
+
+async def test_waiting_gives_up_at_the_timeout(probes, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(startup_module.time, "monotonic", lambda: now[0])
+
+    async def advance(delay):
+        now[0] += delay
+
+    monkeypatch.setattr(startup_module.asyncio, "sleep", advance)
+
+    with pytest.raises(TimeoutError, match=r"not ready after 3s \(4 probes\)"):
+        await wait_for_sidecar(timeout=3, initial_delay=0.5, max_delay=2)
+    assert now[0] == 103.0
+
+
+def test_phases_are_timed_between_marks(monkeypatch):
+    now = [10.0]
+    monkeypatch.setattr(startup_module.time, "perf_counter", lambda: now[0])
+    state = StartupState(started_at=9.0)
+
+    now[0] = 10.5
+    assert state.mark("sidecar_ready") == 1.5
+    now[0] = 12.0
+    state.mark("runtime_start")
+    assert not state.is_ready
+
+    state.set_ready()
+
+    assert state.is_ready
+    assert state.to_dict() == {
+        'phase': StartupPhase.READY, 'error': None,
+        'timingsSeconds': {'sidecar_ready': 1.5, 'runtime_start': 1.5, 'time_to_ready': 3.0},
+    }
+
+
+def test_failures_are_reported():
+    state = StartupState()
+
+    state.set_failed("sidecar not ready")
+
+    assert not state.is_ready
+    assert (state.to_dict()['phase'], state.to_dict()['error']) == (StartupPhase.FAILED, "sidecar not ready")
+
+
+class FakeRuntime:
+    """Workflow runtime whose start blocks until released or shut down."""
+
+    def __init__(self):
+        self.resolved = False
+        self.connected = threading.Event()
+        self.stopped = False
+
+    def resolve(self):
+        self.resolved = True
+
+    def start(self):
+        self.connected.wait(timeout=5)
+
+    def shutdown(self):
+        self.stopped = True
+        self.connected.set()
+
+
+@pytest.fixture
+def embedded_app(monkeypatch):
+    import app
+
+    async def sidecar_ready():
+        return 1
+
+    monkeypatch.setattr(app, "RUNTIME_MODE", "embedded")
+    monkeypatch.setattr(app, "startup", StartupState())
+    monkeypatch.setattr(app, "wait_for_sidecar", sidecar_ready)
+    monkeypatch.setattr(app, "wf", FakeRuntime())
+    return app
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_healthz_reports_ready_once_the_runtime_is_connected(embedded_app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(embedded_app.app) as client:
+        wait_until(lambda: embedded_app.wf.resolved)
+        response = client.get("/healthz")
+        assert response.status_code == 503
+        assert response.json()['status'] == StartupPhase.STARTING
+
+        embedded_app.wf.connected.set()
+        wait_until(lambda: embedded_app.startup.is_ready)
+        response = client.get("/healthz")
+
+    assert response.status_code == 200
+    assert response.json()['status'] == "healthy"
+    assert set(response.json()['startup']['timingsSeconds']) == {'sidecar_ready', 'registration', 'runtime_start', 'time_to_ready'}
+
+
+def test_shutdown_stops_a_runtime_that_is_still_connecting(embedded_app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(embedded_app.app):
+        wait_until(lambda: embedded_app.wf.resolved)
+
+    assert embedded_app.wf.stopped
+    assert 'runtime_start' not in embedded_app.startup.timings
@@ -0,0 +1,200 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from dapr.ext.workflow import WorkflowStatus
+
+from workflow import status as status_module
+from workflow.client import UnsupportedSdkError, WorkflowClientPool, inner_client
+from workflow.status import WorkflowStatusCache
+
+
+class FakeClient:
+    """Workflow client whose states are set by the test; lookups wait until released."""
+
+    def __init__(self):
+        self.states = {}
+        self.calls = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def get_workflow_state(self, instance_id, fetch_payloads=True):
+        self.calls.append((instance_id, fetch_payloads))
+        await self.release.wait()
+        state = self.states.get(instance_id)
+        if isinstance(state, Exception):
+            raise state
+        return state
+
+
+class FakePool:
+    def __init__(self, client):
+        self.client = client
+        self.pages = {None: (["wf-1", "wf-2"], "page-2"), "page-2": (["wf-3"], None)}
+
+    def get(self):
+        return self.client
+
+    async def list_instance_ids(self, page_size=None, continuation_token=None):
+        return self.pages[continuation_token]
+
+
+def state(status=WorkflowStatus.RUNNING, output=None):
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return SimpleNamespace(
+        name="employee_onboarding_workflow", runtime_status=status, created_at=now, last_updated_at=now,
+        serialized_input='{"data": {}}', serialized_output=output, serialized_custom_status=None, failure_details=None,
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(status_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+@pytest.fixture
+def cache(client):
+    return WorkflowStatusCache(client_pool=FakePool(client), ttl_seconds=2, max_entries=100, concurrency=4)
+
+
+async def test_running_statuses_expire_after_the_ttl(cache, client, clock):
+    client.states['wf-1'] = state()
+    await cache.get("wf-1")
+
+    clock[0] += 1.9
+    assert (await cache.get("wf-1"))['runtimeStatus'] == "RUNNING"
+    assert len(client.calls) == 1
+
+    client.states['wf-1'] = state(WorkflowStatus.COMPLETED)
+    clock[0] += 0.2
+    assert (await cache.get("wf-1"))['runtimeStatus'] == "COMPLETED"
+    assert len(client.calls) == 2
+
+
+@pytest.mark.parametrize("terminal", [WorkflowStatus.COMPLETED, WorkflowStatus.FAILED, WorkflowStatus.TERMINATED])
+async def test_terminal_statuses_never_expire(cache, client, clock, terminal):
+    client.states['wf-1'] = state(terminal)
+    await cache.get("wf-1")
+
+    clock[0] += 86400
+
+    assert (await cache.get("wf-1"))['runtimeStatus'] == terminal.name
+    assert len(client.calls) == 1
+    assert cache.stats()['hits'] == 1
+
+
+async def test_the_least_recently_used_status_is_evicted_when_full(client):
+    cache = WorkflowStatusCache(client_pool=FakePool(client), max_entries=2)
+    for instance_id in ("wf-1", "wf-2", "wf-1", "wf-3"):
+        client.states[instance_id] = state(WorkflowStatus.COMPLETED)
+        await cache.get(instance_id)
+
+    await cache.get("wf-2")
+
+    assert [instance_id for instance_id, _ in client.calls] == ["wf-1", "wf-2", "wf-3", "wf-2"]
+
+
+async def test_concurrent_queries_share_one_lookup(cache, client):
+    client.states['wf-1'] = state()
+    client.release.clear()
+
+    queries = [asyncio.ensure_future(cache.get("wf-1")) for _ in range(5)]
+    await asyncio.sleep(0)
+    client.release.set()
+    statuses = await asyncio.gather(*queries)
+
+    assert client.calls == [("wf-1", False)]
+    assert all(status is statuses[0] for status in statuses)
+    assert cache.stats()['lookups'] == 1
+
+
+async def test_payloads_are_fetched_only_when_requested_and_stripped_otherwise(cache, client):
+    client.states['wf-1'] = state(WorkflowStatus.COMPLETED, output='"done"')
+
+    without = await cache.get("wf-1")
+    assert 'serializedOutput' not in without
+
+    # A cached status without payloads doesn't answer a query for them
+    full = await cache.get("wf-1", include_payloads=True)
+    assert full['serializedOutput'] == '"done"'
+    assert client.calls == [("wf-1", False), ("wf-1", True)]
+
+    # A cached status with payloads answers both
+    stripped = await cache.get("wf-1")
+    assert 'serializedOutput' not in stripped and 'serializedInput' not in stripped
+    assert stripped['runtimeStatus'] == "COMPLETED"
+    assert len(client.calls) == 2
+
+
+async def test_missing_instances_and_errors(cache, client):
+    client.states['wf-2'] = ConnectionError("sidecar unavailable")
+
+    missing, failed = await cache.get_many(["wf-1", "wf-2"])
+
+    assert missing == {'instanceId': "wf-1", 'found': False}
+    assert failed == {'instanceId': "wf-2", 'error': "sidecar unavailable"}
+    # Errors aren't cached
+    await cache.get("wf-2")
+    assert [instance_id for instance_id, _ in client.calls].count("wf-2") == 2
+
+
+async def test_batches_keep_their_order_and_look_up_duplicates_once(cache, client):
+    for instance_id in ("wf-1", "wf-2"):
+        client.states[instance_id] = state()
+
+    statuses = await cache.get_many(["wf-2", "wf-1", "wf-2"])
+
+    assert [status['instanceId'] for status in statuses] == ["wf-2", "wf-1", "wf-2"]
+    assert len(client.calls) == 2
+    cache.max_ids = 2
+    with pytest.raises(ValueError, match="At most 2"):
+        await cache.get_many(["wf-1", "wf-2", "wf-3"])
+
+
+async def test_pages_list_instances_with_their_status(cache, client):
+    client.states['wf-1'] = state()
+
+    page = await cache.list_page(page_size=2)
+    assert page['continuationToken'] == "page-2"
+    assert [status.get('found') for status in page['workflows']] == [True, False]
+
+    page = await cache.list_page(page_size=2, continuation_token="page-2", include_status=False)
+    assert page == {'continuationToken': None, 'instanceIds': ["wf-3"]}
+
+
+def test_clients_without_the_durabletask_internals_are_unsupported():
+    with pytest.raises(UnsupportedSdkError, match="doesn't expose its durabletask client"):
+        inner_client(SimpleNamespace(), "_get_stub")
+
+    renamed = SimpleNamespace(_DaprWorkflowClient__obj=SimpleNamespace(get_stub=lambda: None))
+    with pytest.raises(UnsupportedSdkError, match="with _get_stub"):
+        inner_client(renamed, "_get_stub")
+
+
+async def test_listing_fails_clearly_on_an_unsupported_sdk():
+    pool = WorkflowClientPool(size=1)
+    pool._clients = [SimpleNamespace()]
+    pool._cycle = iter(pool._clients)
+
+    with pytest.raises(UnsupportedSdkError, match="dapr-ext-workflow"):
+        await pool.list_instance_ids(page_size=10)
+
+
+async def test_the_installed_sdk_provides_the_internals_used():
+    from dapr.ext.workflow.aio import DaprWorkflowClient
+
+    # Creating the client doesn't connect, so this runs without a sidecar
+    client = DaprWorkflowClient()
+    stub = inner_client(client, "_get_stub", "aclose")._get_stub()
+
+    assert hasattr(stub, "ListInstanceIDs")
+    await inner_client(client, "aclose").aclose()
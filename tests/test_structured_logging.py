@@ -0,0 +1,112 @@
+import io
+import json
+import logging
+import threading
+
+import pytest
+
+from workflow import structured_logging as structured_logging_module
+from workflow.structured_logging import BatchingQueueHandler, ContextLogger, JsonFormatter, SamplingFilter
+
+
+def record(level=logging.INFO, msg="provisioned %d items", args=(3,)):
+    return logging.LogRecord("workflow.activities", level, __file__, 1, msg, args, None)
+
+
+def test_sample_rates_are_parsed_per_level():
+    assert SamplingFilter.parse("DEBUG=0.01, info=0.5,") == {logging.DEBUG: 0.01, logging.INFO: 0.5}
+    assert SamplingFilter.parse("") == {}
+    with pytest.raises(ValueError):
+        SamplingFilter.parse("DEBUG=often")
+
+
+def test_records_are_sampled_only_for_listed_levels(monkeypatch):
+    monkeypatch.setattr(structured_logging_module.random, "random", lambda: 0.3)
+    sampling = SamplingFilter({logging.DEBUG: 0.25, logging.INFO: 0.5, logging.WARNING: 1.0})
+
+    assert not sampling.filter(record(logging.DEBUG))
+    assert sampling.filter(record(logging.INFO))
+    assert sampling.filter(record(logging.WARNING))
+    assert sampling.filter(record(logging.ERROR))
+
+
+class BlockingStream(io.StringIO):
+    """Stream whose writes wait until released, holding up the writer thread."""
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.writing.set()
+        self.release.wait(timeout=5)
+        return super().write(text)
+
+
+def test_records_are_dropped_instead_of_blocking_when_the_queue_is_full():
+    stream = BlockingStream()
+    handler = BatchingQueueHandler(stream=stream, queue_size=1, batch_size=1, flush_interval=0)
+
+    handler.emit(record(args=(1,)))
+    assert stream.writing.wait(timeout=5)
+    for count in (2, 3, 4):
+        handler.emit(record(args=(count,)))
+
+    assert handler.stats() == {'written': 0, 'queued': 1, 'dropped': 2}
+
+    stream.release.set()
+    handler.close()
+
+    assert stream.getvalue().splitlines() == ["provisioned 1 items", "provisioned 2 items"]
+    assert handler.stats() == {'written': 2, 'queued': 0, 'dropped': 2}
+
+
+def test_closing_writes_the_queued_records_in_batches():
+    stream = io.StringIO()
+    handler = BatchingQueueHandler(stream=stream, batch_size=2, flush_interval=5)
+    handler.setFormatter(JsonFormatter())
+
+    for count in range(5):
+        handler.emit(record(args=(count,)))
+    handler.close()
+
+    assert [json.loads(line)['message'] for line in stream.getvalue().splitlines()] == [
+        f"provisioned {count} items" for count in range(5)
+    ]
+
+
+@pytest.fixture
+def records():
+    records = []
+    logger = logging.getLogger("tests.structured_logging")
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield logger, records
+    logger.removeHandler(handler)
+
+
+def test_context_fields_are_merged_with_the_call_fields(records):
+    logger, records = records
+    log = ContextLogger(logger, instanceId="wf-1", activityId="provision_activity")
+
+    log.info("provisioned %d items", 3)
+    log.info("retrying", extra={'activityId': "notify_activity", 'attempt': 2})
+
+    assert [structured_logging_module._structured_fields(r) for r in records] == [
+        {'instanceId': "wf-1", 'activityId': "provision_activity"},
+        {'instanceId': "wf-1", 'activityId': "notify_activity", 'attempt': 2},
+    ]
+    # The call's fields don't leak into the adapter
+    assert log.extra == {'instanceId': "wf-1", 'activityId': "provision_activity"}
+
+
+def test_structured_fields_are_rendered_after_the_message(records):
+    logger, records = records
+    ContextLogger(logger, instanceId="wf-1").info("provisioned %d items", 3)
+
+    assert structured_logging_module.StructuredTextFormatter().format(records[0]) == (
+        "INFO:tests.structured_logging:provisioned 3 items instanceId=wf-1"
+    )
@@ -0,0 +1,275 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from workflow import supervisor as supervisor_module
+from workflow.supervisor import Supervisor, SupervisorClient, WorkerPhase, WorkerStatus, aggregate_stats
+
+
+def worker(index, **stats) -> WorkerStatus:
+    status = WorkerStatus(index=index, name=f"workflow-worker-{index}", phase=WorkerPhase.READY)
+    status.heartbeat_at = status.started_at
+    status.stats = stats
+    return status
+
+
+def activity(completed, failed=0, in_flight=0, queued=0, max_queued=0, wait=0.0, run=0.0):
+    return {
+        'mode': "async", 'maxConcurrency': 10, 'inFlight': in_flight, 'queued': queued, 'maxQueued': max_queued,
+        'completed': completed, 'failed': failed, 'avgWaitSeconds': wait, 'avgRunSeconds': run,
+    }
+
+
+def breaker(state, opened=0, rejected=0, failures=0):
+    return {
+        'state': state, 'consecutiveFailures': failures, 'failureThreshold': 5, 'resetTimeout': 30,
+        'openedCount': opened, 'rejected': rejected,
+    }
+
+
+def test_worker_stats_are_summed_and_averages_weighted():
+    workers = [
+        worker(0, cpuSeconds=1.5, activities={'provision': activity(3, failed=1, in_flight=2, max_queued=4, run=1.0)},
+               activityCache={'hits': 3, 'misses': 1, 'localEntries': 4}),
+        worker(1, cpuSeconds=0.5, activities={'provision': activity(12, queued=5, max_queued=2, run=2.0)},
+               activityCache={'hits': 1, 'misses': 3, 'localEntries': 1}),
+    ]
+    workers[1].restarts = 2
+
+    aggregate = aggregate_stats(workers, heartbeat_timeout=30)
+
+    assert aggregate['workers'] == 2
+    assert aggregate['restarts'] == 2
+    assert aggregate['cpuSeconds'] == pytest.approx(2.0)
+    provision = aggregate['activities']['provision']
+    assert (provision['completed'], provision['failed'], provision['inFlight'], provision['queued']) == (15, 1, 2, 5)
+    assert provision['maxQueued'] == 4
+    # 4 activities at 1s and 12 at 2s
+    assert provision['avgRunSeconds'] == pytest.approx(28 / 16)
+    assert aggregate['activityCache'] == {'hits': 4, 'misses': 4, 'hitRatio': 0.5, 'localEntries': 5}
+
+
+def test_batches_breakers_and_compression_are_aggregated():
+    batches = {'maxBatchSize': 50, 'calls': 10, 'batches': 2, 'failedBatches': 0, 'avgHandlerSeconds': 0.5,
+               'flushedOnSize': 1, 'flushedOnWindow': 1, 'flushedOnIdle': 0}
+    workers = [
+        worker(0, activityBatches={'provision': batches}, circuitBreakers={'payroll': breaker("closed", opened=1)},
+               compression={'onboarding': {'candidates': 4, 'compressed': 2, 'rawBytes': 1000, 'storedBytes': 200}}),
+        worker(1, activityBatches={'provision': dict(batches, calls=30, batches=2, avgHandlerSeconds=1.5)},
+               circuitBreakers={'payroll': breaker("open", opened=1, rejected=7, failures=5)},
+               compression={'onboarding': {'candidates': 1, 'compressed': 1, 'rawBytes': 1000, 'storedBytes': 600}}),
+    ]
+
+    aggregate = aggregate_stats(workers, heartbeat_timeout=30)
+
+    provision = aggregate['activityBatches']['provision']
+    assert (provision['calls'], provision['batches'], provision['avgBatchSize']) == (40, 4, 10.0)
+    assert provision['avgHandlerSeconds'] == pytest.approx(1.0)
+    payroll = aggregate['circuitBreakers']['payroll']
+    assert payroll['state'] == "open"
+    assert (payroll['openedCount'], payroll['rejected'], payroll['consecutiveFailures']) == (2, 7, 5)
+    assert payroll['workerStates'] == {'workflow-worker-0': "closed", 'workflow-worker-1': "open"}
+    assert aggregate['compression']['onboarding'] == {
+        'candidates': 5, 'compressed': 3, 'rawBytes': 2000, 'storedBytes': 800, 'ratio': 0.4,
+    }
+
+
+def test_workers_without_stats_aggregate_to_empty_sections():
+    aggregate = aggregate_stats([WorkerStatus(index=0, name="workflow-worker-0")], heartbeat_timeout=30)
+
+    assert aggregate['healthyWorkers'] == 0
+    assert aggregate['activities'] == {}
+    assert aggregate['activityCache']['hitRatio'] == 0.0
+
+
+class FakeProcess:
+    def __init__(self, pid):
+        self.pid = pid
+        self.alive = True
+        self.exitcode = None
+        self.killed = False
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+    def kill(self):
+        self.killed = True
+        self.alive = False
+        self.exitcode = -9
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(supervisor_module.time, "time", lambda: now[0])
+    monkeypatch.setenv("WORKFLOW_WORKER_MAX_RESTART_DELAY", "4")
+    monkeypatch.setenv("WORKFLOW_WORKER_HEARTBEAT_TIMEOUT", "30")
+    supervisor = Supervisor(workers=1, port=0)
+    supervisor.now = now
+    supervisor.started = []
+
+    def start_worker(index):
+        process = FakeProcess(pid=100 + len(supervisor.started))
+        supervisor.started.append(process)
+        supervisor._processes[index] = process
+        status = supervisor.workers[index]
+        status.pid, status.phase, status.heartbeat_at = process.pid, WorkerPhase.STARTING, None
+
+    monkeypatch.setattr(supervisor, "_start_worker", start_worker)
+    return supervisor
+
+
+def test_exited_workers_restart_with_exponential_backoff(supervisor):
+    supervisor._check_workers()
+    assert len(supervisor.started) == 1
+
+    delays = []
+    for _ in range(5):
+        supervisor.started[-1].alive = False
+        supervisor.started[-1].exitcode = 1
+        supervisor._check_workers()
+        status = supervisor.workers[0]
+        assert status.phase == WorkerPhase.STOPPED
+        delays.append(supervisor._restart_at[0] - supervisor.now[0])
+
+        # Not restarted before the delay has passed
+        started = len(supervisor.started)
+        supervisor.now[0] += delays[-1] - 0.1
+        supervisor._check_workers()
+        assert len(supervisor.started) == started
+        supervisor.now[0] += 0.1
+        supervisor._check_workers()
+        assert len(supervisor.started) == started + 1
+
+    # Capped by WORKFLOW_WORKER_MAX_RESTART_DELAY
+    assert delays == [0.5, 1.0, 2.0, 4.0, 4.0]
+    assert supervisor.workers[0].restarts == 5
+    assert supervisor.workers[0].exit_code == 1
+
+
+def test_a_ready_heartbeat_resets_the_backoff(supervisor):
+    supervisor._check_workers()
+    supervisor.workers[0].failures = 5
+
+    supervisor._status_queue.put({'index': 0, 'pid': 100, 'phase': WorkerPhase.READY, 'error': None, 'stats': {'cpuSeconds': 1.0}, 'at': supervisor.now[0]})
+    supervisor._drain_status_queue(timeout=5)
+
+    status = supervisor.workers[0]
+    assert status.failures == 0
+    assert status.stats == {'cpuSeconds': 1.0}
+    assert status.is_healthy(supervisor.heartbeat_timeout)
+
+
+def test_workers_that_miss_heartbeats_are_killed(supervisor):
+    supervisor._check_workers()
+    status = supervisor.workers[0]
+    status.phase, status.heartbeat_at = WorkerPhase.READY, supervisor.now[0]
+
+    supervisor.now[0] += 20
+    supervisor._check_workers()
+    assert not supervisor.started[0].killed
+
+    supervisor.now[0] += 20
+    supervisor._check_workers()
+    assert supervisor.started[0].killed
+
+    # The next check sees the exit and schedules the restart
+    supervisor._check_workers()
+    assert status.restarts == 1
+    assert status.exit_code == -9
+
+
+def test_the_metrics_directory_is_cleared_on_start(tmp_path, monkeypatch):
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    (tmp_path / "notes.txt").write_text("kept")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    supervisor = Supervisor(workers=1, port=0)
+
+    supervisor._prepare_metrics_dir()
+
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt"]
+    assert supervisor.metrics_dir == str(tmp_path)
+
+
+def test_metrics_of_all_processes_are_rendered_together(tmp_path):
+    # prometheus_client picks multiprocess mode at import, so each process runs in a subprocess
+    record = textwrap.dedent("""
+        from workflow.metrics import ACTIVITY_TIMEOUTS
+        ACTIVITY_TIMEOUTS.labels("provision").inc(2)
+    """)
+    render = "import sys; from workflow.metrics import render; sys.stdout.write(render().decode())"
+    src = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), PYTHONPATH=src)
+
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", record], env=env, check=True)
+    output = subprocess.run([sys.executable, "-c", render], env=env, check=True, capture_output=True, text=True).stdout
+
+    assert 'workflow_activity_timeouts_total{activity="provision"} 4.0' in output
+
+
+def test_activity_load_reads_the_last_fetched_aggregate():
+    client = SupervisorClient(url="http://localhost:1")
+    assert client.activity_load() == (0, 0, 0.0)
+
+    client.status = {'aggregate': {'activities': {
+        'provision': dict(activity(8, failed=2, in_flight=3, queued=4, wait=0.5, run=1.5), activityName="provision"),
+    }}}
+
+    assert client.activity_load() == (7, 10, pytest.approx(20.0))
+    with pytest.raises(OSError):
+        client.fetch()
+
+
+@pytest.fixture
+def supervised_app(monkeypatch):
+    import app
+
+    status = {'aggregate': aggregate_stats([
+        worker(0, activities={'provision': activity(2)}, circuitBreakers={'payroll': breaker("open")}),
+    ], heartbeat_timeout=30)}
+    monkeypatch.setattr(app, "RUNTIME_MODE", "supervised")
+    monkeypatch.setattr(app.supervisor_client, "fetch", lambda: status)
+    return app
+
+
+@pytest.mark.parametrize("path, section", [
+    ("/activities/stats", "activities"),
+    ("/activities/cache/stats", "activityCache"),
+    ("/activities/batch/stats", "activityBatches"),
+    ("/circuit-breakers", "circuitBreakers"),
+    ("/payloads/compression/stats", "compression"),
+])
+def test_supervised_stats_endpoints_report_the_workers(supervised_app, path, section):
+    from fastapi.testclient import TestClient
+
+    response = TestClient(supervised_app.app).get(path)
+
+    assert response.status_code == 200
+    assert response.json() == supervised_app.supervisor_client.fetch()['aggregate'][section]
+
+
+def test_supervised_profiles_are_not_served_by_the_api(supervised_app):
+    from fastapi.testclient import TestClient
+
+    response = TestClient(supervised_app.app).get("/debug/profile")
+
+    assert response.status_code == 404
+    assert "worker processes" in response.json()['detail']
+
+
+def test_supervised_stats_fail_when_the_supervisor_is_down(supervised_app, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    def unreachable():
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(supervised_app.supervisor_client, "fetch", unreachable)
+
+    assert TestClient(supervised_app.app).get("/activities/stats").status_code == 503